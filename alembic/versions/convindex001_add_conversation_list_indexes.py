@@ -0,0 +1,34 @@
+"""add composite indexes for conversation list pages
+
+Revision ID: convindex001
+Revises: convmessage001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'convindex001'
+down_revision = 'convmessage001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_Conversation_user_agent_updated', 'Conversation',
+        ['user_id', 'agent_id', 'updated_at', 'conversation_id'],
+    )
+    op.create_index(
+        'ix_Conversation_api_key_agent_updated', 'Conversation',
+        ['api_key_hash', 'agent_id', 'updated_at', 'conversation_id'],
+    )
+    op.create_index(
+        'ix_Conversation_user_source_updated', 'Conversation',
+        ['user_id', 'source', 'updated_at', 'conversation_id'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_Conversation_user_source_updated', table_name='Conversation')
+    op.drop_index('ix_Conversation_api_key_agent_updated', table_name='Conversation')
+    op.drop_index('ix_Conversation_user_agent_updated', table_name='Conversation')
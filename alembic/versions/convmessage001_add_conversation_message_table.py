@@ -0,0 +1,41 @@
+"""add conversation_message history projection table
+
+Revision ID: convmessage001
+Revises: openaiprefix001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'convmessage001'
+down_revision = 'openaiprefix001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'conversation_message',
+        sa.Column('message_id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('conversation_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=16), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['conversation_id'], ['Conversation.conversation_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('message_id'),
+    )
+    op.create_index(
+        'ix_conversation_message_conversation', 'conversation_message', ['conversation_id', 'message_id']
+    )
+    # Existing conversations are backfilled from their checkpoint on first read
+    op.add_column(
+        'Conversation',
+        sa.Column('history_projected', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade():
+    op.drop_column('Conversation', 'history_projected')
+    op.drop_index('ix_conversation_message_conversation', table_name='conversation_message')
+    op.drop_table('conversation_message')
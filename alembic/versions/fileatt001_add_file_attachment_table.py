@@ -0,0 +1,43 @@
+"""add file_attachment catalog for attached files
+
+Revision ID: fileatt001
+Revises: ocrjob001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'fileatt001'
+down_revision = 'ocrjob001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'file_attachment',
+        sa.Column('file_id', sa.String(length=36), nullable=False),
+        sa.Column('session_key', sa.String(length=255), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('conversation_id', sa.String(length=64), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('mime_type', sa.String(length=100), nullable=True),
+        sa.Column('file_path', sa.String(length=1024), nullable=True),
+        sa.Column('file_size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('processing_status', sa.String(length=20), nullable=True),
+        sa.Column('has_extractable_content', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('content_preview', sa.Text(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('file_id'),
+    )
+    op.create_index('ix_file_attachment_agent_id', 'file_attachment', ['agent_id'])
+    op.create_index('ix_file_attachment_session_uploaded', 'file_attachment', ['session_key', 'uploaded_at'])
+
+
+def downgrade():
+    op.drop_index('ix_file_attachment_session_uploaded', table_name='file_attachment')
+    op.drop_index('ix_file_attachment_agent_id', table_name='file_attachment')
+    op.drop_table('file_attachment')
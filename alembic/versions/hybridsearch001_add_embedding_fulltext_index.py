@@ -0,0 +1,37 @@
+"""add full-text column and GIN index to langchain_pg_embedding
+
+Revision ID: hybridsearch001
+Revises: multisilo001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'hybridsearch001'
+down_revision = 'multisilo001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # langchain_pg_embedding is created by LangChain on first use, so it may
+    # not exist yet; PGVectorStore adds the column itself in that case.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('langchain_pg_embedding') IS NOT NULL THEN
+                ALTER TABLE langchain_pg_embedding ADD COLUMN IF NOT EXISTS document_tsv tsvector
+                    GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(document, ''))) STORED;
+                CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_document_tsv
+                    ON langchain_pg_embedding USING gin (document_tsv);
+            END IF;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_langchain_pg_embedding_document_tsv")
+    op.execute("ALTER TABLE IF EXISTS langchain_pg_embedding DROP COLUMN IF EXISTS document_tsv")
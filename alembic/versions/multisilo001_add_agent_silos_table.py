@@ -0,0 +1,32 @@
+"""add agent_silos table for multi-silo retrieval
+
+Revision ID: multisilo001
+Revises: sessreg001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'multisilo001'
+down_revision = 'sessreg001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'agent_silos',
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('silo_id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['Agent.agent_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['silo_id'], ['Silo.silo_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('agent_id', 'silo_id'),
+    )
+    op.create_index('ix_agent_silos_silo_id', 'agent_silos', ['silo_id'])
+
+
+def downgrade():
+    op.drop_index('ix_agent_silos_silo_id', table_name='agent_silos')
+    op.drop_table('agent_silos')
@@ -0,0 +1,64 @@
+"""add ocr_job table for asynchronous OCR jobs and result caching
+
+Revision ID: ocrjob001
+Revises: crawlpol001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'ocrjob001'
+down_revision = 'crawlpol001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    ocr_job_status = postgresql.ENUM(
+        'QUEUED', 'RUNNING', 'COMPLETED', 'FAILED',
+        name='ocr_job_status',
+        create_type=True,
+    )
+    ocr_job_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'ocr_job',
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('app_id', sa.Integer(), nullable=True),
+        sa.Column(
+            'status',
+            postgresql.ENUM('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='ocr_job_status', create_type=False),
+            nullable=False,
+            server_default='QUEUED',
+        ),
+        sa.Column('agent_fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('pdf_sha256', sa.String(length=64), nullable=False),
+        sa.Column('pdf_filename', sa.String(length=255), nullable=True),
+        sa.Column('pdf_path', sa.String(length=1024), nullable=True),
+        sa.Column('total_pages', sa.Integer(), nullable=True),
+        sa.Column('processed_pages', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('worker_id', sa.String(length=64), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['Agent.agent_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['app_id'], ['App.app_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+    op.create_index('ix_ocr_job_agent_id', 'ocr_job', ['agent_id'])
+    op.create_index('ix_ocr_job_created_at', 'ocr_job', ['created_at'])
+    op.create_index('ix_ocr_job_cache_key', 'ocr_job', ['agent_id', 'agent_fingerprint', 'pdf_sha256'])
+
+
+def downgrade():
+    op.drop_index('ix_ocr_job_cache_key', table_name='ocr_job')
+    op.drop_index('ix_ocr_job_created_at', table_name='ocr_job')
+    op.drop_index('ix_ocr_job_agent_id', table_name='ocr_job')
+    op.drop_table('ocr_job')
+    postgresql.ENUM(name='ocr_job_status').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,24 @@
+"""add Conversation.prefix_hash for OpenAI-compatible conversation resume
+
+Revision ID: openaiprefix001
+Revises: tokenusage001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'openaiprefix001'
+down_revision = 'tokenusage001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Conversation', sa.Column('prefix_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_Conversation_prefix_hash', 'Conversation', ['prefix_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_Conversation_prefix_hash', table_name='Conversation')
+    op.drop_column('Conversation', 'prefix_hash')
@@ -0,0 +1,29 @@
+"""add unlogged rate_limit_window table for the shared rate limiter
+
+Revision ID: ratelimit001
+Revises: fileatt001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'ratelimit001'
+down_revision = 'fileatt001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rate_limit_window',
+        sa.Column('app_id', sa.Integer(), nullable=False),
+        sa.Column('window_start', sa.BigInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('app_id', 'window_start'),
+        prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_window')
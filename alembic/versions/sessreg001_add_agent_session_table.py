@@ -0,0 +1,31 @@
+"""add agent_session table for the shared session registry
+
+Revision ID: sessreg001
+Revises: ratelimit001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'sessreg001'
+down_revision = 'ratelimit001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'agent_session',
+        sa.Column('session_id', sa.String(length=255), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_accessed', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('session_id'),
+    )
+    op.create_index('ix_agent_session_last_accessed', 'agent_session', ['last_accessed'])
+
+
+def downgrade():
+    op.drop_index('ix_agent_session_last_accessed', table_name='agent_session')
+    op.drop_table('agent_session')
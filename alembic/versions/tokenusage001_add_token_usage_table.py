@@ -0,0 +1,40 @@
+"""add token_usage table for per app/agent/day token accounting
+
+No foreign keys to App and Agent: usage is buffered by the write-behind
+flusher, and a delta for an app or agent deleted in the meantime must not
+fail the upsert.
+
+Revision ID: tokenusage001
+Revises: hybridsearch001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'tokenusage001'
+down_revision = 'hybridsearch001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'token_usage',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('app_id', sa.Integer(), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('usage_date', sa.Date(), nullable=False),
+        sa.Column('input_tokens', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('output_tokens', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('llm_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('app_id', 'agent_id', 'usage_date', name='uq_token_usage_app_agent_day'),
+    )
+    op.create_index('ix_token_usage_agent_day', 'token_usage', ['agent_id', 'usage_date'])
+
+
+def downgrade():
+    op.drop_index('ix_token_usage_agent_day', table_name='token_usage')
+    op.drop_table('token_usage')
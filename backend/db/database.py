@@ -1,9 +1,12 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from typing import Generator
 import os
+import time
 from dotenv import load_dotenv
+from utils.metrics import DB_POOL_CHECKOUT_SECONDS
 
 load_dotenv()
 
@@ -11,9 +14,31 @@ DATABASE_URL = os.getenv('SQLALCHEMY_DATABASE_URI')
 if not DATABASE_URL:
     raise EnvironmentError("SQLALCHEMY_DATABASE_URI environment variable is required")
 
+
+class _CheckoutTimingMixin:
+    """Records how long each pool checkout waits for a connection."""
+    metrics_label = ''
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(pool=self.metrics_label).observe(time.perf_counter() - started)
+
+
+class _TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics_label = 'sync'
+
+
+class _TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics_label = 'async'
+
+
 # Configure synchronous engine with connection pooling for better concurrency
 engine = create_engine(
     DATABASE_URL, 
+    poolclass=_TimedQueuePool,
     pool_size=20,              # Number of connections to maintain in the pool
     max_overflow=10,           # Additional connections allowed when pool is full
     pool_pre_ping=True,        # Verify connections before using them
@@ -28,6 +53,7 @@ engine = create_engine(
 ASYNC_DATABASE_URL = DATABASE_URL.replace('postgresql://', 'postgresql+psycopg://') if DATABASE_URL.startswith('postgresql://') else DATABASE_URL
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
+    poolclass=_TimedAsyncAdaptedQueuePool,
     pool_size=20,
     max_overflow=10,
     pool_pre_ping=True,
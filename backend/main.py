@@ -107,6 +107,26 @@ async def lifespan(app: FastAPI):
         crawl_tasks = await start_crawl_workers(app)
         app.state.crawl_tasks = crawl_tasks
 
+        # Start asynchronous OCR job workers
+        from services.ocr_job_service import start_ocr_job_workers
+        app.state.ocr_job_tasks = await start_ocr_job_workers()
+
+        # Start periodic flush of buffered usage counters
+        from services.write_behind_service import start_write_behind_flusher
+        app.state.write_behind_task = await start_write_behind_flusher()
+
+        # Start sweeper for expired memory-agent sessions
+        from services.session_management_service import start_session_sweeper
+        app.state.session_sweeper_task = await start_session_sweeper()
+
+        # Start retention of LangGraph checkpoints (pruning and compaction)
+        from services.checkpoint_retention_service import start_checkpoint_retention
+        app.state.checkpoint_retention_task = await start_checkpoint_retention()
+
+        # Start the warm interpreters used by the python_repl tool
+        from tools.python_sandbox_tools import start_python_repl_pool
+        start_python_repl_pool()
+
         print("✅ Application startup complete")
     except Exception as e:
         logger.error(f"❌ Error during startup: {e}", exc_info=True)
@@ -123,6 +143,34 @@ async def lifespan(app: FastAPI):
             from services.crawl.worker import stop_crawl_workers
             await stop_crawl_workers(crawl_tasks)
 
+        # Stop OCR job workers
+        ocr_job_tasks = getattr(app.state, 'ocr_job_tasks', None)
+        if ocr_job_tasks:
+            from services.ocr_job_service import stop_ocr_job_workers
+            await stop_ocr_job_workers(ocr_job_tasks)
+
+        # Stop checkpoint retention before its connection pool closes
+        checkpoint_retention_task = getattr(app.state, 'checkpoint_retention_task', None)
+        if checkpoint_retention_task:
+            from services.checkpoint_retention_service import stop_checkpoint_retention
+            await stop_checkpoint_retention(checkpoint_retention_task)
+
+        # Stop the session sweeper
+        session_sweeper_task = getattr(app.state, 'session_sweeper_task', None)
+        if session_sweeper_task:
+            from services.session_management_service import stop_session_sweeper
+            await stop_session_sweeper(session_sweeper_task)
+
+        # Stop the write-behind flusher, writing out pending counters
+        write_behind_task = getattr(app.state, 'write_behind_task', None)
+        if write_behind_task:
+            from services.write_behind_service import stop_write_behind_flusher
+            await stop_write_behind_flusher(write_behind_task)
+
+        # Stop the python_repl interpreters
+        from tools.python_sandbox_tools import stop_python_repl_pool
+        stop_python_repl_pool()
+
         # Close checkpointer connection pool
         from services.agent_cache_service import CheckpointerCacheService
         await CheckpointerCacheService.close_pool()
@@ -317,6 +365,23 @@ async def scalar_html():
         title=f"{CLIENT_CONFIG.client_name} API Reference"
     )
 
+# ==================== METRICS ====================
+from fastapi import Response
+from db.database import engine, async_engine
+from services.agent_cache_service import CheckpointerCacheService
+from utils.metrics import PoolStatsCollector, register_live_collector, render_metrics
+
+register_live_collector(PoolStatsCollector(
+    {'sync': engine, 'async': async_engine.sync_engine},
+    lambda: CheckpointerCacheService._pool,
+))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/")
 async def root():
     return {
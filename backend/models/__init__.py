@@ -17,6 +17,7 @@ from .agent_marketplace_rating import AgentMarketplaceRating
 from .skill import Skill
 from .ocr_agent import OCRAgent
 from .conversation import Conversation
+from .conversation_message import ConversationMessage
 from .repository import Repository
 from .resource import Resource
 from .folder import Folder
@@ -25,6 +26,8 @@ from .domain import Domain
 from .domain_url import DomainUrl
 from .crawl_policy import CrawlPolicy
 from .crawl_job import CrawlJob
+from .ocr_job import OCRJob
+from .file_attachment import FileAttachment
 from .media import Media
 from .mcp_server import MCPServer, MCPServerAgent
 from .system_setting import SystemSetting
@@ -32,14 +35,20 @@ from .marketplace_usage import MarketplaceUsage
 from .subscription import Subscription, SubscriptionTier, BillingStatus
 from .tier_config import TierConfig
 from .usage_record import UsageRecord
+from .token_usage import TokenUsage
+from .rate_limit_window import RateLimitWindow
+from .agent_session import AgentSession
 from .user_credential import UserCredential
 
 __all__ = [
     'User', 'App', 'AppCollaborator', 'APIKey',
     'AIService', 'EmbeddingService', 'OutputParser', 'MCPConfig', 'Silo', 'Skill',
     'Agent', 'AgentMarketplaceProfile', 'AgentMarketplaceRating', 'OCRAgent', 'Conversation',
+    'ConversationMessage',
     'Repository', 'Resource', 'Folder', 'Domain',
     'DomainUrl', 'CrawlPolicy', 'CrawlJob',
+    'OCRJob',
+    'FileAttachment',
     'AIService', 'EmbeddingService', 'OutputParser', 'MCPConfig', 'Silo',
     'Agent', 'Skill', 'OCRAgent', 'Conversation', 'Repository', 'Resource', 'Folder', 'Domain',
     'Media',
@@ -49,5 +58,8 @@ __all__ = [
     'Subscription', 'SubscriptionTier', 'BillingStatus',
     'TierConfig',
     'UsageRecord',
+    'TokenUsage',
+    'RateLimitWindow',
+    'AgentSession',
     'UserCredential',
 ]
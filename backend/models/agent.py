@@ -28,6 +28,17 @@ class AgentSkill(Base):
     skill = relationship('Skill', foreign_keys=[skill_id])
 
 
+class AgentSilo(Base):
+    """Additional silos an agent searches alongside its primary ``silo_id``"""
+    __tablename__ = 'agent_silos'
+    agent_id = Column(Integer, ForeignKey(AGENT_ID, ondelete='CASCADE'), primary_key=True)
+    silo_id = Column(Integer, ForeignKey('Silo.silo_id', ondelete='CASCADE'), primary_key=True)
+    description = Column(Text, nullable=True)  # Description of what this silo is used for
+
+    agent = relationship('Agent', foreign_keys=[agent_id], back_populates='silo_associations')
+    silo = relationship('Silo', foreign_keys=[silo_id])
+
+
 class AgentMCP(Base):
     __tablename__ = 'agent_mcps'
     agent_id = Column(Integer, ForeignKey(AGENT_ID), primary_key=True)
@@ -114,6 +125,12 @@ class Agent(Base):
                                   primaryjoin=(agent_id == AgentMCP.agent_id),
                                   back_populates='agent')
 
+    # Additional silos searched together with the primary silo
+    silo_associations = relationship('AgentSilo',
+                                     primaryjoin=(agent_id == AgentSilo.agent_id),
+                                     back_populates='agent',
+                                     passive_deletes=True)
+
     # Add Skill relationship
     skill_associations = relationship('AgentSkill',
                                      primaryjoin=(agent_id == AgentSkill.agent_id),
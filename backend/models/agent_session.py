@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from db.database import Base
+from datetime import datetime
+
+
+class AgentSession(Base):
+    """
+    Memory-agent session shared by all workers.
+
+    Only timeout metadata lives here; the conversation itself is stored by
+    the LangGraph checkpointer under a thread id derived from ``session_id``.
+    """
+    __tablename__ = 'agent_session'
+    __table_args__ = (
+        Index('ix_agent_session_last_accessed', 'last_accessed'),
+    )
+
+    session_id = Column(String(255), primary_key=True)
+    agent_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Index, Text, Enum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db.database import Base
@@ -43,6 +43,15 @@ class Conversation(Base):
     # User context (for API key users who don't have user_id)
     api_key_hash = Column(String(64), nullable=True)  # MD5 hash of API key for tracking
 
+    # OpenAI-compatible endpoint: digest of the message list this conversation's
+    # checkpoint currently ends with, so a client resending it can resume here
+    prefix_hash = Column(String(64), nullable=True, index=True)
+
+    # Whether ConversationMessage holds this conversation's display history.
+    # False for conversations started before the projection existed; their
+    # history is copied from the checkpoint once, on first read.
+    history_projected = Column(Boolean, default=True, nullable=False)
+
     # Source of conversation: playground, marketplace, or api
     source = Column(
         Enum(ConversationSource),
@@ -53,6 +62,14 @@ class Conversation(Base):
     # Relationships
     agent = relationship("Agent", backref="conversations")
     user = relationship("User", backref="conversations", foreign_keys=[user_id])
+
+    # Conversation lists filter by owner and agent (or source) and page by
+    # (updated_at, conversation_id) descending; backward index scans serve them
+    __table_args__ = (
+        Index('ix_Conversation_user_agent_updated', 'user_id', 'agent_id', 'updated_at', 'conversation_id'),
+        Index('ix_Conversation_api_key_agent_updated', 'api_key_hash', 'agent_id', 'updated_at', 'conversation_id'),
+        Index('ix_Conversation_user_source_updated', 'user_id', 'source', 'updated_at', 'conversation_id'),
+    )
     
     def __repr__(self):
         return f"<Conversation {self.conversation_id}: Agent={self.agent_id}, User={self.user_id}, Title='{self.title}'>"
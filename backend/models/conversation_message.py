@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from db.database import Base
+from datetime import datetime
+
+
+class ConversationMessage(Base):
+    """Display projection of a conversation's messages.
+
+    One row per user or agent message, written when a turn is finalized. It
+    holds only the text the UI shows (no tool calls, tool outputs or image
+    payloads), so conversation history is read from here instead of
+    deserializing LangGraph checkpoints. ``message_id`` is the pagination
+    cursor.
+    """
+    __tablename__ = 'conversation_message'
+
+    # SQLite only autoincrements INTEGER primary keys
+    message_id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    conversation_id = Column(
+        Integer, ForeignKey('Conversation.conversation_id', ondelete='CASCADE'), nullable=False
+    )
+    role = Column(String(16), nullable=False)  # 'user' or 'agent'
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_conversation_message_conversation', 'conversation_id', 'message_id'),
+    )
+
+    def __repr__(self):
+        return f"<ConversationMessage {self.message_id}: Conversation={self.conversation_id}, Role={self.role}>"
+
+    def to_dict(self):
+        return {"message_id": self.message_id, "role": self.role, "content": self.content}
@@ -0,0 +1,33 @@
+import sqlalchemy as sa
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime
+from sqlalchemy.orm import deferred
+from db.database import Base
+from datetime import datetime
+
+
+class FileAttachment(Base):
+    """Catalog entry for a file attached to an agent session (upload or generated output)."""
+    __tablename__ = 'file_attachment'
+    __table_args__ = (
+        sa.Index('ix_file_attachment_session_uploaded', 'session_key', 'uploaded_at'),
+    )
+
+    file_id = Column(String(36), primary_key=True)
+    # Same key FileManagementService uses for its on-disk session directory
+    session_key = Column(String(255), nullable=False)
+    agent_id = Column(Integer, nullable=False, index=True)
+    conversation_id = Column(String(64), nullable=True)
+
+    filename = Column(String(255), nullable=False)
+    file_type = Column(String(50), nullable=False)
+    mime_type = Column(String(100), nullable=True)
+    file_path = Column(String(1024), nullable=True)  # Relative to TMP_BASE_FOLDER
+    file_size_bytes = Column(BigInteger, nullable=True)
+
+    processing_status = Column(String(20), nullable=True)
+    has_extractable_content = Column(Boolean, nullable=False, default=False)
+    content_preview = Column(Text, nullable=True)
+    # Extracted text can be large; only loaded when a caller needs it
+    content = deferred(Column(Text, nullable=True))
+
+    uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
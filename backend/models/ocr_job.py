@@ -0,0 +1,44 @@
+import sqlalchemy as sa
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from db.database import Base
+from datetime import datetime
+
+from models.enums.ocr_job_status import OCRJobStatus
+
+
+class OCRJob(Base):
+    """An asynchronous OCR run for one PDF. Completed rows double as the OCR result cache."""
+    __tablename__ = 'ocr_job'
+    __table_args__ = (
+        sa.Index('ix_ocr_job_cache_key', 'agent_id', 'agent_fingerprint', 'pdf_sha256'),
+    )
+
+    job_id = Column(String(36), primary_key=True)
+    agent_id = Column(Integer, sa.ForeignKey('Agent.agent_id', ondelete='CASCADE'), nullable=False, index=True)
+    app_id = Column(Integer, sa.ForeignKey('App.app_id', ondelete='CASCADE'), nullable=True)
+
+    status = Column(
+        sa.Enum(OCRJobStatus, name='ocr_job_status', create_type=False),
+        nullable=False,
+        default=OCRJobStatus.QUEUED,
+        server_default='QUEUED',
+    )
+
+    # Cache key: agent configuration fingerprint + SHA-256 of the PDF bytes
+    agent_fingerprint = Column(String(64), nullable=False)
+    pdf_sha256 = Column(String(64), nullable=False)
+    pdf_filename = Column(String(255), nullable=True)
+    pdf_path = Column(String(1024), nullable=True)  # Removed once the job finishes
+
+    total_pages = Column(Integer, nullable=True)
+    processed_pages = Column(Integer, nullable=False, default=0, server_default='0')
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    worker_id = Column(String(64), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
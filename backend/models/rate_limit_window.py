@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger
+from db.database import Base
+
+
+class RateLimitWindow(Base):
+    """
+    Per-app request count for one fixed one-minute window, shared by all workers.
+
+    The table is UNLOGGED: counters are cheap to write and losing them on a
+    crash only resets the current minute.
+    """
+    __tablename__ = 'rate_limit_window'
+    __table_args__ = {'prefixes': ['UNLOGGED']}
+
+    app_id = Column(Integer, primary_key=True)
+    window_start = Column(BigInteger, primary_key=True)  # epoch minute
+    count = Column(Integer, nullable=False, default=0)
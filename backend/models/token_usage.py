@@ -0,0 +1,36 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, UniqueConstraint
+from db.database import Base
+from datetime import datetime
+
+
+class TokenUsage(Base):
+    """LLM token consumption per app, agent and day.
+
+    Rows are upserted by the write-behind flusher; one turn adds the tokens of
+    every model call it caused, sub-agents and summarization included.
+    app_id and agent_id carry no foreign keys: usage buffered for an app or
+    agent deleted before the flush is still written, and kept as history.
+    """
+    __tablename__ = 'token_usage'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    app_id = Column(Integer, nullable=False)
+    agent_id = Column(Integer, nullable=False)
+    usage_date = Column(Date, nullable=False)
+
+    input_tokens = Column(BigInteger, nullable=False, default=0)
+    output_tokens = Column(BigInteger, nullable=False, default=0)
+    llm_calls = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('app_id', 'agent_id', 'usage_date', name='uq_token_usage_app_agent_day'),
+        Index('ix_token_usage_agent_day', 'agent_id', 'usage_date'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<TokenUsage app_id={self.app_id} agent_id={self.agent_id} {self.usage_date} "
+            f"in={self.input_tokens} out={self.output_tokens}>"
+        )
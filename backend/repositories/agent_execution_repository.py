@@ -1,6 +1,7 @@
 from typing import Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload, selectinload
-from models.agent import Agent, AgentTool, AgentSkill
+from models.agent import Agent, AgentMCP, AgentTool, AgentSkill, AgentSilo
 from models.ocr_agent import OCRAgent
 from models.silo import Silo
 from models.output_parser import OutputParser
@@ -30,15 +31,18 @@ class AgentExecutionRepository:
         agent = db.query(Agent).options(
             # Main agent relationships
             joinedload(Agent.silo).joinedload(Silo.embedding_service),
-            joinedload(Agent.mcp_associations),
+            joinedload(Agent.mcp_associations).joinedload(AgentMCP.mcp),
             joinedload(Agent.ai_service),
             joinedload(Agent.output_parser),
             joinedload(Agent.app),
+            # Additional silos searched alongside the primary one
+            selectinload(Agent.silo_associations).joinedload(AgentSilo.silo).joinedload(Silo.embedding_service),
             # Skill associations with nested skill data
             selectinload(Agent.skill_associations).joinedload(AgentSkill.skill),
             # Tool agents and their relationships (critical for IACTTool)
             selectinload(Agent.tool_associations).joinedload(AgentTool.tool).joinedload(Agent.ai_service),
             selectinload(Agent.tool_associations).joinedload(AgentTool.tool).joinedload(Agent.silo),
+            selectinload(Agent.tool_associations).joinedload(AgentTool.tool).selectinload(Agent.silo_associations).joinedload(AgentSilo.silo),
             selectinload(Agent.tool_associations).joinedload(AgentTool.tool).joinedload(Agent.tool_associations)
         ).filter(Agent.agent_id == agent_id).first()
         
@@ -61,14 +65,14 @@ class AgentExecutionRepository:
     
     @staticmethod
     def update_agent_request_count(db: Session, agent_id: int) -> bool:
-        """Update agent request count"""
+        """Update agent request count (atomic increment, no read-modify-write)"""
         try:
-            db_agent = AgentRepository.get_by_id(db, agent_id)
-            if db_agent:
-                db_agent.request_count = (db_agent.request_count or 0) + 1
-                db.commit()
-                return True
-            return False
+            updated = db.query(Agent).filter(Agent.agent_id == agent_id).update(
+                {Agent.request_count: func.coalesce(Agent.request_count, 0) + 1},
+                synchronize_session=False,
+            )
+            db.commit()
+            return updated > 0
         except Exception as e:
             logger.warning(f"Failed to update request count for agent {agent_id}: {e}")
             db.rollback()
@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from models.agent import Agent, AgentMCP, AgentTool, AgentSkill
+from models.agent import Agent, AgentMCP, AgentTool, AgentSkill, AgentSilo
 from models.ocr_agent import OCRAgent
 from models.ai_service import AIService
 from models.silo import Silo
@@ -106,6 +106,7 @@ class AgentRepository:
         agent_id = agent.agent_id
         db.query(AgentMCP).filter(AgentMCP.agent_id == agent_id).delete(synchronize_session=False)
         db.query(AgentSkill).filter(AgentSkill.agent_id == agent_id).delete(synchronize_session=False)
+        db.query(AgentSilo).filter(AgentSilo.agent_id == agent_id).delete(synchronize_session=False)
         db.query(AgentTool).filter(AgentTool.agent_id == agent_id).delete(synchronize_session=False)
         # Remove all references to this agent as a tool (tool_id side).
         AgentRepository.remove_tool_references(db, agent_id)
@@ -156,6 +157,27 @@ class AgentRepository:
         db.add(association)
         return association
 
+    @staticmethod
+    def get_agent_silo_associations(db: Session, agent_id: int) -> List[AgentSilo]:
+        """Get all additional silo associations for an agent"""
+        return db.query(AgentSilo).filter(AgentSilo.agent_id == agent_id).all()
+
+    @staticmethod
+    def delete_agent_silo_association(db: Session, association: AgentSilo) -> None:
+        """Delete an agent silo association"""
+        db.delete(association)
+
+    @staticmethod
+    def create_agent_silo_association(db: Session, agent_id: int, silo_id: int, description: Optional[str] = None) -> AgentSilo:
+        """Create a new agent silo association"""
+        association = AgentSilo(
+            agent_id=agent_id,
+            silo_id=silo_id,
+            description=description
+        )
+        db.add(association)
+        return association
+
     @staticmethod
     def create_agent_tool_association(db: Session, agent_id: int, tool_id: int, description: Optional[str] = None) -> AgentTool:
         """Create a new agent tool association"""
@@ -324,7 +346,7 @@ class AgentRepository:
     def get_agent_associations_dict(db: Session, agent_id: int) -> Dict[str, List]:
         """Get agent's current associations as a dictionary"""
         if agent_id == 0:
-            return {'tool_ids': [], 'mcp_ids': [], 'skill_ids': []}
+            return {'tool_ids': [], 'mcp_ids': [], 'skill_ids': [], 'silo_ids': []}
 
         # Get tool associations
         tool_assocs = AgentRepository.get_agent_tool_associations(db, agent_id)
@@ -338,4 +360,13 @@ class AgentRepository:
         skill_assocs = AgentRepository.get_agent_skill_associations(db, agent_id)
         agent_skill_ids = [assoc.skill_id for assoc in skill_assocs]
 
-        return {'tool_ids': agent_tool_ids, 'mcp_ids': agent_mcp_ids, 'skill_ids': agent_skill_ids}
+        # Get additional silo associations
+        silo_assocs = AgentRepository.get_agent_silo_associations(db, agent_id)
+        agent_silo_ids = [assoc.silo_id for assoc in silo_assocs]
+
+        return {
+            'tool_ids': agent_tool_ids,
+            'mcp_ids': agent_mcp_ids,
+            'skill_ids': agent_skill_ids,
+            'silo_ids': agent_silo_ids,
+        }
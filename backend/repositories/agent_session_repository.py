@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models.agent_session import AgentSession
+
+
+class AgentSessionRepository:
+    """Repository for the shared memory-agent session registry."""
+
+    @staticmethod
+    def get(session_id: str, db: Session) -> Optional[AgentSession]:
+        return db.query(AgentSession).filter(AgentSession.session_id == session_id).first()
+
+    @staticmethod
+    def create_if_absent(session_id: str, agent_id: int, now: datetime, db: Session) -> AgentSession:
+        """Insert the session unless another worker already did, and return the stored row."""
+        db.execute(
+            insert(AgentSession)
+            .values(session_id=session_id, agent_id=agent_id, created_at=now, last_accessed=now)
+            .on_conflict_do_nothing(index_elements=['session_id'])
+        )
+        db.commit()
+        return AgentSessionRepository.get(session_id, db)
+
+    @staticmethod
+    def touch(session_id: str, now: datetime, db: Session) -> None:
+        db.query(AgentSession).filter(
+            AgentSession.session_id == session_id,
+            AgentSession.last_accessed < now,
+        ).update({AgentSession.last_accessed: now}, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def delete(session_id: str, db: Session) -> bool:
+        deleted = db.query(AgentSession).filter(AgentSession.session_id == session_id).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return deleted > 0
+
+    @staticmethod
+    def delete_expired(cutoff: datetime, db: Session) -> int:
+        deleted = db.query(AgentSession).filter(AgentSession.last_accessed < cutoff).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def count_by_expiry(cutoff: datetime, db: Session) -> Dict[str, int]:
+        total, expired = db.query(
+            func.count(AgentSession.session_id),
+            func.count(AgentSession.session_id).filter(AgentSession.last_accessed < cutoff),
+        ).one()
+        return {"total": total or 0, "expired": expired or 0}
@@ -0,0 +1,110 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage
+
+
+class ConversationMessageRepository:
+
+    @staticmethod
+    def add_messages(
+        db: Session,
+        conversation_id: int,
+        messages: Sequence[Tuple[str, str]],
+    ) -> None:
+        """Append ``(role, content)`` messages to a conversation's history, in order."""
+        db.add_all([
+            ConversationMessage(conversation_id=conversation_id, role=role, content=content)
+            for role, content in messages
+        ])
+        db.commit()
+
+    @staticmethod
+    def add_messages_if_projected(
+        db: Session,
+        conversation_id: int,
+        messages: Sequence[Tuple[str, str]],
+    ) -> bool:
+        """Append messages unless the conversation still awaits its backfill.
+
+        The flag is read under a row lock, so a concurrent backfill is seen
+        once it commits. Returns False when the messages were skipped.
+        """
+        projected = (
+            db.query(Conversation.history_projected)
+            .filter(Conversation.conversation_id == conversation_id)
+            .with_for_update()
+            .scalar()
+        )
+        if not projected:
+            # Release the lock; the backfill copies this turn from the checkpoint
+            db.commit()
+            return False
+        ConversationMessageRepository.add_messages(db, conversation_id, messages)
+        return True
+
+    @staticmethod
+    def clear(db: Session, conversation_id: int) -> None:
+        """Delete a conversation's history and its OpenAI resume digest (conversation reset)."""
+        db.execute(delete(ConversationMessage).where(ConversationMessage.conversation_id == conversation_id))
+        # The checkpoint is gone too: nothing is left to backfill
+        db.execute(
+            update(Conversation)
+            .where(Conversation.conversation_id == conversation_id)
+            .values(prefix_hash=None, history_projected=True)
+        )
+        db.commit()
+
+    @staticmethod
+    def get_page(
+        db: Session,
+        conversation_id: int,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[ConversationMessage]:
+        """Return up to ``limit`` messages older than ``before``, oldest first.
+
+        Without ``limit`` the whole history (older than ``before``) is returned.
+        """
+        query = db.query(ConversationMessage).filter(ConversationMessage.conversation_id == conversation_id)
+        if before is not None:
+            query = query.filter(ConversationMessage.message_id < before)
+        if limit is None:
+            return query.order_by(ConversationMessage.message_id).all()
+        # Newest page first on the (conversation_id, message_id) index, then restore order
+        rows = query.order_by(ConversationMessage.message_id.desc()).limit(limit).all()
+        rows.reverse()
+        return rows
+
+    @staticmethod
+    def backfill(
+        db: Session,
+        conversation_id: int,
+        messages: Sequence[Tuple[str, str]],
+    ) -> bool:
+        """Store the history of a pre-projection conversation, once.
+
+        Flags the conversation in the same transaction, so concurrent readers
+        cannot backfill it twice. Returns False if another reader won.
+        """
+        claimed = db.execute(
+            update(Conversation)
+            .where(
+                Conversation.conversation_id == conversation_id,
+                Conversation.history_projected.is_(False),
+            )
+            .values(history_projected=True)
+            .returning(Conversation.conversation_id)
+        ).scalar()
+        if claimed is None:
+            db.rollback()
+            return False
+        db.add_all([
+            ConversationMessage(conversation_id=conversation_id, role=role, content=content)
+            for role, content in messages
+        ])
+        db.commit()
+        return True
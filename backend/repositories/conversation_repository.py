@@ -1,12 +1,61 @@
-from typing import Optional
+import base64
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, select, tuple_, update
+from sqlalchemy.orm import Query, Session
 
 from models.conversation import Conversation, ConversationSource
 
 
 class ConversationRepository:
 
+    @staticmethod
+    def encode_cursor(conversation: Conversation) -> str:
+        """Opaque keyset cursor pointing just after ``conversation`` in list order."""
+        raw = f"{conversation.updated_at.isoformat()}|{conversation.conversation_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Return ``(updated_at, conversation_id)``; raises ValueError for malformed cursors."""
+        try:
+            updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(updated_at), int(conversation_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    @staticmethod
+    def paginate(
+        query: Query,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        conversation_of: Callable[[Any], Conversation] = lambda row: row,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Return one page of ``query``, most recently updated first, and the next cursor.
+
+        With ``cursor`` the page starts right after the conversation it encodes
+        (keyset pagination on ``(updated_at, conversation_id)``, served by the
+        per-owner composite indexes) and ``offset`` is ignored.
+        ``conversation_of`` extracts the Conversation from rows of joined queries.
+        """
+        if cursor:
+            updated_at, conversation_id = ConversationRepository.decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Conversation.updated_at, Conversation.conversation_id) < (updated_at, conversation_id)
+            )
+        query = query.order_by(desc(Conversation.updated_at), desc(Conversation.conversation_id))
+        if not cursor and offset:
+            query = query.offset(offset)
+        # One extra row tells whether there is a next page
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = ConversationRepository.encode_cursor(conversation_of(rows[-1]))
+        return rows, next_cursor
+
     @staticmethod
     def get_marketplace_conversation(
         db: Session,
@@ -23,3 +72,50 @@ class ConversationRepository:
             )
             .first()
         )
+
+    @staticmethod
+    def claim_by_prefix_hash(
+        db: Session,
+        agent_id: int,
+        api_key_hash: Optional[str],
+        prefix_hash: str,
+    ) -> Optional[int]:
+        """Atomically take the conversation whose history ends at ``prefix_hash``.
+
+        The hash is cleared in the same statement, so two requests resending
+        the same history never resume the same conversation concurrently.
+        Only the most recent match is taken; a row locked by a concurrent
+        claim is skipped rather than waited for.
+        """
+        candidate = (
+            select(Conversation.conversation_id)
+            .where(
+                Conversation.agent_id == agent_id,
+                Conversation.api_key_hash == api_key_hash,
+                Conversation.prefix_hash == prefix_hash,
+            )
+            .order_by(desc(Conversation.updated_at), desc(Conversation.conversation_id))
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        conversation_id = db.execute(
+            update(Conversation)
+            .where(
+                Conversation.conversation_id == candidate,
+                Conversation.prefix_hash == prefix_hash,
+            )
+            .values(prefix_hash=None)
+            .returning(Conversation.conversation_id)
+        ).scalar()
+        db.commit()
+        return conversation_id
+
+    @staticmethod
+    def set_prefix_hash(db: Session, conversation_id: int, prefix_hash: Optional[str]) -> None:
+        db.execute(
+            update(Conversation)
+            .where(Conversation.conversation_id == conversation_id)
+            .values(prefix_hash=prefix_hash)
+        )
+        db.commit()
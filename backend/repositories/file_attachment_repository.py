@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Set
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, undefer
+from models.file_attachment import FileAttachment
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FileAttachmentRepository:
+    """Repository for FileAttachment catalog operations."""
+
+    @staticmethod
+    def get_by_id(file_id: str, db: Session, with_content: bool = True) -> Optional[FileAttachment]:
+        query = db.query(FileAttachment).filter(FileAttachment.file_id == file_id)
+        if with_content:
+            query = query.options(undefer(FileAttachment.content))
+        return query.first()
+
+    @staticmethod
+    def get_by_id_for_session(
+        file_id: str, agent_id: int, session_key: str, db: Session, with_content: bool = True
+    ) -> Optional[FileAttachment]:
+        """Attachment of ``agent_id`` in ``session_key`` or in one of its conversation sessions."""
+        query = db.query(FileAttachment).filter(
+            FileAttachment.file_id == file_id,
+            FileAttachment.agent_id == agent_id,
+            or_(
+                FileAttachment.session_key == session_key,
+                FileAttachment.session_key.startswith(f"{session_key}_conv_", autoescape=True),
+            ),
+        )
+        if with_content:
+            query = query.options(undefer(FileAttachment.content))
+        return query.first()
+
+    @staticmethod
+    def get_by_session(session_key: str, db: Session, with_content: bool = False) -> List[FileAttachment]:
+        """Attachments of one session, oldest first. Content is only loaded when requested."""
+        query = (
+            db.query(FileAttachment)
+            .filter(FileAttachment.session_key == session_key)
+            .order_by(FileAttachment.uploaded_at)
+        )
+        if with_content:
+            query = query.options(undefer(FileAttachment.content))
+        return query.all()
+
+    @staticmethod
+    def get_session_file_paths(session_key: str, db: Session) -> Set[str]:
+        rows = (
+            db.query(FileAttachment.file_path)
+            .filter(
+                FileAttachment.session_key == session_key,
+                FileAttachment.file_path.isnot(None),
+            )
+            .all()
+        )
+        return {row.file_path for row in rows}
+
+    @staticmethod
+    def get_content(file_id: str, db: Session) -> Optional[str]:
+        row = db.query(FileAttachment.content).filter(FileAttachment.file_id == file_id).first()
+        return row.content if row else None
+
+    @staticmethod
+    def create(attachment: FileAttachment, db: Session) -> FileAttachment:
+        db.add(attachment)
+        db.commit()
+        return attachment
+
+    @staticmethod
+    def delete(attachment: FileAttachment, db: Session) -> None:
+        db.delete(attachment)
+        db.commit()
+
+    @staticmethod
+    def get_stats(db: Session) -> Dict[str, object]:
+        """Totals across the whole catalog, grouped by file type."""
+        by_type = (
+            db.query(
+                FileAttachment.file_type,
+                func.count(FileAttachment.file_id),
+                func.coalesce(func.sum(FileAttachment.file_size_bytes), 0),
+            )
+            .group_by(FileAttachment.file_type)
+            .all()
+        )
+        sessions = db.query(func.count(func.distinct(FileAttachment.session_key))).scalar() or 0
+        return {
+            "file_types": {file_type: count for file_type, count, _ in by_type},
+            "total_files": sum(count for _, count, _ in by_type),
+            "total_size_bytes": int(sum(size for _, _, size in by_type)),
+            "total_sessions": sessions,
+        }
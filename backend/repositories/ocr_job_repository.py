@@ -0,0 +1,174 @@
+from typing import Optional, Any
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from models.ocr_job import OCRJob
+from models.enums.ocr_job_status import OCRJobStatus
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OCRJobRepository:
+    """Repository for OCRJob data access operations."""
+
+    @staticmethod
+    def get_by_id(job_id: str, db: Session) -> Optional[OCRJob]:
+        return db.query(OCRJob).filter(OCRJob.job_id == job_id).first()
+
+    @staticmethod
+    def create(job: OCRJob, db: Session) -> OCRJob:
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def find_cached(
+        agent_id: int,
+        agent_fingerprint: str,
+        pdf_sha256: str,
+        db: Session,
+        max_age: Optional[timedelta] = None,
+    ) -> Optional[OCRJob]:
+        """Return the most recent COMPLETED job for this (agent config, PDF) pair, if any."""
+        query = db.query(OCRJob).filter(
+            OCRJob.agent_id == agent_id,
+            OCRJob.agent_fingerprint == agent_fingerprint,
+            OCRJob.pdf_sha256 == pdf_sha256,
+            OCRJob.status == OCRJobStatus.COMPLETED,
+        )
+        if max_age is not None:
+            query = query.filter(OCRJob.finished_at >= datetime.utcnow() - max_age)
+        return query.order_by(OCRJob.finished_at.desc()).first()
+
+    @staticmethod
+    def find_active(
+        agent_id: int,
+        agent_fingerprint: str,
+        pdf_sha256: str,
+        db: Session,
+    ) -> Optional[OCRJob]:
+        """Return a QUEUED or RUNNING job for the same (agent config, PDF) pair, if any."""
+        return (
+            db.query(OCRJob)
+            .filter(
+                OCRJob.agent_id == agent_id,
+                OCRJob.agent_fingerprint == agent_fingerprint,
+                OCRJob.pdf_sha256 == pdf_sha256,
+                OCRJob.status.in_([OCRJobStatus.QUEUED, OCRJobStatus.RUNNING]),
+            )
+            .order_by(OCRJob.created_at)
+            .first()
+        )
+
+    @staticmethod
+    def poll_queued_job(worker_id: str, db: Session) -> Optional[OCRJob]:
+        """
+        Claims the oldest QUEUED job for this worker using SELECT ... FOR UPDATE SKIP LOCKED.
+        Returns the job if claimed, else None.
+        """
+        job = (
+            db.query(OCRJob)
+            .filter(OCRJob.status == OCRJobStatus.QUEUED)
+            .order_by(OCRJob.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return None
+
+        now = datetime.utcnow()
+        job.status = OCRJobStatus.RUNNING
+        job.worker_id = worker_id
+        job.started_at = now
+        job.heartbeat_at = now
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def update_progress(job_id: str, processed_pages: int, total_pages: Optional[int], db: Session) -> None:
+        values = {
+            OCRJob.processed_pages: processed_pages,
+            OCRJob.heartbeat_at: datetime.utcnow(),
+        }
+        if total_pages is not None:
+            values[OCRJob.total_pages] = total_pages
+        db.query(OCRJob).filter(OCRJob.job_id == job_id).update(values, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def heartbeat(job_id: str, db: Session) -> None:
+        db.query(OCRJob).filter(OCRJob.job_id == job_id).update(
+            {OCRJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+
+    @staticmethod
+    def mark_completed(job_id: str, result: Any, db: Session, cacheable: bool = True) -> None:
+        job = OCRJobRepository.get_by_id(job_id, db)
+        if job is None:
+            return
+        job.status = OCRJobStatus.COMPLETED
+        if not cacheable:
+            # An empty fingerprint never matches find_cached, so the result is
+            # still returned to this job's pollers but never reused
+            job.agent_fingerprint = ''
+        job.result = result
+        job.error = None
+        job.pdf_path = None
+        job.finished_at = datetime.utcnow()
+        if job.total_pages is not None:
+            job.processed_pages = job.total_pages
+        db.commit()
+
+    @staticmethod
+    def mark_failed(job_id: str, error: str, db: Session) -> None:
+        job = OCRJobRepository.get_by_id(job_id, db)
+        if job is None:
+            return
+        job.status = OCRJobStatus.FAILED
+        job.error = error
+        job.pdf_path = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def reset_stuck_jobs(db: Session, timeout_minutes: int = 5) -> int:
+        """
+        Finds RUNNING jobs whose heartbeat is older than timeout_minutes and resets them to QUEUED.
+        Returns the number of jobs reset.
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=timeout_minutes)
+        stuck_jobs = (
+            db.query(OCRJob)
+            .filter(
+                OCRJob.status == OCRJobStatus.RUNNING,
+                OCRJob.heartbeat_at < cutoff,
+            )
+            .all()
+        )
+        for job in stuck_jobs:
+            job.status = OCRJobStatus.QUEUED
+            job.worker_id = None
+            job.processed_pages = 0
+
+        if stuck_jobs:
+            db.commit()
+            logger.info(f"Reset {len(stuck_jobs)} stuck OCR job(s) to QUEUED.")
+
+        return len(stuck_jobs)
+
+    @staticmethod
+    def delete_finished_before(cutoff: datetime, db: Session) -> int:
+        """Delete COMPLETED/FAILED jobs (and therefore cached results) finished before cutoff."""
+        count = (
+            db.query(OCRJob)
+            .filter(
+                OCRJob.status.in_([OCRJobStatus.COMPLETED, OCRJobStatus.FAILED]),
+                OCRJob.finished_at < cutoff,
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
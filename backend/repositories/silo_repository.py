@@ -27,6 +27,19 @@ class SiloRepository:
         """
         return db.query(Silo).filter(Silo.app_id == app_id).all()
     
+    @staticmethod
+    def get_valid_silo_ids_for_app(db: Session, silo_ids: set, app_id: int) -> set:
+        """
+        Get silo IDs that exist and belong to the specified app
+        """
+        if not silo_ids:
+            return set()
+        valid_silos = db.query(Silo.silo_id).filter(
+            Silo.silo_id.in_(silo_ids),
+            Silo.app_id == app_id
+        ).all()
+        return {silo.silo_id for silo in valid_silos}
+
     @staticmethod
     def create(silo: Silo, db: Session) -> Silo:
         """
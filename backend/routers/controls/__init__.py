@@ -5,12 +5,13 @@ Contains rate limiting, origin validation, and file size limit controls.
 
 from .rate_limit import enforce_app_rate_limit
 from .origins import enforce_allowed_origins
-from .file_size_limit import enforce_file_size_limit, validate_files_size, get_app_file_size_limit
+from .file_size_limit import enforce_file_size_limit, validate_files_size, get_app_file_size_limit, get_request_file_size_limit
 
 __all__ = [
     'enforce_app_rate_limit',
     'enforce_allowed_origins', 
     'enforce_file_size_limit',
     'validate_files_size',
-    'get_app_file_size_limit'
+    'get_app_file_size_limit',
+    'get_request_file_size_limit'
 ]
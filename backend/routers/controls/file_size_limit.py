@@ -6,7 +6,7 @@ from fastapi import HTTPException, Depends, status, UploadFile, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models.app import App
+from services.auth_cache_service import auth_cache
 from db.database import get_db
 from services.file_size_limit_service import file_size_limit_service
 from utils.logger import get_logger
@@ -33,10 +33,7 @@ def enforce_file_size_limit(
     """
     try:
         # Load app to get file size limit (supports both integer ID and slug)
-        if app_id.isdigit():
-            app = db.query(App).filter(App.app_id == int(app_id)).first()
-        else:
-            app = db.query(App).filter(App.slug == app_id).first()
+        app = auth_cache.get_app(db, app_id)
         if not app:
             logger.warning(f"App {app_id} not found for file size validation")
             return
@@ -47,6 +44,11 @@ def enforce_file_size_limit(
         if max_file_size_mb <= 0:
             logger.debug(f"No file size limit configured for app {app_id}")
             return
+
+        # Store the limit in request state for per-file validation in the
+        # endpoint; chunked uploads carry no Content-Length to pre-check
+        request.state.max_file_size_mb = max_file_size_mb
+        request.state.app_id_for_file_validation = app_id
         
         # Get Content-Length from headers
         content_length = request.headers.get('content-length')
@@ -74,10 +76,6 @@ def enforce_file_size_limit(
         
         logger.debug(f"File size pre-validation passed for app {app_id}: {content_length_mb:.2f}MB / {max_total_mb}MB")
         
-        # Store the limit in request state for per-file validation in the endpoint
-        request.state.max_file_size_mb = max_file_size_mb
-        request.state.app_id_for_file_validation = app_id
-        
     except HTTPException:
         # Re-raise HTTP exceptions (like 413)
         raise
@@ -131,6 +129,16 @@ def validate_files_size(
         )
 
 
+def get_request_file_size_limit(request: Request) -> int:
+    """
+    Per-file size limit (MB) stored by enforce_file_size_limit for this request.
+    
+    Returns:
+        Maximum file size in MB (0 = unlimited or not resolved)
+    """
+    return getattr(request.state, 'max_file_size_mb', 0) or 0
+
+
 def get_app_file_size_limit(app_id: int, db: Session = Depends(get_db)) -> int:
     """
     Helper function to get app file size limit.
@@ -143,7 +151,7 @@ def get_app_file_size_limit(app_id: int, db: Session = Depends(get_db)) -> int:
         Maximum file size in MB (0 = unlimited)
     """
     try:
-        app = db.query(App).filter(App.app_id == app_id).first()
+        app = auth_cache.get_app(db, app_id)
         if not app:
             return 0
         return app.max_file_size_mb or 0
@@ -5,7 +5,7 @@ Enforces per-app CORS origin restrictions based on app configuration.
 from fastapi import HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
 
-from models.app import App
+from services.auth_cache_service import auth_cache
 from db.database import get_db
 from services.origins_service import origins_service
 from utils.logger import get_logger
@@ -31,10 +31,7 @@ def enforce_allowed_origins(
     """
     try:
         # Load app to get allowed origins (supports both integer ID and slug)
-        if app_id.isdigit():
-            app = db.query(App).filter(App.app_id == int(app_id)).first()
-        else:
-            app = db.query(App).filter(App.slug == app_id).first()
+        app = auth_cache.get_app(db, app_id)
         if not app:
             logger.warning(f"App {app_id} not found for origin validation")
             return
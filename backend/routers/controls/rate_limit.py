@@ -8,7 +8,7 @@ from fastapi import HTTPException, Depends, Response, status
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from models.app import App
+from services.auth_cache_service import auth_cache
 from db.database import get_db
 from services.rate_limit_service import rate_limit_service
 from utils.logger import get_logger
@@ -34,10 +34,7 @@ def enforce_app_rate_limit(
     """
     try:
         # Load app to get rate limit (supports both integer ID and slug)
-        if app_id.isdigit():
-            app = db.query(App).filter(App.app_id == int(app_id)).first()
-        else:
-            app = db.query(App).filter(App.slug == app_id).first()
+        app = auth_cache.get_app(db, app_id)
         if not app:
             logger.warning(f"App {app_id} not found for rate limiting")
             return
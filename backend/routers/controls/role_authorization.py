@@ -5,9 +5,9 @@ from sqlalchemy.orm import Session
 from lks_idprovider import AuthContext
 
 from db.database import get_db
-from models.app import App
 from models.app_collaborator import AppCollaborator, CollaborationRole, CollaborationStatus
 from routers.internal.auth_utils import get_current_user_oauth
+from services.auth_cache_service import auth_cache
 from utils.config import is_omniadmin
 from utils.logger import get_logger
 
@@ -45,6 +45,9 @@ def resolve_user_app_role(
     """
     Resolve the effective role of a user for a specific app.
     Returns None if the app does not exist.
+
+    Roles are cached per (app, user) for a short TTL and invalidated when
+    collaborators, the app or the user change.
     """
     # 1. Check Omniadmin
     if email and is_omniadmin(email):
@@ -54,8 +57,19 @@ def resolve_user_app_role(
     if not user_id:
         return AppRole.GUEST
 
+    cached_role = auth_cache.get_role(app_id, user_id)
+    if cached_role is not None:
+        return cached_role
+
+    role = _resolve_affiliation_role(db, app_id, user_id)
+    if role is not None:
+        auth_cache.set_role(app_id, user_id, role)
+    return role
+
+
+def _resolve_affiliation_role(db: Session, app_id: int, user_id: int) -> Optional[AppRole]:
     # 2. Check App existence
-    app = db.query(App).filter(App.app_id == app_id).first()
+    app = auth_cache.get_app(db, app_id)
     if not app:
         return None
 
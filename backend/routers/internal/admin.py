@@ -9,9 +9,10 @@ from models.api_key import APIKey
 from services.user_service import UserService
 from services.system_settings_service import SystemSettingsService
 from services.marketplace_quota_service import MarketplaceQuotaService
+from services.auth_cache_service import auth_cache
 from utils.config import is_omniadmin
 from routers.internal.auth_utils import get_current_user_oauth
-from schemas.admin_schemas import UserListResponse, UserDetailResponse, SystemStatsResponse, MarketplaceQuotaResetResponse
+from schemas.admin_schemas import UserListResponse, UserDetailResponse, SystemStatsResponse, MarketplaceQuotaResetResponse, AuthCacheStatsResponse
 from schemas.system_setting_schemas import SystemSettingRead, SystemSettingUpdate
 from utils.logger import get_logger
 from datetime import datetime, timezone
@@ -292,6 +293,17 @@ async def get_system_stats(
         raise HTTPException(status_code=500, detail=f"Error retrieving system stats: {str(e)}")
 
 
+@router.get(
+    "/auth-cache",
+    response_model=AuthCacheStatsResponse,
+)
+async def get_auth_cache_stats(
+    auth_context: Annotated[AuthContext, Depends(require_admin)],
+):
+    """Hit/miss/invalidation counters of the authorization lookup cache"""
+    return auth_cache.get_stats()
+
+
 @router.get(
     "/settings",
     response_model=list[SystemSettingRead],
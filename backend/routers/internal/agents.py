@@ -397,10 +397,11 @@ async def create_or_update_agent(
     # Create or update agent
     created_agent_id = agent_service.create_or_update_agent(db, agent_dict, agent_data.type)
     
-    # Update tools, MCPs, and skills (always call to handle empty arrays for unselecting)
+    # Update tools, MCPs, skills and extra silos (always call to handle empty arrays for unselecting)
     agent_service.update_agent_tools(db, created_agent_id, agent_data.tool_ids, {})
     agent_service.update_agent_mcps(db, created_agent_id, agent_data.mcp_config_ids, {})
     agent_service.update_agent_skills(db, created_agent_id, agent_data.skill_ids, {})
+    agent_service.update_agent_silos(db, created_agent_id, agent_data.silo_ids, {})
 
     # Return updated agent (reuse the GET logic)
     return await get_agent(app_id, created_agent_id, auth_context, role, db, agent_service)
@@ -757,6 +758,7 @@ async def chat_with_agent_stream(
             user_context=user_context,
             conversation_id=conversation_id,
             db=db,
+            is_disconnected=request.is_disconnected,
         )
 
         logger.info(f"Streaming chat request for agent {agent_id} by user {auth_context.identity.id}")
@@ -1092,6 +1094,7 @@ async def download_file(
                 agent_id=agent_id,
                 user_context=user_context,
                 conversation_id=try_conv_id,
+                include_content=False,
             )
             file_data = next((f for f in files if f.get("file_id") == file_id), None)
             if file_data:
@@ -67,6 +67,7 @@ async def list_conversations(
     current_user: Annotated[AuthContext, Depends(get_current_user_oauth)],
     limit: Annotated[int, Query(ge=1, le=100)] = 50,
     offset: Annotated[int, Query(ge=0)] = 0,
+    cursor: Annotated[Optional[str], Query(description="next_cursor of the previous page")] = None,
 ):
     """
     List all conversations for a user with a specific agent
@@ -74,22 +75,27 @@ async def list_conversations(
     Args:
         agent_id: ID of the agent
         limit: Maximum number of results (1-100)
-        offset: Pagination offset
+        offset: Pagination offset (ignored when cursor is given)
+        cursor: Keyset cursor from the previous page
     """
     try:
         user_context = _auth_context_to_dict(current_user)
         
-        conversations, total = ConversationService.list_conversations(
+        conversations, total, next_cursor = ConversationService.list_conversations(
             db=db,
             agent_id=agent_id,
             user_context=user_context,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor,
         )
         return ConversationListResponse(
             conversations=conversations,
-            total=total
+            total=total,
+            next_cursor=next_cursor,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing conversations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -124,13 +130,17 @@ async def get_conversation(
 async def get_conversation_with_history(
     conversation_id: int,
     db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[AuthContext, Depends(get_current_user_oauth)]
+    current_user: Annotated[AuthContext, Depends(get_current_user_oauth)],
+    before: Annotated[Optional[int], Query(description="Return messages older than this message_id")] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500, description="Page size; all messages when omitted")] = None,
 ):
     """
-    Get a conversation with its complete message history
+    Get a conversation with its message history
     
     Args:
         conversation_id: ID of the conversation
+        before: Cursor from a previous page's next_cursor
+        limit: Maximum number of (most recent) messages to return
     """
     user_context = _auth_context_to_dict(current_user)
     
@@ -145,15 +155,18 @@ async def get_conversation_with_history(
         raise HTTPException(status_code=404, detail=CONVERSATION_NOT_FOUND)
     # Get message history
     try:
-        history = await ConversationService.get_conversation_history(
+        history, next_cursor = await ConversationService.get_conversation_history_page(
             db=db,
             conversation_id=conversation_id,
-            user_context=user_context
-        )
+            user_context=user_context,
+            before=before,
+            limit=limit,
+        ) or ([], None)
         
         return ConversationWithHistoryResponse(
             **conversation.to_dict(),
-            messages=history or []
+            messages=history,
+            next_cursor=next_cursor,
         )
     except Exception as e:
         logger.error(f"Error retrieving conversation history: {e}")
@@ -20,6 +20,8 @@ from services.user_service import UserService
 from services.file_management_service import FileManagementService, FileReference
 from services.marketplace_quota_service import MarketplaceQuotaService
 from services.system_settings_service import SystemSettingsService
+from services.write_behind_service import write_behind
+from tools.streaming_utils import SSE_DONE, format_sse_event
 from utils.config import is_omniadmin
 from models.conversation import Conversation, ConversationSource
 from models.agent import Agent, MarketplaceVisibility
@@ -235,17 +237,22 @@ async def list_marketplace_conversations(
     current_user: Annotated[AuthContext, Depends(get_current_user_oauth)],
     limit: Annotated[int, Query(ge=1, le=100)] = 50,
     offset: Annotated[int, Query(ge=0)] = 0,
+    cursor: Annotated[Optional[str], Query(description="next_cursor of the previous page")] = None,
 ):
     """List the current user's marketplace conversations."""
     user_id = int(current_user.identity.id)
 
-    conversations, total = MarketplaceService.get_marketplace_conversations(
-        db=db,
-        user_id=user_id,
-        limit=limit,
-        offset=offset,
-    )
-    return MarketplaceConversationListSchema(conversations=conversations, total=total)
+    try:
+        conversations, total, next_cursor = MarketplaceService.get_marketplace_conversations(
+            db=db,
+            user_id=user_id,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return MarketplaceConversationListSchema(conversations=conversations, total=total, next_cursor=next_cursor)
 
 
 @marketplace_router.get(
@@ -257,6 +264,8 @@ async def get_marketplace_conversation(
     conversation_id: int,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[AuthContext, Depends(get_current_user_oauth)],
+    before: Annotated[Optional[int], Query(description="Return messages older than this message_id")] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500, description="Page size; all messages when omitted")] = None,
 ):
     """Get a marketplace conversation with its message history."""
     user_context = _auth_context_to_dict(current_user)
@@ -274,14 +283,17 @@ async def get_marketplace_conversation(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=CONVERSATION_NOT_FOUND)
 
     try:
-        history = await ConversationService.get_conversation_history(
+        history, next_cursor = await ConversationService.get_conversation_history_page(
             db=db,
             conversation_id=conversation_id,
             user_context=user_context,
-        )
+            before=before,
+            limit=limit,
+        ) or ([], None)
         return ConversationWithHistoryResponse(
             **conversation.to_dict(),
-            messages=history or [],
+            messages=history,
+            next_cursor=next_cursor,
         )
     except Exception as e:
         logger.error(f"Error retrieving marketplace conversation history: {e}")
@@ -458,6 +470,7 @@ async def download_marketplace_file(
                 agent_id=agent.agent_id,
                 user_context=user_context,
                 conversation_id=try_conv_id,
+                include_content=False,
             )
             file_data = next((f for f in files if f.get("file_id") == file_id), None)
             if file_data:
@@ -522,7 +535,8 @@ def _validate_marketplace_agent(agent: Optional[Agent]) -> None:
             detail="This agent is no longer available in the marketplace",
         )
     if agent.app and agent.app.agent_rate_limit and agent.app.agent_rate_limit > 0:
-        if agent.request_count and agent.request_count >= agent.app.agent_rate_limit:
+        request_count = (agent.request_count or 0) + write_behind.pending_agent_requests(agent.agent_id)
+        if request_count >= agent.app.agent_rate_limit:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="This agent is temporarily unavailable due to high demand. Please try again later.",
@@ -694,7 +708,7 @@ async def marketplace_chat_stream(
         )
 
         streaming_service = AgentStreamingService(db)
-        base_generator = streaming_service.stream_agent_chat(
+        base_events = streaming_service.stream_agent_events(
             agent_id=agent.agent_id,
             message=message,
             file_references=all_file_references,
@@ -702,15 +716,16 @@ async def marketplace_chat_stream(
             user_context=user_context,
             conversation_id=conversation_id,
             db=db,
+            is_disconnected=request.is_disconnected,
         )
 
         async def generator() -> AsyncGenerator[str, None]:
             stream_completed = False
             try:
-                async for chunk in base_generator:
-                    if '"type": "done"' in chunk or '"type":"done"' in chunk:
+                async for event in base_events:
+                    if event.type == SSE_DONE:
                         stream_completed = True
-                    yield chunk
+                    yield format_sse_event(event.type, event.data)
             finally:
                 if stream_completed:
                     _safe_increment_marketplace_usage(user_id, db)
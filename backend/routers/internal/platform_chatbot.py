@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 from typing import Annotated
 from sqlalchemy.orm import Session
@@ -113,6 +113,7 @@ async def platform_chatbot_chat(
     summary="Stream a message to the platform chatbot via SSE",
 )
 async def platform_chatbot_chat_stream(
+    request: Request,
     body: PlatformChatbotChatRequest,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[AuthContext, Depends(get_current_user_oauth)],
@@ -149,6 +150,7 @@ async def platform_chatbot_chat_stream(
             user_context=user_context,
             conversation_id=None,
             db=db,
+            is_disconnected=request.is_disconnected,
         )
         return StreamingResponse(
             generator,
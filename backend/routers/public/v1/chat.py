@@ -1,6 +1,6 @@
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Annotated
@@ -75,7 +75,7 @@ async def call_agent(
     db: Annotated[Session, Depends(get_db)],
     files: Annotated[List[UploadFile], File(description="Optional files to attach (images, PDFs, text files)")] = None,
     file_references: Annotated[Optional[str], Form(description="JSON array of existing file_ids to include. If not provided, all files are included.")] = None,
-    search_params: Annotated[Optional[str], Form(description="JSON object with search parameters for silo-based agents")] = None,
+    search_params: Annotated[Optional[str], Form(description='JSON object with search parameters for silo-based agents, e.g. {"search_type": "hybrid", "k": 10}')] = None,
     conversation_id: Annotated[Optional[int], Form(description="Optional conversation ID to continue existing conversation")] = None,
 ):
     """
@@ -165,6 +165,7 @@ async def call_agent(
     },
 )
 async def call_agent_stream(
+    request: Request,
     app_id: int,
     agent_id: int,
     message: Annotated[str, Form(..., description="The user message to send to the agent")],
@@ -217,6 +218,7 @@ async def call_agent_stream(
             user_context=user_context,
             conversation_id=conversation_id,
             db=db,
+            is_disconnected=request.is_disconnected,
         )
 
         logger.info(f"Public API streaming chat for agent {agent_id}")
@@ -372,11 +374,14 @@ async def list_conversations(
     db: Annotated[Session, Depends(get_db)],
     limit: Annotated[int, Query(ge=1, le=100, description="Maximum number of results")] = 50,
     offset: Annotated[int, Query(ge=0, description="Pagination offset")] = 0,
+    cursor: Annotated[Optional[str], Query(description="next_cursor of the previous page")] = None,
 ):
     """
     List all conversations for an agent.
 
     Returns a paginated list of conversations ordered by most recent first.
+    Pass ``next_cursor`` back as ``cursor`` for constant-time next pages;
+    ``total`` is only returned for the first page.
     """
     validate_api_key_for_app(app_id, api_key, db)
     validate_agent_ownership(db, agent_id, app_id)
@@ -384,21 +389,25 @@ async def list_conversations(
     try:
         user_context = create_api_key_user_context(app_id, api_key)
 
-        conversations, total = ConversationService.list_conversations(
+        conversations, total, next_cursor = ConversationService.list_conversations(
             db=db,
             agent_id=agent_id,
             user_context=user_context,
             limit=limit,
             offset=offset,
+            cursor=cursor,
         )
 
         return PublicConversationListResponseSchema(
             conversations=[PublicConversationSchema.model_validate(c) for c in conversations],
             total=total,
+            next_cursor=next_cursor,
         )
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing conversations for agent {agent_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to list conversations")
@@ -434,11 +443,15 @@ async def get_conversation_with_history(
     conversation_id: int,
     api_key: Annotated[str, Depends(get_api_key_auth)],
     db: Annotated[Session, Depends(get_db)],
+    before: Annotated[Optional[int], Query(description="Return messages older than this message_id")] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500, description="Page size; all messages when omitted")] = None,
 ):
     """
-    Get a conversation with its complete message history.
+    Get a conversation with its message history.
 
-    Returns conversation metadata and all messages exchanged.
+    Returns conversation metadata and the messages exchanged. With ``limit``,
+    only the most recent messages are returned; pass ``next_cursor`` as
+    ``before`` to fetch older ones.
     """
     validate_api_key_for_app(app_id, api_key, db)
     validate_agent_ownership(db, agent_id, app_id)
@@ -456,11 +469,13 @@ async def get_conversation_with_history(
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
-        history = await ConversationService.get_conversation_history(
+        history, next_cursor = await ConversationService.get_conversation_history_page(
             db=db,
             conversation_id=conversation_id,
             user_context=user_context,
-        )
+            before=before,
+            limit=limit,
+        ) or ([], None)
 
         return PublicConversationWithHistorySchema(
             conversation_id=conversation.conversation_id,
@@ -468,7 +483,8 @@ async def get_conversation_with_history(
             title=conversation.title,
             created_at=conversation.created_at,
             updated_at=conversation.updated_at,
-            messages=history or [],
+            messages=history,
+            next_cursor=next_cursor,
         )
 
     except HTTPException:
@@ -22,6 +22,7 @@ from db.database import get_db
 
 from services.file_management_service import FileManagementService, FileReference
 from services.conversation_service import ConversationService
+from routers.controls.file_size_limit import get_request_file_size_limit
 from utils.security import generate_signature
 
 from utils.logger import get_logger
@@ -52,6 +53,7 @@ async def attach_file(
             description="Optional conversation ID for memory-enabled agents. If not provided for a memory-enabled agent, a new conversation will be created.",
         ),
     ] = None,
+    max_file_size_mb: Annotated[int, Depends(get_request_file_size_limit)] = 0,
 ):
     """
     Attach a file to an agent for chat context.
@@ -93,6 +95,7 @@ async def attach_file(
             agent_id=agent_id,
             user_context=user_context,
             conversation_id=effective_conversation_id,
+            max_size_mb=max_file_size_mb,
         )
 
         logger.info(f"File {file.filename} attached to agent {agent_id}, conversation {effective_conversation_id} via public API")
@@ -216,6 +219,7 @@ async def list_attached_files(
             agent_id=agent_id,
             user_context=user_context,
             conversation_id=conversation_id,
+            include_content=False,
         )
 
         files = [
@@ -295,6 +299,7 @@ async def download_file(
                 agent_id=agent_id,
                 user_context=user_context,
                 conversation_id=try_conv_id,
+                include_content=False,
             )
             file_data = next((f for f in files if f.get("file_id") == file_id), None)
             if file_data:
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Annotated
 
-from .schemas import OCRResponseSchema
+from .schemas import OCRResponseSchema, OCRJobSchema
 from .auth import get_api_key_auth, validate_api_key_for_app, validate_agent_ownership
 from db.database import get_db
+from routers.controls.file_size_limit import get_request_file_size_limit
+from models.ocr_agent import OCRAgent
+from services.agent_service import AgentService
+from services.ocr_job_service import OCRJobService
 
 # Import logger
 from utils.logger import get_logger
@@ -90,4 +95,98 @@ async def process_ocr(
         
     except Exception as e:
         logger.error(f"Error in public OCR endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail="OCR processing failed") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="OCR processing failed") 
+
+# ASYNC OCR JOB ENDPOINTS
+
+@ocr_router.post("/{agent_id}/jobs",
+                 summary="Submit OCR job",
+                 tags=["OCR"],
+                 status_code=202,
+                 response_model=OCRJobSchema,
+                 responses={
+                     400: {"description": "Only PDF files are supported"},
+                     404: {"description": "OCR Agent not found"},
+                 })
+async def submit_ocr_job(
+    app_id: int,
+    agent_id: int,
+    pdf: Annotated[UploadFile, File(...)],
+    api_key: Annotated[str, Depends(get_api_key_auth)],
+    db: Annotated[Session, Depends(get_db)],
+    max_file_size_mb: Annotated[int, Depends(get_request_file_size_limit)] = 0,
+):
+    """
+    Queue OCR processing of a PDF and return immediately with a job id.
+
+    Poll `GET /{agent_id}/jobs/{job_id}` or subscribe to
+    `GET /{agent_id}/jobs/{job_id}/events` (Server-Sent Events) for progress.
+    If the same PDF was already processed by this agent with an unchanged
+    configuration, the completed job is returned right away with `cached: true`.
+    """
+    validate_api_key_for_app(app_id, api_key, db)
+    validate_agent_ownership(db, agent_id, app_id)
+
+    agent = AgentService().get_agent(db, agent_id, agent_type='ocr_agent')
+    if not agent or not isinstance(agent, OCRAgent):
+        raise HTTPException(status_code=404, detail="OCR Agent not found")
+
+    job, cached = await OCRJobService.submit_job(agent, pdf, db, max_size_mb=max_file_size_mb)
+    return OCRJobSchema(**OCRJobService.to_dict(job, cached=cached))
+
+
+@ocr_router.get("/{agent_id}/jobs/{job_id}",
+                summary="Get OCR job",
+                tags=["OCR"],
+                response_model=OCRJobSchema,
+                responses={404: {"description": "OCR job not found"}})
+async def get_ocr_job(
+    app_id: int,
+    agent_id: int,
+    job_id: str,
+    api_key: Annotated[str, Depends(get_api_key_auth)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Return the status, progress and (once completed) the result of an OCR job."""
+    validate_api_key_for_app(app_id, api_key, db)
+    validate_agent_ownership(db, agent_id, app_id)
+
+    job = OCRJobService.get_job(job_id, agent_id, db)
+    return OCRJobSchema(**OCRJobService.to_dict(job))
+
+
+@ocr_router.get("/{agent_id}/jobs/{job_id}/events",
+                summary="Stream OCR job progress",
+                tags=["OCR"],
+                responses={
+                    200: {"content": {"text/event-stream": {"schema": {"type": "string"}}}},
+                    404: {"description": "OCR job not found"},
+                })
+async def stream_ocr_job_events(
+    app_id: int,
+    agent_id: int,
+    job_id: str,
+    api_key: Annotated[str, Depends(get_api_key_auth)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Stream OCR job progress as Server-Sent Events.
+
+    Each event is a JSON object with "type" and "data" fields:
+    - **progress**: status and processed/total page counts
+    - **done**: the completed job including its result
+    - **error**: the job failed
+    """
+    validate_api_key_for_app(app_id, api_key, db)
+    validate_agent_ownership(db, agent_id, app_id)
+    OCRJobService.get_job(job_id, agent_id, db)
+
+    return StreamingResponse(
+        OCRJobService.stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -1,4 +1,3 @@
-import base64
 import hashlib
 import httpx
 import ipaddress
@@ -11,15 +10,18 @@ import json
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 from urllib.parse import urlparse
 
 from db.database import get_db
-from models.app import App
+from services.auth_cache_service import CachedApp, auth_cache
 from services.agent_execution_service import AgentExecutionService
 from services.agent_streaming_service import AgentStreamingService
 from services.agent_service import AgentService
 from services.file_management_service import FileManagementService
+from services.file_size_limit_service import FileSizeLimitService, UPLOAD_CHUNK_SIZE
+from services.openai_conversation_service import OpenAIConversationService, chain_digest
+from tools.streaming_utils import SSE_DONE, SSE_ERROR, SSE_TOKEN, encode_json
 from utils.logger import get_logger
 
 from .auth import get_openai_api_key_auth, validate_api_key_for_app, create_api_key_user_context
@@ -30,6 +32,7 @@ from .schemas_openai import (
     OpenAIModel,
     OpenAIChoice,
     OpenAIChoiceMessage,
+    OpenAIPromptTokensDetails,
     OpenAITokenUsage
 )
 
@@ -44,6 +47,11 @@ def _compute_system_fingerprint(agent_id: int, service_id) -> str:
     return f"mtn-{digest[:12]}"
 
 
+def _cached_tokens(usage: dict) -> int:
+    """Prompt tokens the provider served from its prompt cache during the turn."""
+    return (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+
+
 def _response_format_instruction(response_format: dict | None) -> str | None:
     """Return a system-level instruction string implied by response_format, or None."""
     if not response_format:
@@ -66,6 +74,23 @@ def _response_format_instruction(response_format: dict | None) -> str | None:
         )
     return None
 
+class _ClaimReleasingStreamingResponse(StreamingResponse):
+    """StreamingResponse that calls ``on_close`` once sending ends, however it ends.
+
+    Unlike a ``finally`` in the body generator this also runs when the client
+    disconnects before the body is ever iterated.
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._on_close()
+
 # Maximum bytes we will ever buffer from a remote image URL, regardless of
 # what the app's max_file_size_mb is configured to.  This acts as an absolute
 # hard ceiling so a misconfigured or unlimited app cannot be abused for a
@@ -115,11 +140,8 @@ def _validate_image_url(url: str) -> None:
             detail="Image URL resolves to a private or reserved IP address and is not allowed.",
         )
 
-def get_app_by_identifier(db: Session, app_identifier: str) -> App:
-    if app_identifier.isdigit():
-        app = db.query(App).filter(App.app_id == int(app_identifier)).first()
-    else:
-        app = db.query(App).filter(App.slug == app_identifier).first()
+def get_app_by_identifier(db: Session, app_identifier: str) -> CachedApp:
+    app = auth_cache.get_app(db, app_identifier)
     
     if not app:
         raise HTTPException(status_code=404, detail="App not found")
@@ -132,7 +154,7 @@ def get_app_by_identifier(db: Session, app_identifier: str) -> App:
     response_model=OpenAIModelListResponse,
     tags=["OpenAI Compatible API"],
     summary="List available models",
-    description="Lists the currently available memoryless agents that can be used with the OpenAI-compatible chat completions endpoint."
+    description="Lists the agents that can be used with the OpenAI-compatible chat completions endpoint."
 )
 async def list_models(
     app_id: str,
@@ -142,18 +164,16 @@ async def list_models(
     app = get_app_by_identifier(db, app_id)
     validate_api_key_for_app(app.app_id, api_key, db)
     
-    # We only return memoryless agents
     agent_service = AgentService()
     agents = agent_service.get_agents(db, app.app_id)
     
     models = []
     for agent in agents:
-        if not agent.has_memory:
-            models.append(OpenAIModel(
-                id=str(agent.agent_id),
-                created=int(agent.create_date.timestamp()) if hasattr(agent, 'create_date') and agent.create_date else int(time.time()),
-                owned_by=app.name
-            ))
+        models.append(OpenAIModel(
+            id=str(agent.agent_id),
+            created=int(agent.create_date.timestamp()) if hasattr(agent, 'create_date') and agent.create_date else int(time.time()),
+            owned_by=app.name
+        ))
             
     return OpenAIModelListResponse(data=models)
 
@@ -161,7 +181,11 @@ async def list_models(
     "/chat/completions",
     tags=["OpenAI Compatible API"],
     summary="Create chat completion",
-    description="Creates a model response for the given chat conversation. Supports streaming with `stream=True`. Only works with memoryless agents.",
+    description=(
+        "Creates a model response for the given chat conversation. Supports streaming with `stream=True`. "
+        "For agents with memory, a request that repeats a previous exchange verbatim resumes that "
+        "conversation and only its newest message is sent to the agent."
+    ),
     responses={
         200: {
             "description": "Successful chat completion response. Returns standard JSON schema if stream is false, or an SSE event stream if stream is true.",
@@ -175,6 +199,7 @@ async def list_models(
 async def chat_completions(
     app_id: str,
     request: OpenAIChatCompletionRequest,
+    http_request: Request,
     api_key: Annotated[str, Depends(get_openai_api_key_auth)],
     db: Annotated[Session, Depends(get_db)]
 ):
@@ -208,12 +233,6 @@ async def chat_completions(
     
     if not agent or agent.app_id != app.app_id:
         raise HTTPException(status_code=404, detail="Agent not found")
-        
-    if agent.has_memory:
-        raise HTTPException(
-            status_code=400, 
-            detail="Agent has memory enabled. OpenAI API only supports memoryless agents."
-        )
 
     system_fingerprint = _compute_system_fingerprint(
         agent_id, getattr(agent, "service_id", None)
@@ -237,86 +256,120 @@ async def chat_completions(
 
     # First, filter out system messages
     non_system_messages = [msg for msg in request.messages if msg.role != "system"]
+
+    # Agents with memory resume the conversation whose checkpoint already holds
+    # everything but the newest message; only that message is then processed.
+    conversation_id = None
+    prefix_digest = request_digest = None
+    if agent.has_memory and non_system_messages:
+        prefix_digest = chain_digest((m.role, m.content) for m in non_system_messages[:-1])
+        request_digest = chain_digest(
+            [(non_system_messages[-1].role, non_system_messages[-1].content)], prefix_digest
+        )
+        if len(non_system_messages) > 1:
+            conversation_id = OpenAIConversationService.claim(db, agent_id, user_context, prefix_digest)
+        if conversation_id:
+            logger.info(f"OpenAI chat for agent {agent_id} resumes conversation {conversation_id}")
+            non_system_messages = non_system_messages[-1:]
+
+    def remember_reply(result_conversation_id: Optional[int], reply_text: str) -> None:
+        if request_digest:
+            OpenAIConversationService.remember(
+                db, result_conversation_id, chain_digest([("assistant", reply_text)], request_digest)
+            )
+
+    run_started = False
+
+    def mark_run_started() -> None:
+        nonlocal run_started
+        run_started = True
+
+    def release_claim() -> None:
+        # The turn failed before the agent ran: let the client retry the same
+        # history against this conversation. Once the run has started the
+        # checkpoint may already hold the new message, so the claim is kept.
+        if conversation_id and not run_started:
+            OpenAIConversationService.remember(db, conversation_id, prefix_digest)
+
+    try:
+        history_texts = []
+        latest_message_text = ""
+        latest_role = "user"
     
-    history_texts = []
-    latest_message_text = ""
-    latest_role = "user"
-    
-    for i, msg in enumerate(non_system_messages):
-        is_last = (i == len(non_system_messages) - 1)
-        if is_last:
-            latest_role = msg.role
+        for i, msg in enumerate(non_system_messages):
+            is_last = (i == len(non_system_messages) - 1)
+            if is_last:
+                latest_role = msg.role
             
-        msg_text = ""
-        if isinstance(msg.content, str):
-            msg_text = msg.content
-        elif isinstance(msg.content, list):
-            part_texts = []
-            max_image_size_mb: int = getattr(app, 'max_file_size_mb', 0) or 0
-            for part in msg.content:
-                if part.type == "text":
-                    part_texts.append(part.text)
-                elif part.type == "image_url":
-                    url = part.image_url.url
-                    img_data = None
-                    ext = ".jpg"
-
-                    if url.startswith("data:image/"):
-                        try:
-                            header, base64_data = url.split(",", 1)
-                            mime_type = header.split(";")[0].replace("data:", "")
-                            ext = mimetypes.guess_extension(mime_type) or ".jpg"
-                            img_data = base64.b64decode(base64_data)
-                        except Exception as e:
-                            logger.error(f"Failed to parse base64 image: {e}")
-                            continue
-                    elif url.startswith("http"):
-                        try:
-                            _validate_image_url(url)
-                            byte_cap = (
-                                max_image_size_mb * 1024 * 1024
-                                if max_image_size_mb > 0
-                                else _MAX_IMAGE_DOWNLOAD_BYTES
-                            )
-                            chunks: list[bytes] = []
-                            total = 0
-                            async with httpx.AsyncClient() as client:
-                                async with client.stream("GET", url, timeout=10.0) as resp:
-                                    resp.raise_for_status()
-                                    content_type = resp.headers.get("content-type", "image/jpeg")
-                                    ext = mimetypes.guess_extension(content_type) or ".jpg"
-                                    async for chunk in resp.aiter_bytes(chunk_size=65536):
-                                        total += len(chunk)
-                                        if total > byte_cap:
-                                            raise HTTPException(
-                                                status_code=413,
-                                                detail=(
-                                                    f"Remote image exceeds the maximum allowed size "
-                                                    f"({byte_cap // (1024 * 1024)}MB)."
-                                                ),
-                                            )
-                                        chunks.append(chunk)
-                            img_data = b"".join(chunks)
-                        except HTTPException:
-                            raise
-                        except Exception as e:
-                            logger.error(f"Failed to download image URL {url}: {e}")
-                            continue
+            msg_text = ""
+            if isinstance(msg.content, str):
+                msg_text = msg.content
+            elif isinstance(msg.content, list):
+                part_texts = []
+                max_upload_size_mb: int = getattr(app, 'max_file_size_mb', 0) or 0
+                for part in msg.content:
+                    if part.type == "text":
+                        part_texts.append(part.text)
+                    elif part.type == "image_url":
+                        url = part.image_url.url
+                        ext = ".jpg"
+                        # Payloads are spooled to disk past UPLOAD_CHUNK_SIZE so
+                        # memory per attachment stays bounded
+                        temp_f = tempfile.SpooledTemporaryFile(max_size=UPLOAD_CHUNK_SIZE)
+                        img_size = 0
 
-                    if img_data:
-                        if max_image_size_mb > 0:
-                            img_size_mb = len(img_data) / (1024 * 1024)
-                            if img_size_mb > max_image_size_mb:
-                                raise HTTPException(
-                                    status_code=413,
-                                    detail=(
-                                        f"Image size ({img_size_mb:.2f}MB) exceeds the maximum "
-                                        f"allowed ({max_image_size_mb}MB) for this app."
-                                    ),
+                        if url.startswith("data:image/"):
+                            try:
+                                comma = url.index(",")
+                                mime_type = url[5:comma].split(";")[0]
+                                ext = mimetypes.guess_extension(mime_type) or ".jpg"
+                                img_size, _ = FileSizeLimitService.decode_base64_to_file(
+                                    url, temp_f, start=comma + 1,
+                                    max_size_mb=max_upload_size_mb, filename="image",
+                                )
+                            except HTTPException:
+                                temp_f.close()
+                                raise
+                            except Exception as e:
+                                temp_f.close()
+                                logger.error(f"Failed to parse base64 image: {e}")
+                                continue
+                        elif url.startswith("http"):
+                            try:
+                                _validate_image_url(url)
+                                byte_cap = (
+                                    max_upload_size_mb * 1024 * 1024
+                                    if max_upload_size_mb > 0
+                                    else _MAX_IMAGE_DOWNLOAD_BYTES
                                 )
+                                async with httpx.AsyncClient() as client:
+                                    async with client.stream("GET", url, timeout=10.0) as resp:
+                                        resp.raise_for_status()
+                                        content_type = resp.headers.get("content-type", "image/jpeg")
+                                        ext = mimetypes.guess_extension(content_type) or ".jpg"
+                                        async for chunk in resp.aiter_bytes(chunk_size=65536):
+                                            img_size += len(chunk)
+                                            if img_size > byte_cap:
+                                                raise HTTPException(
+                                                    status_code=413,
+                                                    detail=(
+                                                        f"Remote image exceeds the maximum allowed size "
+                                                        f"({byte_cap // (1024 * 1024)}MB)."
+                                                    ),
+                                                )
+                                            temp_f.write(chunk)
+                            except HTTPException:
+                                temp_f.close()
+                                raise
+                            except Exception as e:
+                                temp_f.close()
+                                logger.error(f"Failed to download image URL {url}: {e}")
+                                continue
+
+                        if not img_size:
+                            temp_f.close()
+                            continue
                         try:
-                            temp_f = tempfile.SpooledTemporaryFile(max_size=1024*1024*10)
-                            temp_f.write(img_data)
                             temp_f.seek(0)
                             upload_file = UploadFile(file=temp_f, filename=f"image_{uuid.uuid4().hex[:8]}{ext}")
                             file_ref = await file_service.upload_file(
@@ -327,185 +380,219 @@ async def chat_completions(
                             file_references.append(file_ref)
                         except Exception as e:
                             logger.error(f"Failed to process image payload: {e}")
+                        finally:
+                            temp_f.close()
 
-                elif part.type == "input_audio":
-                    audio_format = part.input_audio.format  # "wav" or "mp3"
-                    try:
-                        audio_bytes = base64.b64decode(part.input_audio.data)
-                        temp_f = tempfile.SpooledTemporaryFile(max_size=1024 * 1024 * 10)
-                        temp_f.write(audio_bytes)
-                        temp_f.seek(0)
-                        upload_file = UploadFile(
-                            file=temp_f,
-                            filename=f"audio_{uuid.uuid4().hex[:8]}.{audio_format}",
-                        )
-                        file_ref = await file_service.upload_file(
-                            file=upload_file,
-                            agent_id=agent_id,
-                            user_context=user_context,
-                        )
-                        file_references.append(file_ref)
-                    except Exception as e:
-                        logger.error(f"Failed to process audio payload: {e}")
-
-                elif part.type == "file":
-                    file_obj = part.file
-                    if file_obj.file_id:
-                        # Reference an already-uploaded file by its ID
-                        existing_ref = await file_service.get_file_reference(file_obj.file_id)
-                        if existing_ref:
-                            file_references.append(existing_ref)
-                        else:
-                            logger.warning(f"file_id '{file_obj.file_id}' not found in file service")
-                    elif file_obj.file_data:
-                        filename = file_obj.filename or f"file_{uuid.uuid4().hex[:8]}.bin"
+                    elif part.type == "input_audio":
+                        audio_format = part.input_audio.format  # "wav" or "mp3"
+                        temp_f = tempfile.SpooledTemporaryFile(max_size=UPLOAD_CHUNK_SIZE)
                         try:
-                            raw_bytes = base64.b64decode(file_obj.file_data)
-                            temp_f = tempfile.SpooledTemporaryFile(max_size=1024 * 1024 * 10)
-                            temp_f.write(raw_bytes)
+                            FileSizeLimitService.decode_base64_to_file(
+                                part.input_audio.data, temp_f,
+                                max_size_mb=max_upload_size_mb, filename="audio",
+                            )
                             temp_f.seek(0)
-                            upload_file = UploadFile(file=temp_f, filename=filename)
+                            upload_file = UploadFile(
+                                file=temp_f,
+                                filename=f"audio_{uuid.uuid4().hex[:8]}.{audio_format}",
+                            )
                             file_ref = await file_service.upload_file(
                                 file=upload_file,
                                 agent_id=agent_id,
                                 user_context=user_context,
                             )
                             file_references.append(file_ref)
+                        except HTTPException:
+                            raise
                         except Exception as e:
-                            logger.error(f"Failed to process file payload: {e}")
+                            logger.error(f"Failed to process audio payload: {e}")
+                        finally:
+                            temp_f.close()
+
+                    elif part.type == "file":
+                        file_obj = part.file
+                        if file_obj.file_id:
+                            # Reference an already-uploaded file by its ID
+                            existing_ref = await file_service.get_file_reference(
+                                file_obj.file_id, agent_id, user_context
+                            )
+                            if not existing_ref:
+                                logger.warning(f"file_id '{file_obj.file_id}' not found for agent {agent_id}")
+                                raise HTTPException(status_code=404, detail=f"File '{file_obj.file_id}' not found")
+                            file_references.append(existing_ref)
+                        elif file_obj.file_data:
+                            filename = file_obj.filename or f"file_{uuid.uuid4().hex[:8]}.bin"
+                            temp_f = tempfile.SpooledTemporaryFile(max_size=UPLOAD_CHUNK_SIZE)
+                            try:
+                                FileSizeLimitService.decode_base64_to_file(
+                                    file_obj.file_data, temp_f,
+                                    max_size_mb=max_upload_size_mb, filename=filename,
+                                )
+                                temp_f.seek(0)
+                                upload_file = UploadFile(file=temp_f, filename=filename)
+                                file_ref = await file_service.upload_file(
+                                    file=upload_file,
+                                    agent_id=agent_id,
+                                    user_context=user_context,
+                                )
+                                file_references.append(file_ref)
+                            except HTTPException:
+                                raise
+                            except Exception as e:
+                                logger.error(f"Failed to process file payload: {e}")
+                            finally:
+                                temp_f.close()
 
-            msg_text = " ".join(part_texts)
+                msg_text = " ".join(part_texts)
             
-        if is_last:
-            latest_message_text = msg_text
-        else:
-            history_texts.append(f"{msg.role}: {msg_text}")
+            if is_last:
+                latest_message_text = msg_text
+            else:
+                history_texts.append(f"{msg.role}: {msg_text}")
             
-    # Now construct the structured formatting
-    formatted_message = ""
-    if history_texts:
-        formatted_message += "--- Conversation History ---\n"
-        formatted_message += "\n\n".join(history_texts)
-        formatted_message += "\n--- End of History ---\n\n"
+        # Now construct the structured formatting
+        formatted_message = ""
+        if history_texts:
+            formatted_message += "--- Conversation History ---\n"
+            formatted_message += "\n\n".join(history_texts)
+            formatted_message += "\n--- End of History ---\n\n"
         
-    formatted_message += f"[Latest Input]\n{latest_role}: {latest_message_text}"
+        formatted_message += f"[Latest Input]\n{latest_role}: {latest_message_text}"
 
-    # FR-8: response_format injection
-    rf_instruction = _response_format_instruction(request.response_format)
-    if rf_instruction:
-        formatted_message = f"[System Instruction]\n{rf_instruction}\n\n" + formatted_message
+        # FR-8: response_format injection
+        rf_instruction = _response_format_instruction(request.response_format)
+        if rf_instruction:
+            formatted_message = f"[System Instruction]\n{rf_instruction}\n\n" + formatted_message
+
+        if request.stream:
+            streaming_service = AgentStreamingService(db)
+            events = streaming_service.stream_agent_events(
+                agent_id=agent_id,
+                message=formatted_message,
+                file_references=file_references,
+                search_params=None,
+                user_context=user_context,
+                conversation_id=conversation_id,
+                db=db,
+                is_disconnected=http_request.is_disconnected,
+                on_run_start=mark_run_started,
+            )
+        else:
+            execution_service = AgentExecutionService(db)
+            result = await execution_service.execute_agent_chat_with_file_refs(
+                agent_id=agent_id,
+                message=formatted_message,
+                file_references=file_references,
+                search_params=None,
+                user_context=user_context,
+                conversation_id=conversation_id,
+                db=db,
+                on_run_start=mark_run_started,
+            )
+    except BaseException:
+        release_claim()
+        raise
 
     if request.stream:
-        streaming_service = AgentStreamingService(db)
-        generator = streaming_service.stream_agent_chat(
-            agent_id=agent_id,
-            message=formatted_message,
-            file_references=file_references,
-            search_params=None,
-            user_context=user_context,
-            conversation_id=None,
-            db=db,
-        )
-        
+        include_usage = bool((request.stream_options or {}).get("include_usage"))
+
         async def openai_sse_generator():
             completion_id = f"chatcmpl-{uuid.uuid4()}"
-            yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': str(agent_id), 'system_fingerprint': system_fingerprint, 'choices': [{'index': 0, 'delta': {'role': 'assistant'}, 'finish_reason': None}]})}\n\n"
-
-            async for event in generator:
-                try:
-                    if event.startswith("data: "):
-                        data_str = event[6:].strip()
-                        event_data = json.loads(data_str)
-                        if event_data.get("type") == "token":
-                            chunk = {
-                                "id": completion_id,
-                                "object": "chat.completion.chunk",
-                                "created": int(time.time()),
-                                "model": str(agent_id),
-                                "system_fingerprint": system_fingerprint,
-                                "choices": [{"index": 0, "delta": {"content": event_data.get("data", {}).get("content", "")}, "finish_reason": None}]
-                            }
-                            yield f"data: {json.dumps(chunk)}\n\n"
-                        elif event_data.get("type") == "error":
-                            chunk = {
-                                "id": completion_id,
-                                "object": "chat.completion.chunk",
-                                "created": int(time.time()),
-                                "model": str(agent_id),
-                                "system_fingerprint": system_fingerprint,
-                                "choices": [{"index": 0, "delta": {"content": f"\\n\\n[Error: {event_data.get('data', {}).get('message', 'unknown error')}]"}, "finish_reason": "stop"}]
-                            }
-                            yield f"data: {json.dumps(chunk)}\n\n"
-                        elif event_data.get("type") == "done":
-                            chunk = {
-                                "id": completion_id,
-                                "object": "chat.completion.chunk",
-                                "created": int(time.time()),
-                                "model": str(agent_id),
-                                "system_fingerprint": system_fingerprint,
-                                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
-                            }
-                            yield f"data: {json.dumps(chunk)}\n\n"
-                except Exception as e:
-                    logger.warning(
-                        "Skipping unparseable SSE event: %s — raw event: %.200r",
-                        e,
-                        event,
-                    )
-
-            yield "data: [DONE]\n\n"
+            created = int(time.time())
+
+            def chunk(delta: dict, finish_reason: Optional[str] = None) -> bytes:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": str(agent_id),
+                    "system_fingerprint": system_fingerprint,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return b"data: " + encode_json(payload) + b"\n\n"
+
+            def usage_chunk(usage: dict) -> bytes:
+                # stream_options.include_usage: a final chunk with no choices
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": str(agent_id),
+                    "system_fingerprint": system_fingerprint,
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": usage.get("prompt_tokens", 0),
+                        "completion_tokens": usage.get("completion_tokens", 0),
+                        "total_tokens": usage.get("total_tokens", 0),
+                        "prompt_tokens_details": {"cached_tokens": _cached_tokens(usage)},
+                    },
+                }
+                return b"data: " + encode_json(payload) + b"\n\n"
+
+            yield chunk({"role": "assistant"})
+
+            reply_parts: List[str] = []
+            # Events arrive unserialized; each one is encoded exactly once here
+            async for event in events:
+                if event.type == SSE_TOKEN:
+                    content = event.data.get("content", "")
+                    reply_parts.append(content)
+                    yield chunk({"content": content})
+                elif event.type == SSE_ERROR:
+                    message = event.data.get("message", "unknown error")
+                    yield chunk({"content": f"\\n\\n[Error: {message}]"}, "stop")
+                elif event.type == SSE_DONE:
+                    remember_reply(event.data.get("conversation_id"), "".join(reply_parts))
+                    yield chunk({}, "stop")
+                    if include_usage:
+                        yield usage_chunk(event.data.get("usage") or {})
+
+            yield b"data: [DONE]\n\n"
             
-        return StreamingResponse(openai_sse_generator(), media_type="text/event-stream")
-        
-    else:
-        execution_service = AgentExecutionService(db)
-        result = await execution_service.execute_agent_chat_with_file_refs(
-            agent_id=agent_id,
-            message=formatted_message,
-            file_references=file_references,
-            search_params=None,
-            user_context=user_context,
-            conversation_id=None,
-            db=db,
+        return _ClaimReleasingStreamingResponse(
+            openai_sse_generator(), on_close=release_claim, media_type="text/event-stream"
         )
+
+    response_text = result.get("response", "")
+    if isinstance(response_text, dict):
+        # Structured output from output_parser: must be valid JSON, not Python repr
+        response_text = json.dumps(response_text, ensure_ascii=False)
+    elif isinstance(response_text, list):
+        # Complex response, extract text
+        text_parts = []
+        for item in response_text:
+            if isinstance(item, dict) and item.get("type") == "text":
+                text_parts.append(item.get("text", ""))
+        response_text = " ".join(text_parts)
+    elif not isinstance(response_text, str):
+        response_text = str(response_text)
+    remember_reply(result.get("conversation_id"), response_text)
         
-        response_text = result.get("response", "")
-        if isinstance(response_text, dict):
-            # Structured output from output_parser: must be valid JSON, not Python repr
-            response_text = json.dumps(response_text, ensure_ascii=False)
-        elif isinstance(response_text, list):
-            # Complex response, extract text
-            text_parts = []
-            for item in response_text:
-                if isinstance(item, dict) and item.get("type") == "text":
-                    text_parts.append(item.get("text", ""))
-            response_text = " ".join(text_parts)
-        elif not isinstance(response_text, str):
-            response_text = str(response_text)
-            
-        usage_data = result.get("metadata", {}).get("usage", {})
-        prompt_tokens = usage_data.get("prompt_tokens", 0) if isinstance(usage_data, dict) else 0
-        completion_tokens = usage_data.get("completion_tokens", 0) if isinstance(usage_data, dict) else 0
-        
-        return OpenAIChatCompletionResponse(
-            id=f"chatcmpl-{uuid.uuid4()}",
-            created=int(time.time()),
-            model=str(agent_id),
-            system_fingerprint=system_fingerprint,
-            response_format=inferred_response_format,
-            choices=[
-                OpenAIChoice(
-                    index=0,
-                    message=OpenAIChoiceMessage(
-                        role="assistant",
-                        content=response_text
-                    ),
-                    finish_reason="stop"
-                )
-            ],
-            usage=OpenAITokenUsage(
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=prompt_tokens + completion_tokens
+    usage_data = result.get("metadata", {}).get("usage", {})
+    prompt_tokens = usage_data.get("prompt_tokens", 0) if isinstance(usage_data, dict) else 0
+    completion_tokens = usage_data.get("completion_tokens", 0) if isinstance(usage_data, dict) else 0
+    cached = _cached_tokens(usage_data) if isinstance(usage_data, dict) else 0
+    
+    return OpenAIChatCompletionResponse(
+        id=f"chatcmpl-{uuid.uuid4()}",
+        created=int(time.time()),
+        model=str(agent_id),
+        system_fingerprint=system_fingerprint,
+        response_format=inferred_response_format,
+        choices=[
+            OpenAIChoice(
+                index=0,
+                message=OpenAIChoiceMessage(
+                    role="assistant",
+                    content=response_text
+                ),
+                finish_reason="stop"
             )
+        ],
+        usage=OpenAITokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=OpenAIPromptTokensDetails(cached_tokens=cached),
         )
+    )
@@ -83,7 +83,8 @@ class PublicConversationSchema(BaseModel):
 class PublicConversationListResponseSchema(BaseModel):
     """Paginated list of conversations"""
     conversations: List[PublicConversationSchema]
-    total: int
+    total: Optional[int] = None  # Only counted for the first page
+    next_cursor: Optional[str] = None
 
 class PublicConversationWithHistorySchema(BaseModel):
     """Conversation with message history"""
@@ -93,6 +94,7 @@ class PublicConversationWithHistorySchema(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     messages: List[Dict[str, Any]] = []
+    next_cursor: Optional[int] = None
 
 class CreateConversationRequestSchema(BaseModel):
     """Request to create a new conversation"""
@@ -113,6 +115,21 @@ class OCRResponseSchema(BaseModel):
     pages: int
     confidence: Optional[float] = None
 
+class OCRJobSchema(BaseModel):
+    """Asynchronous OCR job status. ``result`` is set once the job has completed."""
+    job_id: str
+    agent_id: int
+    status: str
+    cached: bool = False
+    pdf_filename: Optional[str] = None
+    total_pages: Optional[int] = None
+    processed_pages: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[OCRResponseSchema] = None
+    error: Optional[str] = None
+
 # ==================== SILO SCHEMAS ====================
 
 class PublicSiloSchema(BaseModel):
@@ -92,10 +92,14 @@ class OpenAIChoice(BaseModel):
     message: OpenAIChoiceMessage
     finish_reason: str = "stop"
 
+class OpenAIPromptTokensDetails(BaseModel):
+    cached_tokens: int = 0
+
 class OpenAITokenUsage(BaseModel):
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    prompt_tokens_details: Optional[OpenAIPromptTokensDetails] = None
 
 class OpenAIChatCompletionResponse(BaseModel):
     id: str
@@ -6,6 +6,8 @@ import tempfile
 import os
 
 from services.silo_service import SiloService
+from services.file_size_limit_service import FileSizeLimitService
+from routers.controls.file_size_limit import get_request_file_size_limit
 
 from .schemas import (
     MessageResponseSchema,
@@ -565,6 +567,7 @@ async def index_file_document(
     api_key: Annotated[str, Depends(get_api_key_auth)],
     db: Annotated[Session, Depends(get_db)],
     metadata: Annotated[Optional[str], Form()] = None,
+    max_file_size_mb: Annotated[int, Depends(get_request_file_size_limit)] = 0,
 ):
     """Index file content in a silo."""
     validate_api_key_for_app(app_id, api_key, db)
@@ -592,12 +595,14 @@ async def index_file_document(
             else:
                 file_extension = ".txt"
 
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=file_extension
-        ) as temp_file:
-            temp_file_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
+        fd, temp_file_path = tempfile.mkstemp(suffix=file_extension)
+        os.close(fd)
+        await FileSizeLimitService.stream_upload_to_file(
+            file,
+            temp_file_path,
+            max_size_mb=max_file_size_mb,
+            app_id=app_id,
+        )
 
         docs = SiloService.extract_documents_from_file(
             temp_file_path, file_extension, metadata_dict
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class UserListResponse(BaseModel):
@@ -43,6 +43,21 @@ class MarketplaceQuotaResetResponse(BaseModel):
     timestamp: str
 
 
+class AuthCacheCounters(BaseModel):
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+    size: int
+
+
+class AuthCacheStatsResponse(BaseModel):
+    enabled: bool
+    ttl_seconds: float
+    max_entries: int
+    caches: Dict[str, AuthCacheCounters]
+
+
 # ==================== SAAS ADMIN SCHEMAS ====================
 
 class UserAdminRead(BaseModel):
@@ -44,6 +44,7 @@ class AgentDetailSchema(BaseModel):
     tool_ids: List[int] = []
     mcp_config_ids: List[int] = []
     skill_ids: List[int] = []
+    silo_ids: List[int] = []
     created_at: Optional[datetime] = None
     request_count: int
     # OCR-specific fields
@@ -89,6 +90,7 @@ class CreateUpdateAgentSchema(BaseModel):
     tool_ids: Optional[List[int]] = []
     mcp_config_ids: Optional[List[int]] = []
     skill_ids: Optional[List[int]] = []
+    silo_ids: Optional[List[int]] = []
     # OCR-specific fields
     vision_service_id: Optional[int] = None
     vision_system_prompt: Optional[str] = None
@@ -37,10 +37,12 @@ class ConversationResponse(ConversationBase):
 class ConversationListResponse(BaseModel):
     """Schema for listing conversations"""
     conversations: list[ConversationResponse]
-    total: int
+    total: Optional[int] = None  # Only counted for the first page
+    next_cursor: Optional[str] = None
 
 
 class ConversationWithHistoryResponse(ConversationResponse):
     """Schema for conversation with message history"""
-    messages: list[dict] = []  # List of {role: str, content: str}
+    messages: list[dict] = []  # List of {message_id: int, role: str, content: str}
+    next_cursor: Optional[int] = None  # `before` value for the previous page of messages
 
@@ -159,7 +159,8 @@ class MarketplaceConversationSchema(BaseModel):
 class MarketplaceConversationListSchema(BaseModel):
     """List of consumer's marketplace conversations."""
     conversations: List[MarketplaceConversationSchema]
-    total: int
+    total: Optional[int] = None  # Only counted for the first page
+    next_cursor: Optional[str] = None
 
 
 # ==================== RATING SCHEMAS ====================
@@ -74,9 +74,10 @@ class SiloSearchSchema(BaseModel):
     """Schema for searching within a silo.
 
     `limit` — max results. Defaults to DEFAULT_SEARCH_LIMIT (100), capped at MAX_SEARCH_LIMIT (200).
-    `search_type` — one of "similarity" (default), "similarity_score_threshold", "mmr".
+    `search_type` — one of "similarity" (default), "similarity_score_threshold", "mmr", "hybrid".
+        "hybrid" fuses dense and full-text (exact term) matches by reciprocal rank.
     `score_threshold` — float 0-1, only meaningful when search_type="similarity_score_threshold".
-    `fetch_k` — candidate pool size for MMR, only meaningful when search_type="mmr".
+    `fetch_k` — candidate pool size for MMR or hybrid fusion, only meaningful when search_type is "mmr" or "hybrid".
     `lambda_mult` — diversity factor 0-1 for MMR (1=max relevance, 0=max diversity). Default 0.5.
     """
     query: str
@@ -92,7 +93,7 @@ class SiloSearchSchema(BaseModel):
     @field_validator("search_type")
     @classmethod
     def validate_search_type(cls, v: str) -> str:
-        allowed = {"similarity", "similarity_score_threshold", "mmr"}
+        allowed = {"similarity", "similarity_score_threshold", "mmr", "hybrid"}
         if v not in allowed:
             raise ValueError(f"search_type must be one of {sorted(allowed)}, got '{v}'")
         return v
@@ -103,9 +104,13 @@ class SiloSearchSchema(BaseModel):
             raise ValueError(
                 "score_threshold is only valid when search_type='similarity_score_threshold'"
             )
-        if (self.fetch_k is not None or self.lambda_mult is not None) and self.search_type != "mmr":
+        if self.fetch_k is not None and self.search_type not in ("mmr", "hybrid"):
             raise ValueError(
-                "fetch_k and lambda_mult are only valid when search_type='mmr'"
+                "fetch_k is only valid when search_type is 'mmr' or 'hybrid'"
+            )
+        if self.lambda_mult is not None and self.search_type != "mmr":
+            raise ValueError(
+                "lambda_mult is only valid when search_type='mmr'"
             )
         if self.min_content_length is not None and self.min_content_length < 0:
             raise ValueError("min_content_length must be >= 0")
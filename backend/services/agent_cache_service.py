@@ -8,7 +8,7 @@ import os
 logger = logging.getLogger(__name__)
 
 
-def _content_blocks_to_str(blocks: list) -> str:
+def content_blocks_to_str(blocks: list) -> str:
     """Convert a LangChain multimodal content block list to a display string.
 
     Handles text, image_url and image_generation_call block types so that
@@ -122,6 +122,16 @@ class CheckpointerCacheService:
             )
         return cls._checkpointer
 
+    @classmethod
+    def get_pool(cls) -> AsyncConnectionPool:
+        """Return the shared connection pool, for maintenance queries on the checkpoint tables."""
+        if cls._pool is None:
+            raise RuntimeError(
+                "Checkpointer pool not initialized. "
+                "Call CheckpointerCacheService.initialize_pool() during application startup."
+            )
+        return cls._pool
+
     @classmethod
     async def invalidate_checkpointer_async(cls, agent_id: int, session_id: str = "default"):
         """
@@ -205,7 +215,7 @@ class CheckpointerCacheService:
                             content = msg.content if hasattr(msg, 'content') else str(msg)
 
                             if isinstance(content, list):
-                                content_str = _content_blocks_to_str(content)
+                                content_str = content_blocks_to_str(content)
                             else:
                                 content_str = str(content) if content else ""
 
@@ -225,7 +235,7 @@ class CheckpointerCacheService:
                         content = msg.content if hasattr(msg, 'content') else str(msg)
 
                         if isinstance(content, list):
-                            content_str = _content_blocks_to_str(content)
+                            content_str = content_blocks_to_str(content)
                         else:
                             content_str = str(content) if content else ""
 
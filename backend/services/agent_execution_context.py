@@ -10,6 +10,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from utils.token_usage import TurnUsage
+
 
 @dataclass
 class AgentExecutionContext:
@@ -17,7 +19,7 @@ class AgentExecutionContext:
 
     # Core identity
     agent_id: int
-    agent: Any                          # Agent ORM instance (lightweight, pre-access-check)
+    agent: Any                          # Agent ORM instance (same row as fresh_agent)
     fresh_agent: Any                    # Agent ORM instance with all relationships loaded
 
     # Message
@@ -34,7 +36,16 @@ class AgentExecutionContext:
     working_dir: Optional[str] = None
     pre_existing_files: set = field(default_factory=set)
 
+    # MCP tools discovered during setup (None means create_agent loads them)
+    mcp_tools: Optional[List[Any]] = None
+
+    # Wall-clock duration of each setup phase, in milliseconds
+    timings: Dict[str, float] = field(default_factory=dict)
+
     # Original inputs (needed by finalize for metadata)
     processed_files: List[Dict[str, Any]] = field(default_factory=list)
     search_params: Optional[Dict[str, Any]] = None
     user_context: Optional[Dict[str, Any]] = None
+
+    # Tokens of every model call made while the turn is tracked
+    usage: TurnUsage = field(default_factory=TurnUsage)
@@ -1,8 +1,11 @@
 import os
 import asyncio
 import ast
+import contextvars
 import json
-from typing import List, Dict, Any, Optional
+import time
+from datetime import date
+from typing import Callable, List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
@@ -10,23 +13,27 @@ from sqlalchemy.orm import Session
 from models.agent import Agent
 from models.ocr_agent import OCRAgent
 from services.agent_execution_context import AgentExecutionContext
-from tools.PDFTools import extract_text_from_pdf, convert_pdf_to_images, check_pdf_has_text
+from tools.PDFTools import extract_text_from_pdf
 from tools.ocrAgentTools import (
-    convert_image_to_base64,
-    extract_text_from_image,
     format_data_with_text_llm,
     format_data_from_vision,
     get_data_from_extracted_text,
     get_document_data_from_pages
 )
 from tools.aiServiceTools import get_llm
-from tools.outputParserTools import create_model_from_json_schema
+from tools.outputParserTools import get_parser_model_by_id
 from services.agent_service import AgentService
 from services.file_management_service import FileManagementService
+from services.ocr_engine_service import ConcurrentOCREngine, OCRProgressCallback
+from services.pdf_extraction_service import PDFExtractionService, PageKind
+from services.file_size_limit_service import FileSizeLimitService
+from services.write_behind_service import write_behind
 from services.session_management_service import SessionManagementService
 from repositories.agent_execution_repository import AgentExecutionRepository
 from utils.logger import get_logger
 from utils.config import get_app_config
+from utils.metrics import AGENT_FINALIZE_SECONDS, AGENT_PREPARE_PHASE_SECONDS
+from utils.token_usage import TurnUsage, track_token_usage
 
 logger = get_logger(__name__)
 
@@ -62,6 +69,26 @@ def _inject_file_markers(text: str, files: list) -> str:
     return text
 
 
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+async def _timed(timings: Dict[str, float], phase: str, awaitable):
+    """Await ``awaitable`` and record its duration under ``timings[phase]``."""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[phase] = _elapsed_ms(started)
+
+
+def _snapshot_dir(path: Optional[str]) -> set:
+    """Names of the entries already in ``path`` (empty if it does not exist)."""
+    if path and os.path.isdir(path):
+        return set(os.listdir(path))
+    return set()
+
+
 class AgentExecutionService:
     """Unified service for agent execution - used by both public and internal APIs"""
     
@@ -82,9 +109,13 @@ class AgentExecutionService:
         user_context: Dict = None,
         conversation_id: int = None,
         db: Session = None,
+        on_run_start: Optional[Callable[[], None]] = None,
     ) -> Dict[str, Any]:
         """Execute agent chat with persistent file references.
 
+        ``on_run_start`` is called just before the agent runs, i.e. once the
+        turn may reach the conversation checkpoint.
+
         Returns:
             Dict containing agent response and metadata.
         """
@@ -99,15 +130,19 @@ class AgentExecutionService:
                 db=db,
             )
 
-            response = await self._execute_agent_async(
-                ctx.fresh_agent,
-                ctx.enhanced_message,
-                ctx.search_params,
-                ctx.session_id_for_cache,
-                ctx.user_context,
-                ctx.image_files,
-                working_dir=ctx.working_dir,
-            )
+            if on_run_start is not None:
+                on_run_start()
+            with track_token_usage(ctx.usage):
+                response = await self._execute_agent_async(
+                    ctx.fresh_agent,
+                    ctx.enhanced_message,
+                    ctx.search_params,
+                    ctx.session_id_for_cache,
+                    ctx.user_context,
+                    ctx.image_files,
+                    working_dir=ctx.working_dir,
+                    mcp_tools=ctx.mcp_tools,
+                )
 
             return await self._finalize_turn(ctx, response, db)
 
@@ -130,14 +165,21 @@ class AgentExecutionService:
         """Run all setup steps for one agent chat turn.
 
         Validates access, resolves the conversation / session, builds the
-        enhanced message, and resolves the working directory.  Does NOT invoke
-        the LangGraph chain — that is the caller's responsibility.
+        enhanced message, discovers MCP tools, and resolves the working
+        directory.  Independent I/O runs concurrently and per-phase durations
+        are recorded in ``ctx.timings``.  Does NOT invoke the LangGraph chain —
+        that is the caller's responsibility.
 
         Returns:
             A fully populated :class:`AgentExecutionContext`.
         """
-        # 1. Fetch agent (lightweight — no relationships)
-        agent = self.agent_service.get_agent(db, agent_id)
+        timings: Dict[str, float] = {}
+        turn_started = time.perf_counter()
+
+        # 1. Load the agent once, with every relationship execution needs
+        started = time.perf_counter()
+        agent = self.agent_execution_repo.get_agent_with_relationships(db, agent_id)
+        timings['load_agent'] = _elapsed_ms(started)
         if not agent:
             raise HTTPException(status_code=404, detail=_AGENT_NOT_FOUND)
 
@@ -169,62 +211,41 @@ class AgentExecutionService:
                     "file_path": file_ref.file_path,
                 })
 
-        # 6. Get / create conversation for memory-enabled agents
-        session = None
-        conversation = None
-        if agent.has_memory:
-            from services.conversation_service import ConversationService
-
-            if conversation_id:
-                conversation = ConversationService.get_conversation(
-                    db=db,
-                    conversation_id=conversation_id,
-                    user_context=user_context,
-                    agent_id=agent_id,
-                )
-                if not conversation:
-                    raise HTTPException(
-                        status_code=404, detail="Conversation not found or access denied"
-                    )
-                session_suffix = conversation.session_id.replace(f"conv_{agent_id}_", "")
-                session = await self.session_service.get_user_session(
-                    agent_id=agent_id,
-                    user_context=user_context,
-                    conversation_id=session_suffix,
-                )
-            else:
-                conversation = ConversationService.create_conversation(
-                    db=db,
-                    agent_id=agent_id,
-                    user_context=user_context,
-                    title=None,
-                )
-                logger.info(
-                    "Auto-created conversation %s for agent %s",
-                    conversation.conversation_id,
-                    agent_id,
-                )
-                session_suffix = conversation.session_id.replace(f"conv_{agent_id}_", "")
-                session = await self.session_service.get_user_session(
-                    agent_id=agent_id,
-                    user_context=user_context,
-                    conversation_id=session_suffix,
-                )
+        # 6. MCP tool discovery, conversation resolution and message building
+        #    are independent, so they overlap instead of running back to back.
+        #    The MCP configs are copied out of the session first: the conversation
+        #    thread commits on `db`, which must not be touched from the loop meanwhile.
+        from tools.agentTools import detach_mcp_configs, load_mcp_tools
 
-        # 7. Re-query agent with all relationships eagerly loaded
-        fresh_agent = self.agent_execution_repo.get_agent_with_relationships(db, agent_id)
-        if not fresh_agent:
-            raise HTTPException(status_code=404, detail="Agent not found in database")
+        mcp_configs = detach_mcp_configs(agent)
+        mcp_task = asyncio.ensure_future(
+            _timed(timings, 'mcp_discovery', load_mcp_tools(agent_id, mcp_configs, user_context))
+        )
+        try:
+            (session, conversation), (enhanced_message, image_files) = await asyncio.gather(
+                _timed(timings, 'conversation', self._resolve_conversation(
+                    agent, conversation_id, user_context, db
+                )),
+                _timed(timings, 'files', asyncio.to_thread(
+                    self._prepare_message_with_files, message, processed_files
+                )),
+            )
+            mcp_tools = await mcp_task
+        except BaseException:
+            mcp_task.cancel()
+            raise
 
-        # 8. Build enhanced message + separate image files
-        enhanced_message, image_files = self._prepare_message_with_files(message, processed_files)
+        # Auto-creating the conversation committed `db`, which expired the agent;
+        # reload it eagerly rather than lazy-loading each relationship later.
+        if conversation is not None and not conversation_id:
+            agent = self.agent_execution_repo.get_agent_with_relationships(db, agent_id)
 
-        session_id_for_cache = session.id if (fresh_agent.has_memory and session) else None
+        session_id_for_cache = session.id if (agent.has_memory and session) else None
         effective_conv_id = conversation_id or (
             conversation.conversation_id if conversation else None
         )
 
-        # 9. Resolve working directory
+        # 7. Resolve working directory
         app_config = get_app_config()
         tmp_base = app_config['TMP_BASE_FOLDER']
         if effective_conv_id:
@@ -235,15 +256,25 @@ class AgentExecutionService:
             session_key = f"agent_{agent_id}_user_{user_id}_app_{app_id_ctx}"
             working_dir = os.path.join(tmp_base, "persistent", session_key)
 
-        # 10. Snapshot working dir so finalize can exclude pre-existing files
-        pre_existing_files: set = set()
-        if working_dir and os.path.isdir(working_dir):
-            pre_existing_files = set(os.listdir(working_dir))
+        # 8. Snapshot working dir so finalize can exclude pre-existing files
+        pre_existing_files = await _timed(
+            timings, 'workspace_snapshot', asyncio.to_thread(_snapshot_dir, working_dir)
+        )
+
+        timings['total'] = _elapsed_ms(turn_started)
+        for phase, ms in timings.items():
+            AGENT_PREPARE_PHASE_SECONDS.labels(phase=phase).observe(ms / 1000)
+        logger.info(
+            "Prepared turn for agent %s in %.1f ms (%s)",
+            agent_id,
+            timings['total'],
+            ", ".join(f"{phase}={ms:.1f}" for phase, ms in timings.items() if phase != 'total'),
+        )
 
         return AgentExecutionContext(
             agent_id=agent_id,
             agent=agent,
-            fresh_agent=fresh_agent,
+            fresh_agent=agent,
             enhanced_message=enhanced_message,
             image_files=image_files,
             session=session,
@@ -252,11 +283,70 @@ class AgentExecutionService:
             session_id_for_cache=session_id_for_cache,
             working_dir=working_dir,
             pre_existing_files=pre_existing_files,
+            mcp_tools=mcp_tools,
+            timings=timings,
             processed_files=processed_files,
             search_params=search_params,
             user_context=user_context,
         )
 
+    async def _resolve_conversation(
+        self,
+        agent: Agent,
+        conversation_id: Optional[int],
+        user_context: Optional[Dict],
+        db: Session,
+    ) -> tuple:
+        """Get or create the conversation and its memory session for memory-enabled agents.
+
+        The conversation queries run in a worker thread so they overlap with
+        MCP tool discovery on the event loop.
+
+        Returns:
+            Tuple of (session, conversation); both None when the agent has no memory.
+        """
+        if not agent.has_memory:
+            return None, None
+
+        from services.conversation_service import ConversationService
+
+        agent_id = agent.agent_id
+
+        def _get_or_create():
+            if conversation_id:
+                found = ConversationService.get_conversation(
+                    db=db,
+                    conversation_id=conversation_id,
+                    user_context=user_context,
+                    agent_id=agent_id,
+                )
+                if not found:
+                    raise HTTPException(
+                        status_code=404, detail="Conversation not found or access denied"
+                    )
+                return found, found.session_id
+            created = ConversationService.create_conversation(
+                db=db,
+                agent_id=agent_id,
+                user_context=user_context,
+                title=None,
+            )
+            logger.info(
+                "Auto-created conversation %s for agent %s",
+                created.conversation_id,
+                agent_id,
+            )
+            return created, created.session_id
+
+        conversation, conversation_session_id = await asyncio.to_thread(_get_or_create)
+        session_suffix = conversation_session_id.replace(f"conv_{agent_id}_", "")
+        session = await self.session_service.get_user_session(
+            agent_id=agent_id,
+            user_context=user_context,
+            conversation_id=session_suffix,
+        )
+        return session, conversation
+
     async def _finalize_turn(
         self,
         ctx: AgentExecutionContext,
@@ -270,8 +360,9 @@ class AgentExecutionService:
         3. Parse the response with the agent's output parser.
         4. Update the agent request count.
         5. Touch the session to keep it alive.
-        6. Record system LLM usage (SaaS mode).
+        6. Record system LLM usage (SaaS mode) and buffer the turn's token usage.
         7. Increment the conversation message count.
+        8. Append the exchange to the conversation's display history.
 
         Args:
             ctx: The context produced by :meth:`_prepare_turn`.
@@ -280,12 +371,13 @@ class AgentExecutionService:
 
         Returns:
             A dict with keys ``response``, ``agent_id``, ``conversation_id``,
-            ``metadata``, ``parsed_response``, ``effective_conv_id``, and
-            ``files_data`` (used by the streaming path to emit the ``done`` event).
+            ``metadata`` (including the turn's token ``usage``),
+            ``parsed_response``, ``effective_conv_id``, and ``files_data``
+            (used by the streaming path to emit the ``done`` event).
         """
-        import re as _re
         from tools.agentTools import parse_agent_response
 
+        started = time.perf_counter()
         response = raw_response
         files_data: List[Dict[str, Any]] = []
 
@@ -338,43 +430,35 @@ class AgentExecutionService:
                 logger.warning(
                     "Failed to record system LLM usage: %s", _usage_exc, exc_info=True
                 )
+        self._record_token_usage(ctx.agent, ctx.usage)
 
         # 7. Update conversation message count
         if ctx.conversation:
             from services.conversation_service import ConversationService
 
-            if isinstance(parsed_response, list):
-                try:
-                    text_parts = [
-                        item.get("text", "")
-                        for item in parsed_response
-                        if isinstance(item, dict) and item.get("type") == "text"
-                    ]
-                    last_message_preview = " ".join(text_parts)[:200]
-                except Exception:
-                    last_message_preview = str(parsed_response)[:200]
-            else:
-                last_message_preview = (
-                    parsed_response[:200]
-                    if isinstance(parsed_response, str)
-                    else str(parsed_response)[:200]
-                )
-
-            last_message_preview = _re.sub(
-                r'!\[[^\]]*\]\(file://[^\)]*\)', '[imagen]', last_message_preview
-            )
-            last_message_preview = _re.sub(
-                r'\[📎[^\]]*\]\(file://[^\)]*\)', '[archivo]', last_message_preview
-            )
-            last_message_preview = last_message_preview.strip() or '[imagen generada]'
-
             ConversationService.increment_message_count(
                 db=db,
                 conversation_id=ctx.conversation.conversation_id,
-                last_message=last_message_preview,
+                last_message=ConversationService.message_preview(parsed_response),
                 increment_by=2,
             )
 
+            # 8. Append the exchange to the conversation's display history
+            user_content = ctx.fresh_agent.prompt_template.format(question=ctx.enhanced_message)
+            if ctx.image_files:
+                user_content = [{"type": "text", "text": user_content}] + [
+                    {"type": "image_url"} for _ in ctx.image_files
+                ]
+            try:
+                ConversationService.record_turn(db, ctx.conversation, user_content, parsed_response)
+            except Exception as _history_exc:
+                db.rollback()
+                logger.warning(
+                    "Failed to record history for conversation %s: %s",
+                    ctx.conversation.conversation_id, _history_exc,
+                )
+
+        AGENT_FINALIZE_SECONDS.observe(time.perf_counter() - started)
         return {
             "response": parsed_response,
             "agent_id": ctx.agent_id,
@@ -386,6 +470,7 @@ class AgentExecutionService:
                 "agent_type": ctx.agent.type,
                 "files_processed": len(ctx.processed_files),
                 "has_memory": ctx.agent.has_memory,
+                "usage": ctx.usage.as_dict(),
             },
             # Fields used by the streaming path to emit the done event
             "parsed_response": parsed_response,
@@ -429,8 +514,20 @@ class AgentExecutionService:
             temp_pdf_path = await self._save_uploaded_file(pdf_file)
             
             try:
-                # Process PDF using existing tools
-                result = await self._process_pdf_with_ocr(agent, temp_pdf_path, db)
+                # Reuse a previous result for the same PDF and agent configuration
+                from services.ocr_job_service import OCRJobService, compute_file_sha256
+                pdf_sha256 = await asyncio.to_thread(compute_file_sha256, temp_pdf_path)
+                result = OCRJobService.get_cached_result(agent, pdf_sha256, db)
+
+                usage = TurnUsage()
+                if result is None:
+                    # Process PDF using existing tools
+                    result = await self._process_pdf_with_ocr(agent, temp_pdf_path, db, usage=usage)
+                    try:
+                        OCRJobService.record_result(agent, pdf_sha256, result, db, pdf_filename=pdf_file.filename)
+                    except Exception as cache_exc:
+                        db.rollback()
+                        logger.warning(f"Failed to cache OCR result: {cache_exc}")
                 
                 # Update request count
                 self._update_request_count(agent, db)
@@ -455,7 +552,8 @@ class AgentExecutionService:
                             "agent_name": agent.name,
                             "pdf_filename": pdf_file.filename,
                             "pages_processed": len(result.get("pages", [])),
-                            "confidence": result.get("confidence", 0.0)
+                            "confidence": result.get("confidence", 0.0),
+                            "usage": usage.as_dict(),
                         }
                     }
                 
@@ -508,6 +606,15 @@ class AgentExecutionService:
                     # Invalidate the checkpointer for this specific session (use async version)
                     await CheckpointerCacheService.invalidate_checkpointer_async(agent_id, session.id)
                     logger.info(f"Invalidated checkpointer for agent {agent_id}, session {session.id}")
+
+                # The history projection must empty along with the checkpoint
+                if conversation_id and db is not None:
+                    from services.conversation_service import ConversationService
+                    conversation = ConversationService.get_conversation(
+                        db, int(conversation_id), user_context, agent_id
+                    )
+                    if conversation:
+                        ConversationService.reset_history(db, conversation)
                 
                 # Reset the session object (clears messages and memory)
                 # This should be done after invalidating checkpointer to ensure we have the session ID
@@ -518,7 +625,7 @@ class AgentExecutionService:
             file_service = FileManagementService()
             
             # Get all attached files for this session
-            attached_files = await file_service.list_attached_files(agent_id, user_context)
+            attached_files = await file_service.list_attached_files(agent_id, user_context, include_content=False)
             
             # Remove each file
             for file_data in attached_files:
@@ -701,19 +808,46 @@ class AgentExecutionService:
             logger.error(f"Error in _process_single_file: {str(e)}")
             return None
     
-    async def _process_pdf_with_ocr(self, agent: OCRAgent, pdf_path: str, db: Session) -> Dict[str, Any]:
-        """Process PDF using OCR workflow respecting output parser/data structure"""
+    async def _process_pdf_with_ocr(
+        self,
+        agent: OCRAgent,
+        pdf_path: str,
+        db: Session,
+        progress_callback: Optional[OCRProgressCallback] = None,
+        usage: Optional[TurnUsage] = None,
+    ) -> Dict[str, Any]:
+        """Process PDF using OCR workflow respecting output parser/data structure
+
+        Token usage of the run is added to ``usage`` (when given) and buffered
+        for the agent's daily totals.
+        """
+        usage = usage if usage is not None else TurnUsage()
+        with track_token_usage(usage):
+            context = contextvars.copy_context()
         # Run all OCR processing in thread pool (blocking operations: PDF parsing, LLM calls, etc.)
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            self._executor,
-            self._process_pdf_with_ocr_sync,
-            agent, pdf_path, db
-        )
-        return result
+        try:
+            return await loop.run_in_executor(
+                self._executor,
+                context.run,
+                self._process_pdf_with_ocr_sync,
+                agent, pdf_path, db, progress_callback
+            )
+        finally:
+            self._record_token_usage(agent, usage)
     
-    def _process_pdf_with_ocr_sync(self, agent: OCRAgent, pdf_path: str, db: Session) -> Dict[str, Any]:
-        """Synchronous OCR processing - called in thread pool"""
+    def _process_pdf_with_ocr_sync(
+        self,
+        agent: OCRAgent,
+        pdf_path: str,
+        db: Session,
+        progress_callback: Optional[OCRProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Synchronous OCR processing - called in thread pool.
+
+        ``progress_callback`` receives ``(completed, total, page, succeeded)``
+        after each page of a scanned PDF is processed by the vision model.
+        """
         try:
             # Re-load agent with all relationships
             ocr_agent_id = agent.agent_id
@@ -731,11 +865,8 @@ class AgentExecutionService:
                     
                     if output_parser and output_parser.fields:
                         logger.info(f"Found output parser: {output_parser.name} with fields: {output_parser.fields}")
-                        # Create pydantic model from schema like in original
-                        pydantic_class = create_model_from_json_schema(
-                            output_parser.fields,
-                            output_parser.name
-                        )
+                        # Cached per parser version, nested parsers included
+                        pydantic_class = get_parser_model_by_id(output_parser.parser_id)
                         logger.info(f"Output parser model created successfully: {output_parser.name} -> {pydantic_class}")
                     else:
                         logger.warning(f"Output parser {agent.output_parser_id} not found or has no fields")
@@ -743,12 +874,29 @@ class AgentExecutionService:
                 except Exception as e:
                     logger.warning(f"Failed to load output parser: {str(e)}")
             
-            # Check if PDF has text
-            has_text = check_pdf_has_text(pdf_path)
-            
-            if has_text:
+            # Parse the PDF once and classify every page (text / scanned / blank)
+            pdf_pages = PDFExtractionService.get_pages(pdf_path)
+            scanned_pages = PDFExtractionService.split_by_kind(pdf_pages)[PageKind.SCANNED]
+            has_text = PDFExtractionService.has_text(pdf_pages)
+
+            vision_model = None
+            if scanned_pages or not has_text:
+                try:
+                    vision_model = get_llm(agent, is_vision=True)
+                except ValueError as e:
+                    logger.warning(f"Vision model unavailable for OCR agent {agent.agent_id}: {str(e)}")
+            if has_text and scanned_pages and vision_model is None:
+                logger.warning(
+                    f"No vision model configured, {len(scanned_pages)} scanned pages "
+                    f"fall back to text extraction"
+                )
+
+            # Set when the text model fails and a degraded result is returned
+            llm_failed = False
+
+            if has_text and vision_model is None:
                 # Extract text directly
-                text_content = extract_text_from_pdf(pdf_path)
+                text_content = "".join(page.text for page in pdf_pages)
                 logger.info(f"Extracted text from PDF: {len(text_content)} characters")
                 
                 # Process with text model and output parser if available
@@ -777,6 +925,7 @@ class AgentExecutionService:
                             }
                     except Exception as e:
                         logger.error(f"Error processing with LLM and output parser: {str(e)}", exc_info=True)
+                        llm_failed = True
                 
                 # If no text model or output parser, return raw text
                 logger.info("No text model or output parser configured, returning raw text")
@@ -784,49 +933,35 @@ class AgentExecutionService:
                     "method": "text_extraction",
                     "content": text_content,
                     "extracted_text": text_content,
-                    "confidence": 0.9
+                    "confidence": 0.9,
+                    "fallback": llm_failed,
                 }
             else:
-                # Convert to images and process with vision
+                # Rasterize pages lazily and OCR them concurrently with a
+                # single shared vision client
                 app_config = get_app_config()
                 images_dir = app_config['IMAGES_PATH']
-                os.makedirs(images_dir, exist_ok=True)
-                
-                image_paths = convert_pdf_to_images(pdf_path, images_dir)
-                logger.info(f"Converted PDF to {len(image_paths)} images")
-                
-                # Process images with vision model
-                vision_results = []
-                for i, image_path in enumerate(image_paths):
-                    try:
-                        base64_image = convert_image_to_base64(image_path)
-                        
-                        # Get vision model
-                        vision_model = get_llm(agent, is_vision=True)
-                        if not vision_model:
-                            raise ValueError("Vision model not found")
-                        
-                        # Extract text from image
-                        vision_result = extract_text_from_image(
-                            base64_image, 
-                            agent.vision_system_prompt, 
-                            vision_model, 
-                            f"Page {i+1}"
-                        )
-                        vision_results.append({
-                            "page": i + 1,
-                            "extracted_text": vision_result
-                        })
-                        
-                        # Clean up image file
-                        try:
-                            os.remove(image_path)
-                        except OSError:
-                            pass
-                            
-                    except Exception as e:
-                        logger.warning(f"Error processing image {i+1}: {str(e)}")
-                        continue
+
+                engine = ConcurrentOCREngine(
+                    vision_model=vision_model,
+                    vision_system_prompt=agent.vision_system_prompt,
+                    progress_callback=progress_callback,
+                )
+                if has_text:
+                    # Mixed PDF: only scanned pages go to the vision model,
+                    # pages with a text layer are reused as extracted
+                    vision_results = engine.process_pdf(
+                        pdf_path, images_dir, pages=[page.page_number for page in scanned_pages]
+                    )
+                    vision_results.extend(
+                        {"page": page.page_number, "extracted_text": page.text}
+                        for page in pdf_pages
+                        if page.kind == PageKind.TEXT
+                    )
+                    vision_results.sort(key=lambda r: r["page"])
+                else:
+                    vision_results = engine.process_pdf(pdf_path, images_dir)
+                logger.info(f"Vision OCR extracted {len(vision_results)} pages")
                 
                 # Process with text model if available and we have vision results
                 if agent.text_system_prompt and agent.service_id and vision_results:
@@ -857,17 +992,21 @@ class AgentExecutionService:
                                 "method": "vision_and_text",
                                 "content": final_result,
                                 "extracted_text": vision_results,
-                                "confidence": 0.8
+                                "confidence": 0.8,
+                                "failed_pages": engine.failed_pages,
                             }
                     except Exception as e:
                         logger.warning(f"Error processing with text model: {str(e)}")
+                        llm_failed = True
                 
                 # Return vision results directly
                 return {
                     "method": "vision_only",
                     "content": vision_results,
                     "extracted_text": vision_results,
-                    "confidence": 0.7
+                    "confidence": 0.7,
+                    "failed_pages": engine.failed_pages,
+                    "fallback": llm_failed,
                 }
                 
         except Exception as e:
@@ -969,7 +1108,8 @@ class AgentExecutionService:
         session_id_for_cache: str = None,
         user_context: Dict = None,
         image_files: List[Dict] = None,
-        working_dir: Optional[str] = None
+        working_dir: Optional[str] = None,
+        mcp_tools: Optional[List] = None,
     ) -> Any:
         """Execute agent in FastAPI's event loop using shared checkpointer pool.
         
@@ -980,90 +1120,85 @@ class AgentExecutionService:
         from tools.agentTools import create_agent, prepare_agent_config
         from langchain.messages import HumanMessage
 
-        mcp_client = None
-        try:
-            # Create the agent chain with all tools and capabilities
-            agent_chain, langsmith_config, mcp_client = await create_agent(
-                fresh_agent, search_params, session_id_for_cache, user_context, working_dir
-            )
-            
-            # Prepare configuration
-            config = prepare_agent_config(fresh_agent)
-            
-            # Add session-specific configuration if memory is enabled
-            if fresh_agent.has_memory and session_id_for_cache:
-                config["configurable"]["thread_id"] = f"thread_{fresh_agent.agent_id}_{session_id_for_cache}"
-                logger.info(f"Using session-aware thread_id: {config['configurable']['thread_id']}")
-            else:
-                config["configurable"]["thread_id"] = f"thread_{fresh_agent.agent_id}"
+        # Create the agent chain with all tools and capabilities
+        agent_chain, langsmith_config = await create_agent(
+            fresh_agent, search_params, session_id_for_cache, user_context, working_dir,
+            mcp_tools=mcp_tools,
+        )
+        
+        # Prepare configuration
+        config = prepare_agent_config(fresh_agent)
+        
+        # Add session-specific configuration if memory is enabled
+        if fresh_agent.has_memory and session_id_for_cache:
+            config["configurable"]["thread_id"] = f"thread_{fresh_agent.agent_id}_{session_id_for_cache}"
+            logger.info(f"Using session-aware thread_id: {config['configurable']['thread_id']}")
+        else:
+            config["configurable"]["thread_id"] = f"thread_{fresh_agent.agent_id}"
+        
+        # Add the question to config
+        config["configurable"]["question"] = message
+        
+        # Build the HumanMessage (handles text-only and multimodal images)
+        from tools.agentTools import build_human_message
+        message_payload = build_human_message(fresh_agent, message, image_files or [], user_context)
+        
+        if langsmith_config:
+            from langchain_core.tracers.langchain import LangChainTracer, wait_for_all_tracers
             
-            # Add the question to config
-            config["configurable"]["question"] = message
+            logger.info(
+                f"LangSmith tracing ENABLED for app '{langsmith_config['project_name']}'"
+            )
             
-            # Build the HumanMessage (handles text-only and multimodal images)
-            from tools.agentTools import build_human_message
-            message_payload = build_human_message(fresh_agent, message, image_files or [], user_context)
+            per_app_tracer = LangChainTracer(
+                client=langsmith_config["client"],
+                project_name=langsmith_config["project_name"],
+            )
+            config.setdefault("callbacks", []).append(per_app_tracer)
             
-            if langsmith_config:
-                from langchain_core.tracers.langchain import LangChainTracer, wait_for_all_tracers
-                
-                logger.info(
-                    f"LangSmith tracing ENABLED for app '{langsmith_config['project_name']}'"
-                )
-                
-                per_app_tracer = LangChainTracer(
-                    client=langsmith_config["client"],
-                    project_name=langsmith_config["project_name"],
-                )
-                config.setdefault("callbacks", []).append(per_app_tracer)
-                
-                with ls.tracing_context(
-                    client=langsmith_config["client"],
-                    project_name=langsmith_config["project_name"],
-                    enabled=True,
-                ):
-                    result = await agent_chain.ainvoke({"messages": [message_payload]}, config=config)
-                
-                try:
-                    wait_for_all_tracers()
-                except Exception as flush_err:
-                    logger.warning(f"Error flushing LangSmith traces: {flush_err}")
-            else:
+            with ls.tracing_context(
+                client=langsmith_config["client"],
+                project_name=langsmith_config["project_name"],
+                enabled=True,
+            ):
                 result = await agent_chain.ainvoke({"messages": [message_payload]}, config=config)
-
-            # LangChain v1: structured output is in 'structured_response' key
-            # when create_agent is called with response_format=pydantic_model
-            if isinstance(result, dict) and "structured_response" in result:
-                structured = result["structured_response"]
-                if structured is not None:
-                    return structured
             
-            # Extract the response from the result messages
-            if isinstance(result, dict) and "messages" in result and result["messages"] is not None:
-                # Get the last AI message
-                messages = result["messages"]
-                for msg in reversed(messages):
-                    if hasattr(msg, 'content') and msg.content:
-                        content = msg.content
-                        if isinstance(content, str):
-                            return content
-                        if isinstance(content, list):
-                            return self._extract_content_blocks(content, working_dir)
+            try:
+                wait_for_all_tracers()
+            except Exception as flush_err:
+                logger.warning(f"Error flushing LangSmith traces: {flush_err}")
+        else:
+            result = await agent_chain.ainvoke({"messages": [message_payload]}, config=config)
+
+        # LangChain v1: structured output is in 'structured_response' key
+        # when create_agent is called with response_format=pydantic_model
+        if isinstance(result, dict) and "structured_response" in result:
+            structured = result["structured_response"]
+            if structured is not None:
+                return structured
+        
+        # Extract the response from the result messages
+        if isinstance(result, dict) and "messages" in result and result["messages"] is not None:
+            # Get the last AI message
+            messages = result["messages"]
+            for msg in reversed(messages):
+                if hasattr(msg, 'content') and msg.content:
+                    content = msg.content
+                    if isinstance(content, str):
                         return content
-                # Fallback: return the last message content
-                if messages:
-                    return str(messages[-1].content) if hasattr(messages[-1], 'content') else str(messages[-1])
+                    if isinstance(content, list):
+                        return self._extract_content_blocks(content, working_dir)
+                    return content
+            # Fallback: return the last message content
+            if messages:
+                return str(messages[-1].content) if hasattr(messages[-1], 'content') else str(messages[-1])
+        
+        # If result is a string, return it directly
+        if isinstance(result, str):
+            return result
             
-            # If result is a string, return it directly
-            if isinstance(result, str):
-                return result
-                
-            # Fallback: convert to string
-            return str(result)
-        finally:
-            # As of langchain-mcp-adapters 0.1.0, MCP client doesn't need manual cleanup
-            if mcp_client:
-                logger.info("MCP client will be cleaned up automatically")
+        # Fallback: convert to string
+        return str(result)
     
     async def _save_uploaded_file(self, file: UploadFile) -> str:
         """Save uploaded file to temporary location"""
@@ -1078,18 +1213,23 @@ class AgentExecutionService:
         
         # Create temporary file in TMP_BASE_FOLDER/uploads
         suffix = os.path.splitext(file.filename)[1] if file.filename else ""
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=uploads_dir)
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=uploads_dir)
+        os.close(fd)
         
-        try:
-            # Write file content
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.flush()
-            
-            return temp_file.name
-        finally:
-            temp_file.close()
+        # Stream in chunks instead of buffering the whole upload in memory
+        await FileSizeLimitService.stream_upload_to_file(file, temp_path)
+        return temp_path
     
     def _update_request_count(self, agent: Agent, db: Session):
-        """Update agent request count"""
-        self.agent_execution_repo.update_agent_request_count(db, agent.agent_id) 
\ No newline at end of file
+        """Count the request; applied by the write-behind flusher"""
+        write_behind.increment_agent_requests(agent.agent_id)
+
+    @staticmethod
+    def _record_token_usage(agent: Agent, usage: TurnUsage) -> None:
+        """Buffer the tokens of a turn under the agent's app and today's date"""
+        app_id = getattr(agent, 'app_id', None)
+        if usage.llm_calls and app_id:
+            write_behind.add_token_usage(
+                app_id, agent.agent_id, date.today(),
+                usage.input_tokens, usage.output_tokens, usage.llm_calls,
+            )
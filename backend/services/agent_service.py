@@ -5,6 +5,7 @@ from models.ocr_agent import OCRAgent
 from schemas.agent_schemas import AgentListItemSchema, AgentDetailSchema
 from repositories.agent_repository import AgentRepository
 from repositories.skill_repository import SkillRepository
+from repositories.silo_repository import SiloRepository
 
 
 def _serialize_marketplace_profile(profile) -> Optional[Dict[str, Any]]:
@@ -109,6 +110,7 @@ class AgentService:
             tool_ids=associations['tool_ids'],
             mcp_config_ids=associations['mcp_ids'],
             skill_ids=associations['skill_ids'],
+            silo_ids=associations['silo_ids'],
             created_at=agent.create_date,
             request_count=getattr(agent, 'request_count', 0) or 0,
             # OCR-specific fields
@@ -383,6 +385,47 @@ class AgentService:
 
         db.commit()
 
+    def update_agent_silos(self, db: Session, agent_id: int, silo_ids: list, form_data: dict = None):
+        """Update the additional silos an agent searches alongside its primary silo"""
+        # Get the agent
+        agent = AgentRepository.get_by_id(db, agent_id)
+        if not agent:
+            return
+
+        # Convert silo_ids to list if it's not already
+        if isinstance(silo_ids, str):
+            silo_ids = [silo_ids]
+        elif not isinstance(silo_ids, list):
+            silo_ids = []
+
+        # Get existing silo associations
+        existing_silos = {assoc.silo_id: assoc for assoc in AgentRepository.get_agent_silo_associations(db, agent_id)}
+
+        # The primary silo is always searched, so it is not stored twice
+        requested_silo_ids = {int(id) for id in silo_ids if id} - {agent.silo_id}
+
+        # Only silos of the agent's own app may be attached
+        valid_silo_ids = SiloRepository.get_valid_silo_ids_for_app(db, requested_silo_ids, agent.app_id)
+
+        # Remove associations that are no longer needed
+        for silo_id in existing_silos.keys():
+            if silo_id not in valid_silo_ids:
+                AgentRepository.delete_agent_silo_association(db, existing_silos[silo_id])
+
+        # Update or create associations
+        for silo_id in valid_silo_ids:
+            description = form_data.get(f'silo_description_{silo_id}') if form_data else None
+
+            if silo_id in existing_silos:
+                # Update existing association
+                existing_silos[silo_id].description = description
+                db.add(existing_silos[silo_id])
+            else:
+                # Create new association
+                AgentRepository.create_agent_silo_association(db, agent_id, silo_id, description)
+
+        db.commit()
+
     def delete_agent(self, db: Session, agent_id: int) -> bool:
         """Delete agent"""
         return AgentRepository.delete_by_id(db, agent_id)
@@ -1,25 +1,43 @@
 """
 Streaming agent execution service.
 
-A thin SSE adapter over AgentExecutionService.  The setup and post-processing
-phases are fully delegated to AgentExecutionService._prepare_turn() and
-_finalize_turn(); this service only owns the astream loop that yields tokens
+A thin streaming adapter over AgentExecutionService.  The setup and
+post-processing phases are fully delegated to AgentExecutionService._prepare_turn()
+and _finalize_turn(); this service only owns the astream loop that yields tokens
 and tool events to the client.
+
+``stream_agent_events`` yields typed ``StreamEvent`` objects; each transport
+renders them once — ``stream_agent_chat`` as our native SSE lines, the
+OpenAI-compatible router as ``chat.completion.chunk`` objects.
+
+Token chunks are coalesced (see ``TokenCoalescer``) so fast models do not
+produce one frame and one socket write per chunk. When the caller passes an
+``is_disconnected`` probe, a dropped client stops the LangGraph run instead of
+letting it spend LLM tokens nobody will read.
 """
 
-from typing import AsyncGenerator, Dict, List, Any
+import time
+from contextlib import aclosing, nullcontext
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Any
 
 import langsmith as ls
 from sqlalchemy.orm import Session
 
 from tools.agentTools import create_agent, prepare_agent_config, build_human_message
 from tools.streaming_utils import (
+    StreamEvent,
     format_sse_event,
     map_stream_event,
+    SSE_DONE,
+    SSE_ERROR,
+    SSE_METADATA,
     SSE_TOKEN,
+    TokenCoalescer,
 )
 from services.agent_execution_service import AgentExecutionService
 from utils.logger import get_logger
+from utils.metrics import AGENT_STREAM_FIRST_TOKEN_SECONDS
+from utils.token_usage import track_token_usage
 
 logger = get_logger(__name__)
 
@@ -44,20 +62,56 @@ class AgentStreamingService:
         user_context: dict | None = None,
         conversation_id: int | None = None,
         db: Session | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
     ) -> AsyncGenerator[str, None]:
         """Stream an agent chat turn as SSE events.
 
-        Yields ``format_sse_event`` strings for each event in the following
-        sequence:
+        Renders every event of ``stream_agent_events`` with
+        ``format_sse_event``; see that method for the event sequence and
+        arguments.
+
+        Yields:
+            SSE-formatted strings (``"data: {...}\\n\\n"``).
+        """
+        async for event in self.stream_agent_events(
+            agent_id,
+            message,
+            file_references=file_references,
+            search_params=search_params,
+            user_context=user_context,
+            conversation_id=conversation_id,
+            db=db,
+            is_disconnected=is_disconnected,
+        ):
+            yield format_sse_event(event.type, event.data)
+
+    async def stream_agent_events(
+        self,
+        agent_id: int,
+        message: str,
+        file_references: list | None = None,
+        search_params: dict | None = None,
+        user_context: dict | None = None,
+        conversation_id: int | None = None,
+        db: Session | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        on_run_start: Callable[[], None] | None = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Stream an agent chat turn as typed events.
+
+        Yields a ``StreamEvent`` for each event in the following sequence:
 
         1. ``metadata`` — emitted immediately after setup with conversation/agent
            metadata so the client can bind the conversation ID before tokens
            arrive.
         2. ``thinking`` / ``tool_start`` / ``tool_end`` — emitted while the agent
            reasons and calls tools.
-        3. ``token`` — one per partial LLM text chunk.
+        3. ``token`` — partial LLM text, coalesced across chunks; buffered
+           text is always flushed before any other event.
         4. ``done`` — emitted once after the stream finishes, carrying the full
-           parsed response, conversation ID, and any generated files.
+           parsed response, conversation ID, any generated files and the
+           turn's token usage.  Not
+           emitted when the client disconnected.
         5. ``error`` — emitted instead of ``done`` if an unhandled exception
            occurs.
 
@@ -77,12 +131,18 @@ class AgentStreamingService:
                 created automatically.
             db: SQLAlchemy session.  If omitted the instance-level ``self.db``
                 is used.
+            is_disconnected: Optional probe (e.g. ``Request.is_disconnected``)
+                checked after each emission.  Once it reports a disconnect the
+                LangGraph run is closed and the turn is finalized with the
+                partial response.
+            on_run_start: Optional callback invoked just before the LangGraph
+                run starts, i.e. once the turn may reach the checkpoint.
 
         Yields:
-            SSE-formatted strings (``"data: {...}\\n\\n"``).
+            ``StreamEvent`` objects, not yet serialized.
         """
         effective_db = db or self.db
-        mcp_client = None
+        started = time.perf_counter()
 
         try:
             # ----------------------------------------------------------------
@@ -101,8 +161,8 @@ class AgentStreamingService:
             # ----------------------------------------------------------------
             # 2. Emit early metadata event so the client has conversation_id
             # ----------------------------------------------------------------
-            yield format_sse_event(
-                "metadata",
+            yield StreamEvent(
+                SSE_METADATA,
                 {
                     "conversation_id": ctx.effective_conv_id,
                     "agent_id": agent_id,
@@ -114,12 +174,13 @@ class AgentStreamingService:
             # ----------------------------------------------------------------
             # 3. Build agent chain
             # ----------------------------------------------------------------
-            agent_chain, langsmith_config, mcp_client = await create_agent(
+            agent_chain, langsmith_config = await create_agent(
                 ctx.fresh_agent,
                 ctx.search_params,
                 ctx.session_id_for_cache,
                 ctx.user_context,
                 ctx.working_dir,
+                mcp_tools=ctx.mcp_tools,
             )
 
             config = prepare_agent_config(ctx.fresh_agent)
@@ -165,7 +226,10 @@ class AgentStreamingService:
             # ----------------------------------------------------------------
             # 6. Streaming loop — the only part that stays in this service
             # ----------------------------------------------------------------
-            accumulated_content = ""
+            response_parts: List[str] = []
+            coalescer = TokenCoalescer()
+            first_token_seen = False
+            disconnected = False
 
             if langsmith_config:
                 stream_ctx = ls.tracing_context(
@@ -174,49 +238,83 @@ class AgentStreamingService:
                     enabled=True,
                 )
             else:
-                from contextlib import nullcontext
-
                 stream_ctx = nullcontext()
 
-            with stream_ctx:
-                async for mode, chunk in agent_chain.astream(
-                    {"messages": [message_payload]},
-                    config=config,
-                    stream_mode=["messages", "updates"],
-                ):
-                    events = map_stream_event(mode, chunk)
-                    if events:
+            # aclosing() cancels the graph run as soon as we stop iterating,
+            # whether we break on a disconnect or the consumer closes us.
+            if on_run_start is not None:
+                on_run_start()
+            with stream_ctx, track_token_usage(ctx.usage):
+                async with aclosing(
+                    agent_chain.astream(
+                        {"messages": [message_payload]},
+                        config=config,
+                        stream_mode=["messages", "updates"],
+                    )
+                ) as stream:
+                    async for mode, chunk in stream:
+                        events = map_stream_event(mode, chunk)
+                        if not events:
+                            continue
                         for event in events:
                             if event["type"] == SSE_TOKEN:
-                                accumulated_content += event["data"].get("content", "")
-                            yield format_sse_event(event["type"], event["data"])
+                                content = event["data"].get("content", "")
+                                response_parts.append(content)
+                                text = coalescer.add(content)
+                            else:
+                                # Tool and thinking events go out at once,
+                                # after the text that preceded them
+                                text = coalescer.flush()
+                            if text:
+                                if not first_token_seen:
+                                    first_token_seen = True
+                                    AGENT_STREAM_FIRST_TOKEN_SECONDS.observe(
+                                        time.perf_counter() - started
+                                    )
+                                yield StreamEvent(SSE_TOKEN, {"content": text})
+                            if event["type"] != SSE_TOKEN:
+                                yield StreamEvent(event["type"], event["data"])
+                            if text or event["type"] != SSE_TOKEN:
+                                if is_disconnected is not None and await is_disconnected():
+                                    disconnected = True
+                                    break
+                        if disconnected:
+                            break
+
+            if disconnected:
+                logger.info(
+                    "Client disconnected from agent %s stream; run cancelled", agent_id
+                )
+            else:
+                tail = coalescer.flush()
+                if tail:
+                    yield StreamEvent(SSE_TOKEN, {"content": tail})
 
             # ----------------------------------------------------------------
             # 7. Post-processing phase — delegates to AgentExecutionService
             # ----------------------------------------------------------------
             result = await self.execution_service._finalize_turn(
-                ctx, accumulated_content, effective_db
+                ctx, "".join(response_parts), effective_db
             )
+            if disconnected:
+                return
 
             # ----------------------------------------------------------------
             # 8. Emit done event
             # ----------------------------------------------------------------
-            yield format_sse_event(
-                "done",
+            yield StreamEvent(
+                SSE_DONE,
                 {
                     "response": result["parsed_response"],
                     "conversation_id": result["effective_conv_id"],
                     "files": result["files_data"],
+                    "usage": result["metadata"]["usage"],
                 },
             )
 
         except Exception as exc:
             logger.error("Error in streaming agent chat: %s", str(exc), exc_info=True)
-            yield format_sse_event("error", {"message": str(exc)})
-
-        finally:
-            if mcp_client:
-                logger.info("MCP client will be cleaned up automatically")
+            yield StreamEvent(SSE_ERROR, {"message": str(exc)})
 
     # ------------------------------------------------------------------
     # Private helpers
@@ -5,6 +5,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from models.api_key import APIKey
 from repositories.api_key_repository import APIKeyRepository
+from services.auth_cache_service import auth_cache
 from utils.logger import get_logger
 from schemas.api_key_schemas import APIKeyListItemSchema, APIKeyDetailSchema, APIKeyCreateResponseSchema
 
@@ -159,6 +160,7 @@ class APIKeyService:
         
         # Save changes
         updated_api_key = self.api_key_repository.update(db, api_key)
+        auth_cache.invalidate_api_key(key_id)
         
         logger.info(f"Updated API key {key_id} for app {app_id}")
         
@@ -191,6 +193,7 @@ class APIKeyService:
             return False
         
         self.api_key_repository.delete(db, api_key)
+        auth_cache.invalidate_api_key(key_id)
         
         logger.info(f"Deleted API key {key_id} for app {app_id}")
         return True
@@ -217,6 +220,7 @@ class APIKeyService:
         
         # Save changes
         self.api_key_repository.update(db, api_key)
+        auth_cache.invalidate_api_key(key_id)
         
         status_text = "activated" if api_key.is_active else "deactivated"
         logger.info(f"API key {key_id} {status_text} for app {app_id}")
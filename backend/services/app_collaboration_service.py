@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from models.app_collaborator import AppCollaborator, CollaborationRole, CollaborationStatus
 from models.app import App
 from repositories.app_collaboration_repository import AppCollaborationRepository
+from services.auth_cache_service import auth_cache
 from utils.logger import get_logger
 from datetime import datetime
 
@@ -127,6 +128,7 @@ class AppCollaborationService:
             # Update role
             update_data = {'role': CollaborationRole(new_role.lower())}
             self.repo.update_collaboration(collaboration, update_data)
+            auth_cache.invalidate_role(app_id, user_id)
             
             logger.info(f"Updated role for user {user_id} in app {app_id} to {new_role}")
             return True
@@ -149,6 +151,7 @@ class AppCollaborationService:
             
             # Delete collaboration
             success = self.repo.delete_collaboration(collaboration)
+            auth_cache.invalidate_role(app_id, user_id)
             
             if success:
                 logger.info(f"Removed user {user_id} from app {app_id}")
@@ -177,6 +180,7 @@ class AppCollaborationService:
             
             # Delete collaboration
             success = self.repo.delete_collaboration(collaboration)
+            auth_cache.invalidate_role(app_id, user_id)
             
             if success:
                 logger.info(f"User {user_id} left app {app_id}")
@@ -217,6 +221,7 @@ class AppCollaborationService:
                 return False
             
             self.repo.update_collaboration(collaboration, update_data)
+            auth_cache.invalidate_role(collaboration.app_id, collaboration.user_id)
             return True
             
         except Exception as e:
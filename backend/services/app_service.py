@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from models.app import App
 from repositories.app_repository import AppRepository
 from repositories.app_collaboration_repository import AppCollaborationRepository
+from services.auth_cache_service import auth_cache
 from datetime import datetime
 from utils.logger import get_logger
 
@@ -45,7 +46,9 @@ class AppService:
         if app_id:
             app = self.app_repo.get_by_id(app_id)
             if app:
-                return self.app_repo.update(app, app_data)
+                updated = self.app_repo.update(app, app_data)
+                auth_cache.invalidate_app(app_id)
+                return updated
 
         # Enforce app limit (SaaS mode only, no-op in self-managed)
         if user_id is not None:
@@ -179,6 +182,7 @@ class AppService:
             
             # 15. Finally, delete the app
             success = self.app_repo.delete(app)
+            auth_cache.invalidate_app(app_id)
             
             if success:
                 logger.info(f"Successfully deleted app {app_id} and all related data")
@@ -0,0 +1,262 @@
+"""
+Short-lived cache for authorization lookups on the request path.
+
+Public endpoints resolve the app (by id or slug) and validate the API key on
+every call, and internal endpoints resolve the caller's role in the app. Those
+lookups are cached here for ``AUTH_CACHE_TTL_SECONDS`` so a burst of requests
+hits the database once.
+
+Entries are immutable snapshots rather than ORM rows so they can be shared
+across sessions and threads. API keys are indexed by a SHA-256 digest of
+``app_id:key``; raw key values are never stored.
+
+Write paths (API key toggle/update/delete, app update/delete, collaborator
+changes, user (de)activation) invalidate the affected entries explicitly.
+Invalidation is local to the process, so other workers pick up the change
+when their entries expire. Setting ``AUTH_CACHE_TTL_SECONDS=0`` disables the
+cache.
+"""
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, joinedload
+
+from models.app import App
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+
+
+@dataclass(frozen=True)
+class CachedApp:
+    """Authorization-relevant fields of an App row."""
+    app_id: int
+    name: str
+    slug: Optional[str]
+    owner_id: Optional[int]
+    owner_active: bool
+    agent_rate_limit: int
+    max_file_size_mb: int
+    agent_cors_origins: Optional[str]
+    enable_openai_api: bool
+
+    @classmethod
+    def from_app(cls, app: App) -> "CachedApp":
+        owner = app.owner
+        return cls(
+            app_id=app.app_id,
+            name=app.name,
+            slug=app.slug,
+            owner_id=app.owner_id,
+            owner_active=bool(getattr(owner, 'is_active', True)) if owner else True,
+            agent_rate_limit=app.agent_rate_limit or 0,
+            max_file_size_mb=app.max_file_size_mb or 0,
+            agent_cors_origins=app.agent_cors_origins,
+            enable_openai_api=bool(app.enable_openai_api),
+        )
+
+
+@dataclass(frozen=True)
+class CachedAPIKey:
+    """An active API key together with its app owner's state."""
+    key_id: int
+    app_id: int
+    owner_id: Optional[int]
+    owner_active: bool
+
+
+class _Counters:
+    __slots__ = ('hits', 'misses', 'invalidations')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+
+def _digest_api_key(app_id: int, api_key: str) -> str:
+    return hashlib.sha256(f"{app_id}:{api_key}".encode()).hexdigest()
+
+
+class AuthCache:
+    """Thread-safe, size-bounded TTL cache of apps, API keys and app roles."""
+
+    def __init__(self, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.enabled = ttl_seconds > 0 and max_entries > 0
+        ttl = max(ttl_seconds, 1)
+        size = max(max_entries, 1)
+        self._lock = threading.Lock()
+        self._apps: TTLCache = TTLCache(maxsize=size, ttl=ttl)
+        self._slugs: TTLCache = TTLCache(maxsize=size, ttl=ttl)
+        self._api_keys: TTLCache = TTLCache(maxsize=size, ttl=ttl)
+        self._roles: TTLCache = TTLCache(maxsize=size, ttl=ttl)
+        self._counters = {name: _Counters() for name in ('apps', 'api_keys', 'roles')}
+
+    def _get(self, name: Optional[str], cache: TTLCache, key) -> Any:
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = cache.get(key)
+            if name is None:
+                return value
+            counters = self._counters[name]
+            if value is None:
+                counters.misses += 1
+            else:
+                counters.hits += 1
+            return value
+
+    def _set(self, cache: TTLCache, key, value) -> None:
+        if self.enabled:
+            with self._lock:
+                cache[key] = value
+
+    # ------------------------------------------------------------------
+    # Apps
+    # ------------------------------------------------------------------
+
+    def get_app(self, db: Session, app_identifier: Union[int, str]) -> Optional[CachedApp]:
+        """
+        Resolve an app by integer ID or slug.
+
+        Args:
+            db: Database session used on a cache miss
+            app_identifier: App ID (int or digit string) or slug
+
+        Returns:
+            CachedApp snapshot or None if the app does not exist
+        """
+        app_id: Optional[int] = None
+        if isinstance(app_identifier, int) or app_identifier.isdigit():
+            app_id = int(app_identifier)
+        else:
+            app_id = self._get(None, self._slugs, app_identifier)
+
+        cached = self._get('apps', self._apps, app_id) if app_id is not None else None
+        if cached is not None:
+            return cached
+        if app_id is None and self.enabled:
+            with self._lock:
+                self._counters['apps'].misses += 1
+
+        query = db.query(App).options(joinedload(App.owner))
+        if app_id is not None:
+            app = query.filter(App.app_id == app_id).first()
+        else:
+            app = query.filter(App.slug == app_identifier).first()
+        if not app:
+            return None
+
+        cached = CachedApp.from_app(app)
+        self._set(self._apps, cached.app_id, cached)
+        if cached.slug:
+            self._set(self._slugs, cached.slug, cached.app_id)
+        return cached
+
+    def invalidate_app(self, app_id: int) -> None:
+        """Drop an app together with its slug, API keys and role entries."""
+        with self._lock:
+            cached = self._apps.pop(app_id, None)
+            for slug in [s for s, a in self._slugs.items() if a == app_id]:
+                self._slugs.pop(slug, None)
+            for digest in [d for d, k in self._api_keys.items() if k.app_id == app_id]:
+                self._api_keys.pop(digest, None)
+            for role_key in [r for r in self._roles.keys() if r[0] == app_id]:
+                self._roles.pop(role_key, None)
+            self._counters['apps'].invalidations += 1
+        if cached:
+            logger.debug(f"Auth cache invalidated app {app_id}")
+
+    # ------------------------------------------------------------------
+    # API keys
+    # ------------------------------------------------------------------
+
+    def get_api_key(self, app_id: int, api_key: str) -> Optional[CachedAPIKey]:
+        return self._get('api_keys', self._api_keys, _digest_api_key(app_id, api_key))
+
+    def set_api_key(self, app_id: int, api_key: str, entry: CachedAPIKey) -> None:
+        self._set(self._api_keys, _digest_api_key(app_id, api_key), entry)
+
+    def invalidate_api_key(self, key_id: int) -> None:
+        with self._lock:
+            for digest in [d for d, k in self._api_keys.items() if k.key_id == key_id]:
+                self._api_keys.pop(digest, None)
+            self._counters['api_keys'].invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Roles
+    # ------------------------------------------------------------------
+
+    def get_role(self, app_id: int, user_id: int) -> Any:
+        return self._get('roles', self._roles, (app_id, user_id))
+
+    def set_role(self, app_id: int, user_id: int, role: Any) -> None:
+        self._set(self._roles, (app_id, user_id), role)
+
+    def invalidate_role(self, app_id: int, user_id: int) -> None:
+        with self._lock:
+            self._roles.pop((app_id, user_id), None)
+            self._counters['roles'].invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop everything that depends on a user's state: roles, owned apps and their keys."""
+        with self._lock:
+            owned_apps = {a.app_id for a in self._apps.values() if a.owner_id == user_id}
+            for app_id in owned_apps:
+                self._apps.pop(app_id, None)
+            for slug in [s for s, a in self._slugs.items() if a in owned_apps]:
+                self._slugs.pop(slug, None)
+            for digest in [d for d, k in self._api_keys.items() if k.owner_id == user_id]:
+                self._api_keys.pop(digest, None)
+            for role_key in [r for r in self._roles.keys() if r[1] == user_id or r[0] in owned_apps]:
+                self._roles.pop(role_key, None)
+            for counters in self._counters.values():
+                counters.invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def clear(self) -> None:
+        with self._lock:
+            for cache in (self._apps, self._slugs, self._api_keys, self._roles):
+                cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/invalidation counters and current size per cache."""
+        with self._lock:
+            sizes = {
+                'apps': len(self._apps),
+                'api_keys': len(self._api_keys),
+                'roles': len(self._roles),
+            }
+            caches = {}
+            for name, counters in self._counters.items():
+                lookups = counters.hits + counters.misses
+                caches[name] = {
+                    'hits': counters.hits,
+                    'misses': counters.misses,
+                    'invalidations': counters.invalidations,
+                    'hit_rate': round(counters.hits / lookups, 4) if lookups else 0.0,
+                    'size': sizes[name],
+                }
+        return {
+            'enabled': self.enabled,
+            'ttl_seconds': AUTH_CACHE_TTL_SECONDS,
+            'max_entries': AUTH_CACHE_MAX_ENTRIES,
+            'caches': caches,
+        }
+
+
+auth_cache = AuthCache()
@@ -0,0 +1,297 @@
+"""
+Retention for LangGraph's PostgreSQL checkpoint tables.
+
+AsyncPostgresSaver stores a checkpoint, its channel blobs and pending writes
+for every graph step of every ``thread_{agent_id}_{session_id}`` and never
+deletes any, so the tables grow without bound and ``aget_tuple`` slows down.
+A background job started in the FastAPI lifespan periodically:
+
+1. deletes threads whose conversation no longer exists, and threads of
+   session-scoped memory (``oauth_``/``api_`` sessions) idle for longer than
+   the session timeout;
+2. keeps only the newest ``CHECKPOINT_KEEP_LATEST`` checkpoints of every
+   other thread, with the blobs and writes only the deleted ones referenced.
+
+Threads are processed in small batches, each in its own short transaction,
+so locks stay brief and autovacuum can reuse the freed space. Only one
+process runs the job at a time (PostgreSQL advisory lock).
+
+Checkpoint ids and channel versions increase monotonically within a thread,
+so the trim only deletes rows older than the oldest one still referenced:
+a run in progress, whose new rows are always the newest, is never affected.
+"""
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from psycopg_pool import AsyncConnectionPool
+
+from services.agent_cache_service import CheckpointerCacheService
+from utils.logger import get_logger
+from utils.metrics import CHECKPOINT_BYTES_RECLAIMED, CHECKPOINT_ROWS_DELETED
+
+logger = get_logger(__name__)
+
+CHECKPOINT_RETENTION_ENABLED = os.getenv('CHECKPOINT_RETENTION_ENABLED', 'true').lower() == 'true'
+CHECKPOINT_RETENTION_INTERVAL_SECONDS = float(os.getenv('CHECKPOINT_RETENTION_INTERVAL_SECONDS', '3600'))
+CHECKPOINT_KEEP_LATEST = max(1, int(os.getenv('CHECKPOINT_KEEP_LATEST', '3')))
+# Matches SessionManagementService's session timeout
+CHECKPOINT_SESSION_TTL_SECONDS = int(os.getenv('CHECKPOINT_SESSION_TTL_SECONDS', str(24 * 3600)))
+CHECKPOINT_RETENTION_BATCH_SIZE = int(os.getenv('CHECKPOINT_RETENTION_BATCH_SIZE', '100'))
+CHECKPOINT_RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv('CHECKPOINT_RETENTION_BATCH_PAUSE_SECONDS', '0.2'))
+
+_ADVISORY_LOCK_KEY = 0x636B7074  # "ckpt"
+_THREAD_ID_RE = re.compile(r'^thread_\d+_(?P<session_id>.+)$')
+_SESSION_PREFIXES = ('oauth_', 'api_')
+
+_THREADS_SQL = """
+SELECT thread_id, max((checkpoint ->> 'ts')::timestamptz) AS last_ts
+FROM checkpoints
+WHERE thread_id > %s
+GROUP BY thread_id
+ORDER BY thread_id
+LIMIT %s
+"""
+
+_THREADS_OVER_LIMIT_SQL = """
+SELECT thread_id
+FROM checkpoints
+WHERE thread_id > %s
+GROUP BY thread_id
+HAVING count(*) > %s
+ORDER BY thread_id
+LIMIT %s
+"""
+
+_LIVE_CONVERSATION_SESSIONS_SQL = 'SELECT session_id FROM "Conversation" WHERE session_id = ANY(%s)'
+
+# (table, statement) pairs; every statement reports the rows and payload bytes it deleted
+_DELETE_THREADS_SQL = [
+    ('checkpoint_writes', """
+        WITH d AS (DELETE FROM checkpoint_writes WHERE thread_id = ANY(%(threads)s) RETURNING octet_length(blob) AS size)
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+    ('checkpoint_blobs', """
+        WITH d AS (DELETE FROM checkpoint_blobs WHERE thread_id = ANY(%(threads)s) RETURNING coalesce(octet_length(blob), 0) AS size)
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+    ('checkpoints', """
+        WITH d AS (
+            DELETE FROM checkpoints WHERE thread_id = ANY(%(threads)s)
+            RETURNING pg_column_size(checkpoint) + pg_column_size(metadata) AS size
+        )
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+]
+
+_TRIM_THREADS_SQL = [
+    ('checkpoints', """
+        WITH ranked AS (
+            SELECT thread_id, checkpoint_ns, checkpoint_id,
+                   row_number() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+            FROM checkpoints
+            WHERE thread_id = ANY(%(threads)s)
+        ), d AS (
+            DELETE FROM checkpoints c
+            USING ranked r
+            WHERE c.thread_id = r.thread_id AND c.checkpoint_ns = r.checkpoint_ns
+              AND c.checkpoint_id = r.checkpoint_id AND r.rn > %(keep)s
+            RETURNING pg_column_size(c.checkpoint) + pg_column_size(c.metadata) AS size
+        )
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+    ('checkpoint_writes', """
+        WITH kept AS (
+            SELECT thread_id, checkpoint_ns, min(checkpoint_id) AS oldest
+            FROM checkpoints
+            WHERE thread_id = ANY(%(threads)s)
+            GROUP BY thread_id, checkpoint_ns
+        ), d AS (
+            DELETE FROM checkpoint_writes w
+            USING kept
+            WHERE w.thread_id = kept.thread_id AND w.checkpoint_ns = kept.checkpoint_ns
+              AND w.checkpoint_id < kept.oldest
+            RETURNING octet_length(w.blob) AS size
+        )
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+    ('checkpoint_blobs', """
+        WITH kept AS (
+            SELECT c.thread_id, c.checkpoint_ns, v.key AS channel, min(v.value) AS oldest
+            FROM checkpoints c, jsonb_each_text(c.checkpoint -> 'channel_versions') v
+            WHERE c.thread_id = ANY(%(threads)s)
+            GROUP BY c.thread_id, c.checkpoint_ns, v.key
+        ), d AS (
+            DELETE FROM checkpoint_blobs b
+            USING kept
+            WHERE b.thread_id = kept.thread_id AND b.checkpoint_ns = kept.checkpoint_ns
+              AND b.channel = kept.channel AND b.version < kept.oldest
+            RETURNING coalesce(octet_length(b.blob), 0) AS size
+        )
+        SELECT count(*) AS n, coalesce(sum(size), 0) AS size FROM d
+    """),
+]
+
+
+@dataclass
+class RetentionStats:
+    """What one retention run deleted."""
+
+    threads_deleted: int = 0
+    threads_trimmed: int = 0
+    rows_deleted: Dict[str, int] = field(default_factory=dict)
+    bytes_reclaimed: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, table: str, rows: int, size: int) -> None:
+        self.rows_deleted[table] = self.rows_deleted.get(table, 0) + rows
+        self.bytes_reclaimed[table] = self.bytes_reclaimed.get(table, 0) + size
+
+
+def select_stale_threads(
+    threads: Iterable[dict],
+    live_conversation_sessions: Set[str],
+    now: datetime,
+    session_ttl: timedelta = timedelta(seconds=CHECKPOINT_SESSION_TTL_SECONDS),
+) -> List[str]:
+    """Return the thread ids among ``threads`` whose memory is no longer reachable.
+
+    Args:
+        threads: Rows with ``thread_id`` and ``last_ts`` (newest checkpoint time)
+        live_conversation_sessions: session_ids of existing conversations
+        now: Current time (timezone-aware)
+        session_ttl: Idle time after which session-scoped memory expires
+    """
+    stale = []
+    for row in threads:
+        match = _THREAD_ID_RE.match(row['thread_id'])
+        if not match:
+            continue
+        session_id = match.group('session_id')
+        if session_id.startswith('conv_'):
+            if session_id not in live_conversation_sessions:
+                stale.append(row['thread_id'])
+        elif session_id.startswith(_SESSION_PREFIXES):
+            if row['last_ts'] is not None and row['last_ts'] < now - session_ttl:
+                stale.append(row['thread_id'])
+    return stale
+
+
+class CheckpointRetentionService:
+
+    @classmethod
+    async def run_once(cls, pool: Optional[AsyncConnectionPool] = None) -> Optional[RetentionStats]:
+        """Run one retention pass.
+
+        Returns:
+            The pass statistics, or None when another process holds the lock.
+        """
+        pool = pool or CheckpointerCacheService.get_pool()
+        async with pool.connection() as lock_conn:
+            cursor = await lock_conn.execute('SELECT pg_try_advisory_lock(%s) AS locked', (_ADVISORY_LOCK_KEY,))
+            if not (await cursor.fetchone())['locked']:
+                logger.info("Checkpoint retention already running in another process, skipping")
+                return None
+            try:
+                stats = RetentionStats()
+                await cls._delete_stale_threads(pool, stats)
+                await cls._trim_threads(pool, stats)
+            finally:
+                await lock_conn.execute('SELECT pg_advisory_unlock(%s)', (_ADVISORY_LOCK_KEY,))
+
+        for table, rows in stats.rows_deleted.items():
+            CHECKPOINT_ROWS_DELETED.labels(table=table).inc(rows)
+            CHECKPOINT_BYTES_RECLAIMED.labels(table=table).inc(stats.bytes_reclaimed[table])
+        logger.info(
+            "Checkpoint retention: deleted %d thread(s), trimmed %d thread(s) to %d checkpoint(s), "
+            "rows deleted %s, %.1f MiB reclaimed",
+            stats.threads_deleted,
+            stats.threads_trimmed,
+            CHECKPOINT_KEEP_LATEST,
+            stats.rows_deleted,
+            sum(stats.bytes_reclaimed.values()) / (1024 * 1024),
+        )
+        return stats
+
+    @classmethod
+    async def _delete_stale_threads(cls, pool: AsyncConnectionPool, stats: RetentionStats) -> None:
+        after = ''
+        while True:
+            async with pool.connection() as conn:
+                rows = await (await conn.execute(_THREADS_SQL, (after, CHECKPOINT_RETENTION_BATCH_SIZE))).fetchall()
+                if not rows:
+                    return
+                conversation_sessions = [
+                    match.group('session_id')
+                    for match in (_THREAD_ID_RE.match(row['thread_id']) for row in rows)
+                    if match and match.group('session_id').startswith('conv_')
+                ]
+                live = set()
+                if conversation_sessions:
+                    cursor = await conn.execute(_LIVE_CONVERSATION_SESSIONS_SQL, (conversation_sessions,))
+                    live = {row['session_id'] for row in await cursor.fetchall()}
+
+            stale = select_stale_threads(rows, live, datetime.now(timezone.utc))
+            if stale:
+                await cls._execute_batch(pool, _DELETE_THREADS_SQL, {'threads': stale}, stats)
+                stats.threads_deleted += len(stale)
+
+            if len(rows) < CHECKPOINT_RETENTION_BATCH_SIZE:
+                return
+            after = rows[-1]['thread_id']
+            await asyncio.sleep(CHECKPOINT_RETENTION_BATCH_PAUSE_SECONDS)
+
+    @classmethod
+    async def _trim_threads(cls, pool: AsyncConnectionPool, stats: RetentionStats) -> None:
+        after = ''
+        while True:
+            async with pool.connection() as conn:
+                cursor = await conn.execute(
+                    _THREADS_OVER_LIMIT_SQL, (after, CHECKPOINT_KEEP_LATEST, CHECKPOINT_RETENTION_BATCH_SIZE)
+                )
+                thread_ids = [row['thread_id'] for row in await cursor.fetchall()]
+            if not thread_ids:
+                return
+
+            await cls._execute_batch(
+                pool, _TRIM_THREADS_SQL, {'threads': thread_ids, 'keep': CHECKPOINT_KEEP_LATEST}, stats
+            )
+            stats.threads_trimmed += len(thread_ids)
+
+            if len(thread_ids) < CHECKPOINT_RETENTION_BATCH_SIZE:
+                return
+            after = thread_ids[-1]
+            await asyncio.sleep(CHECKPOINT_RETENTION_BATCH_PAUSE_SECONDS)
+
+    @staticmethod
+    async def _execute_batch(pool: AsyncConnectionPool, statements, params: dict, stats: RetentionStats) -> None:
+        """Run ``statements`` in one transaction and add their deletions to ``stats``."""
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                for table, sql in statements:
+                    row = await (await conn.execute(sql, params)).fetchone()
+                    stats.add(table, row['n'], row['size'])
+
+
+async def _retention_loop() -> None:
+    while True:
+        await asyncio.sleep(CHECKPOINT_RETENTION_INTERVAL_SECONDS)
+        try:
+            await CheckpointRetentionService.run_once()
+        except Exception as e:
+            logger.error(f"Checkpoint retention error: {str(e)}")
+
+
+async def start_checkpoint_retention() -> Optional[asyncio.Task]:
+    """Start the periodic checkpoint retention job. Called during FastAPI lifespan startup."""
+    if not CHECKPOINT_RETENTION_ENABLED:
+        logger.info("Checkpoint retention disabled")
+        return None
+    return asyncio.create_task(_retention_loop(), name="checkpoint-retention")
+
+
+async def stop_checkpoint_retention(task: asyncio.Task) -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
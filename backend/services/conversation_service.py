@@ -3,7 +3,7 @@ import hashlib
 import ast
 import json
 import re
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 from numpy import isin
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc
@@ -11,14 +11,28 @@ from datetime import datetime
 
 from models.conversation import Conversation
 from repositories.conversation_repository import ConversationRepository
+from repositories.conversation_message_repository import ConversationMessageRepository
 from models.agent import Agent
 from schemas.conversation_schemas import ConversationCreate, ConversationUpdate
-from services.agent_cache_service import CheckpointerCacheService
+from services.agent_cache_service import CheckpointerCacheService, content_blocks_to_str
+from services.write_behind_service import write_behind
 from utils.logger import get_logger
 from lks_idprovider import AuthContext
 
 logger = get_logger(__name__)
 
+# Inline file markers injected into responses, shortened in list previews
+_FILE_MARKER_RE = re.compile(r'(!)?\[(📎)?[^\]]*\]\(file://[^\)]*\)')
+_PREVIEW_LENGTH = 200
+
+
+def _preview_marker(match: re.Match) -> str:
+    if match.group(1):
+        return '[imagen]'
+    if match.group(2):
+        return '[archivo]'
+    return match.group(0)
+
 
 async def _resolve_image_placeholders(
     content: str,
@@ -41,9 +55,9 @@ async def _resolve_image_placeholders(
     from services.file_management_service import FileManagementService
     file_service = FileManagementService()
     # Try conversation-scoped first; fall back to global session for legacy files
-    files = await file_service.list_attached_files(agent_id, user_context, conversation_id)
+    files = await file_service.list_attached_files(agent_id, user_context, conversation_id, include_content=False)
     if not files and conversation_id:
-        files = await file_service.list_attached_files(agent_id, user_context, None)
+        files = await file_service.list_attached_files(agent_id, user_context, None, include_content=False)
 
     def replace_marker(m: re.Match) -> str:
         block_id = m.group(1)
@@ -181,8 +195,9 @@ class ConversationService:
         agent_id: int,
         user_context: AuthContext|dict,
         limit: int = 50,
-        offset: int = 0
-    ) -> tuple[List[Conversation], int]:
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Conversation], Optional[int], Optional[str]]:
         """
         List conversations for a user with a specific agent
         
@@ -191,10 +206,15 @@ class ConversationService:
             agent_id: ID of the agent
             user_context: User context
             limit: Maximum number of results
-            offset: Pagination offset
+            offset: Pagination offset (ignored when cursor is given)
+            cursor: next_cursor of the previous page
             
         Returns:
-            Tuple of (list of conversations, total count)
+            Tuple of (list of conversations, total count, next page cursor).
+            The total is only counted for the first page (no cursor).
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         # Build query with user filtering
         query = db.query(Conversation).filter(Conversation.agent_id == agent_id)
@@ -216,19 +236,19 @@ class ConversationService:
                 query = query.filter(Conversation.user_id == int(user_id))
             else:
                 # Invalid user_id format
-                return [], 0
+                return [], 0, None
         else:
             # No valid user context
-            return [], 0
+            return [], 0, None
         
-        # Get total count
-        total = query.count()
+        # Counting is linear in the number of conversations; later pages skip it
+        total = query.count() if not cursor else None
         
         # Get paginated results, ordered by most recent
-        conversations = query.order_by(desc(Conversation.updated_at)).offset(offset).limit(limit).all()
+        conversations, next_cursor = ConversationRepository.paginate(query, limit, offset, cursor)
         
         logger.info(f"Listed {len(conversations)} conversations for agent {agent_id} (total: {total})")
-        return conversations, total
+        return conversations, total, next_cursor
     
     @staticmethod
     def update_conversation(
@@ -328,64 +348,49 @@ class ConversationService:
         Returns:
             List of messages or None if not found/unauthorized
         """
+        page = await ConversationService.get_conversation_history_page(db, conversation_id, user_context)
+        return page[0] if page is not None else None
+
+    @staticmethod
+    async def get_conversation_history_page(
+        db: Session,
+        conversation_id: int,
+        user_context: Dict,
+        before: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[Tuple[List[Dict], Optional[int]]]:
+        """
+        Get one page of a conversation's message history from the
+        ConversationMessage projection, oldest message first.
+        
+        Args:
+            db: Database session
+            conversation_id: ID of the conversation
+            user_context: User context for validation
+            before: Only return messages older than this message_id (cursor)
+            limit: Maximum number of messages; None returns all of them
+            
+        Returns:
+            Tuple of (messages, next_cursor) or None if not found/unauthorized.
+            next_cursor is the ``before`` value for the previous page, or None
+            when there are no older messages.
+        """
         conversation = ConversationService.get_conversation(db, conversation_id, user_context)
         
         if not conversation:
             return None
-        
-        # Use the full session_id as-is (don't remove the conv_ prefix)
-        # The thread_id format is: thread_{agent_id}_{full_session_id}
-        
-        # Get history from PostgreSQL checkpointer
-        history = await CheckpointerCacheService.get_conversation_history_async(
-            agent_id=conversation.agent_id,
-            session_id=conversation.session_id
+
+        if not conversation.history_projected:
+            await ConversationService._backfill_history(db, conversation)
+
+        # One extra row tells whether an older page exists
+        rows = ConversationMessageRepository.get_page(
+            db, conversation_id, before=before, limit=limit + 1 if limit else None
         )
-        
-        if not history:
-            return []
-        
-        cleaned_history: List[Dict] = []
-        for msg in history:
-            if not isinstance(msg, dict):
-                continue
-            content = msg.get("content")
-            parsed_content = content
-            
-            if isinstance(content, str):
-                stripped_content = content.strip()
-                if stripped_content.startswith("[") and "type" in stripped_content:
-                    try:
-                        parsed_content = json.loads(stripped_content)
-                    except json.JSONDecodeError:
-                        try:
-                            parsed_content = ast.literal_eval(stripped_content)
-                        except (ValueError, SyntaxError):
-                            parsed_content = content
-            
-            if isinstance(parsed_content, list):
-                text_parts = []
-                has_image = False
-                for item in parsed_content:
-                    if isinstance(item, dict):
-                        if item.get("type") == "text":
-                            text_parts.append(item.get("text", ""))
-                        elif item.get("type") == "image_url":
-                            has_image = True
-                display_text = " ".join(text_parts).strip()
-                # Clean attached file content from multimodal text
-                display_text = ConversationService._clean_attached_files_content(display_text)
-                if not display_text and has_image:
-                    display_text = "[Imagen adjunta]"
-                clean_msg = msg.copy()
-                clean_msg["content"] = display_text or msg.get("content", "")
-                cleaned_history.append(clean_msg)
-            else:
-                # Clean attached file content from simple text messages
-                clean_msg = msg.copy()
-                if isinstance(parsed_content, str):
-                    clean_msg["content"] = ConversationService._clean_attached_files_content(parsed_content)
-                cleaned_history.append(clean_msg)
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[1:]
+            next_cursor = rows[0].message_id
 
         # Resolve [IMAGE:{block_id}] placeholders to inline file:// markers.
         # The conversations endpoint user_context lacks app_id; enrich it from the agent.
@@ -393,21 +398,124 @@ class ConversationService:
         if 'app_id' not in resolve_user_ctx and conversation.agent and conversation.agent.app_id:
             resolve_user_ctx = {**resolve_user_ctx, 'app_id': conversation.agent.app_id}
 
-        resolved_history = []
-        for msg in cleaned_history:
-            if msg.get("role") == "agent" and isinstance(msg.get("content"), str) and "[IMAGE:" in msg["content"]:
-                resolved_msg = msg.copy()
-                resolved_msg["content"] = await _resolve_image_placeholders(
+        history = []
+        for row in rows:
+            msg = row.to_dict()
+            if msg["role"] == "agent" and "[IMAGE:" in msg["content"]:
+                msg["content"] = await _resolve_image_placeholders(
                     msg["content"],
                     agent_id=conversation.agent_id,
                     user_context=resolve_user_ctx,
                     conversation_id=str(conversation_id),
                 )
-                resolved_history.append(resolved_msg)
-            else:
-                resolved_history.append(msg)
+            history.append(msg)
+
+        return history, next_cursor
+
+    @staticmethod
+    def record_turn(
+        db: Session,
+        conversation: Conversation,
+        user_content: Any,
+        agent_content: Any,
+    ) -> None:
+        """
+        Append one user/agent exchange to the conversation's display history.
+        
+        Args:
+            db: Database session
+            conversation: The conversation the turn belongs to
+            user_content: The human message content (string or content blocks)
+            agent_content: The agent response (string, content blocks or structured dict)
+        """
+        if isinstance(agent_content, dict):
+            agent_content = json.dumps(agent_content, ensure_ascii=False)
+        elif isinstance(agent_content, list):
+            agent_content = content_blocks_to_str(agent_content)
+        messages = [
+            (role, ConversationService._display_text(content))
+            for role, content in (("user", user_content), ("agent", agent_content))
+        ]
+        messages = [(role, text) for role, text in messages if text]
+        # Conversations awaiting backfill get this turn from the checkpoint on
+        # first read; the flag is re-read since a reader may have backfilled it
+        if messages:
+            ConversationMessageRepository.add_messages_if_projected(db, conversation.conversation_id, messages)
 
-        return resolved_history
+    @staticmethod
+    def reset_history(db: Session, conversation: Conversation) -> None:
+        """
+        Clear the display history and OpenAI resume digest of a reset conversation.
+        
+        Args:
+            db: Database session
+            conversation: The conversation whose checkpoint was reset
+        """
+        ConversationMessageRepository.clear(db, conversation.conversation_id)
+
+    @staticmethod
+    async def _backfill_history(db: Session, conversation: Conversation) -> None:
+        """Copy the history of a conversation started before the projection existed.
+
+        This is the only place history is read from the checkpointer, once per
+        legacy conversation.
+        """
+        # Use the full session_id as-is (don't remove the conv_ prefix)
+        # The thread_id format is: thread_{agent_id}_{full_session_id}
+        history = await CheckpointerCacheService.get_conversation_history_async(
+            agent_id=conversation.agent_id,
+            session_id=conversation.session_id
+        )
+        messages = [
+            (msg.get("role"), ConversationService._display_text(msg.get("content")))
+            for msg in history or []
+            if isinstance(msg, dict)
+        ]
+        backfilled = ConversationMessageRepository.backfill(
+            db, conversation.conversation_id, [(role, text) for role, text in messages if text]
+        )
+        if backfilled:
+            logger.info(f"Backfilled {len(messages)} history messages for conversation {conversation.conversation_id}")
+
+    @staticmethod
+    def _display_text(content: Any) -> str:
+        """
+        Convert message content to the text shown in the conversation history.
+        
+        Multimodal content keeps only its text parts ("[Imagen adjunta]" for
+        image-only messages) and attached file content is removed.
+        """
+        parsed_content = content
+
+        # Some backends store the content as a string representation of the list
+        if isinstance(content, str):
+            stripped_content = content.strip()
+            if stripped_content.startswith("[") and "type" in stripped_content:
+                try:
+                    parsed_content = json.loads(stripped_content)
+                except json.JSONDecodeError:
+                    try:
+                        parsed_content = ast.literal_eval(stripped_content)
+                    except (ValueError, SyntaxError):
+                        parsed_content = content
+
+        if isinstance(parsed_content, list):
+            text_parts = []
+            has_image = False
+            for item in parsed_content:
+                if isinstance(item, dict):
+                    if item.get("type") == "text":
+                        text_parts.append(item.get("text", ""))
+                    elif item.get("type") == "image_url":
+                        has_image = True
+            display_text = ConversationService._clean_attached_files_content(" ".join(text_parts).strip())
+            if not display_text and has_image:
+                display_text = "[Imagen adjunta]"
+            return display_text
+
+        if isinstance(parsed_content, str):
+            return ConversationService._clean_attached_files_content(parsed_content)
+        return str(parsed_content) if parsed_content else ""
     
     @staticmethod
     def _clean_attached_files_content(text: str) -> str:
@@ -459,6 +567,30 @@ class ConversationService:
         
         return text
     
+    @staticmethod
+    def message_preview(response: Any) -> str:
+        """
+        Build the last_message preview of an agent response.
+        
+        Args:
+            response: Parsed agent response (string, content blocks or structured dict)
+            
+        Returns:
+            At most 200 characters, with image and file markers shortened
+        """
+        if isinstance(response, list):
+            preview = " ".join(
+                item.get("text", "")
+                for item in response
+                if isinstance(item, dict) and item.get("type") == "text"
+            )
+        else:
+            preview = response if isinstance(response, str) else str(response)
+        preview = preview[:_PREVIEW_LENGTH]
+        if "file://" in preview:
+            preview = _FILE_MARKER_RE.sub(_preview_marker, preview)
+        return preview.strip() or '[imagen generada]'
+
     @staticmethod
     def increment_message_count(
         db: Session,
@@ -467,7 +599,10 @@ class ConversationService:
         increment_by: int = 1
     ):
         """
-        Increment message count and update last message for a conversation
+        Increment message count and update last message for a conversation.
+        
+        The update is buffered and applied atomically by the write-behind
+        flusher instead of a read-modify-write on every turn.
         
         Args:
             db: Database session
@@ -475,19 +610,12 @@ class ConversationService:
             last_message: Optional last message preview
             increment_by: Number to increment message count by (default 1, use 2 for user+agent)
         """
-        conversation = db.query(Conversation).filter(
-            Conversation.conversation_id == conversation_id
-        ).first()
-        
-        if conversation:
-            conversation.message_count += increment_by
-            conversation.updated_at = datetime.utcnow()
-            
-            if last_message:
-                # Store preview (first 200 characters)
-                conversation.last_message = last_message[:200]
-            
-            db.commit()
+        write_behind.increment_conversation(
+            conversation_id,
+            increment_by,
+            # Store preview (first 200 characters)
+            last_message=last_message[:200] if last_message else None,
+        )
     
     @staticmethod
     def _validate_user_access(conversation: Conversation, user_context: AuthContext|dict) -> bool:
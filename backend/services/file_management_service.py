@@ -3,11 +3,19 @@ import os
 import uuid
 import tempfile
 import logging
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from datetime import datetime
 from fastapi import UploadFile, HTTPException
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from models.file_attachment import FileAttachment
+from repositories.file_attachment_repository import FileAttachmentRepository
 
 from tools.PDFTools import extract_text_from_pdf, convert_pdf_to_images, check_pdf_has_text
+from services.file_size_limit_service import FileSizeLimitService
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -61,6 +69,70 @@ class FileReference:
         self.has_extractable_content = self._has_extractable_content()
         self.content_preview = self._get_content_preview()
     
+    @property
+    def content(self) -> str:
+        """Extracted text, fetched from the catalog on first access when deferred"""
+        if self._content_loader is not None:
+            self._content = self._content_loader()
+            self._content_loader = None
+        return self._content
+    
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._content_loader = None
+    
+    @classmethod
+    def from_attachment(
+        cls,
+        attachment: FileAttachment,
+        content_loader: Optional[Callable[[], str]] = None
+    ) -> "FileReference":
+        """
+        Build a FileReference from a catalog row.
+        
+        Derived fields are read from the row, so the extracted text is only
+        fetched (through ``content_loader``) if the caller actually uses it.
+        """
+        file_ref = cls.__new__(cls)
+        file_ref.file_id = attachment.file_id
+        file_ref.filename = attachment.filename
+        file_ref.file_type = attachment.file_type
+        file_ref.file_path = attachment.file_path
+        file_ref.file_size_bytes = attachment.file_size_bytes
+        file_ref.conversation_id = attachment.conversation_id
+        file_ref.uploaded_at = attachment.uploaded_at
+        file_ref.mime_type = attachment.mime_type or file_ref._get_mime_type()
+        file_ref.processing_status = attachment.processing_status
+        file_ref.has_extractable_content = attachment.has_extractable_content
+        file_ref.content_preview = attachment.content_preview
+        if 'content' in sa_inspect(attachment).unloaded and content_loader is not None:
+            file_ref._content = None
+            file_ref._content_loader = content_loader
+        else:
+            file_ref._content = attachment.content
+            file_ref._content_loader = None
+        return file_ref
+    
+    def to_attachment(self, session_key: str, agent_id: int) -> FileAttachment:
+        """Build the catalog row for this reference"""
+        return FileAttachment(
+            file_id=self.file_id,
+            session_key=session_key,
+            agent_id=agent_id,
+            conversation_id=self.conversation_id,
+            filename=self.filename,
+            file_type=self.file_type,
+            mime_type=self.mime_type,
+            file_path=self.file_path,
+            file_size_bytes=self.file_size_bytes,
+            processing_status=self.processing_status,
+            has_extractable_content=bool(self.has_extractable_content),
+            content_preview=self.content_preview,
+            content=self.content,
+            uploaded_at=self.uploaded_at,
+        )
+    
     def _get_mime_type(self) -> str:
         """Get MIME type based on file type and extension"""
         if self.file_type == "image":
@@ -119,13 +191,13 @@ class FileReference:
         else:
             return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_content: bool = True) -> Dict[str, Any]:
         """Convert to dictionary with visual feedback data"""
         return {
             "file_id": self.file_id,
             "filename": self.filename,
             "file_type": self.file_type,
-            "content": self.content,
+            "content": self.content if include_content else None,
             "file_path": self.file_path,
             "uploaded_at": self.uploaded_at.isoformat(),
             # Visual feedback fields
@@ -142,10 +214,10 @@ class FileReference:
 class FileManagementService:
     """Unified file management - used by both public and internal APIs"""
     
-    def __init__(self):
-        # Persistent file storage on disk
-        # Structure: {session_key: {file_id: FileReference}}
-        self._files: Dict[str, Dict[str, FileReference]] = {}
+    def __init__(self, db: Optional[Session] = None):
+        # Attachment metadata lives in the file_attachment catalog so every
+        # worker process sees the same files; original files stay on disk.
+        self._db = db
         
         # Get TMP_BASE_FOLDER from config
         from utils.config import get_app_config
@@ -160,14 +232,37 @@ class FileManagementService:
         os.makedirs(os.path.join(self._tmp_base_folder, "downloads"), exist_ok=True)
         os.makedirs(os.path.join(self._tmp_base_folder, "images"), exist_ok=True)
         
-        # Files will be loaded on-demand per session
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Use the caller's session if one was given, otherwise a short-lived one"""
+        if self._db is not None:
+            yield self._db
+            return
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    def _load_content(self, file_id: str) -> str:
+        with self._session() as db:
+            return FileAttachmentRepository.get_content(file_id, db) or ""
+    
+    def _to_file_reference(self, attachment: FileAttachment) -> FileReference:
+        file_id = attachment.file_id
+        return FileReference.from_attachment(attachment, lambda: self._load_content(file_id))
+    
+    def _record_attachment(self, session_key: str, agent_id: int, file_ref: FileReference):
+        with self._session() as db:
+            FileAttachmentRepository.create(file_ref.to_attachment(session_key, agent_id), db)
     
     async def upload_file(
         self, 
         file: UploadFile, 
         agent_id: int,
         user_context: Dict = None,
-        conversation_id: Optional[int] = None
+        conversation_id: Optional[int] = None,
+        max_size_mb: int = 0
     ) -> FileReference:
         """
         Upload file for agent consumption
@@ -177,6 +272,7 @@ class FileManagementService:
             agent_id: ID of the agent
             user_context: User context (api_key, user_id, etc.)
             conversation_id: Optional conversation ID to organize files
+            max_size_mb: Per-file size limit enforced while streaming (0 = no limit)
             
         Returns:
             FileReference object
@@ -193,7 +289,7 @@ class FileManagementService:
             file_type = self._get_file_type(file.filename)
             
             # Process file based on type (also returns file size)
-            content, temp_path, file_size = await self._process_file_content(file, file_type)
+            content, temp_path, file_size = await self._process_file_content(file, file_type, max_size_mb)
             
             # Create file reference with visual feedback data
             file_ref = FileReference(
@@ -210,15 +306,11 @@ class FileManagementService:
             # conversation_id ensures files are isolated per conversation
             session_key = self._get_session_key(agent_id, user_context, str(conversation_id) if conversation_id else None)
             
-            # Initialize session if not exists
-            if session_key not in self._files:
-                self._files[session_key] = {}
-            
-            # Save file to disk for persistence (including original file)
+            # Save original file to disk for persistence
             await self._save_file_to_disk(session_key, file_id, file_ref, temp_path, conversation_id)
             
-            # Store file reference in session (after file_path is set)
-            self._files[session_key][file_id] = file_ref
+            # Record in the catalog (after file_path is set)
+            self._record_attachment(session_key, agent_id, file_ref)
             
             # Clean up temporary file after saving to persistent storage
             if temp_path and os.path.exists(temp_path):
@@ -227,6 +319,8 @@ class FileManagementService:
             logger.info(f"Uploaded file {file.filename} for agent {agent_id}, session {session_key}")
             return file_ref
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error uploading file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
@@ -265,23 +359,42 @@ class FileManagementService:
             logger.error(f"Error processing file for agent: {str(e)}")
             return f"Error processing file: {str(e)}"
     
-    async def get_file_reference(self, file_id: str) -> Optional[FileReference]:
+    async def get_file_reference(
+        self,
+        file_id: str,
+        agent_id: int,
+        user_context: Dict = None
+    ) -> Optional[FileReference]:
         """
-        Get file reference by ID
+        Get file reference by ID, scoped to the caller's agent session
+        
+        The session key carries the user and app, so files of other API keys,
+        users, apps or agents are never returned.
         
         Args:
             file_id: File ID
+            agent_id: ID of the agent
+            user_context: User context (user_id, app_id)
             
         Returns:
-            FileReference or None if not found
+            FileReference or None if not found or not owned by the caller
         """
-        return self._files.get(file_id)
+        # Session-global key; files attached to any of its conversations also match
+        session_context = dict(user_context) if user_context else None
+        if session_context:
+            session_context.pop('conversation_id', None)
+        session_key = self._get_session_key(agent_id, session_context)
+        
+        with self._session() as db:
+            attachment = FileAttachmentRepository.get_by_id_for_session(file_id, agent_id, session_key, db)
+            return FileReference.from_attachment(attachment) if attachment else None
     
     async def list_attached_files(
         self, 
         agent_id: int, 
         user_context: Dict = None,
-        conversation_id: str = None
+        conversation_id: str = None,
+        include_content: bool = True
     ) -> List[Dict[str, Any]]:
         """
         List attached files for a user session, optionally filtered by conversation.
@@ -290,6 +403,8 @@ class FileManagementService:
             agent_id: ID of the agent
             user_context: User context
             conversation_id: Optional conversation ID for conversation-specific files
+            include_content: Load extracted text; callers that only need
+                metadata should pass False to skip reading it
             
         Returns:
             List of file references
@@ -298,19 +413,18 @@ class FileManagementService:
             # Get session key for this agent, user, and optionally conversation
             session_key = self._get_session_key(agent_id, user_context, conversation_id)
             
-            # Load files for this session if not already loaded
-            if session_key not in self._files:
-                self._load_session_files(session_key)
+            with self._session() as db:
+                self._import_legacy_session_files(session_key, agent_id, db)
+                attachments = FileAttachmentRepository.get_by_session(
+                    session_key, db, with_content=include_content
+                )
+                files_list = [
+                    FileReference.from_attachment(attachment).to_dict(include_content=include_content)
+                    for attachment in attachments
+                ]
             
-            # Return files for this session
-            if session_key in self._files:
-                files_list = [file_ref.to_dict() for file_ref in self._files[session_key].values()]
-                logger.info(f"Returning {len(files_list)} files for session {session_key}")
-                for file_data in files_list:
-                    logger.info(f"File: {file_data['filename']}, Path: {file_data.get('file_path', 'None')}")
-                return files_list
-            else:
-                return []
+            logger.info(f"Returning {len(files_list)} files for session {session_key}")
+            return files_list
             
         except Exception as e:
             logger.error(f"Error listing attached files: {str(e)}")
@@ -339,21 +453,21 @@ class FileManagementService:
             # Get session key for this agent, user, and optionally conversation
             session_key = self._get_session_key(agent_id, user_context, conversation_id)
             
-            # Load files for this session if not already loaded
-            if session_key not in self._files:
-                self._load_session_files(session_key)
-            
-            if session_key in self._files and file_id in self._files[session_key]:
-                del self._files[session_key][file_id]
+            with self._session() as db:
+                self._import_legacy_session_files(session_key, agent_id, db)
+                attachment = FileAttachmentRepository.get_by_id(file_id, db, with_content=False)
+                if attachment is None or attachment.session_key != session_key:
+                    logger.warning(f"File {file_id} not found for removal in session {session_key}")
+                    return False
                 
-                # Also remove from disk
-                await self._remove_file_from_disk(session_key, file_id)
-                
-                logger.info(f"Removed file {file_id} from session {session_key}")
-                return True
-            else:
-                logger.warning(f"File {file_id} not found for removal in session {session_key}")
-                return False
+                file_path = attachment.file_path
+                FileAttachmentRepository.delete(attachment, db)
+            
+            # Also remove from disk
+            await self._remove_file_from_disk(session_key, file_id, file_path)
+            
+            logger.info(f"Removed file {file_id} from session {session_key}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error removing file: {str(e)}")
@@ -407,20 +521,7 @@ class FileManagementService:
             file_ref.processing_status = "ready"
 
             session_key = self._get_session_key(agent_id, user_context, str(conversation_id) if conversation_id else None)
-            if session_key not in self._files:
-                self._files[session_key] = {}
-            self._files[session_key][file_id] = file_ref
-
-            # Persist metadata so it survives restarts
-            session_dir = os.path.join(self._persistent_dir, session_key)
-            os.makedirs(session_dir, exist_ok=True)
-            metadata_file = os.path.join(session_dir, f"{file_id}.json")
-            with open(metadata_file, 'w') as f:
-                json.dump(file_ref.to_dict(), f, indent=2)
-            # _load_session_files requires a matching .content file to load the entry
-            content_file = os.path.join(session_dir, f"{file_id}.content")
-            with open(content_file, 'w', encoding='utf-8') as f:
-                f.write(file_ref.content)
+            self._record_attachment(session_key, agent_id, file_ref)
 
             logger.info(f"Registered output file {filename} (id={file_id}) for session {session_key}")
             return file_ref
@@ -459,20 +560,21 @@ class FileManagementService:
         """Get file type from file path"""
         return self._get_file_type(os.path.basename(file_path))
     
-    async def _process_file_content(self, file: UploadFile, file_type: str) -> tuple[str, str, int]:
+    async def _process_file_content(self, file: UploadFile, file_type: str, max_size_mb: int = 0) -> tuple[str, str, int]:
         """
         Process file content based on file type
         
         Args:
             file: Uploaded file
             file_type: Type of file
+            max_size_mb: Per-file size limit (0 = no limit)
             
         Returns:
             Tuple of (processed_content, temp_file_path, file_size_bytes)
         """
         try:
             # Save file temporarily and get size
-            temp_path, file_size = await self._save_uploaded_file_with_size(file)
+            temp_path, file_size = await self._save_uploaded_file_with_size(file, max_size_mb)
             
             try:
                 if file_type == "pdf":
@@ -505,26 +607,22 @@ class FileManagementService:
                 logger.error(f"Error processing file content: {str(e)}")
                 return f"Error processing file: {str(e)}", temp_path, file_size
                     
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error processing file content: {str(e)}")
             return f"Error processing file: {str(e)}", None, 0
     
-    async def _save_uploaded_file_with_size(self, file: UploadFile) -> tuple[str, int]:
+    async def _save_uploaded_file_with_size(self, file: UploadFile, max_size_mb: int = 0) -> tuple[str, int]:
         """Save uploaded file to temporary location and return path with file size"""
         # Create temporary file in TMP_BASE_FOLDER/uploads
         suffix = os.path.splitext(file.filename)[1] if file.filename else ""
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=self._temp_dir)
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=self._temp_dir)
+        os.close(fd)
         
-        try:
-            # Write file content and track size
-            content = await file.read()
-            file_size = len(content)
-            temp_file.write(content)
-            temp_file.flush()
-            
-            return temp_file.name, file_size
-        finally:
-            temp_file.close()
+        # Stream in chunks so memory per upload stays bounded by the chunk size
+        file_size, _ = await FileSizeLimitService.stream_upload_to_file(file, temp_path, max_size_mb)
+        return temp_path, file_size
     
     async def _save_uploaded_file(self, file: UploadFile) -> str:
         """Save uploaded file to temporary location (legacy method for compatibility)"""
@@ -562,173 +660,132 @@ class FileManagementService:
             return f"agent_{agent_id}_anonymous"
 
     async def _save_file_to_disk(self, session_key: str, file_id: str, file_ref: FileReference, original_file_path: str = None, conversation_id: Optional[int] = None):
-        """Save file reference to disk for persistence"""
+        """Copy the original upload to persistent storage and set file_ref.file_path"""
         try:
-            session_dir = os.path.join(self._persistent_dir, session_key)
-            os.makedirs(session_dir, exist_ok=True)
-            
-            # Save original file FIRST (to set file_path before saving metadata)
-            if original_file_path and os.path.exists(original_file_path):
-                # Determine target directory
-                if conversation_id:
-                    target_dir = os.path.join(self._tmp_base_folder, "conversations", str(conversation_id))
-                else:
-                    target_dir = session_dir
+            if not (original_file_path and os.path.exists(original_file_path)):
+                return
 
-                os.makedirs(target_dir, exist_ok=True)
+            # Determine target directory
+            if conversation_id:
+                target_dir = os.path.join(self._tmp_base_folder, "conversations", str(conversation_id))
+            else:
+                target_dir = os.path.join(self._persistent_dir, session_key)
 
-                # Use the original user-facing filename so the code interpreter can
-                # reference files by the name the user knows (e.g. 'report.xlsx').
-                # Path separators are stripped to prevent directory traversal.
-                safe_filename = file_ref.filename.replace('/', '_').replace('\\', '_')
-                original_file = os.path.join(target_dir, safe_filename)
+            os.makedirs(target_dir, exist_ok=True)
 
-                import shutil
-                shutil.copy2(original_file_path, original_file)
+            # Use the original user-facing filename so the code interpreter can
+            # reference files by the name the user knows (e.g. 'report.xlsx').
+            # Path separators are stripped to prevent directory traversal.
+            safe_filename = file_ref.filename.replace('/', '_').replace('\\', '_')
+            original_file = os.path.join(target_dir, safe_filename)
 
-                # Calculate relative path from TMP_BASE_FOLDER
-                relative_path = os.path.relpath(original_file, self._tmp_base_folder)
-                # Ensure forward slashes for URLs
-                file_ref.file_path = relative_path.replace(os.sep, '/')
+            import shutil
+            shutil.copy2(original_file_path, original_file)
 
-                logger.info(f"Saved file as '{safe_filename}' in {target_dir} (relative: {relative_path})")
-                logger.info(f"FileReference file_path set to: {file_ref.file_path}")
-            
-            # Save file metadata AFTER setting file_path
-            metadata_file = os.path.join(session_dir, f"{file_id}.json")
-            with open(metadata_file, 'w') as f:
-                json.dump(file_ref.to_dict(), f, indent=2)
-            
-            # Save file content (extracted text)
-            content_file = os.path.join(session_dir, f"{file_id}.content")
-            with open(content_file, 'w', encoding='utf-8') as f:
-                f.write(file_ref.content)
-                
-            logger.info(f"Saved file {file_id} to disk: {session_dir}")
+            # Calculate relative path from TMP_BASE_FOLDER
+            relative_path = os.path.relpath(original_file, self._tmp_base_folder)
+            # Ensure forward slashes for URLs
+            file_ref.file_path = relative_path.replace(os.sep, '/')
+
+            logger.info(f"Saved file {file_id} as '{safe_filename}' in {target_dir} (relative: {relative_path})")
             
         except Exception as e:
             logger.error(f"Error saving file to disk: {str(e)}")
 
-    def _load_session_files(self, session_key: str):
-        """Load existing files from disk for a specific session"""
-        try:
-            if not os.path.exists(self._persistent_dir):
-                return
-                
-            session_path = os.path.join(self._persistent_dir, session_key)
-            if not os.path.exists(session_path) or not os.path.isdir(session_path):
-                return
-                
-            # Initialize session if not exists
-            if session_key not in self._files:
-                self._files[session_key] = {}
-            
-            # Load files for this session
-            for filename in os.listdir(session_path):
-                if filename.endswith('.json'):
-                    file_id = filename[:-5]  # Remove .json extension
-                    metadata_file = os.path.join(session_path, filename)
-                    content_file = os.path.join(session_path, f"{file_id}.content")
-                    
-                    if os.path.exists(content_file):
-                        try:
-                            with open(metadata_file, 'r') as f:
-                                metadata = json.load(f)
-                            
-                            with open(content_file, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            # Recreate FileReference with visual feedback data
-                            file_ref = FileReference(
-                                file_id=metadata['file_id'],
-                                filename=metadata['filename'],
-                                file_type=metadata['file_type'],
-                                content=content,
-                                file_path=metadata.get('file_path'),
-                                file_size_bytes=metadata.get('file_size_bytes'),
-                                conversation_id=metadata.get('conversation_id')
-                            )
-                            
-                            # If file_path is missing, try to regenerate it
-                            if not file_ref.file_path:
-                                # Search: session dir (UUID-named legacy files) and
-                                # conversation dir (original-named files)
-                                conv_id = metadata.get('conversation_id')
-                                search_dirs = [session_path]
-                                if conv_id:
-                                    search_dirs.append(os.path.join(
-                                        self._tmp_base_folder, "conversations", str(conv_id)
-                                    ))
-                                found = False
-                                for search_dir in search_dirs:
-                                    if not os.path.isdir(search_dir):
-                                        continue
-                                    for fname in os.listdir(search_dir):
-                                        # Legacy: UUID prefix match; new: original filename match
-                                        is_match = (
-                                            fname.startswith(file_id)
-                                            or fname == metadata.get('filename')
-                                        )
-                                        if is_match and not fname.endswith(('.json', '.content')):
-                                            candidate = os.path.join(search_dir, fname)
-                                            if os.path.exists(candidate):
-                                                relative_path = os.path.relpath(candidate, self._tmp_base_folder)
-                                                file_ref.file_path = relative_path
-                                                metadata['file_path'] = relative_path
-                                                with open(metadata_file, 'w') as f:
-                                                    json.dump(metadata, f, indent=2)
-                                                logger.info(f"Regenerated file_path for {file_id}: {relative_path}")
-                                                found = True
-                                                break
-                                    if found:
-                                        break
-                            
-                            self._files[session_key][file_id] = file_ref
-                            logger.info(f"Loaded persistent file {file_id} for session {session_key}")
-                            logger.info(f"Loaded file_path: {file_ref.file_path}")
-                            
-                        except Exception as e:
-                            logger.error(f"Error loading file {file_id}: {str(e)}")
-                            
-            logger.info(f"Loaded {len(self._files.get(session_key, {}))} persistent files for session {session_key}")
-            
-        except Exception as e:
-            logger.error(f"Error loading persistent files for session {session_key}: {str(e)}")
+    def _import_legacy_session_files(self, session_key: str, agent_id: int, db: Session):
+        """
+        Move attachments stored as ``<file_id>.json``/``.content`` sidecars
+        (the previous on-disk format) into the catalog.
 
-    async def _remove_file_from_disk(self, session_key: str, file_id: str):
-        """Remove file from disk"""
-        try:
-            session_dir = os.path.join(self._persistent_dir, session_key)
-            metadata_file = os.path.join(session_dir, f"{file_id}.json")
-            content_file = os.path.join(session_dir, f"{file_id}.content")
-
-            # Read metadata BEFORE deleting it to locate the original file
-            # (original files stored in conversations/ dir have a relative file_path)
-            if os.path.exists(metadata_file):
-                try:
-                    with open(metadata_file, 'r') as f:
-                        metadata = json.load(f)
-                    file_path = metadata.get('file_path')
-                    if file_path:
-                        abs_path = os.path.join(self._tmp_base_folder, file_path)
-                        if os.path.exists(abs_path):
-                            os.remove(abs_path)
-                            logger.info(f"Removed original file {abs_path}")
-                except Exception as e:
-                    logger.error(f"Error reading metadata to locate original file: {e}")
+        Runs once per legacy session: imported sidecars are deleted, so later
+        calls only pay for a missing-directory check.
+        """
+        session_path = os.path.join(self._persistent_dir, session_key)
+        if not os.path.isdir(session_path):
+            return
+
+        metadata_files = [f for f in os.listdir(session_path) if f.endswith('.json')]
+        if not metadata_files:
+            return
+
+        imported = 0
+        for filename in metadata_files:
+            file_id = filename[:-5]  # Remove .json extension
+            metadata_file = os.path.join(session_path, filename)
+            content_file = os.path.join(session_path, f"{file_id}.content")
+            if not os.path.exists(content_file):
+                continue
+            try:
+                with open(metadata_file, 'r') as f:
+                    metadata = json.load(f)
+                with open(content_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+
+                file_ref = FileReference(
+                    file_id=metadata['file_id'],
+                    filename=metadata['filename'],
+                    file_type=metadata['file_type'],
+                    content=content,
+                    file_path=metadata.get('file_path'),
+                    file_size_bytes=metadata.get('file_size_bytes'),
+                    conversation_id=metadata.get('conversation_id')
+                )
+                if metadata.get('uploaded_at'):
+                    file_ref.uploaded_at = datetime.fromisoformat(metadata['uploaded_at'])
+                if metadata.get('processing_status'):
+                    file_ref.processing_status = metadata['processing_status']
+                if not file_ref.file_path:
+                    file_ref.file_path = self._find_legacy_original(session_path, file_id, metadata)
+
+                if FileAttachmentRepository.get_by_id(file_ref.file_id, db, with_content=False) is None:
+                    db.add(file_ref.to_attachment(session_key, agent_id))
+                    db.commit()
                 os.remove(metadata_file)
-
-            if os.path.exists(content_file):
                 os.remove(content_file)
+                imported += 1
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error importing legacy file {file_id}: {str(e)}")
+
+        if imported:
+            logger.info(f"Imported {imported} legacy attachment(s) for session {session_key}")
+
+    def _find_legacy_original(self, session_path: str, file_id: str, metadata: Dict[str, Any]) -> Optional[str]:
+        """Locate the original file of a legacy entry that has no file_path"""
+        # Search: session dir (UUID-named legacy files) and
+        # conversation dir (original-named files)
+        conv_id = metadata.get('conversation_id')
+        search_dirs = [session_path]
+        if conv_id:
+            search_dirs.append(os.path.join(self._tmp_base_folder, "conversations", str(conv_id)))
+        for search_dir in search_dirs:
+            if not os.path.isdir(search_dir):
+                continue
+            for fname in os.listdir(search_dir):
+                # Legacy: UUID prefix match; new: original filename match
+                is_match = fname.startswith(file_id) or fname == metadata.get('filename')
+                if is_match and not fname.endswith(('.json', '.content')):
+                    candidate = os.path.join(search_dir, fname)
+                    if os.path.exists(candidate):
+                        return os.path.relpath(candidate, self._tmp_base_folder).replace(os.sep, '/')
+        return None
+
+    async def _remove_file_from_disk(self, session_key: str, file_id: str, file_path: Optional[str] = None):
+        """Remove the original file (and any legacy sidecars) from disk"""
+        try:
+            if file_path:
+                abs_path = os.path.join(self._tmp_base_folder, file_path)
+                if os.path.exists(abs_path):
+                    os.remove(abs_path)
+                    logger.info(f"Removed original file {abs_path}")
 
-            # Fallback: also remove any file with the file_id prefix inside session_dir
-            if os.path.exists(session_dir):
+            # Legacy layout: sidecars and UUID-prefixed originals in the session dir
+            session_dir = os.path.join(self._persistent_dir, session_key)
+            if os.path.isdir(session_dir):
                 for filename in os.listdir(session_dir):
-                    if filename.startswith(file_id) and not filename.endswith(('.json', '.content')):
-                        original_file = os.path.join(session_dir, filename)
-                        if os.path.exists(original_file):
-                            os.remove(original_file)
-                            logger.info(f"Removed original file {filename}")
+                    if filename.startswith(file_id):
+                        os.remove(os.path.join(session_dir, filename))
+                        logger.info(f"Removed legacy file {filename}")
 
             logger.info(f"Removed file {file_id} from disk")
 
@@ -767,21 +824,13 @@ class FileManagementService:
             _exclude = exclude_filenames if exclude_filenames is not None else set()
 
             # When exclude_filenames is provided we already know which files
-            # existed before the current execution turn, so we can skip the
-            # expensive _load_session_files() call that reads every historical
-            # file into memory.  This avoids O(N) memory/IO overhead when the
-            # persistent directory has accumulated thousands of files from
-            # previous agent calls (e.g. vision agent via public API).
+            # existed before the current execution turn, so the catalog lookup
+            # of already registered paths can be skipped.
             session_key = self._get_session_key(agent_id, user_context, conversation_id)
             if exclude_filenames is None:
-                if session_key not in self._files:
-                    self._load_session_files(session_key)
-
-                registered_paths = {
-                    ref.file_path
-                    for ref in self._files.get(session_key, {}).values()
-                    if ref.file_path
-                }
+                with self._session() as db:
+                    self._import_legacy_session_files(session_key, agent_id, db)
+                    registered_paths = FileAttachmentRepository.get_session_file_paths(session_key, db)
             else:
                 registered_paths = set()
 
@@ -902,24 +951,10 @@ class FileManagementService:
     def get_file_stats(self) -> Dict[str, Any]:
         """Get file management statistics"""
         try:
-            file_types = {}
-            total_size = 0
-            total_files = 0
-            
-            for session_files in self._files.values():
-                for file_ref in session_files.values():
-                    file_type = file_ref.file_type
-                    file_types[file_type] = file_types.get(file_type, 0) + 1
-                    total_size += len(file_ref.content)
-                    total_files += 1
-            
-            return {
-                "total_files": total_files,
-                "total_sessions": len(self._files),
-                "file_types": file_types,
-                "total_size_bytes": total_size,
-                "total_size_mb": round(total_size / (1024 * 1024), 2)
-            }
+            with self._session() as db:
+                stats = FileAttachmentRepository.get_stats(db)
+            stats["total_size_mb"] = round(stats["total_size_bytes"] / (1024 * 1024), 2)
+            return stats
             
         except Exception as e:
             logger.error(f"Error getting file stats: {str(e)}")
@@ -1,13 +1,20 @@
 """
 File size limit service for validating uploaded files against app limits.
-Provides utilities for checking file sizes and generating appropriate error messages.
+Provides utilities for checking file sizes and generating appropriate error messages,
+and for streaming uploads to disk while enforcing those limits incrementally.
 """
-from typing import Optional, Tuple
-from fastapi import UploadFile
+import base64
+import binascii
+import hashlib
+import os
+from typing import BinaryIO, Optional, Tuple
+from fastapi import HTTPException, UploadFile, status
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+
 
 class FileSizeLimitService:
     """
@@ -109,5 +116,125 @@ class FileSizeLimitService:
         return f"{size_bytes:.2f} TB"
 
 
+    @staticmethod
+    def max_size_bytes(max_size_mb: int) -> int:
+        """Convert an app limit in MB to bytes (0 means no limit)."""
+        return max_size_mb * 1024 * 1024 if max_size_mb and max_size_mb > 0 else 0
+
+    @staticmethod
+    def _raise_size_exceeded(filename: Optional[str], max_size_mb: int, app_id: Optional[int] = None):
+        error_msg = (
+            f"File '{filename}' exceeds maximum size limit. "
+            f"Maximum allowed: {max_size_mb}MB"
+        )
+        logger.warning(f"File size limit exceeded for app {app_id}: {error_msg}")
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=error_msg)
+
+    @staticmethod
+    async def stream_upload_to_file(
+        file: UploadFile,
+        dest_path: str,
+        max_size_mb: int = 0,
+        app_id: Optional[int] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ) -> Tuple[int, str]:
+        """
+        Write an upload to ``dest_path`` chunk by chunk.
+
+        The size limit is checked as bytes arrive, so an oversized upload is
+        rejected without ever being held in memory, and the SHA-256 is computed
+        on the way through.
+
+        Args:
+            file: The uploaded file
+            dest_path: Destination path (overwritten)
+            max_size_mb: Maximum file size in MB (0 means no limit)
+            app_id: Application ID for logging
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            Tuple of (size_bytes, sha256_hex)
+
+        Raises:
+            HTTPException: 413 if the upload exceeds the limit (partial file is removed)
+        """
+        max_bytes = FileSizeLimitService.max_size_bytes(max_size_mb)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(dest_path, 'wb') as out:
+                while True:
+                    chunk = await file.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        FileSizeLimitService._raise_size_exceeded(file.filename, max_size_mb, app_id)
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            try:
+                os.remove(dest_path)
+            except OSError:
+                pass
+            raise
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def decode_base64_to_file(
+        data: str,
+        out: BinaryIO,
+        start: int = 0,
+        max_size_mb: int = 0,
+        filename: Optional[str] = None,
+        app_id: Optional[int] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ) -> Tuple[int, str]:
+        """
+        Decode base64 ``data[start:]`` into ``out`` without materialising the
+        whole decoded payload.
+
+        ``start`` lets callers skip a ``data:`` URL header without slicing (and
+        copying) the string. Whitespace inside the payload is ignored.
+
+        Returns:
+            Tuple of (size_bytes, sha256_hex)
+
+        Raises:
+            HTTPException: 413 if the decoded payload exceeds the limit
+            ValueError: If the payload is not valid base64
+        """
+        max_bytes = FileSizeLimitService.max_size_bytes(max_size_mb)
+        # Keep slices aligned to whole base64 quanta (4 chars -> 3 bytes)
+        step = max(4, (chunk_size // 3) * 4)
+        digest = hashlib.sha256()
+        size = 0
+        carry = ""
+        try:
+            for offset in range(start, len(data), step):
+                piece = carry + "".join(data[offset:offset + step].split())
+                usable = len(piece) - len(piece) % 4
+                carry = piece[usable:]
+                if not usable:
+                    continue
+                chunk = base64.b64decode(piece[:usable])
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    FileSizeLimitService._raise_size_exceeded(filename, max_size_mb, app_id)
+                digest.update(chunk)
+                out.write(chunk)
+            if carry:
+                # Unpadded tail
+                chunk = base64.b64decode(carry + "=" * (-len(carry) % 4))
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    FileSizeLimitService._raise_size_exceeded(filename, max_size_mb, app_id)
+                digest.update(chunk)
+                out.write(chunk)
+        except binascii.Error as e:
+            raise ValueError(f"Invalid base64 payload: {str(e)}") from e
+        return size, digest.hexdigest()
+
+
 # Global instance
 file_size_limit_service = FileSizeLimitService()
@@ -19,6 +19,7 @@ from schemas.marketplace_schemas import (
     AgentRatingResponseSchema,
     UserRatingResponseSchema,
 )
+from repositories.conversation_repository import ConversationRepository
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -375,10 +376,14 @@ class MarketplaceService:
         user_id: int,
         limit: int = 50,
         offset: int = 0,
-    ) -> Tuple[List[MarketplaceConversationSchema], int]:
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[MarketplaceConversationSchema], Optional[int], Optional[str]]:
         """
         List a consumer's marketplace conversations, ordered by updated_at DESC.
         Resolves agent display name and icon from the marketplace profile.
+
+        Returns (conversations, total, next_cursor); the total is only counted
+        for the first page. Raises ValueError for a malformed cursor.
         """
         base_query = (
             db.query(Conversation, Agent, AgentMarketplaceProfile, App)
@@ -394,14 +399,10 @@ class MarketplaceService:
             )
         )
 
-        total = base_query.count()
+        total = base_query.count() if not cursor else None
 
-        results = (
-            base_query
-            .order_by(desc(Conversation.updated_at))
-            .offset(offset)
-            .limit(limit)
-            .all()
+        results, next_cursor = ConversationRepository.paginate(
+            base_query, limit, offset, cursor, conversation_of=lambda row: row[0]
         )
 
         conversations: List[MarketplaceConversationSchema] = []
@@ -423,7 +424,7 @@ class MarketplaceService:
                 )
             )
 
-        return conversations, total
+        return conversations, total, next_cursor
 
     # ------------------------------------------------------------------
     # 7. Create marketplace conversation
@@ -0,0 +1,245 @@
+"""
+Pooled MCP clients with a cached tool catalog.
+
+Listing tools means connecting to every MCP server an agent uses, which used
+to happen on every chat turn before the LLM was even called. Clients are now
+kept per (MCP config, auth identity) and their tool catalog is cached for
+``MCP_TOOL_CACHE_TTL_SECONDS``. A stale catalog is still served while a
+background task refreshes it, so only the very first turn waits on discovery.
+
+Discovery is bounded by ``MCP_CONNECT_TIMEOUT_SECONDS`` and every config is
+queried concurrently. After ``MCP_CIRCUIT_FAILURE_THRESHOLD`` consecutive
+failures a server's circuit opens for ``MCP_CIRCUIT_OPEN_SECONDS``; while it
+is open no discovery is attempted and the agent runs with the last catalog
+fetched for it, or without its tools, instead of waiting on it. A 4xx answer,
+such as a rejected user token, says nothing about the server's health and does
+not count towards the circuit that every user of the server shares.
+
+The auth identity is a SHA-256 digest of the user's token, so users never
+share clients that carry someone else's credentials. Config fingerprints are
+part of the key, so an edited config is picked up on the next turn.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from cachetools import LRUCache
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from models.mcp_config import MCPConfig
+from utils.logger import get_logger
+from utils.metrics import MCP_TOOL_DISCOVERY_SECONDS
+from utils.mcp_auth_utils import prepare_mcp_headers, get_user_token_from_context
+from utils.mcp_ssl_utils import inject_ssl_config
+
+logger = get_logger(__name__)
+
+MCP_TOOL_CACHE_TTL_SECONDS = float(os.getenv('MCP_TOOL_CACHE_TTL_SECONDS', '300'))
+MCP_CONNECT_TIMEOUT_SECONDS = float(os.getenv('MCP_CONNECT_TIMEOUT_SECONDS', '5'))
+MCP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('MCP_CIRCUIT_FAILURE_THRESHOLD', '3'))
+MCP_CIRCUIT_OPEN_SECONDS = float(os.getenv('MCP_CIRCUIT_OPEN_SECONDS', '60'))
+MCP_POOL_MAX_ENTRIES = int(os.getenv('MCP_POOL_MAX_ENTRIES', '1000'))
+
+
+def build_mcp_connections(mcp_config: MCPConfig, user_context: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Build the MultiServerMCPClient connections for one MCP config.
+
+    Adds the caller's bearer token to URL-based servers and disables SSL
+    verification when the config asks for it. The stored config is never
+    modified.
+
+    Raises:
+        ValueError: If the stored config is not valid JSON
+    """
+    connections = copy.deepcopy(mcp_config.to_connection_dict() or {})
+    auth_token = get_user_token_from_context(user_context) if user_context else None
+    if auth_token:
+        headers = prepare_mcp_headers(auth_token)
+        for server_name, server_config in connections.items():
+            if isinstance(server_config, dict) and 'url' in server_config:
+                server_config.setdefault('headers', {}).update(headers)
+                logger.debug(f"Added auth headers to MCP server: {server_name}")
+    ssl_verify = mcp_config.ssl_verify if mcp_config.ssl_verify is not None else True
+    return inject_ssl_config(connections, ssl_verify=ssl_verify)
+
+
+def _config_fingerprint(mcp_config: MCPConfig) -> str:
+    payload = json.dumps(
+        [mcp_config.to_connection_dict(), mcp_config.ssl_verify], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _identity_digest(user_context: Optional[Dict]) -> str:
+    token = get_user_token_from_context(user_context) if user_context else None
+    return hashlib.sha256(token.encode()).hexdigest() if token else ''
+
+
+def _is_client_error(error: BaseException) -> bool:
+    """True if ``error`` is, or wraps, a 4xx response from the MCP server."""
+    pending, seen = [error], set()
+    while pending:
+        exc = pending.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        seen.add(id(exc))
+        if isinstance(exc, httpx.HTTPStatusError) and 400 <= exc.response.status_code < 500:
+            return True
+        # The adapters raise from anyio task groups, so the HTTP error may be nested
+        pending.extend(getattr(exc, 'exceptions', ()))
+        pending.extend((exc.__cause__, exc.__context__))
+    return False
+
+
+@dataclass
+class _PooledClient:
+    client: MultiServerMCPClient
+    tools: List[BaseTool] = field(default_factory=list)
+    fetched_at: Optional[float] = None
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    open_until: float = 0.0
+
+
+class MCPClientPool:
+    """Per-(config, identity) MCP clients with TTL-cached tools and per-server circuit breakers.
+
+    Only used from the event loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = MCP_TOOL_CACHE_TTL_SECONDS,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT_SECONDS,
+        failure_threshold: int = MCP_CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds: float = MCP_CIRCUIT_OPEN_SECONDS,
+        max_entries: int = MCP_POOL_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.connect_timeout = connect_timeout
+        self.failure_threshold = max(failure_threshold, 1)
+        self.open_seconds = open_seconds
+        self._entries: LRUCache = LRUCache(maxsize=max(max_entries, 1))
+        self._circuits: Dict[Tuple[int, str], _Circuit] = {}
+        self._inflight: Dict[Tuple[int, str, str], asyncio.Task] = {}
+
+    async def get_tools(self, mcp_configs: Iterable[MCPConfig], user_context: Optional[Dict] = None) -> List[BaseTool]:
+        """
+        Return the tools of all given MCP configs, discovering them concurrently.
+
+        Configs that are misconfigured, unreachable or circuit-broken contribute
+        no tools.
+        """
+        results = await asyncio.gather(
+            *(self._tools_for(mcp_config, user_context) for mcp_config in mcp_configs)
+        )
+        return [tool for tools in results for tool in tools]
+
+    async def _tools_for(self, mcp_config: MCPConfig, user_context: Optional[Dict]) -> List[BaseTool]:
+        try:
+            fingerprint = _config_fingerprint(mcp_config)
+            connections = build_mcp_connections(mcp_config, user_context)
+        except ValueError as e:
+            logger.error(f"Error configuring MCP {mcp_config.name}: {e}")
+            return []
+        if not connections:
+            return []
+
+        server_key = (mcp_config.config_id, fingerprint)
+        key = (mcp_config.config_id, fingerprint, _identity_digest(user_context))
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        cached = entry is not None and entry.fetched_at is not None
+
+        circuit = self._circuits.get(server_key)
+        if circuit and circuit.open_until > now:
+            logger.warning(f"MCP circuit open for {mcp_config.name}, serving its cached tools only")
+            return entry.tools if cached else []
+
+        if cached:
+            if now - entry.fetched_at >= self.ttl_seconds:
+                self._refresh(key, server_key, mcp_config.name, connections)
+            return entry.tools
+
+        try:
+            # Shielded so a cancelled turn does not abort a discovery other turns share
+            return await asyncio.shield(self._refresh(key, server_key, mcp_config.name, connections))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return []
+
+    def _refresh(self, key, server_key, name: str, connections: Dict[str, Any]) -> asyncio.Task:
+        """Start (or join) the discovery task for ``key``."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._discover(key, server_key, name, connections))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return task
+
+    async def _discover(self, key, server_key, name: str, connections: Dict[str, Any]) -> List[BaseTool]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PooledClient(client=MultiServerMCPClient(connections=connections))
+        started = time.monotonic()
+        try:
+            tools = await asyncio.wait_for(entry.client.get_tools(), timeout=self.connect_timeout)
+        except Exception as e:
+            outcome = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error'
+            MCP_TOOL_DISCOVERY_SECONDS.labels(outcome=outcome).observe(time.monotonic() - started)
+            if _is_client_error(e):
+                logger.error(f"MCP tool discovery for {name} was refused: {e}")
+            else:
+                self._record_failure(server_key, name, e)
+            return []
+
+        self._circuits.pop(server_key, None)
+        entry.tools = list(tools or [])
+        entry.fetched_at = time.monotonic()
+        MCP_TOOL_DISCOVERY_SECONDS.labels(outcome='success').observe(entry.fetched_at - started)
+        self._entries[key] = entry
+        logger.info(
+            f"MCP tools loaded for {name}: {len(entry.tools)} tools "
+            f"in {(entry.fetched_at - started) * 1000:.0f} ms"
+        )
+        return entry.tools
+
+    def _record_failure(self, server_key, name: str, error: Exception) -> None:
+        circuit = self._circuits.setdefault(server_key, _Circuit())
+        circuit.failures += 1
+        reason = 'timed out' if isinstance(error, asyncio.TimeoutError) else f"failed: {error}"
+        if circuit.failures >= self.failure_threshold:
+            circuit.open_until = time.monotonic() + self.open_seconds
+            logger.error(
+                f"MCP tool discovery for {name} {reason}; circuit open for {self.open_seconds:.0f}s "
+                f"after {circuit.failures} consecutive failures"
+            )
+        else:
+            logger.error(f"MCP tool discovery for {name} {reason}")
+
+    def invalidate_config(self, config_id: int) -> None:
+        """Drop pooled clients and circuit state of an MCP config after it changes."""
+        for key in [k for k in self._entries.keys() if k[0] == config_id]:
+            self._entries.pop(key, None)
+        for server_key in [k for k in self._circuits if k[0] == config_id]:
+            self._circuits.pop(server_key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._circuits.clear()
+
+
+mcp_client_pool = MCPClientPool()
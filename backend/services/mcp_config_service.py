@@ -7,6 +7,7 @@ import json
 import asyncio
 from schemas.mcp_config_schemas import MCPConfigListItemSchema, MCPConfigDetailSchema, CreateUpdateMCPConfigSchema
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from services.mcp_client_pool_service import mcp_client_pool
 from utils.logger import get_logger
 from utils.mcp_ssl_utils import inject_ssl_config
 
@@ -103,12 +104,17 @@ class MCPConfigService:
         if config_id == 0:
             return MCPConfigRepository.create(db, config)
         else:
-            return MCPConfigRepository.update(db, config)
+            updated = MCPConfigRepository.update(db, config)
+            mcp_client_pool.invalidate_config(config_id)
+            return updated
 
     @staticmethod
     def delete_mcp_config(db: Session, app_id: int, config_id: int) -> bool:
         """Delete an MCP config"""
-        return MCPConfigRepository.delete_by_id_and_app_id(db, config_id, app_id)
+        deleted = MCPConfigRepository.delete_by_id_and_app_id(db, config_id, app_id)
+        if deleted:
+            mcp_client_pool.invalidate_config(config_id)
+        return deleted
 
     @staticmethod
     async def test_connection(db: Session, app_id: int, config_id: int) -> dict:
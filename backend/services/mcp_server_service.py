@@ -3,6 +3,7 @@ from models.mcp_server import MCPServer
 from models.agent import Agent
 from models.app import App
 from repositories.mcp_server_repository import MCPServerRepository, AppSlugRepository
+from services.auth_cache_service import auth_cache
 from sqlalchemy.orm import Session
 from datetime import datetime
 import re
@@ -449,6 +450,7 @@ class AppSlugService:
             clean_slug = AppSlugService.ensure_unique_slug(db, clean_slug, app_id)
 
         app = AppSlugRepository.update_slug(db, app_id, clean_slug)
+        auth_cache.invalidate_app(app_id)
         if not app:
             return None
 
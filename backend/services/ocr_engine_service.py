@@ -0,0 +1,142 @@
+"""
+Concurrent OCR engine for scanned PDFs.
+
+Pages are rasterized lazily (one pdf2image call per page) inside a bounded
+worker pool and sent to a single shared vision client, so a long scanned
+document is processed ``max_workers`` pages at a time instead of strictly in
+sequence. At most ``max_workers`` page images exist on disk at any moment.
+"""
+import contextvars
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from tools.PDFTools import get_pdf_page_count, convert_pdf_page_to_image
+from tools.ocrAgentTools import convert_image_to_base64, extract_text_from_image
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OCR_PAGE_CONCURRENCY = int(os.getenv('OCR_PAGE_CONCURRENCY', '4'))
+OCR_RASTER_DPI = int(os.getenv('OCR_RASTER_DPI', '200'))
+
+# (completed_pages, total_pages, page_number, succeeded)
+OCRProgressCallback = Callable[[int, int, int, bool], None]
+
+
+class ConcurrentOCREngine:
+    """Run vision OCR over the pages of a PDF with a bounded worker pool."""
+
+    def __init__(
+        self,
+        vision_model: Any,
+        vision_system_prompt: str,
+        max_workers: int = OCR_PAGE_CONCURRENCY,
+        dpi: int = OCR_RASTER_DPI,
+        progress_callback: Optional[OCRProgressCallback] = None,
+    ):
+        if vision_model is None:
+            raise ValueError("Vision model not found")
+        self.vision_model = vision_model
+        self.vision_system_prompt = vision_system_prompt
+        self.max_workers = max(1, max_workers)
+        self.dpi = dpi
+        self.progress_callback = progress_callback
+        # Pages the last process_pdf call could not OCR
+        self.failed_pages: List[int] = []
+
+    def process_pdf(
+        self,
+        pdf_path: str,
+        images_dir: str,
+        pages: Optional[Sequence[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        OCR the pages of ``pdf_path`` and return the per-page results in page order.
+
+        Pages that fail are logged and skipped, matching the previous sequential
+        behaviour; their numbers are left in ``failed_pages``.
+
+        Args:
+            pdf_path: Path to the PDF to process
+            images_dir: Base folder for temporary page images
+            pages: 1-based page numbers to OCR; all pages when omitted
+
+        Returns:
+            List of ``{"page": n, "extracted_text": ...}`` dicts sorted by page
+        """
+        self.failed_pages = []
+        if pages is None:
+            pages = range(1, get_pdf_page_count(pdf_path) + 1)
+        total_pages = len(pages)
+        if total_pages == 0:
+            return []
+
+        os.makedirs(images_dir, exist_ok=True)
+        # Per-run scratch folder so concurrent jobs never collide and a single
+        # rmtree reclaims anything left behind by a failed page.
+        work_dir = tempfile.mkdtemp(prefix="ocr_", dir=images_dir)
+        workers = min(self.max_workers, total_pages)
+        logger.info(f"OCR: processing {total_pages} pages with {workers} workers")
+
+        results: List[Dict[str, Any]] = []
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr_page") as executor:
+                # Each page runs in a copy of the caller's context so model
+                # calls are attributed to the caller's token usage
+                futures = {
+                    executor.submit(
+                        contextvars.copy_context().run, self._process_page, pdf_path, page_number, work_dir
+                    ): page_number
+                    for page_number in pages
+                }
+                for future in as_completed(futures):
+                    page_number = futures[future]
+                    succeeded = False
+                    try:
+                        results.append({
+                            "page": page_number,
+                            "extracted_text": future.result(),
+                        })
+                        succeeded = True
+                    except Exception as e:
+                        logger.warning(f"Error processing image {page_number}: {str(e)}")
+                        self.failed_pages.append(page_number)
+                    completed += 1
+                    self._report_progress(completed, total_pages, page_number, succeeded)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        results.sort(key=lambda r: r["page"])
+        self.failed_pages.sort()
+        return results
+
+    def _process_page(self, pdf_path: str, page_number: int, work_dir: str) -> str:
+        """Rasterize, encode and OCR a single page, removing its image afterwards."""
+        image_path = convert_pdf_page_to_image(pdf_path, page_number, work_dir, dpi=self.dpi)
+        try:
+            base64_image = convert_image_to_base64(image_path)
+        finally:
+            try:
+                os.remove(image_path)
+            except OSError:
+                pass
+
+        return extract_text_from_image(
+            base64_image,
+            self.vision_system_prompt,
+            self.vision_model,
+            f"Page {page_number}"
+        )
+
+    def _report_progress(self, completed: int, total: int, page_number: int, succeeded: bool):
+        logger.info(f"OCR progress: {completed}/{total} pages (page {page_number} {'ok' if succeeded else 'failed'})")
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(completed, total, page_number, succeeded)
+        except Exception as e:
+            logger.warning(f"OCR progress callback failed: {str(e)}")
@@ -0,0 +1,461 @@
+"""
+Asynchronous OCR jobs with progress tracking and result caching.
+
+A submitted PDF is stored under ``TMP_BASE_FOLDER/ocr_jobs`` and queued as an
+``ocr_job`` row. Worker loops started in the FastAPI lifespan claim queued
+jobs (``SELECT ... FOR UPDATE SKIP LOCKED``), so any uvicorn worker can run a
+job and any worker can answer status polls for it.
+
+Completed jobs double as the result cache: a job is keyed by the agent
+configuration fingerprint and the SHA-256 of the PDF, so re-submitting the
+same document to an unchanged agent returns the stored result immediately.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from models.ocr_job import OCRJob
+from models.enums.ocr_job_status import OCRJobStatus
+from repositories.ocr_job_repository import OCRJobRepository
+from services.file_size_limit_service import FileSizeLimitService
+from services.pdf_extraction_service import compute_file_sha256
+from tools.streaming_utils import format_sse_event
+from utils.config import get_app_config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OCR_JOB_WORKER_CONCURRENCY = int(os.getenv('OCR_JOB_WORKER_CONCURRENCY', '2'))
+OCR_JOB_POLL_INTERVAL_SECONDS = int(os.getenv('OCR_JOB_POLL_INTERVAL_SECONDS', '2'))
+OCR_RESULT_CACHE_TTL_HOURS = int(os.getenv('OCR_RESULT_CACHE_TTL_HOURS', '168'))
+OCR_JOB_HEARTBEAT_SECONDS = 30
+OCR_JOB_MAINTENANCE_INTERVAL_SECONDS = 300
+OCR_JOB_EVENTS_POLL_SECONDS = 1.0
+
+_TERMINAL_STATUSES = (OCRJobStatus.COMPLETED, OCRJobStatus.FAILED)
+
+# Wakes local worker loops as soon as a job is submitted on this process;
+# workers on other processes pick it up on their next poll.
+_job_submitted = asyncio.Event()
+
+
+def compute_agent_fingerprint(agent) -> str:
+    """
+    Hash every OCR agent setting that can change the extraction result.
+
+    Covers prompts, temperature, the text and vision model services and the
+    output parser schema. Credentials are deliberately excluded so rotating
+    an API key does not invalidate cached results.
+    """
+    def _service(service) -> Optional[Dict[str, Any]]:
+        if service is None:
+            return None
+        provider = getattr(service, 'provider', None)
+        return {
+            "service_id": service.service_id,
+            "provider": getattr(provider, 'value', provider),
+            "model": service.description,
+            "endpoint": service.endpoint,
+            "api_version": service.api_version,
+        }
+
+    output_parser = getattr(agent, 'output_parser', None)
+    payload = {
+        "agent_id": agent.agent_id,
+        "temperature": getattr(agent, 'temperature', None),
+        "text_system_prompt": getattr(agent, 'text_system_prompt', None),
+        "vision_system_prompt": getattr(agent, 'vision_system_prompt', None),
+        "ai_service": _service(getattr(agent, 'ai_service', None)),
+        "vision_service": _service(getattr(agent, 'vision_service_rel', None)),
+        "output_parser": {
+            "parser_id": output_parser.parser_id,
+            "name": output_parser.name,
+            "fields": output_parser.fields,
+        } if output_parser is not None else None,
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def build_ocr_response(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Shape a stored OCR result like ``OCRResponseSchema`` (text, pages, confidence)."""
+    if result is None:
+        return None
+    content = result.get("content", "")
+    if isinstance(content, (dict, list)):
+        text = json.dumps(content, indent=2, ensure_ascii=False)
+    else:
+        text = str(content)
+    extracted = result.get("extracted_text")
+    pages = len(extracted) if isinstance(extracted, list) and extracted else 1
+    return {
+        "text": text,
+        "pages": pages,
+        "confidence": result.get("confidence"),
+    }
+
+
+def is_cacheable_result(result: Optional[Dict[str, Any]]) -> bool:
+    """
+    Return False for results that must not be served from the cache.
+
+    That is a result with failed pages, with no content, or produced by a
+    fallback after the text model failed: a retry may well do better.
+    """
+    if not result or result.get("failed_pages") or result.get("fallback"):
+        return False
+    content = result.get("content")
+    if isinstance(content, str):
+        return bool(content.strip())
+    return bool(content)
+
+
+class OCRJobService:
+    """Submit, run and report on asynchronous OCR jobs."""
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_max_age() -> Optional[timedelta]:
+        if OCR_RESULT_CACHE_TTL_HOURS <= 0:
+            return None
+        return timedelta(hours=OCR_RESULT_CACHE_TTL_HOURS)
+
+    @staticmethod
+    def get_cached_result(agent, pdf_sha256: str, db: Session) -> Optional[Dict[str, Any]]:
+        """Return the cached OCR result for this agent configuration and PDF, if any."""
+        job = OCRJobRepository.find_cached(
+            agent.agent_id,
+            compute_agent_fingerprint(agent),
+            pdf_sha256,
+            db,
+            max_age=OCRJobService._cache_max_age(),
+        )
+        if job is None:
+            return None
+        logger.info(f"OCR cache hit for agent {agent.agent_id} (job {job.job_id})")
+        return job.result
+
+    @staticmethod
+    def record_result(
+        agent,
+        pdf_sha256: str,
+        result: Dict[str, Any],
+        db: Session,
+        pdf_filename: Optional[str] = None,
+    ) -> Optional[OCRJob]:
+        """Store a synchronously produced OCR result so later requests hit the cache."""
+        if not is_cacheable_result(result):
+            logger.info(f"OCR result for agent {agent.agent_id} is incomplete, not caching it")
+            return None
+        now = datetime.utcnow()
+        job = OCRJob(
+            job_id=str(uuid.uuid4()),
+            agent_id=agent.agent_id,
+            app_id=agent.app_id,
+            status=OCRJobStatus.COMPLETED,
+            agent_fingerprint=compute_agent_fingerprint(agent),
+            pdf_sha256=pdf_sha256,
+            pdf_filename=pdf_filename,
+            result=jsonable_encoder(result),
+            created_at=now,
+            started_at=now,
+            finished_at=now,
+        )
+        return OCRJobRepository.create(job, db)
+
+    # ------------------------------------------------------------------
+    # Submission / status
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _jobs_dir() -> str:
+        jobs_dir = os.path.join(get_app_config()['TMP_BASE_FOLDER'], "ocr_jobs")
+        os.makedirs(jobs_dir, exist_ok=True)
+        return jobs_dir
+
+    @staticmethod
+    async def submit_job(agent, pdf_file: UploadFile, db: Session, max_size_mb: int = 0) -> Tuple[OCRJob, bool]:
+        """
+        Queue an OCR job for ``pdf_file`` or reuse an existing one.
+
+        ``max_size_mb`` is the app's per-file limit (0 = unlimited).
+
+        Returns:
+            Tuple of (job, cached). ``cached`` is True when a completed job for
+            the same agent configuration and PDF was returned instead of
+            queuing new work.
+        """
+        if not pdf_file.filename or not pdf_file.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+        job_id = str(uuid.uuid4())
+        pdf_path = os.path.join(OCRJobService._jobs_dir(), f"{job_id}.pdf")
+        _, pdf_sha256 = await FileSizeLimitService.stream_upload_to_file(
+            pdf_file, pdf_path, max_size_mb=max_size_mb, app_id=agent.app_id
+        )
+        fingerprint = compute_agent_fingerprint(agent)
+
+        existing = OCRJobRepository.find_cached(
+            agent.agent_id, fingerprint, pdf_sha256, db, max_age=OCRJobService._cache_max_age()
+        )
+        cached = existing is not None
+        if existing is None:
+            existing = OCRJobRepository.find_active(agent.agent_id, fingerprint, pdf_sha256, db)
+        if existing is not None:
+            os.remove(pdf_path)
+            logger.info(f"OCR submit for agent {agent.agent_id} reused job {existing.job_id} (cached={cached})")
+            return existing, cached
+
+        job = OCRJobRepository.create(OCRJob(
+            job_id=job_id,
+            agent_id=agent.agent_id,
+            app_id=agent.app_id,
+            status=OCRJobStatus.QUEUED,
+            agent_fingerprint=fingerprint,
+            pdf_sha256=pdf_sha256,
+            pdf_filename=pdf_file.filename,
+            pdf_path=pdf_path,
+            created_at=datetime.utcnow(),
+        ), db)
+        _job_submitted.set()
+        logger.info(f"Queued OCR job {job.job_id} for agent {agent.agent_id}")
+        return job, False
+
+    @staticmethod
+    def get_job(job_id: str, agent_id: int, db: Session) -> OCRJob:
+        """Return the job if it exists and belongs to ``agent_id``; 404 otherwise."""
+        job = OCRJobRepository.get_by_id(job_id, db)
+        if job is None or job.agent_id != agent_id:
+            raise HTTPException(status_code=404, detail="OCR job not found")
+        return job
+
+    @staticmethod
+    def to_dict(job: OCRJob, cached: bool = False) -> Dict[str, Any]:
+        """Serialize a job for API responses."""
+        status = job.status.value if hasattr(job.status, 'value') else job.status
+        return {
+            "job_id": job.job_id,
+            "agent_id": job.agent_id,
+            "status": status,
+            "cached": cached,
+            "pdf_filename": job.pdf_filename,
+            "total_pages": job.total_pages,
+            "processed_pages": job.processed_pages or 0,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "result": build_ocr_response(job.result) if status == OCRJobStatus.COMPLETED.value else None,
+            "error": job.error,
+        }
+
+    @staticmethod
+    async def stream_job_events(job_id: str) -> AsyncGenerator[str, None]:
+        """
+        Yield SSE events for a job until it reaches a terminal state.
+
+        Emits ``progress`` whenever the processed page count or status changes,
+        then a single ``done`` (with the full job) or ``error`` event.
+        """
+        from db.database import SessionLocal
+
+        last_seen = None
+        while True:
+            db = SessionLocal()
+            try:
+                job = OCRJobRepository.get_by_id(job_id, db)
+                if job is None:
+                    yield format_sse_event("error", {"message": "OCR job not found"})
+                    return
+                payload = jsonable_encoder(OCRJobService.to_dict(job))
+            finally:
+                db.close()
+
+            if payload["status"] == OCRJobStatus.COMPLETED.value:
+                yield format_sse_event("done", payload)
+                return
+            if payload["status"] == OCRJobStatus.FAILED.value:
+                yield format_sse_event("error", {"message": payload["error"] or "OCR processing failed", "job_id": job_id})
+                return
+
+            snapshot = (payload["status"], payload["processed_pages"], payload["total_pages"])
+            if snapshot != last_seen:
+                last_seen = snapshot
+                yield format_sse_event("progress", {
+                    "job_id": job_id,
+                    "status": payload["status"],
+                    "processed_pages": payload["processed_pages"],
+                    "total_pages": payload["total_pages"],
+                })
+            await asyncio.sleep(OCR_JOB_EVENTS_POLL_SECONDS)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _progress_callback(job_id: str, total_pages: int):
+        """Build a thread-safe progress callback that persists page counts.
+
+        Progress is reported against the document's ``total_pages``; pages the
+        engine was not asked to OCR count as already processed.
+        """
+        from db.database import SessionLocal
+
+        def _callback(completed: int, total: int, page_number: int, succeeded: bool) -> None:
+            db = SessionLocal()
+            try:
+                OCRJobRepository.update_progress(job_id, total_pages - total + completed, None, db)
+            finally:
+                db.close()
+
+        return _callback
+
+    @staticmethod
+    async def _heartbeat_loop(job_id: str) -> None:
+        from db.database import SessionLocal
+
+        while True:
+            await asyncio.sleep(OCR_JOB_HEARTBEAT_SECONDS)
+            db = SessionLocal()
+            try:
+                OCRJobRepository.heartbeat(job_id, db)
+            except Exception as e:
+                logger.warning(f"OCR job {job_id} heartbeat failed: {e}")
+            finally:
+                db.close()
+
+    @staticmethod
+    async def run_job(job_id: str) -> None:
+        """Execute a claimed (RUNNING) job and store its result or error."""
+        from db.database import SessionLocal
+        from services.agent_execution_service import AgentExecutionService
+        from tools.PDFTools import get_pdf_page_count
+
+        db = SessionLocal()
+        heartbeat = asyncio.create_task(OCRJobService._heartbeat_loop(job_id))
+        pdf_path = None
+        try:
+            job = OCRJobRepository.get_by_id(job_id, db)
+            if job is None:
+                return
+            pdf_path = job.pdf_path
+            if not pdf_path or not os.path.exists(pdf_path):
+                raise FileNotFoundError("Uploaded PDF is no longer available")
+
+            execution_service = AgentExecutionService()
+            agent = execution_service.agent_service.get_agent(db, job.agent_id, agent_type='ocr_agent')
+            if agent is None:
+                raise ValueError("OCR Agent not found")
+
+            total_pages = await asyncio.to_thread(get_pdf_page_count, pdf_path)
+            OCRJobRepository.update_progress(job_id, 0, total_pages, db)
+
+            result = await execution_service._process_pdf_with_ocr(
+                agent, pdf_path, db, progress_callback=OCRJobService._progress_callback(job_id, total_pages)
+            )
+            execution_service._update_request_count(agent, db)
+            OCRJobRepository.mark_completed(
+                job_id, jsonable_encoder(result), db, cacheable=is_cacheable_result(result)
+            )
+            logger.info(f"OCR job {job_id} completed")
+        except Exception as e:
+            logger.error(f"OCR job {job_id} failed: {e}", exc_info=True)
+            db.rollback()
+            OCRJobRepository.mark_failed(job_id, str(e), db)
+        finally:
+            heartbeat.cancel()
+            if pdf_path and os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            db.close()
+
+    @staticmethod
+    def cleanup_expired(db: Session) -> int:
+        """Delete finished jobs older than the cache TTL."""
+        max_age = OCRJobService._cache_max_age()
+        if max_age is None:
+            return 0
+        return OCRJobRepository.delete_finished_before(datetime.utcnow() - max_age, db)
+
+
+# ----------------------------------------------------------------------
+# Worker loops (started in FastAPI lifespan)
+# ----------------------------------------------------------------------
+
+async def _worker_loop(worker_id: str) -> None:
+    """Single worker coroutine — claims QUEUED OCR jobs and runs them."""
+    from db.database import SessionLocal
+
+    while True:
+        try:
+            db = SessionLocal()
+            try:
+                job = OCRJobRepository.poll_queued_job(worker_id, db)
+            finally:
+                db.close()
+
+            if job:
+                logger.info(f"OCR worker {worker_id} picked up job {job.job_id}")
+                await OCRJobService.run_job(job.job_id)
+            else:
+                try:
+                    await asyncio.wait_for(_job_submitted.wait(), timeout=OCR_JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                _job_submitted.clear()
+        except asyncio.CancelledError:
+            logger.info(f"OCR worker {worker_id} shutting down")
+            break
+        except Exception as e:
+            logger.error(f"OCR worker {worker_id} error: {e}", exc_info=True)
+            await asyncio.sleep(OCR_JOB_POLL_INTERVAL_SECONDS)
+
+
+async def _maintenance_loop() -> None:
+    """Periodically re-queue jobs with a stale heartbeat and expire old results."""
+    from db.database import SessionLocal
+
+    while True:
+        try:
+            db = SessionLocal()
+            try:
+                OCRJobRepository.reset_stuck_jobs(db)
+                removed = OCRJobService.cleanup_expired(db)
+                if removed:
+                    logger.info(f"Removed {removed} expired OCR job(s)")
+            finally:
+                db.close()
+            await asyncio.sleep(OCR_JOB_MAINTENANCE_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            logger.info("OCR maintenance loop shutting down")
+            break
+        except Exception as e:
+            logger.error(f"OCR maintenance error: {e}", exc_info=True)
+            await asyncio.sleep(OCR_JOB_MAINTENANCE_INTERVAL_SECONDS)
+
+
+async def start_ocr_job_workers() -> List[asyncio.Task]:
+    """Start OCR job worker tasks. Called during FastAPI lifespan startup."""
+    tasks: List[asyncio.Task] = [
+        asyncio.create_task(_worker_loop(str(uuid.uuid4())), name=f"ocr-worker-{i}")
+        for i in range(OCR_JOB_WORKER_CONCURRENCY)
+    ]
+    tasks.append(asyncio.create_task(_maintenance_loop(), name="ocr-maintenance"))
+    return tasks
+
+
+async def stop_ocr_job_workers(tasks: List[asyncio.Task]) -> None:
+    """Cancel all OCR job worker tasks. Called during FastAPI lifespan shutdown."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
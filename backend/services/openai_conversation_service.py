@@ -0,0 +1,75 @@
+"""
+Conversation resume for the stateless OpenAI-compatible endpoint.
+
+OpenAI clients resend the whole message list on every turn. For agents with
+memory, each turn's conversation stores a digest of the message list its
+LangGraph checkpoint ends with (the request plus the assistant reply the
+client received). When a later request's messages, minus the newest one,
+hash to that digest, the turn resumes the conversation and only the newest
+message is sent to the agent; the history comes from the checkpoint instead
+of being re-sent as text.
+
+Digests are chained per message, so extending a known digest by the
+assistant reply costs one hash. System messages are not part of the digest:
+the endpoint does not forward them to the agent.
+"""
+import hashlib
+import json
+from typing import Any, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from repositories.conversation_repository import ConversationRepository
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _canonical_message(role: str, content: Any) -> bytes:
+    if isinstance(content, str):
+        payload = content.strip()
+    else:
+        payload = [
+            part.model_dump(mode="json", exclude_none=True) if hasattr(part, "model_dump") else part
+            for part in content or []
+        ]
+    return json.dumps([role, payload], ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+
+
+def chain_digest(messages: Iterable[Tuple[str, Any]], digest: str = "") -> str:
+    """Extend ``digest`` with ``(role, content)`` messages, in order."""
+    for role, content in messages:
+        digest = hashlib.sha256(digest.encode() + _canonical_message(role, content)).hexdigest()
+    return digest
+
+
+def _api_key_hash(user_context: dict) -> Optional[str]:
+    api_key = (user_context or {}).get("api_key")
+    # Same identity ConversationService.create_conversation stores
+    return hashlib.md5(api_key.encode()).hexdigest() if api_key else None
+
+
+class OpenAIConversationService:
+
+    @staticmethod
+    def claim(db: Session, agent_id: int, user_context: dict, prefix_digest: str) -> Optional[int]:
+        """Return the conversation to resume for ``prefix_digest``, if any, taking it over."""
+        try:
+            return ConversationRepository.claim_by_prefix_hash(
+                db, agent_id, _api_key_hash(user_context), prefix_digest
+            )
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not look up resumable conversation for agent {agent_id}: {e}")
+            return None
+
+    @staticmethod
+    def remember(db: Session, conversation_id: Optional[int], digest: Optional[str]) -> None:
+        """Record that ``conversation_id``'s history now ends at ``digest``."""
+        if not conversation_id or not digest:
+            return
+        try:
+            ConversationRepository.set_prefix_hash(db, conversation_id, digest)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not store prefix hash for conversation {conversation_id}: {e}")
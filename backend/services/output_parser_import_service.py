@@ -13,6 +13,7 @@ from schemas.import_schemas import (
 )
 from core.export_constants import validate_export_version
 from repositories.output_parser_repository import OutputParserRepository
+from tools.outputParserTools import invalidate_parser_models
 import logging
 
 logger = logging.getLogger(__name__)
@@ -166,6 +167,7 @@ class OutputParserImportService:
 
                 self.session.add(existing_parser)
                 self.session.flush()
+                invalidate_parser_models()
 
                 return ImportSummarySchema(
                     component_type=ComponentType.OUTPUT_PARSER,
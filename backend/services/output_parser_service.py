@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from models.output_parser import OutputParser
 from models.repository import Repository
 from repositories.output_parser_repository import OutputParserRepository
+from tools.outputParserTools import invalidate_parser_models
 from schemas.output_parser_schemas import (
     OutputParserListItemSchema,
     OutputParserDetailSchema,
@@ -135,7 +136,9 @@ class OutputParserService:
         if parser_id == 0:
             return self.repository.create(db, parser)
         else:
-            return self.repository.update(db, parser)
+            parser = self.repository.update(db, parser)
+            invalidate_parser_models()
+            return parser
     
     def delete_output_parser(self, db: Session, app_id: int, parser_id: int) -> bool:
         """
@@ -146,7 +149,9 @@ class OutputParserService:
         if not parser:
             return False
         
-        return self.repository.delete(db, parser)
+        deleted = self.repository.delete(db, parser)
+        invalidate_parser_models()
+        return deleted
     
     def get_parsers_by_app(self, db: Session, app_id: int) -> List[OutputParser]:
         """Obtiene todos los parsers de una aplicación"""
@@ -173,11 +178,15 @@ class OutputParserService:
         if parser_id == 0:
             return self.repository.create(db, parser)
         else:
-            return self.repository.update(db, parser)
+            parser = self.repository.update(db, parser)
+            invalidate_parser_models()
+            return parser
     
     def delete_parser(self, db: Session, parser_id: int) -> bool:
         """Elimina un parser por su ID"""
-        return self.repository.delete_by_id(db, parser_id)
+        deleted = self.repository.delete_by_id(db, parser_id)
+        invalidate_parser_models()
+        return deleted
     
     def _process_fields(self, names: List[str], types: List[str], 
                        descriptions: List[str], list_types: List[str]) -> List[Dict]:
@@ -0,0 +1,240 @@
+"""
+Single-pass PDF text extraction with a per-page cache.
+
+Every consumer that needs the text layer of a PDF (the OCR agent, file
+attachments and silo indexing) goes through ``PDFExtractionService`` so a
+document is parsed once: pages are yielded lazily while pypdf walks the file,
+and the per-page results are cached by the SHA-256 of the file contents so a
+second pass over the same bytes never re-parses it.
+
+Each page is classified as ``text`` (usable text layer), ``scanned`` (little
+or no text but embedded images, so it needs the vision model) or ``blank``.
+Mixed documents can therefore send only their scanned pages to OCR.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PDF_TEXT_CACHE_SIZE = int(os.getenv('PDF_TEXT_CACHE_SIZE', '64'))
+PDF_PAGE_MIN_TEXT_LENGTH = int(os.getenv('PDF_PAGE_MIN_TEXT_LENGTH', '50'))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+# Same heuristic as tools.PDFTools.check_pdf_has_text
+_MIN_PRINTABLE_RATIO = 0.3
+
+
+def compute_file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_is_meaningful(text: Optional[str], min_text_length: int = PDF_PAGE_MIN_TEXT_LENGTH) -> bool:
+    """Return True if ``text`` is long enough and mostly printable characters."""
+    if not text or len(text.strip()) < min_text_length:
+        return False
+    printable_chars = sum(1 for c in text if c.isprintable() and not c.isspace())
+    return printable_chars / len(text) > _MIN_PRINTABLE_RATIO
+
+
+class PageKind(str, Enum):
+    TEXT = "text"
+    SCANNED = "scanned"
+    BLANK = "blank"
+
+
+@dataclass(frozen=True)
+class PDFPage:
+    """Text layer of a single PDF page. ``page_number`` is 1-based."""
+    page_number: int
+    text: str
+    has_images: bool
+
+    @property
+    def kind(self) -> PageKind:
+        return classify_page(self.text, self.has_images)
+
+
+def classify_page(text: str, has_images: bool, min_text_length: int = PDF_PAGE_MIN_TEXT_LENGTH) -> PageKind:
+    """
+    Classify a page from its extracted text and whether it embeds images.
+
+    A page without a usable text layer is only considered scanned when it
+    carries an image; otherwise it is blank and there is nothing to OCR.
+    """
+    if text_is_meaningful(text, min_text_length):
+        return PageKind.TEXT
+    return PageKind.SCANNED if has_images else PageKind.BLANK
+
+
+def _resources_have_images(resources, seen: set) -> bool:
+    """Look for image XObjects in ``resources``, descending into Form XObjects."""
+    if resources is None:
+        return False
+    xobjects = resources.get_object().get('/XObject')
+    if xobjects is None:
+        return False
+    xobjects = xobjects.get_object()
+    for name in xobjects:
+        xobject = xobjects[name].get_object()
+        subtype = xobject.get('/Subtype')
+        if subtype == '/Image':
+            return True
+        # Scanners and PDF tools often wrap the page image in a Form XObject
+        if subtype == '/Form' and id(xobject) not in seen:
+            seen.add(id(xobject))
+            if _resources_have_images(xobject.get('/Resources'), seen):
+                return True
+    return False
+
+
+def _page_has_images(page) -> bool:
+    """Check the page resources for image XObjects without decoding them."""
+    try:
+        return _resources_have_images(page.get('/Resources'), set())
+    except Exception as e:
+        # Be conservative: an unreadable resource dictionary may hide a scan
+        logger.debug(f"Could not inspect page images: {str(e)}")
+        return True
+
+
+class _PageCache:
+    """Thread-safe LRU of fully parsed documents keyed by file hash."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[PDFPage, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash: str) -> Optional[Tuple[PDFPage, ...]]:
+        with self._lock:
+            pages = self._entries.get(file_hash)
+            if pages is not None:
+                self._entries.move_to_end(file_hash)
+            return pages
+
+    def put(self, file_hash: str, pages: Tuple[PDFPage, ...]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[file_hash] = pages
+            self._entries.move_to_end(file_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_page_cache = _PageCache(PDF_TEXT_CACHE_SIZE)
+
+
+class PDFExtractionService:
+    """Parse PDFs once and share the per-page text layer between callers."""
+
+    @staticmethod
+    def iter_pages(pdf_path: str, file_hash: Optional[str] = None) -> Iterator[PDFPage]:
+        """
+        Yield the pages of ``pdf_path`` lazily, in order.
+
+        Cached documents are served without touching pypdf. Otherwise pages are
+        extracted as the caller consumes them and the document is cached once
+        it has been read to the end.
+
+        Args:
+            pdf_path: Path to the PDF file
+            file_hash: SHA-256 of the file if the caller already computed it
+
+        Raises:
+            Exception: If the PDF cannot be read
+        """
+        file_hash = file_hash or compute_file_sha256(pdf_path)
+        cached = _page_cache.get(file_hash)
+        if cached is not None:
+            yield from cached
+            return
+
+        try:
+            reader = PdfReader(pdf_path)
+        except Exception as e:
+            logger.error(f"Error reading PDF {pdf_path}: {str(e)}")
+            raise
+
+        pages: List[PDFPage] = []
+        for index, page in enumerate(reader.pages):
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {index + 1} of {pdf_path}: {str(e)}")
+                text = ""
+            pdf_page = PDFPage(page_number=index + 1, text=text, has_images=_page_has_images(page))
+            pages.append(pdf_page)
+            yield pdf_page
+
+        _page_cache.put(file_hash, tuple(pages))
+
+    @staticmethod
+    def get_pages(pdf_path: str, file_hash: Optional[str] = None) -> List[PDFPage]:
+        """Return every page of the PDF (parsed at most once per file hash)."""
+        return list(PDFExtractionService.iter_pages(pdf_path, file_hash))
+
+    @staticmethod
+    def extract_text(pdf_path: str, file_hash: Optional[str] = None) -> str:
+        """Return the concatenated text layer of the PDF."""
+        return "".join(page.text for page in PDFExtractionService.iter_pages(pdf_path, file_hash))
+
+    @staticmethod
+    def has_text(pages: List[PDFPage], min_text_length: int = PDF_PAGE_MIN_TEXT_LENGTH) -> bool:
+        """Document-level text check over already extracted pages."""
+        return text_is_meaningful("".join(page.text for page in pages), min_text_length)
+
+    @staticmethod
+    def split_by_kind(pages: List[PDFPage]) -> Dict[PageKind, List[PDFPage]]:
+        """Group pages by ``PageKind``, preserving page order within each group."""
+        groups: Dict[PageKind, List[PDFPage]] = {kind: [] for kind in PageKind}
+        for page in pages:
+            groups[page.kind].append(page)
+        return groups
+
+    @staticmethod
+    def load_documents(pdf_path: str, metadata: Optional[dict] = None, file_hash: Optional[str] = None):
+        """
+        Return one LangChain ``Document`` per page.
+
+        Metadata mirrors ``PyPDFLoader``: ``source``, a 0-based ``page`` and
+        ``total_pages``, plus any ``metadata`` passed in.
+        """
+        from langchain_core.documents import Document
+
+        pages = PDFExtractionService.get_pages(pdf_path, file_hash)
+        base_metadata = metadata or {}
+        return [
+            Document(
+                page_content=page.text,
+                metadata={
+                    **base_metadata,
+                    "source": pdf_path,
+                    "page": page.page_number - 1,
+                    "total_pages": len(pages),
+                },
+            )
+            for page in pages
+        ]
+
+    @staticmethod
+    def clear_cache() -> None:
+        _page_cache.clear()
@@ -2,8 +2,9 @@ from datetime import datetime
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from models.api_key import APIKey
 from repositories.api_key_repository import APIKeyRepository
+from services.auth_cache_service import CachedAPIKey, auth_cache
+from services.write_behind_service import write_behind
 
 
 class PublicAuthService:
@@ -12,35 +13,51 @@ class PublicAuthService:
     def __init__(self, api_key_repository: APIKeyRepository | None = None):
         self.api_key_repository = api_key_repository or APIKeyRepository()
 
-    def validate_api_key_for_app(self, db: Session, app_id: int, api_key: str) -> APIKey:
+    def validate_api_key_for_app(self, db: Session, app_id: int, api_key: str) -> CachedAPIKey:
         """
         Validate API key for a specific app and update usage metadata.
 
+        Valid keys are served from the auth cache for a short TTL; unknown
+        keys always go to the database. ``last_used_at`` is buffered and
+        written by the write-behind flusher rather than committed on every
+        request.
+
         Args:
             db: Database session
             app_id: The app ID to validate against
             api_key: The API key value
 
         Returns:
-            The validated API key ORM object
+            Snapshot of the validated API key and its owner state
 
         Raises:
             HTTPException: If authentication fails
         """
-        api_key_obj = self.api_key_repository.get_active_by_app_and_key(db, app_id, api_key)
-
-        if not api_key_obj:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or inactive API key for this app",
+        cached_key = auth_cache.get_api_key(app_id, api_key)
+
+        if cached_key is None:
+            api_key_obj = self.api_key_repository.get_active_by_app_and_key(db, app_id, api_key)
+
+            if not api_key_obj:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid or inactive API key for this app",
+                )
+
+            app_owner = api_key_obj.app.owner if api_key_obj.app else None
+            cached_key = CachedAPIKey(
+                key_id=api_key_obj.key_id,
+                app_id=app_id,
+                owner_id=app_owner.user_id if app_owner else None,
+                owner_active=not (app_owner and hasattr(app_owner, "is_active") and not app_owner.is_active),
             )
+            auth_cache.set_api_key(app_id, api_key, cached_key)
 
-        app_owner = api_key_obj.app.owner if api_key_obj.app else None
-        if app_owner and hasattr(app_owner, "is_active") and not app_owner.is_active:
+        if not cached_key.owner_active:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This API key belongs to a deactivated account",
             )
 
-        self.api_key_repository.update_last_used_at(db, api_key_obj, datetime.now())
-        return api_key_obj
+        write_behind.touch_api_key(cached_key.key_id, datetime.now())
+        return cached_key
@@ -1,12 +1,35 @@
 """
 Rate limiting service for per-app agent execution limits.
-Uses in-memory fixed-window counters with thread-safe access.
+
+Uses a sliding-window counter: the request count of the current one-minute
+window plus the previous window's count weighted by how much of it still
+overlaps the last 60 seconds. This avoids the 2x burst a fixed window allows
+at window edges.
+
+Two backends are available, selected with ``RATE_LIMIT_BACKEND``:
+
+- ``memory`` (default): thread-safe in-process counters, for single-process runs.
+- ``postgres``: counters in the UNLOGGED ``rate_limit_window`` table shared by
+  all workers. Each worker leases small blocks of requests from the shared
+  counter and admits requests locally until the lease is used up, so only one
+  request in every ``RATE_LIMIT_LEASE_SIZE`` touches the database.
 """
+import math
+import os
 import time
 import threading
-from typing import Dict, NamedTuple, Optional, Any
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
 
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+RATE_LIMIT_LEASE_SIZE = int(os.getenv('RATE_LIMIT_LEASE_SIZE', '10'))
+
+WINDOW_SECONDS = 60
+
 
 @dataclass
 class RateLimitState:
@@ -17,146 +40,175 @@ class RateLimitState:
     exceeded: bool = False
 
 
+def sliding_window_estimate(previous: float, current: float, elapsed_fraction: float) -> float:
+    """Requests in the last 60 seconds, assuming the previous window's requests were evenly spread."""
+    return previous * (1 - elapsed_fraction) + current
+
+
+def _window_position(now: float) -> Tuple[int, float]:
+    """Return (epoch minute, fraction of the minute elapsed)."""
+    window = int(now // WINDOW_SECONDS)
+    return window, (now - window * WINDOW_SECONDS) / WINDOW_SECONDS
+
+
+def _retry_epoch(now: float, window: int, previous: float, current: float, max_per_minute: int) -> int:
+    """
+    Epoch second at which one more request fits under the limit.
+
+    Within the current window only the weighted previous count decays, so
+    the request fits once ``previous * (1 - f) + current + 1 <= limit``. If
+    the current window alone is full, the next window's decay applies.
+    """
+    next_window_start = (window + 1) * WINDOW_SECONDS
+    if previous > 0 and current + 1 <= max_per_minute:
+        fraction = 1 - (max_per_minute - current - 1) / previous
+        return max(int(now) + 1, math.ceil(window * WINDOW_SECONDS + fraction * WINDOW_SECONDS))
+    if current + 1 <= max_per_minute:
+        return int(now) + 1
+    # Next window: current becomes previous, so solve current * (1 - f) + 1 <= limit
+    fraction = 1 - (max_per_minute - 1) / current if current > 0 else 0
+    return math.ceil(next_window_start + max(0.0, fraction) * WINDOW_SECONDS)
+
+
+def _unlimited_state(max_per_minute: int) -> RateLimitState:
+    return RateLimitState(
+        remaining=-1,  # -1 indicates unlimited
+        reset_epoch=int(time.time()) + WINDOW_SECONDS,
+        limit=max_per_minute
+    )
+
+
 class RateLimitService:
     """
-    Thread-safe in-memory rate limiter using fixed-window approach.
-    Each app has a separate counter that resets every minute.
+    Thread-safe in-memory sliding-window rate limiter.
+    Each app keeps the counts of the current and previous minute.
     """
-    
+
     def __init__(self):
-        # app_id -> {window_start_epoch_minute, count}
+        # app_id -> {window_start_epoch_minute, count, previous}
         self._counters: Dict[int, Dict[str, int]] = {}
         self._lock = threading.RLock()
         self._cleanup_threshold = 100  # Clean up when we have this many apps
-    
+
+    def _roll_counter(self, app_id: int, window: int) -> Dict[str, int]:
+        """Get the app's counter for ``window``, shifting the count into ``previous`` on rollover."""
+        counter = self._counters.get(app_id)
+        if counter is None:
+            counter = {'window_start': window, 'count': 0, 'previous': 0}
+            self._counters[app_id] = counter
+        elif counter['window_start'] < window:
+            counter['previous'] = counter['count'] if counter['window_start'] == window - 1 else 0
+            counter['window_start'] = window
+            counter['count'] = 0
+        return counter
+
     def check_and_consume(self, app_id: int, max_per_minute: int) -> RateLimitState:
         """
         Check if app can make a request and consume one if allowed.
-        
+
         Args:
             app_id: The app identifier
             max_per_minute: Maximum requests per minute (0 = unlimited)
-            
+
         Returns:
             RateLimitState with remaining count and reset time
         """
         if max_per_minute <= 0:
             # Unlimited - return a state indicating no limits
-            return RateLimitState(
-                remaining=-1,  # -1 indicates unlimited
-                reset_epoch=int(time.time()) + 60,
-                limit=max_per_minute
-            )
-        
-        current_time = time.time()
-        current_minute = int(current_time // 60)
-        
+            return _unlimited_state(max_per_minute)
+
+        now = time.time()
+        window, fraction = _window_position(now)
+
         with self._lock:
-            # Get or create counter for this app
-            if app_id not in self._counters:
-                self._counters[app_id] = {
-                    'window_start': current_minute,
-                    'count': 0
-                }
-            
-            counter = self._counters[app_id]
-            
-            # Reset window if we're in a new minute
-            if counter['window_start'] < current_minute:
-                counter['window_start'] = current_minute
-                counter['count'] = 0
-            
+            counter = self._roll_counter(app_id, window)
+            estimate = sliding_window_estimate(counter['previous'], counter['count'], fraction)
+
             # Check if we can make the request
-            if counter['count'] >= max_per_minute:
-                # Rate limit exceeded
-                reset_epoch = (current_minute + 1) * 60  # Next minute
+            if estimate + 1 > max_per_minute:
                 return RateLimitState(
                     remaining=0,
-                    reset_epoch=reset_epoch,
+                    reset_epoch=_retry_epoch(now, window, counter['previous'], counter['count'], max_per_minute),
                     limit=max_per_minute,
                     exceeded=True,
                 )
-            
+
             # Consume one request
             counter['count'] += 1
-            
+
             # Cleanup old entries if we have too many
             self._cleanup_if_needed()
-            
-            # Calculate remaining requests
-            remaining = max_per_minute - counter['count']
-            reset_epoch = (current_minute + 1) * 60  # Next minute
-            
+
             return RateLimitState(
-                remaining=remaining,
-                reset_epoch=reset_epoch,
+                remaining=max(0, math.floor(max_per_minute - estimate - 1)),
+                reset_epoch=(window + 1) * WINDOW_SECONDS,  # Next minute
                 limit=max_per_minute
             )
-    
+
     def _cleanup_if_needed(self):
         """Clean up stale entries if we have too many apps tracked"""
         if len(self._counters) <= self._cleanup_threshold:
             return
-        
-        current_minute = int(time.time() // 60)
+
+        current_minute = int(time.time() // WINDOW_SECONDS)
         stale_apps = []
-        
+
         for app_id, counter in self._counters.items():
             # Remove entries older than 2 minutes
             if counter['window_start'] < current_minute - 1:
                 stale_apps.append(app_id)
-        
+
         for app_id in stale_apps:
             del self._counters[app_id]
-    
+
+    def _usage_counts(self, app_id: int, window: int) -> Optional[Tuple[int, int]]:
+        """(previous, current) counts for ``window`` without consuming, or None if untracked."""
+        with self._lock:
+            counter = self._counters.get(app_id)
+            if counter is None:
+                return None
+            if counter['window_start'] == window:
+                return counter['previous'], counter['count']
+            if counter['window_start'] == window - 1:
+                return counter['count'], 0
+            return 0, 0
+
     def get_app_state(self, app_id: int, max_per_minute: int) -> Optional[RateLimitState]:
         """
         Get current rate limit state without consuming a request.
-        
+
         Args:
             app_id: The app identifier
             max_per_minute: Maximum requests per minute
-            
+
         Returns:
             RateLimitState or None if app not tracked
         """
         if max_per_minute <= 0:
-            return RateLimitState(
-                remaining=-1,
-                reset_epoch=int(time.time()) + 60,
-                limit=max_per_minute
-            )
-        
-        current_minute = int(time.time() // 60)
-        
-        with self._lock:
-            if app_id not in self._counters:
-                return None
-            
-            counter = self._counters[app_id]
-            
-            # Reset window if we're in a new minute
-            if counter['window_start'] < current_minute:
-                counter['window_start'] = current_minute
-                counter['count'] = 0
-            
-            remaining = max_per_minute - counter['count']
-            reset_epoch = (current_minute + 1) * 60
-            
-            return RateLimitState(
-                remaining=max(0, remaining),
-                reset_epoch=reset_epoch,
-                limit=max_per_minute
-            )
-    
+            return _unlimited_state(max_per_minute)
+
+        now = time.time()
+        window, fraction = _window_position(now)
+        counts = self._usage_counts(app_id, window)
+        if counts is None:
+            return None
+
+        previous, current = counts
+        estimate = sliding_window_estimate(previous, current, fraction)
+        return RateLimitState(
+            remaining=max(0, math.floor(max_per_minute - estimate)),
+            reset_epoch=(window + 1) * WINDOW_SECONDS,
+            limit=max_per_minute
+        )
+
     def get_app_usage_stats(self, app_id: int, max_per_minute: int) -> Dict[str, any]:
         """
         Get detailed usage statistics for an app to calculate stress level.
-        
+
         Args:
             app_id: The app identifier
             max_per_minute: Maximum requests per minute
-            
+
         Returns:
             Dictionary with usage statistics and stress metrics
         """
@@ -167,61 +219,228 @@ class RateLimitService:
                 'current_usage': 0,
                 'limit': max_per_minute,
                 'remaining': -1,
-                'reset_in_seconds': 60,
+                'reset_in_seconds': WINDOW_SECONDS,
                 'is_over_limit': False
             }
-        
+
         current_time = time.time()
-        current_minute = int(current_time // 60)
-        
-        with self._lock:
-            if app_id not in self._counters:
-                return {
-                    'usage_percentage': 0,
-                    'stress_level': 'low',
-                    'current_usage': 0,
-                    'limit': max_per_minute,
-                    'remaining': max_per_minute,
-                    'reset_in_seconds': 60,
-                    'is_over_limit': False
-                }
-            
-            counter = self._counters[app_id]
-            
-            # Reset window if we're in a new minute
-            if counter['window_start'] < current_minute:
-                counter['window_start'] = current_minute
-                counter['count'] = 0
-            
-            current_usage = counter['count']
-            remaining = max(0, max_per_minute - current_usage)
-            usage_percentage = (current_usage / max_per_minute) * 100 if max_per_minute > 0 else 0
-            is_over_limit = current_usage > max_per_minute
-            
-            # Calculate stress level
-            if usage_percentage >= 95:
-                stress_level = 'critical'
-            elif usage_percentage >= 80:
-                stress_level = 'high'
-            elif usage_percentage >= 50:
-                stress_level = 'moderate'
-            else:
-                stress_level = 'low'
-            
-            # Calculate seconds until reset
-            reset_epoch = (current_minute + 1) * 60
-            reset_in_seconds = max(0, reset_epoch - int(current_time))
-            
+        window, fraction = _window_position(current_time)
+        counts = self._usage_counts(app_id, window)
+
+        if counts is None:
             return {
-                'usage_percentage': round(usage_percentage, 1),
-                'stress_level': stress_level,
-                'current_usage': current_usage,
+                'usage_percentage': 0,
+                'stress_level': 'low',
+                'current_usage': 0,
                 'limit': max_per_minute,
-                'remaining': remaining,
-                'reset_in_seconds': reset_in_seconds,
-                'is_over_limit': is_over_limit
+                'remaining': max_per_minute,
+                'reset_in_seconds': WINDOW_SECONDS,
+                'is_over_limit': False
             }
 
+        previous, current = counts
+        current_usage = round(sliding_window_estimate(previous, current, fraction))
+        remaining = max(0, max_per_minute - current_usage)
+        usage_percentage = (current_usage / max_per_minute) * 100 if max_per_minute > 0 else 0
+        is_over_limit = current_usage > max_per_minute
+
+        # Calculate stress level
+        if usage_percentage >= 95:
+            stress_level = 'critical'
+        elif usage_percentage >= 80:
+            stress_level = 'high'
+        elif usage_percentage >= 50:
+            stress_level = 'moderate'
+        else:
+            stress_level = 'low'
+
+        # Calculate seconds until the current window rolls over
+        reset_epoch = (window + 1) * WINDOW_SECONDS
+        reset_in_seconds = max(0, reset_epoch - int(current_time))
+
+        return {
+            'usage_percentage': round(usage_percentage, 1),
+            'stress_level': stress_level,
+            'current_usage': current_usage,
+            'limit': max_per_minute,
+            'remaining': remaining,
+            'reset_in_seconds': reset_in_seconds,
+            'is_over_limit': is_over_limit
+        }
+
+
+class SharedRateLimitService(RateLimitService):
+    """
+    Sliding-window rate limiter whose counters live in PostgreSQL, so the
+    limit holds across all uvicorn workers and replicas.
+
+    Every worker reserves requests in blocks (leases) with a conditional
+    upsert that never lets the shared count exceed what the sliding window
+    allows. Requests are then admitted from the local lease without a
+    database round trip. Unused lease capacity counts as consumed, which
+    errs on the side of the limit. If the database is unreachable the
+    in-memory limiter is used for the affected request.
+    """
+
+    def __init__(self, lease_size: int = RATE_LIMIT_LEASE_SIZE):
+        super().__init__()
+        self.lease_size = max(1, lease_size)
+        # app_id -> {window_start, previous, shared, lease}
+        self._leases: Dict[int, Dict[str, int]] = {}
+        self._app_locks: Dict[int, threading.Lock] = {}
+        self._last_cleanup_window = 0
+
+    def _app_lock(self, app_id: int) -> threading.Lock:
+        with self._lock:
+            lock = self._app_locks.get(app_id)
+            if lock is None:
+                lock = self._app_locks[app_id] = threading.Lock()
+            return lock
+
+    def _lease_size_for(self, max_per_minute: int) -> int:
+        # Small limits get small leases so idle workers don't strand much capacity
+        return max(1, min(self.lease_size, max_per_minute // 20))
+
+    # ------------------------------------------------------------------
+    # Database access (overridable in tests)
+    # ------------------------------------------------------------------
+
+    def _fetch_previous(self, app_id: int, window: int) -> int:
+        """Read the previous window's shared count and prune expired windows."""
+        from sqlalchemy import delete, select
+        from db.database import engine
+        from models.rate_limit_window import RateLimitWindow
+
+        with engine.begin() as conn:
+            previous = conn.execute(
+                select(RateLimitWindow.count).where(
+                    RateLimitWindow.app_id == app_id,
+                    RateLimitWindow.window_start == window - 1,
+                )
+            ).scalar()
+            if self._last_cleanup_window < window:
+                self._last_cleanup_window = window
+                conn.execute(delete(RateLimitWindow).where(RateLimitWindow.window_start < window - 1))
+        return previous or 0
+
+    def _reserve(self, app_id: int, window: int, requested: int, cap: int) -> Tuple[int, int]:
+        """
+        Atomically add up to ``requested`` to the shared count without exceeding ``cap``.
+
+        Returns:
+            (granted, shared count after the reservation)
+        """
+        from sqlalchemy import select
+        from sqlalchemy.dialects.postgresql import insert
+        from db.database import engine
+        from models.rate_limit_window import RateLimitWindow
+
+        with engine.begin() as conn:
+            for _ in range(2):
+                stmt = insert(RateLimitWindow).values(app_id=app_id, window_start=window, count=requested)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['app_id', 'window_start'],
+                    set_={'count': RateLimitWindow.count + stmt.excluded.count},
+                    where=(RateLimitWindow.count + stmt.excluded.count) <= cap,
+                ).returning(RateLimitWindow.count)
+                shared = conn.execute(stmt).scalar()
+                if shared is not None:
+                    return requested, shared
+
+                # Not enough room for the whole block: retry with what is left
+                shared = conn.execute(
+                    select(RateLimitWindow.count).where(
+                        RateLimitWindow.app_id == app_id,
+                        RateLimitWindow.window_start == window,
+                    )
+                ).scalar() or 0
+                requested = cap - shared
+                if requested < 1:
+                    return 0, shared
+        return 0, shared
+
+    # ------------------------------------------------------------------
+    # Rate limiting
+    # ------------------------------------------------------------------
+
+    def check_and_consume(self, app_id: int, max_per_minute: int) -> RateLimitState:
+        if max_per_minute <= 0:
+            return super().check_and_consume(app_id, max_per_minute)
+
+        now = time.time()
+        window, fraction = _window_position(now)
+
+        try:
+            with self._app_lock(app_id):
+                lease = self._leases.get(app_id)
+                if lease is None or lease['window_start'] != window:
+                    lease = {
+                        'window_start': window,
+                        'previous': self._fetch_previous(app_id, window),
+                        'shared': 0,
+                        'lease': 0,
+                    }
+                    self._leases[app_id] = lease
+
+                weighted_previous = lease['previous'] * (1 - fraction)
+                # Shared count can only grow within a window, so a full window needs no round trip
+                cap = math.floor(max_per_minute - weighted_previous)
+                if lease['lease'] == 0 and cap - lease['shared'] >= 1:
+                    requested = min(self._lease_size_for(max_per_minute), cap - lease['shared'])
+                    granted, lease['shared'] = self._reserve(app_id, window, requested, cap)
+                    lease['lease'] = granted
+
+                if lease['lease'] == 0:
+                    return RateLimitState(
+                        remaining=0,
+                        reset_epoch=_retry_epoch(now, window, lease['previous'], lease['shared'], max_per_minute),
+                        limit=max_per_minute,
+                        exceeded=True,
+                    )
+
+                lease['lease'] -= 1
+                used = lease['shared'] - lease['lease']
+                return RateLimitState(
+                    remaining=max(0, math.floor(max_per_minute - weighted_previous - used)),
+                    reset_epoch=(window + 1) * WINDOW_SECONDS,
+                    limit=max_per_minute
+                )
+        except Exception as e:
+            logger.warning(f"Shared rate limiter unavailable for app {app_id}, using local counters: {str(e)}")
+            return super().check_and_consume(app_id, max_per_minute)
+
+    def _usage_counts(self, app_id: int, window: int) -> Optional[Tuple[int, int]]:
+        from sqlalchemy import select
+        from db.database import engine
+        from models.rate_limit_window import RateLimitWindow
+
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    select(RateLimitWindow.window_start, RateLimitWindow.count).where(
+                        RateLimitWindow.app_id == app_id,
+                        RateLimitWindow.window_start >= window - 1,
+                    )
+                ).all()
+        except Exception as e:
+            logger.warning(f"Could not read shared rate limit counters for app {app_id}: {str(e)}")
+            return super()._usage_counts(app_id, window)
+
+        if not rows:
+            return None
+        counts = {row.window_start: row.count for row in rows}
+        return counts.get(window - 1, 0), counts.get(window, 0)
+
+
+def create_rate_limit_service(backend: str = RATE_LIMIT_BACKEND) -> RateLimitService:
+    """Instantiate the rate limiter selected by ``RATE_LIMIT_BACKEND``."""
+    if backend == 'postgres':
+        logger.info(f"Using shared PostgreSQL rate limiter (lease size {RATE_LIMIT_LEASE_SIZE})")
+        return SharedRateLimitService()
+    if backend != 'memory':
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{backend}', falling back to in-memory rate limiting")
+    return RateLimitService()
+
 
 # Global instance
-rate_limit_service = RateLimitService()
+rate_limit_service = create_rate_limit_service()
@@ -1,174 +1,350 @@
-import uuid
-import json
-import logging
-from typing import Dict, Any, Optional, List
+import asyncio
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
-from fastapi import HTTPException
+
+from cachetools import LRUCache
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# memory: per-process registry (single worker); postgres: agent_session table shared by all workers
+SESSION_STORE_BACKEND = os.getenv('SESSION_STORE_BACKEND', 'memory').lower()
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', '5000'))
+# last_accessed is persisted at most this often per session; the timeout is measured in hours
+SESSION_TOUCH_INTERVAL_SECONDS = int(os.getenv('SESSION_TOUCH_INTERVAL_SECONDS', '60'))
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv('SESSION_SWEEP_INTERVAL_SECONDS', '600'))
+
 
 class Session:
     """
     Lightweight session tracking for agent conversations.
-    
+
     The actual conversation history is stored in PostgreSQL via LangGraph's checkpointer.
     This class only tracks session metadata for timeout management and thread_id generation.
     """
-    
-    def __init__(self, session_id: str, agent_id: int, user_context: Dict):
-        self.id = session_id                    # Used to generate thread_id for PostgreSQL
-        self.agent_id = agent_id                # Agent identifier
-        self.user_context = user_context        # User context for validation
-        self.created_at = datetime.utcnow()     # Session creation timestamp
-        self.last_accessed = datetime.utcnow()  # Last interaction timestamp (for timeout)
-    
+
+    def __init__(self, session_id: str, agent_id: int, user_context: Dict,
+                 created_at: Optional[datetime] = None, last_accessed: Optional[datetime] = None):
+        now = datetime.utcnow()
+        self.id = session_id                                # Used to generate thread_id for PostgreSQL
+        self.agent_id = agent_id                            # Agent identifier
+        self.user_context = user_context                    # User context for validation
+        self.created_at = created_at or now                 # Session creation timestamp
+        self.last_accessed = last_accessed or now           # Last interaction timestamp (for timeout)
+        self.persisted_access = self.last_accessed          # Last timestamp written to the store
+
     def touch(self):
         """Update last accessed timestamp to keep session alive"""
         self.last_accessed = datetime.utcnow()
-    
+
     def is_expired(self, timeout: timedelta) -> bool:
         """Check if session has exceeded the timeout period"""
         return datetime.utcnow() - self.last_accessed > timeout
 
 
+SessionTimes = Tuple[datetime, datetime]  # (created_at, last_accessed)
+
+
+class SessionStore(ABC):
+    """
+    Backing store for session metadata.
+
+    Methods are synchronous; SessionManagementService calls them off the
+    event loop.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionTimes]:
+        pass
+
+    @abstractmethod
+    def create(self, session_id: str, agent_id: int, now: datetime) -> SessionTimes:
+        """Create the session unless it already exists, returning the stored timestamps."""
+        pass
+
+    @abstractmethod
+    def touch(self, session_id: str, now: datetime) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete_expired(self, cutoff: datetime) -> int:
+        pass
+
+    @abstractmethod
+    def count_by_expiry(self, cutoff: datetime) -> Dict[str, int]:
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store, for single-worker deployments and tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, list] = {}  # session_id -> [created_at, last_accessed]
+
+    def get(self, session_id: str) -> Optional[SessionTimes]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return tuple(entry) if entry else None
+
+    def create(self, session_id: str, agent_id: int, now: datetime) -> SessionTimes:
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [now, now])
+            return tuple(entry)
+
+    def touch(self, session_id: str, now: datetime) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry and entry[1] < now:
+                entry[1] = now
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def delete_expired(self, cutoff: datetime) -> int:
+        with self._lock:
+            expired = [sid for sid, (_, last) in self._sessions.items() if last < cutoff]
+            for session_id in expired:
+                del self._sessions[session_id]
+            return len(expired)
+
+    def count_by_expiry(self, cutoff: datetime) -> Dict[str, int]:
+        with self._lock:
+            expired = sum(1 for _, last in self._sessions.values() if last < cutoff)
+            return {"total": len(self._sessions), "expired": expired}
+
+
+class DatabaseSessionStore(SessionStore):
+    """Store backed by the agent_session table, shared by every worker."""
+
+    def _run(self, operation, *args):
+        from db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return operation(*args, db)
+        finally:
+            db.close()
+
+    def get(self, session_id: str) -> Optional[SessionTimes]:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        row = self._run(AgentSessionRepository.get, session_id)
+        return (row.created_at, row.last_accessed) if row else None
+
+    def create(self, session_id: str, agent_id: int, now: datetime) -> SessionTimes:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        row = self._run(AgentSessionRepository.create_if_absent, session_id, agent_id, now)
+        return row.created_at, row.last_accessed
+
+    def touch(self, session_id: str, now: datetime) -> None:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        self._run(AgentSessionRepository.touch, session_id, now)
+
+    def delete(self, session_id: str) -> bool:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        return self._run(AgentSessionRepository.delete, session_id)
+
+    def delete_expired(self, cutoff: datetime) -> int:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        return self._run(AgentSessionRepository.delete_expired, cutoff)
+
+    def count_by_expiry(self, cutoff: datetime) -> Dict[str, int]:
+        from repositories.agent_session_repository import AgentSessionRepository
+
+        return self._run(AgentSessionRepository.count_by_expiry, cutoff)
+
+
+def create_session_store(backend: str = SESSION_STORE_BACKEND) -> SessionStore:
+    """Instantiate the session store selected by ``SESSION_STORE_BACKEND``."""
+    if backend == 'postgres':
+        return DatabaseSessionStore()
+    if backend != 'memory':
+        logger.warning(f"Unknown SESSION_STORE_BACKEND '{backend}', using in-memory sessions")
+    return InMemorySessionStore()
+
+
 class SessionManagementService:
-    """Unified session management - used by both public and internal APIs"""
-    
+    """
+    Unified session management - used by both public and internal APIs.
+
+    Sessions live in a SessionStore (shared across workers with the postgres
+    backend) and are read through a bounded per-process LRU cache. A
+    background sweeper removes expired sessions.
+    """
+
     # Global instance to ensure sessions persist across requests
     _instance = None
-    _sessions: Dict[str, Session] = {}
+    _store: SessionStore = create_session_store()
+    _cache: LRUCache = LRUCache(maxsize=SESSION_CACHE_SIZE)
+    _cache_lock = threading.Lock()
     _session_timeout = timedelta(hours=24)  # 24 hour timeout
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SessionManagementService, cls).__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
-        # No need to initialize _sessions here since it's a class variable
+        # Store and cache are class variables shared by every instance
         pass
-    
+
+    def _cache_get(self, session_id: str) -> Optional[Session]:
+        with self.__class__._cache_lock:
+            return self.__class__._cache.get(session_id)
+
+    def _cache_put(self, session: Session) -> None:
+        with self.__class__._cache_lock:
+            self.__class__._cache[session.id] = session
+
+    def _cache_pop(self, session_id: str) -> Optional[Session]:
+        with self.__class__._cache_lock:
+            return self.__class__._cache.pop(session_id, None)
+
+    async def _persist_touch(self, session: Session) -> None:
+        """Write last_accessed to the store when the persisted value is older than the touch interval."""
+        if (session.last_accessed - session.persisted_access).total_seconds() < SESSION_TOUCH_INTERVAL_SECONDS:
+            return
+        await asyncio.to_thread(self.__class__._store.touch, session.id, session.last_accessed)
+        session.persisted_access = session.last_accessed
+
     async def get_user_session(
-        self, 
-        agent_id: int, 
+        self,
+        agent_id: int,
         user_context: Dict,
         conversation_id: str = None
     ) -> Optional[Session]:
         """
         Get or create user session for memory-enabled agents
-        
+
         Args:
             agent_id: ID of the agent
             user_context: User context (api_key, user_id, etc.)
-            
+
         Returns:
             Session object or None if session not found/expired
         """
         try:
             # Generate session ID based on user context
             session_id = self._generate_session_id(agent_id, user_context, conversation_id)
-            
-            logger.info(f"Looking for session {session_id}, total sessions: {len(self.__class__._sessions)}")
-            logger.info(f"Available sessions: {list(self.__class__._sessions.keys())}")
-            
-            # Check if session exists and is not expired
-            if session_id in self.__class__._sessions:
-                session = self.__class__._sessions[session_id]
-                logger.info(f"Found existing session {session_id}")
-                
+            store = self.__class__._store
+            timeout = self.__class__._session_timeout
+
+            session = self._cache_get(session_id)
+            if session is None or session.is_expired(timeout):
+                # Read through: another worker may have created or kept the session alive
+                times = await asyncio.to_thread(store.get, session_id)
+                session = Session(session_id, agent_id, user_context, *times) if times else None
+
+            if session is not None:
                 # Check if session is expired
-                if datetime.utcnow() - session.last_accessed > self.__class__._session_timeout:
+                if session.is_expired(timeout):
                     # Remove expired session
-                    del self.__class__._sessions[session_id]
+                    self._cache_pop(session_id)
+                    await asyncio.to_thread(store.delete, session_id)
                     logger.info(f"Removed expired session {session_id}")
                     return None
-                
-                # Update last accessed time
-                session.last_accessed = datetime.utcnow()
+
+                logger.debug(f"Found existing session {session_id}")
+                session.touch()
+                await self._persist_touch(session)
+                self._cache_put(session)
                 return session
-            
+
             # Create new session
-            session = Session(session_id, agent_id, user_context)
-            self.__class__._sessions[session_id] = session
-            
+            now = datetime.utcnow()
+            created_at, last_accessed = await asyncio.to_thread(store.create, session_id, agent_id, now)
+            session = Session(session_id, agent_id, user_context, created_at, last_accessed)
+            self._cache_put(session)
+
             logger.info(f"Created new session {session_id} for agent {agent_id}")
-            logger.info(f"Total sessions after creation: {len(self.__class__._sessions)}")
             return session
-            
+
         except Exception as e:
             logger.error(f"Error getting user session: {str(e)}")
             return None
-    
+
     async def touch_session(self, session_id: str):
         """
         Update session last accessed timestamp to keep it alive
-        
+
         Args:
             session_id: Session ID
         """
         try:
-            if session_id in self.__class__._sessions:
-                session = self.__class__._sessions[session_id]
+            session = self._cache_get(session_id)
+            if session:
                 session.touch()
+                await self._persist_touch(session)
                 logger.debug(f"Updated last accessed time for session {session_id}")
             else:
-                logger.warning(f"Session {session_id} not found for touch update")
-                
+                await asyncio.to_thread(self.__class__._store.touch, session_id, datetime.utcnow())
+
         except Exception as e:
             logger.error(f"Error touching session: {str(e)}")
-    
+
     async def reset_user_session(
-        self, 
-        agent_id: int, 
+        self,
+        agent_id: int,
         user_context: Dict
     ) -> bool:
         """
-        Reset user session by removing it from memory.
+        Reset user session by removing it from the store and the local cache.
         The PostgreSQL checkpointer must be cleared separately via CheckpointerCacheService.
-        
+
         Args:
             agent_id: ID of the agent
             user_context: User context
-            
+
         Returns:
             True if reset successful, False if session not found
         """
         try:
             session_id = self._generate_session_id(agent_id, user_context, user_context.get("conversation_id"))
-            
-            if session_id in self.__class__._sessions:
-                # Remove session from memory
-                del self.__class__._sessions[session_id]
+
+            cached = self._cache_pop(session_id)
+            deleted = await asyncio.to_thread(self.__class__._store.delete, session_id)
+            if cached or deleted:
                 logger.info(f"Deleted session {session_id} for agent {agent_id}")
                 return True
             else:
                 logger.warning(f"Session {session_id} not found for reset")
                 return False
-                
+
         except Exception as e:
             logger.error(f"Error resetting user session: {str(e)}")
             return False
-    
-    
+
+
     def _generate_session_id(self, agent_id: int, user_context: Dict, conversation_id: str = None) -> str:
         """
         Generate unique session ID based on agent and user context
-        
+
         Args:
             agent_id: ID of the agent
             user_context: User context (api_key, user_id, etc.)
             conversation_id: Optional custom conversation ID
-            
+
         Returns:
             Unique session ID
         """
         # If conversation_id is provided, use it as the session ID
         if conversation_id:
             return f"conv_{agent_id}_{conversation_id}"
-        
+
         # Create a unique identifier based on user context
         if "user_id" in user_context:
             # OAuth user
@@ -182,44 +358,57 @@ class SessionManagementService:
         else:
             # Fallback - use timestamp
             return f"anon_{agent_id}_{int(datetime.utcnow().timestamp())}"
-    
-    def cleanup_expired_sessions(self):
-        """Clean up expired sessions (should be called periodically)"""
+
+    def cleanup_expired_sessions(self) -> int:
+        """Clean up expired sessions (called periodically by the session sweeper)"""
         try:
-            current_time = datetime.utcnow()
-            expired_sessions = []
-            
-            for session_id, session in self.__class__._sessions.items():
-                if current_time - session.last_accessed > self.__class__._session_timeout:
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                del self.__class__._sessions[session_id]
-                logger.info(f"Cleaned up expired session {session_id}")
-                
+            cutoff = datetime.utcnow() - self.__class__._session_timeout
+
+            with self.__class__._cache_lock:
+                cache = self.__class__._cache
+                for session_id in [sid for sid, s in cache.items() if s.last_accessed < cutoff]:
+                    del cache[session_id]
+
+            removed = self.__class__._store.delete_expired(cutoff)
+            if removed:
+                logger.info(f"Cleaned up {removed} expired session(s)")
+            return removed
+
         except Exception as e:
             logger.error(f"Error cleaning up expired sessions: {str(e)}")
-    
+            return 0
+
     def get_session_stats(self) -> Dict[str, Any]:
         """Get session management statistics"""
         try:
-            current_time = datetime.utcnow()
-            active_sessions = 0
-            expired_sessions = 0
-            
-            for session in self.__class__._sessions.values():
-                if current_time - session.last_accessed <= self.__class__._session_timeout:
-                    active_sessions += 1
-                else:
-                    expired_sessions += 1
-            
+            cutoff = datetime.utcnow() - self.__class__._session_timeout
+            counts = self.__class__._store.count_by_expiry(cutoff)
+
             return {
-                "total_sessions": len(self.__class__._sessions),
-                "active_sessions": active_sessions,
-                "expired_sessions": expired_sessions,
+                "total_sessions": counts["total"],
+                "active_sessions": counts["total"] - counts["expired"],
+                "expired_sessions": counts["expired"],
+                "cached_sessions": len(self.__class__._cache),
                 "session_timeout_hours": self.__class__._session_timeout.total_seconds() / 3600
             }
-            
+
         except Exception as e:
             logger.error(f"Error getting session stats: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {}
+
+
+async def _sweep_loop() -> None:
+    service = SessionManagementService()
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        await asyncio.to_thread(service.cleanup_expired_sessions)
+
+
+async def start_session_sweeper() -> asyncio.Task:
+    """Start the expired-session sweeper. Called during FastAPI lifespan startup."""
+    return asyncio.create_task(_sweep_loop(), name="session-sweeper")
+
+
+async def stop_session_sweeper(task: asyncio.Task) -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
@@ -451,24 +451,24 @@ class SiloService:
         """
         from langchain_core.documents import Document
         from langchain_text_splitters import CharacterTextSplitter
-        from langchain_community.document_loaders.pdf import PyPDFLoader
         from langchain_community.document_loaders import Docx2txtLoader, TextLoader
+        from services.pdf_extraction_service import PDFExtractionService
 
         if base_metadata is None:
             base_metadata = {}
 
         # Determine file type and use appropriate loader
         if file_extension == '.pdf':
-            loader = PyPDFLoader(file_path, extract_images=False)
+            # Shares the per-page text cache with the OCR and attachment paths
+            pages = PDFExtractionService.load_documents(file_path)
         elif file_extension == '.docx':
-            loader = Docx2txtLoader(file_path)
+            pages = Docx2txtLoader(file_path).load()
         elif file_extension in ('.txt', '.md'):
-            loader = TextLoader(file_path, encoding='utf-8')
+            pages = TextLoader(file_path, encoding='utf-8').load()
         else:
             logger.error(f"Unsupported file type: {file_extension}")
             raise ValueError(f"Unsupported file type: {file_extension}")
 
-        pages = loader.load()
         text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
         docs = text_splitter.split_documents(pages)
 
@@ -13,6 +13,7 @@ from repositories.subscription_repository import SubscriptionRepository
 from repositories.tier_config_repository import TierConfigRepository
 from repositories.usage_record_repository import UsageRecordRepository
 from schemas.subscription_schemas import SubscriptionRead
+from services.write_behind_service import write_behind
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -52,7 +53,9 @@ class SubscriptionService:
         eff_tier = _effective_tier(sub)
         call_limit = tier_repo.get_limit(eff_tier, "llm_calls")
         usage_record = usage_repo.get_current(user_id)
-        call_count = usage_record.call_count if usage_record else 0
+        call_count = (usage_record.call_count if usage_record else 0) + write_behind.pending_llm_calls(
+            user_id, date.today().replace(day=1)
+        )
         pct_used = (call_count / call_limit) if call_limit > 0 else 0.0
 
         return SubscriptionRead(
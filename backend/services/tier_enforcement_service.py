@@ -2,6 +2,7 @@
 
 All methods are no-ops (return immediately) when running in self-managed mode.
 """
+from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from fastapi import HTTPException, status
@@ -16,6 +17,7 @@ from models.app_collaborator import AppCollaborator
 from repositories.subscription_repository import SubscriptionRepository
 from repositories.tier_config_repository import TierConfigRepository
 from repositories.usage_record_repository import UsageRecordRepository
+from services.write_behind_service import write_behind
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -117,7 +119,10 @@ class TierEnforcementService:
 
         usage_repo = UsageRecordRepository(db)
         usage = usage_repo.get_current(user_id)
-        call_count = usage.call_count if usage else 0
+        # Read through the write-behind buffer so unflushed calls still count
+        call_count = (usage.call_count if usage else 0) + write_behind.pending_llm_calls(
+            user_id, date.today().replace(day=1)
+        )
 
         if limit > 0 and call_count >= limit:
             raise HTTPException(
@@ -1,5 +1,6 @@
 """Usage tracking service: increment/query system LLM call counters."""
 from datetime import date
+from typing import Optional
 from sqlalchemy.orm import Session
 
 from deployment_mode import is_self_managed
@@ -8,6 +9,7 @@ from repositories.usage_record_repository import UsageRecordRepository
 from repositories.subscription_repository import SubscriptionRepository
 from repositories.tier_config_repository import TierConfigRepository
 from schemas.usage_schemas import UsageRead
+from services.write_behind_service import write_behind
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -30,19 +32,28 @@ def _get_effective_tier(db: Session, user_id: int) -> str:
 class UsageTrackingService:
 
     @staticmethod
-    def record_system_llm_call(db: Session, user_id: int) -> UsageRecord:
+    def get_call_count(db: Session, user_id: int) -> int:
+        """Current-period call count, including increments not yet flushed by this process."""
+        record = UsageRecordRepository(db).get_current(user_id)
+        persisted = record.call_count if record else 0
+        return persisted + write_behind.pending_llm_calls(user_id, date.today().replace(day=1))
+
+    @staticmethod
+    def record_system_llm_call(db: Session, user_id: int) -> Optional[int]:
         """Increment the system LLM call counter.
 
-        After incrementing, checks if usage has crossed the 80% threshold and sends
+        The increment is buffered and written by the write-behind flusher.
+        Afterwards, checks if usage has crossed the 80% threshold and sends
         a warning email once per period.
-        Returns the updated UsageRecord.
+        Returns the effective call count for the current period.
         Is a no-op in self-managed mode.
         """
         if is_self_managed():
             return None
 
-        usage_repo = UsageRecordRepository(db)
-        record = usage_repo.increment(user_id)
+        period_start = date.today().replace(day=1)
+        write_behind.increment_llm_calls(user_id, period_start)
+        call_count = UsageTrackingService.get_call_count(db, user_id)
 
         # Check 80% warning threshold
         tier = _get_effective_tier(db, user_id)
@@ -50,8 +61,8 @@ class UsageTrackingService:
         limit = tier_repo.get_limit(tier, "llm_calls")
 
         if limit > 0:
-            pct = record.call_count / limit
-            period_key = f"{user_id}:{record.billing_period_start}"
+            pct = call_count / limit
+            period_key = f"{user_id}:{period_start}"
             already_warned = _warned_users.get(period_key, False)
 
             if pct >= _WARNING_THRESHOLD and not already_warned:
@@ -65,7 +76,7 @@ class UsageTrackingService:
                 except Exception as exc:
                     logger.warning("Failed to send quota warning email: %s", exc)
 
-        return record
+        return call_count
 
     @staticmethod
     def get_usage(db: Session, user_id: int) -> UsageRead:
@@ -79,8 +90,8 @@ class UsageTrackingService:
         limit = tier_repo.get_limit(tier, "llm_calls")
 
         record = usage_repo.get_current(user_id)
-        call_count = record.call_count if record else 0
         period_start = record.billing_period_start if record else date.today().replace(day=1)
+        call_count = (record.call_count if record else 0) + write_behind.pending_llm_calls(user_id, period_start)
         pct = (call_count / limit) if limit > 0 else 0.0
 
         return UsageRead(
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.user import User
 from repositories.user_repository import UserRepository
+from services.auth_cache_service import auth_cache
 from typing import Tuple, List, Dict, Any
 from utils.config import is_omniadmin
 from utils.logger import get_logger
@@ -181,7 +182,9 @@ class UserService:
             True if successful, False otherwise
         """
         user_repo = UserRepository(db)
-        return user_repo.delete(user_id)
+        deleted = user_repo.delete(user_id)
+        auth_cache.invalidate_user(user_id)
+        return deleted
     
     @staticmethod
     def get_user_stats(db: Session) -> Dict[str, Any]:
@@ -246,6 +249,7 @@ class UserService:
         user.is_active = True
         db.commit()
         db.refresh(user)
+        auth_cache.invalidate_user(user_id)
         
         logger.info(f"User activated - Admin: {admin_email}, Target User: {user.email} (ID: {user_id})")
         
@@ -285,6 +289,7 @@ class UserService:
         user.is_active = False
         db.commit()
         db.refresh(user)
+        auth_cache.invalidate_user(user_id)
         
         logger.info(f"User deactivated - Admin: {admin_email}, Target User: {user.email} (ID: {user_id})")
         
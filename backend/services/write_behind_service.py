@@ -0,0 +1,326 @@
+"""
+Write-behind aggregation of per-request bookkeeping writes.
+
+Every public chat turn used to commit several single-row UPDATEs on the hot
+path (API key ``last_used_at``, agent ``request_count``, system LLM usage and
+conversation message counts), all contending on the same rows. Token usage
+per app, agent and day is batched the same way. Those updates
+are now buffered in process and flushed periodically, and at shutdown, as
+atomic ``SET x = x + :n`` statements in a single transaction, one SAVEPOINT
+per row so a row the database rejects cannot hold back the rest.
+
+Pending increments are only visible to this process, so quota checks read
+through ``pending_llm_calls`` / ``pending_agent_requests`` to stay exact for
+the local share of traffic; other processes see them after the next flush
+(at most ``WRITE_BEHIND_FLUSH_INTERVAL_SECONDS`` later).
+"""
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+from db.database import SessionLocal
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WRITE_BEHIND_FLUSH_INTERVAL_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL_SECONDS', '5'))
+# Failed flushes in a row after which the buffered batch is dropped
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', '12'))
+
+
+@dataclass
+class _ConversationDelta:
+    message_count: int = 0
+    last_message: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+@dataclass
+class _TokenDelta:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+
+    def merge(self, other: "_TokenDelta") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.llm_calls += other.llm_calls
+
+
+@dataclass
+class _Pending:
+    api_key_last_used: Dict[int, datetime]
+    agent_requests: Dict[int, int]
+    llm_calls: Dict[Tuple[int, date], int]
+    conversations: Dict[int, _ConversationDelta]
+    token_usage: Dict[Tuple[int, int, date], _TokenDelta]
+
+    @classmethod
+    def empty(cls) -> "_Pending":
+        return cls({}, {}, {}, {}, {})
+
+    def is_empty(self) -> bool:
+        return not (
+            self.api_key_last_used or self.agent_requests or self.llm_calls
+            or self.conversations or self.token_usage
+        )
+
+
+class WriteBehindAggregator:
+    """Thread-safe in-process buffer of counter increments and last-seen timestamps."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = _Pending.empty()
+        # Consecutive flushes that failed as a whole; only the flusher touches it
+        self._failed_attempts = 0
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def touch_api_key(self, key_id: int, used_at: Optional[datetime] = None) -> None:
+        used_at = used_at or datetime.now()
+        with self._lock:
+            current = self._pending.api_key_last_used.get(key_id)
+            if current is None or used_at > current:
+                self._pending.api_key_last_used[key_id] = used_at
+
+    def increment_agent_requests(self, agent_id: int, n: int = 1) -> None:
+        with self._lock:
+            self._pending.agent_requests[agent_id] = self._pending.agent_requests.get(agent_id, 0) + n
+
+    def increment_llm_calls(self, user_id: int, period_start: date, n: int = 1) -> None:
+        key = (user_id, period_start)
+        with self._lock:
+            self._pending.llm_calls[key] = self._pending.llm_calls.get(key, 0) + n
+
+    def increment_conversation(
+        self,
+        conversation_id: int,
+        n: int = 1,
+        last_message: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            delta = self._pending.conversations.setdefault(conversation_id, _ConversationDelta())
+            delta.message_count += n
+            delta.updated_at = datetime.utcnow()
+            if last_message:
+                delta.last_message = last_message
+
+    def add_token_usage(
+        self,
+        app_id: int,
+        agent_id: int,
+        usage_date: date,
+        input_tokens: int,
+        output_tokens: int,
+        llm_calls: int = 1,
+    ) -> None:
+        delta = _TokenDelta(input_tokens, output_tokens, llm_calls)
+        with self._lock:
+            self._pending.token_usage.setdefault((app_id, agent_id, usage_date), _TokenDelta()).merge(delta)
+
+    # ------------------------------------------------------------------
+    # Read-through
+    # ------------------------------------------------------------------
+
+    def pending_llm_calls(self, user_id: int, period_start: date) -> int:
+        with self._lock:
+            return self._pending.llm_calls.get((user_id, period_start), 0)
+
+    def pending_agent_requests(self, agent_id: int) -> int:
+        with self._lock:
+            return self._pending.agent_requests.get(agent_id, 0)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def _swap(self) -> _Pending:
+        with self._lock:
+            pending, self._pending = self._pending, _Pending.empty()
+        return pending
+
+    def _restore(self, pending: _Pending) -> None:
+        """Merge a batch that failed to flush back into the buffer."""
+        with self._lock:
+            for key_id, used_at in pending.api_key_last_used.items():
+                current = self._pending.api_key_last_used.get(key_id)
+                if current is None or used_at > current:
+                    self._pending.api_key_last_used[key_id] = used_at
+            for agent_id, n in pending.agent_requests.items():
+                self._pending.agent_requests[agent_id] = self._pending.agent_requests.get(agent_id, 0) + n
+            for key, n in pending.llm_calls.items():
+                self._pending.llm_calls[key] = self._pending.llm_calls.get(key, 0) + n
+            for conversation_id, delta in pending.conversations.items():
+                newer = self._pending.conversations.get(conversation_id)
+                if newer is None:
+                    self._pending.conversations[conversation_id] = delta
+                else:
+                    newer.message_count += delta.message_count
+                    newer.last_message = newer.last_message or delta.last_message
+            for key, delta in pending.token_usage.items():
+                self._pending.token_usage.setdefault(key, _TokenDelta()).merge(delta)
+
+    def _statements(self, pending: _Pending) -> List[Tuple[str, Executable]]:
+        """One ``(label, statement)`` per pending row, label used in logs."""
+        from models.agent import Agent
+        from models.api_key import APIKey
+        from models.conversation import Conversation
+        from models.token_usage import TokenUsage
+        from models.usage_record import UsageRecord
+
+        statements = []
+        for key_id, used_at in pending.api_key_last_used.items():
+            statements.append((f"api_key {key_id} last_used_at", (
+                update(APIKey)
+                .where(APIKey.key_id == key_id)
+                .values(last_used_at=func.greatest(func.coalesce(APIKey.last_used_at, used_at), used_at))
+            )))
+
+        for agent_id, n in pending.agent_requests.items():
+            statements.append((f"agent {agent_id} request_count", (
+                update(Agent)
+                .where(Agent.agent_id == agent_id)
+                .values(request_count=func.coalesce(Agent.request_count, 0) + n)
+            )))
+
+        for (user_id, period_start), n in pending.llm_calls.items():
+            statements.append((f"usage record of user {user_id} for {period_start}", (
+                insert(UsageRecord)
+                .values(
+                    user_id=user_id,
+                    billing_period_start=period_start,
+                    call_count=n,
+                    updated_at=datetime.utcnow(),
+                )
+                .on_conflict_do_update(
+                    index_elements=['user_id', 'billing_period_start'],
+                    set_={
+                        'call_count': UsageRecord.call_count + n,
+                        'updated_at': datetime.utcnow(),
+                    },
+                )
+            )))
+
+        for conversation_id, delta in pending.conversations.items():
+            values = {
+                'message_count': func.coalesce(Conversation.message_count, 0) + delta.message_count,
+                'updated_at': delta.updated_at,
+            }
+            if delta.last_message:
+                values['last_message'] = delta.last_message
+            statements.append((f"conversation {conversation_id} counters", (
+                update(Conversation)
+                .where(Conversation.conversation_id == conversation_id)
+                .values(**values)
+            )))
+
+        for (app_id, agent_id, usage_date), delta in pending.token_usage.items():
+            statements.append((f"token usage of app {app_id} agent {agent_id} for {usage_date}", (
+                insert(TokenUsage)
+                .values(
+                    app_id=app_id,
+                    agent_id=agent_id,
+                    usage_date=usage_date,
+                    input_tokens=delta.input_tokens,
+                    output_tokens=delta.output_tokens,
+                    llm_calls=delta.llm_calls,
+                    updated_at=datetime.utcnow(),
+                )
+                .on_conflict_do_update(
+                    constraint='uq_token_usage_app_agent_day',
+                    set_={
+                        'input_tokens': TokenUsage.input_tokens + delta.input_tokens,
+                        'output_tokens': TokenUsage.output_tokens + delta.output_tokens,
+                        'llm_calls': TokenUsage.llm_calls + delta.llm_calls,
+                        'updated_at': datetime.utcnow(),
+                    },
+                )
+            )))
+        return statements
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write all pending updates in one transaction.
+
+        Each row is written in its own SAVEPOINT. A row the database rejects
+        (e.g. a foreign key to a user deleted meanwhile) is dropped, since it
+        would fail again on every retry and would block the others.
+        If the transaction as a whole fails, the batch is put back and
+        retried. After ``WRITE_BEHIND_MAX_ATTEMPTS`` failed flushes in a row it
+        is discarded instead.
+
+        Returns:
+            Number of rows updated (statements executed)
+        """
+        pending = self._swap()
+        if pending.is_empty():
+            return 0
+
+        owns_session = db is None
+        db = db or SessionLocal()
+        applied = 0
+        try:
+            for label, statement in self._statements(pending):
+                try:
+                    with db.begin_nested():
+                        db.execute(statement)
+                    applied += 1
+                except (IntegrityError, DataError) as e:
+                    logger.warning(f"Write-behind dropped {label}: {getattr(e, 'orig', e)}")
+
+            db.commit()
+            self._failed_attempts = 0
+            logger.debug(f"Write-behind flush applied {applied} update(s)")
+            return applied
+        except Exception as e:
+            db.rollback()
+            self._failed_attempts += 1
+            if self._failed_attempts >= WRITE_BEHIND_MAX_ATTEMPTS:
+                self._failed_attempts = 0
+                logger.error(
+                    f"Write-behind flush failed {WRITE_BEHIND_MAX_ATTEMPTS} times in a row, "
+                    f"discarding the batch: {str(e)}"
+                )
+            else:
+                self._restore(pending)
+                logger.error(f"Write-behind flush failed, will retry: {str(e)}")
+            return 0
+        finally:
+            if owns_session:
+                db.close()
+
+
+write_behind = WriteBehindAggregator()
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(WRITE_BEHIND_FLUSH_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(write_behind.flush)
+        except Exception as e:
+            logger.error(f"Write-behind flush loop error: {str(e)}")
+
+
+async def start_write_behind_flusher() -> asyncio.Task:
+    """Start the periodic flush task. Called during FastAPI lifespan startup."""
+    return asyncio.create_task(_flush_loop(), name="write-behind-flusher")
+
+
+async def stop_write_behind_flusher(task: asyncio.Task) -> None:
+    """Stop the flush task and write out anything still buffered."""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.to_thread(write_behind.flush)
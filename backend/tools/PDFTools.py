@@ -4,6 +4,8 @@ from typing import List
 from pdf2image import convert_from_path
 from pypdf import PdfReader
 
+from services.pdf_extraction_service import PDFExtractionService
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,6 +13,9 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extract text from a PDF file using pypdf.
     
+    Pages are parsed once and cached by file hash (see PDFExtractionService),
+    so a follow-up check_pdf_has_text on the same file does not re-parse it.
+    
     Args:
         pdf_path (str): Path to the PDF file
         
@@ -21,11 +26,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         Exception: If there's an error reading the PDF
     """
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        return text
+        return PDFExtractionService.extract_text(pdf_path)
     except Exception as e:
         logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
         raise
@@ -71,6 +72,58 @@ def convert_pdf_to_images(pdf_path: str, output_folder: str) -> List[str]:
         raise
 
 
+def get_pdf_page_count(pdf_path: str) -> int:
+    """
+    Return the number of pages in a PDF without rasterizing it.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        
+    Returns:
+        int: Number of pages in the document
+    """
+    try:
+        return len(PdfReader(pdf_path).pages)
+    except Exception as e:
+        logger.error(f"Error reading page count from PDF {pdf_path}: {str(e)}")
+        raise
+
+
+def convert_pdf_page_to_image(pdf_path: str, page_number: int, output_folder: str, dpi: int = 200) -> str:
+    """
+    Rasterize a single PDF page to a JPEG in the specified folder.
+    
+    Only the requested page is rendered (pdf2image ``first_page``/``last_page``),
+    so callers can stream large documents page by page instead of converting
+    the whole file up front.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        page_number (int): 1-based page number to render
+        output_folder (str): Folder where the image will be saved
+        dpi (int): Rendering resolution
+        
+    Returns:
+        str: Path to the generated image
+        
+    Raises:
+        ValueError: If no image was generated for the page
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        output_folder=output_folder,
+        fmt='jpeg',
+        paths_only=True
+    )
+    if not images:
+        raise ValueError(f"No image was generated for page {page_number}")
+    return images[0]
+
+
 def check_pdf_has_text(pdf_path: str, min_text_length: int = 50) -> bool:
     """
     Check if a PDF contains extractable text.
@@ -83,15 +136,8 @@ def check_pdf_has_text(pdf_path: str, min_text_length: int = 50) -> bool:
         bool: True if the PDF contains extractable text, False otherwise
     """
     try:
-        text = extract_text_from_pdf(pdf_path)
-        if not text or len(text.strip()) < min_text_length:
-            return False
-            
-        # Calculate ratio of printable characters
-        printable_chars = sum(1 for c in text if c.isprintable() and not c.isspace())
-        ratio = printable_chars / len(text)
-        
-        return ratio > 0.3
+        pages = PDFExtractionService.get_pages(pdf_path)
+        return PDFExtractionService.has_text(pages, min_text_length)
     except Exception as e:
         logger.error(f"Error checking PDF text: {str(e)}")
         return False 
\ No newline at end of file
@@ -1,10 +1,12 @@
 from langchain.messages import HumanMessage, SystemMessage, AnyMessage
 from langchain.agents import create_agent as create_langchain_agent, AgentState
 from langchain.agents.middleware import SummarizationMiddleware
+from langchain_anthropic import ChatAnthropic
+from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware
 from models.agent import Agent
+from models.mcp_config import MCPConfig
 from models.silo import Silo, SiloType
 from langchain.tools import BaseTool, tool
-from tools.outputParserTools import get_parser_model_by_id
 from tools.aiServiceTools import get_llm, get_output_parser
 from tools.ai.dateTimeTools import get_current_date
 from tools.ai.fileTools import fetch_file_in_base64
@@ -12,105 +14,102 @@ from tools.ai.workspaceTools import create_download_url_tool
 from typing import Any, Optional, Dict, List
 from langchain_core.tools.retriever import create_retriever_tool
 from services.silo_service import SiloService
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from services.agent_cache_service import CheckpointerCacheService
 from langchain_core.retrievers import BaseRetriever
 from langchain_core.documents import Document
+from cachetools import TTLCache
 import langsmith as ls
+import copy
 import json
 import asyncio
+import hashlib
 import os
+import threading
+import time
 import base64
 import mimetypes
 from utils.logger import get_logger
-from utils.mcp_auth_utils import prepare_mcp_headers, get_user_token_from_context
-from utils.mcp_ssl_utils import inject_ssl_config
+from utils.metrics import AGENT_CREATE_SECONDS, RETRIEVER_SECONDS, observe_seconds
 from tools.skill_tools import create_skill_loader_tool, generate_skills_system_prompt_section
 from tools.python_sandbox_tools import create_python_repl_tool
 
 logger = get_logger(__name__)
 
-class MCPClientManager:
-    _instance = None
-    _client = None
+# Reciprocal-rank fusion constant and result cap for multi-silo retrieval
+RRF_K = int(os.getenv("RRF_K", "60"))
+MULTI_SILO_TOP_K = int(os.getenv("MULTI_SILO_TOP_K", "30"))
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(MCPClientManager, cls).__new__(cls)
-        return cls._instance
+# Provider prompt caching of the static system prompt and conversation prefix
+PROMPT_CACHING_ENABLED = os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true"
+ANTHROPIC_PROMPT_CACHE_TTL = os.getenv("ANTHROPIC_PROMPT_CACHE_TTL", "5m")
+
+
+def build_system_prompt(llm, static_prompt: str, dynamic_prompt: str = ""):
+    """Return the system prompt for ``create_langchain_agent``.
+
+    For Anthropic models the static part becomes its own content block with a
+    ``cache_control`` breakpoint, caching tool definitions and the static
+    prompt across sessions even when the dynamic part differs. OpenAI and
+    Gemini cache prompt prefixes automatically, so they get the plain
+    concatenation with the static part first.
+    """
+    if not (PROMPT_CACHING_ENABLED and isinstance(llm, ChatAnthropic) and static_prompt):
+        return (static_prompt + dynamic_prompt) or None
+    content = [{
+        "type": "text",
+        "text": static_prompt,
+        "cache_control": {"type": "ephemeral", "ttl": ANTHROPIC_PROMPT_CACHE_TTL},
+    }]
+    if dynamic_prompt:
+        content.append({"type": "text", "text": dynamic_prompt})
+    return SystemMessage(content=content)
+
+
+def _uses_openai_prompt_cache_key(agent: Agent) -> bool:
+    # prompt_cache_key is only known to api.openai.com, not to compatible servers
+    service = agent.ai_service
+    provider = getattr(service.provider, 'value', service.provider) if service else None
+    return provider == "OpenAI" and not service.endpoint
+
+def detach_mcp_configs(agent: Agent) -> List[MCPConfig]:
+    """Transient copies of the agent's MCP configs.
+
+    They belong to no session, so MCP discovery can run on the event loop while
+    the request's session is used, and committed, from a worker thread.
+    """
+    return [
+        MCPConfig(
+            config_id=assoc.mcp.config_id,
+            name=assoc.mcp.name,
+            config=copy.deepcopy(assoc.mcp.config),
+            ssl_verify=assoc.mcp.ssl_verify,
+        )
+        for assoc in agent.mcp_associations
+    ]
 
-    async def get_client(self, agent: Agent = None, user_context: Optional[Dict] = None):
-        """Get or create an MCP client for the given agent with authentication support.
-        
-        Args:
-            agent: The agent to create the client for
-            user_context: Optional user context containing authentication tokens
-            
-        Returns:
-            MultiServerMCPClient or None
-        """
-        # Always create a new client for each agent execution to avoid ClosedResourceError
-        # Don't use singleton pattern as the client lifecycle is tied to the agent execution
-        if agent is not None:
-            connections = {}
-            for mcp_assoc in agent.mcp_associations:
-                mcp_config = mcp_assoc.mcp
-                try:
-                    # Get the config from the database
-                    connection_config = mcp_config.to_connection_dict()
-                    if connection_config:
-                        # Add authentication headers if user context is provided
-                        if user_context:
-                            auth_token = get_user_token_from_context(user_context)
-                            if auth_token:
-                                # Prepare headers for MCP server authentication
-                                headers = prepare_mcp_headers(auth_token)
-                                
-                                # Add headers to each connection in the config
-                                for server_name, server_config in connection_config.items():
-                                    if isinstance(server_config, dict):
-                                        # If it's an SSE connection with a URL
-                                        if 'url' in server_config:
-                                            if 'headers' not in server_config:
-                                                server_config['headers'] = {}
-                                            server_config['headers'].update(headers)
-                                            logger.info(f"Added auth headers to MCP server: {server_name}")
-                        
-                        connections.update(connection_config)
-                except ValueError as e:
-                    logger.error(f"Error configuring MCP {mcp_config.name}: {e}")
-                    continue
-                
-            if connections:
-                # Inject SSL configuration for connections that need it
-                # Check each MCP config's ssl_verify setting
-                for mcp_assoc in agent.mcp_associations:
-                    mcp_cfg = mcp_assoc.mcp
-                    ssl_verify = mcp_cfg.ssl_verify if mcp_cfg.ssl_verify is not None else True
-                    if not ssl_verify:
-                        cfg_dict = mcp_cfg.to_connection_dict()
-                        for server_name in cfg_dict:
-                            if server_name in connections:
-                                inject_ssl_config({server_name: connections[server_name]}, ssl_verify=False)
-                
-                logger.info(f"Creating new MCP client with connections: {connections}")
-                # Create a new client each time - don't reuse the singleton
-                # As of langchain-mcp-adapters 0.1.0, MultiServerMCPClient cannot be used as a context manager
-                client = MultiServerMCPClient(connections=connections)
-                return client
-            else:
-                logger.warning("No valid MCP configurations found for agent")
-                return None
-                
-        return None
 
-    async def close(self):
-        # As of langchain-mcp-adapters 0.1.0, MultiServerMCPClient doesn't need manual cleanup
-        # The client is managed internally by the library
-        if self._client is not None:
-            self._client = None
+async def load_mcp_tools(agent_id: int, mcp_configs: List[MCPConfig],
+                         user_context: Optional[Dict] = None) -> List[BaseTool]:
+    """List the tools of the given MCP servers through the shared client pool.
 
-async def create_agent(agent: Agent, search_params=None, session_id=None, user_context: Optional[Dict] = None, working_dir: Optional[str] = None):
+    Unreachable or misconfigured servers contribute no tools, so the agent
+    still runs without them.
+    """
+    if not mcp_configs:
+        return []
+    from services.mcp_client_pool_service import mcp_client_pool
+    mcp_tools = await mcp_client_pool.get_tools(mcp_configs, user_context)
+    logger.info(f"MCP tools available for agent {agent_id}: {len(mcp_tools)}")
+    return mcp_tools
+
+async def create_agent(
+    agent: Agent,
+    search_params=None,
+    session_id=None,
+    user_context: Optional[Dict] = None,
+    working_dir: Optional[str] = None,
+    mcp_tools: Optional[List] = None,
+):
     """Create a new agent instance with cached checkpointer if memory is enabled.
     
     Args:
@@ -118,7 +117,10 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
         search_params: Optional search parameters for silo-based retrieval
         session_id: Optional session ID for memory-enabled agents (used to cache checkpointer)
         user_context: Optional user context containing authentication tokens for MCP
+        working_dir: Optional workspace directory for file and code tools
+        mcp_tools: MCP tools already discovered for this turn; loaded here when None
     """
+    started = time.perf_counter()
     llm = get_llm(agent)
     if llm is None:
         raise ValueError("No LLM found for agent")
@@ -132,7 +134,10 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
 
     if agent.output_parser_id is not None:
         try:
-            pydantic_model = get_parser_model_by_id(agent.output_parser_id)
+            # The model get_output_parser already built (None if it fell back to str)
+            pydantic_model = getattr(output_parser, 'pydantic_object', None)
+            if pydantic_model is None:
+                raise ValueError(f"Output parser {agent.output_parser_id} could not be built")
             format_instructions = output_parser.get_format_instructions()
             format_instructions = format_instructions.replace('{', '{{').replace('}', '}}')
         except Exception as e:
@@ -149,29 +154,19 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
         checkpointer = await CheckpointerCacheService.get_async_checkpointer()
         logger.info(f"Using async PostgreSQL checkpointer for agent {agent.agent_id} (session: {cache_session_id})")
 
-    # Build system prompt with optional skills section and format instructions
-    # In LangChain v1, system_prompt is a static string passed to create_agent
-    system_prompt_content = agent.system_prompt
+    # Build system prompt with optional skills section and format instructions.
+    # Static sections come first and per-session ones (the workspace path) last,
+    # so every turn of the agent shares the longest possible prompt prefix for
+    # provider prompt caching.
+    static_sections = [agent.system_prompt or ""]
     if hasattr(agent, 'skill_associations') and agent.skill_associations:
         skills_section = generate_skills_system_prompt_section(agent.skill_associations)
         if skills_section:
-            system_prompt_content = system_prompt_content + "\n" + skills_section
-
-    if working_dir:
-        system_prompt_content = (
-            system_prompt_content
-            + "\n\n<workspace>\n"
-            + f"Working directory: {working_dir}\n"
-            + "User-uploaded files are in this directory — reference them by filename only.\n"
-            + "Use `download_url_to_workspace` to save any URL (generated image, PDF, report…) "
-            + "to this directory so the user can download it from the files panel.\n"
-            + "</workspace>"
-        )
+            static_sections.append("\n" + skills_section)
 
     if agent.enable_code_interpreter and working_dir:
-        system_prompt_content = (
-            system_prompt_content
-            + "\n\n<code_interpreter>\n"
+        static_sections.append(
+            "\n\n<code_interpreter>\n"
             + "You have access to a `python_repl` tool that executes Python code.\n"
             + "Reference uploaded files by filename only (e.g. 'report.xlsx').\n"
             + "Save output files to the working directory and print the filename so the user can download it.\n"
@@ -180,13 +175,25 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
         )
 
     if format_instructions:
-        system_prompt_content = (
-            system_prompt_content
-            + "\n<output_format_instructions>"
+        static_sections.append(
+            "\n<output_format_instructions>"
             + format_instructions
             + "</output_format_instructions>"
         )
 
+    dynamic_sections = []
+    if working_dir:
+        dynamic_sections.append(
+            "\n\n<workspace>\n"
+            + f"Working directory: {working_dir}\n"
+            + "User-uploaded files are in this directory — reference them by filename only.\n"
+            + "Use `download_url_to_workspace` to save any URL (generated image, PDF, report…) "
+            + "to this directory so the user can download it from the files panel.\n"
+            + "</workspace>"
+        )
+
+    system_prompt_content = build_system_prompt(llm, "".join(static_sections), "".join(dynamic_sections))
+
     middleware = []
     if agent.has_memory:
         max_tokens = agent.memory_max_tokens or 4000
@@ -205,6 +212,14 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
             f"trim_tokens_to_summarize={trim_tokens}"
         )
 
+    if PROMPT_CACHING_ENABLED and isinstance(llm, ChatAnthropic):
+        # Moves a cache breakpoint onto the last message of every model call, so
+        # tool-loop iterations and follow-up turns re-read the conversation prefix
+        middleware.append(AnthropicPromptCachingMiddleware(ttl=ANTHROPIC_PROMPT_CACHE_TTL))
+    elif PROMPT_CACHING_ENABLED and _uses_openai_prompt_cache_key(agent):
+        # Routes the agent's requests to the same cache shard (automatic caching)
+        llm.model_kwargs = {**(llm.model_kwargs or {}), "prompt_cache_key": f"aict-agent-{agent.agent_id}"}
+
     tools = []
 
     # Provider-side tools — injected from agent.server_tools using provider-specific formats
@@ -235,11 +250,9 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
     if working_dir:
         tools.append(create_download_url_tool(working_dir))
 
-    if agent.silo_id is not None:
-
-        retriever_tool = get_retriever_tool(agent.silo, search_params)
-        if retriever_tool is not None:
-            tools.append(retriever_tool)
+    retriever_tool = get_agent_retriever_tool(agent, search_params)
+    if retriever_tool is not None:
+        tools.append(retriever_tool)
 
     if agent.enable_code_interpreter and working_dir:
         os.makedirs(working_dir, exist_ok=True)
@@ -247,19 +260,9 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
         tools.append(python_tool)
         logger.info(f"Python REPL tool added for agent {agent.agent_id} (working_dir={working_dir})")
 
-    mcp_client = None
-    try:
-        logger.info("Starting MCP tools loading...")
-        mcp_client = await MCPClientManager().get_client(agent, user_context)
-        if (mcp_client):
-            mcp_tools = await mcp_client.get_tools()
-            logger.info(f"MCP tools loaded successfully: {len(mcp_tools)} tools")
-            if (mcp_tools):
-                tools.extend(mcp_tools)
-    except Exception as e:
-        logger.error(f"Error loading MCP tools: {e}", exc_info=True)
-        # As of langchain-mcp-adapters 0.1.0, no manual cleanup needed
-        mcp_client = None
+    if mcp_tools is None:
+        mcp_tools = await load_mcp_tools(agent.agent_id, detach_mcp_configs(agent), user_context)
+    tools.extend(mcp_tools)
 
     # Add skill loader tool if agent has skills
     if hasattr(agent, 'skill_associations') and agent.skill_associations:
@@ -294,9 +297,9 @@ async def create_agent(agent: Agent, search_params=None, session_id=None, user_c
     logger.info(f"Memory enabled: {agent.has_memory}")
     logger.info(f"Output parser: {agent.output_parser_id is not None}")
     logger.info(f"LangSmith configured: {langsmith_config is not None}")
-    
+    AGENT_CREATE_SECONDS.observe(time.perf_counter() - started)
 
-    return agent_chain, langsmith_config, mcp_client
+    return agent_chain, langsmith_config
 
 
 def prepare_agent_config(agent):
@@ -492,89 +495,163 @@ def get_langsmith_config(agent):
     return None
 
 
+# Compiled sub-agents are shared across requests, keyed by a fingerprint of
+# their configuration so an edited agent gets rebuilt on its next use.
+SUB_AGENT_CACHE_TTL_SECONDS = float(os.getenv("SUB_AGENT_CACHE_TTL_SECONDS", "300"))
+SUB_AGENT_CACHE_SIZE = int(os.getenv("SUB_AGENT_CACHE_SIZE", "256"))
+
+_sub_agent_cache: TTLCache = TTLCache(
+    maxsize=max(SUB_AGENT_CACHE_SIZE, 1), ttl=max(SUB_AGENT_CACHE_TTL_SECONDS, 1)
+)
+_sub_agent_cache_lock = threading.Lock()
+
+
+def _sub_agent_system_prompt(agent: Agent) -> str:
+    """System prompt of a tool agent, with its skills section when it has one."""
+    tool_system_prompt = agent.system_prompt or ""
+    if agent.system_prompt and hasattr(agent, 'skill_associations') and agent.skill_associations:
+        skills_section = generate_skills_system_prompt_section(agent.skill_associations)
+        if skills_section:
+            tool_system_prompt = tool_system_prompt + "\n" + skills_section
+    return tool_system_prompt
+
+
+def _silo_fingerprint(silo: Silo) -> list:
+    """Silo settings a retriever tool is built from, embedding service included."""
+    embedding = silo.embedding_service
+    return [
+        silo.silo_id, silo.silo_type, silo.description, silo.vector_db_type,
+        [embedding.service_id, embedding.provider, embedding.name, embedding.description,
+         embedding.endpoint, embedding.api_key, embedding.api_version] if embedding else None,
+    ]
+
+
+def sub_agent_fingerprint(agent: Agent) -> str:
+    """Hash of everything that goes into a tool agent's compiled graph, nested tools included."""
+    ai_service = agent.ai_service
+    parts = [
+        agent.agent_id,
+        _sub_agent_system_prompt(agent),
+        getattr(agent, 'temperature', None),
+        [ai_service.service_id, ai_service.provider, ai_service.description,
+         ai_service.endpoint, ai_service.api_key, ai_service.api_version] if ai_service else None,
+        [_silo_fingerprint(silo) for silo in get_agent_silos(agent)],
+        [sub_agent_fingerprint(tool.tool) for tool in agent.tool_associations],
+    ]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _build_sub_agent(agent: Agent):
+    llm = get_llm(agent)
+    if llm is None:
+        raise ValueError("No LLM found for agent")
+
+    tools = []
+    # Nested tool agents are materialised with their parent, while the
+    # request's session can still load them; later requests reuse the result.
+    for tool in agent.tool_associations:
+        nested = IACTTool(tool.tool)
+        nested.get_react_agent()
+        tools.append(nested)
+
+    # Add base useful tools
+    tools.append(get_current_date)
+    tools.append(fetch_file_in_base64)
+
+    # Add silo retriever if configured
+    retriever_tool = get_agent_retriever_tool(agent)
+    if retriever_tool is not None:
+        tools.append(retriever_tool)
+
+    tool_system_prompt = _sub_agent_system_prompt(agent)
+    return create_langchain_agent(
+        model=llm,
+        tools=tools,
+        system_prompt=tool_system_prompt if tool_system_prompt else None,
+    )
+
+
 class IACTTool(BaseTool):
+    """Exposes another agent as a tool.
+
+    The inner agent is only built the first time the tool is called, and the
+    compiled graph is cached across requests (see ``sub_agent_fingerprint``).
+    Everything needed at call time is copied from the ORM agent up front and
+    the agent itself is dropped once the graph is built: cached graphs outlive
+    the request's session, which detaches and expires its instances.
+    """
     name: str = "agent_tool"
     description: str = "Search for a repository"
-    agent: Agent
+    agent: Optional[Agent] = None
+    agent_name: str = ""
+    prompt_template: Optional[str] = None
+    fingerprint: str = ""
     react_agent: Any = None
-    llm: Any = None
 
     def __init__(self, agent: Agent) -> None:
         super().__init__(agent=agent)
         
         self.agent = agent  
+        self.agent_name = agent.name
         self.name = agent.name.replace(" ", "_")
         self.description = agent.description or "Agent tool"
-        self.llm = get_llm(agent)
-        if self.llm is None:
+        self.prompt_template = agent.prompt_template
+        if agent.ai_service is None:
             raise ValueError("No LLM found for agent")
-        
-        tools = []
-        # Add nested tool agents recursively
-        for tool in agent.tool_associations:
-            sub_agent = tool.tool
-            tools.append(IACTTool(sub_agent))
-        
-        # Add base useful tools
-        tools.append(get_current_date)
-        tools.append(fetch_file_in_base64)
-        
-        # Add silo retriever if configured
-        if agent.silo_id is not None:
-            retriever_tool = get_retriever_tool(agent.silo)
-            if retriever_tool is not None:
-                tools.append(retriever_tool)
-        
-        # Build system prompt with optional skills section (LangChain v1 pattern)
-        tool_system_prompt = agent.system_prompt or ""
-        if agent.system_prompt and hasattr(agent, 'skill_associations') and agent.skill_associations:
-            skills_section = generate_skills_system_prompt_section(agent.skill_associations)
-            if skills_section:
-                tool_system_prompt = tool_system_prompt + "\n" + skills_section
-
-        # Create sub-agent
-        self.react_agent = create_langchain_agent(
-            model=self.llm,
-            tools=tools,
-            system_prompt=tool_system_prompt if tool_system_prompt else None,
-        )
+        self.fingerprint = sub_agent_fingerprint(agent)
+
+    def get_react_agent(self):
+        """Return the compiled inner agent, building and caching it on first use."""
+        if self.react_agent is None:
+            with _sub_agent_cache_lock:
+                cached = _sub_agent_cache.get(self.fingerprint)
+            if cached is None:
+                cached = _build_sub_agent(self.agent)
+                with _sub_agent_cache_lock:
+                    _sub_agent_cache[self.fingerprint] = cached
+                logger.info(f"Built sub-agent for tool {self.name}")
+            self.react_agent = cached
+            self.agent = None
+        return self.react_agent
+
+    def _format_prompt(self, query: str) -> str:
+        # Format the message using prompt_template if available, otherwise use query directly
+        if not self.prompt_template:
+            return query
+        try:
+            return self.prompt_template.format(question=query)
+        except KeyError:
+            # If 'question' is not in template, try other common placeholders
+            try:
+                return self.prompt_template.format(query=query)
+            except KeyError:
+                # If no placeholder works, just use the query
+                logger.warning(f"Could not format prompt_template for agent {self.agent_name}, using query directly")
+                return query
+
+    @staticmethod
+    def _extract_content(result: Any) -> str:
+        # Extract the content from the last AI message
+        if isinstance(result, dict) and "messages" in result:
+            messages_list = result["messages"]
+            # Find the last AI message with content
+            for msg in reversed(messages_list):
+                if hasattr(msg, 'content') and msg.content:
+                    return str(msg.content)
+            # Fallback: return the last message content
+            if messages_list:
+                last_msg = messages_list[-1]
+                return str(last_msg.content) if hasattr(last_msg, 'content') else str(last_msg)
+
+        # If result is a string, return it directly
+        return str(result)
 
     def _run(self, query: str, *args, **kwargs) -> str:
         """Synchronous execution of the agent tool"""
         try:
-            # Format the message using prompt_template if available, otherwise use query directly
-            if self.agent.prompt_template:
-                try:
-                    formatted_prompt = self.agent.prompt_template.format(question=query)
-                except KeyError:
-                    # If 'question' is not in template, try other common placeholders
-                    try:
-                        formatted_prompt = self.agent.prompt_template.format(query=query)
-                    except KeyError:
-                        # If no placeholder works, just use the query
-                        logger.warning(f"Could not format prompt_template for agent {self.agent.name}, using query directly")
-                        formatted_prompt = query
-            else:
-                formatted_prompt = query
-            
-            messages = [HumanMessage(content=formatted_prompt)]
-            result = self.react_agent.invoke({"messages": messages})
-            
-            # Extract the content from the last AI message
-            if isinstance(result, dict) and "messages" in result:
-                messages_list = result["messages"]
-                # Find the last AI message with content
-                for msg in reversed(messages_list):
-                    if hasattr(msg, 'content') and msg.content:
-                        return str(msg.content)
-                # Fallback: return the last message content
-                if messages_list:
-                    last_msg = messages_list[-1]
-                    return str(last_msg.content) if hasattr(last_msg, 'content') else str(last_msg)
-            
-            # If result is a string, return it directly
-            return str(result)
-            
+            messages = [HumanMessage(content=self._format_prompt(query))]
+            result = self.get_react_agent().invoke({"messages": messages})
+            return self._extract_content(result)
         except Exception as e:
             logger.error(f"Error executing agent tool {self.name}: {str(e)}")
             return f"Error executing agent tool: {str(e)}"
@@ -582,39 +659,9 @@ class IACTTool(BaseTool):
     async def _arun(self, query: str, *args, **kwargs) -> str:
         """Asynchronous execution of the agent tool"""
         try:
-            # Format the message using prompt_template if available, otherwise use query directly
-            if self.agent.prompt_template:
-                try:
-                    formatted_prompt = self.agent.prompt_template.format(question=query)
-                except KeyError:
-                    # If 'question' is not in template, try other common placeholders
-                    try:
-                        formatted_prompt = self.agent.prompt_template.format(query=query)
-                    except KeyError:
-                        # If no placeholder works, just use the query
-                        logger.warning(f"Could not format prompt_template for agent {self.agent.name}, using query directly")
-                        formatted_prompt = query
-            else:
-                formatted_prompt = query
-            
-            messages = [HumanMessage(content=formatted_prompt)]
-            result = await self.react_agent.ainvoke({"messages": messages})
-            
-            # Extract the content from the last AI message
-            if isinstance(result, dict) and "messages" in result:
-                messages_list = result["messages"]
-                # Find the last AI message with content
-                for msg in reversed(messages_list):
-                    if hasattr(msg, 'content') and msg.content:
-                        return str(msg.content)
-                # Fallback: return the last message content
-                if messages_list:
-                    last_msg = messages_list[-1]
-                    return str(last_msg.content) if hasattr(last_msg, 'content') else str(last_msg)
-            
-            # If result is a string, return it directly
-            return str(result)
-            
+            messages = [HumanMessage(content=self._format_prompt(query))]
+            result = await self.get_react_agent().ainvoke({"messages": messages})
+            return self._extract_content(result)
         except Exception as e:
             logger.error(f"Error executing agent tool {self.name} (async): {str(e)}")
             return f"Error executing agent tool: {str(e)}"
@@ -664,6 +711,91 @@ def convert_search_params_to_types(search_params: dict, metadata_definition) ->
             
     return converted_params
 
+def _silo_tool_description(silo: Silo) -> str:
+    if silo.silo_type == SiloType.REPO:
+        #todo: add description to repository model to compose description
+        return "Use this tool to search for relevant documents in the repository."
+    elif silo.silo_type == SiloType.DOMAIN:
+        return f"Use this tool to search for documents. This tool stores information about a web site and this is its description: {silo.domain.description}"
+    return f"Use this tool to search for documents and information about {silo.description}"
+
+
+def _silo_type_label(silo: Silo) -> str:
+    return silo.silo_type.value if hasattr(silo.silo_type, 'value') else str(silo.silo_type)
+
+
+def format_docs_with_metadata(docs: List[Document]) -> List[Document]:
+    """Format documents to include metadata in page_content"""
+    formatted_docs = []
+    for doc in docs:
+        metadata_str = json.dumps(doc.metadata, ensure_ascii=False) if doc.metadata else "{}"
+        # Include metadata in the page_content so the agent can see it
+        formatted_content = f"Content: {doc.page_content}\nMetadata: {metadata_str}"
+        formatted_doc = Document(
+            page_content=formatted_content,
+            metadata=doc.metadata  # Keep original metadata for filtering
+        )
+        formatted_docs.append(formatted_doc)
+    return formatted_docs
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = RRF_K, limit: Optional[int] = None) -> List[Document]:
+    """Merge ranked result lists by reciprocal-rank fusion.
+
+    Each document scores ``sum(1 / (k + rank))`` over the lists it appears in.
+    Documents with the same content are merged, keeping the first occurrence;
+    ties keep the order in which documents were first seen.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = hashlib.sha256(doc.page_content.encode()).hexdigest()
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:limit]]
+
+
+def _tag_silo(docs: List[Document], silo_id: int) -> List[Document]:
+    return [Document(page_content=doc.page_content, metadata={'silo_id': silo_id, **(doc.metadata or {})}) for doc in docs]
+
+
+def _create_silo_retriever_tool(retriever: BaseRetriever, description: str):
+    # Use default document prompt since metadata is now in page_content
+    from langchain_core.prompts import PromptTemplate
+    document_prompt = PromptTemplate.from_template("{page_content}")
+
+    return create_retriever_tool(
+        retriever=retriever,
+        name="silo_retriever",
+        description=description,
+        response_format="content_and_artifact",
+        document_prompt=document_prompt
+    )
+
+
+def get_agent_silos(agent: Agent) -> List[Silo]:
+    """The agent's primary silo followed by its additional silos, without duplicates."""
+    silos = [agent.silo] if agent.silo_id is not None and agent.silo is not None else []
+    seen = {silo.silo_id for silo in silos}
+    for assoc in getattr(agent, 'silo_associations', None) or []:
+        if assoc.silo is not None and assoc.silo_id not in seen:
+            seen.add(assoc.silo_id)
+            silos.append(assoc.silo)
+    return silos
+
+
+def get_agent_retriever_tool(agent: Agent, search_params=None):
+    """Retriever tool over every silo of the agent, or None when it has none."""
+    silos = get_agent_silos(agent)
+    if not silos:
+        return None
+    if len(silos) == 1:
+        return get_retriever_tool(silos[0], search_params)
+    return get_multi_silo_retriever_tool(silos, search_params)
+
+
 def get_retriever_tool(silo: Silo, search_params=None):
     
     if silo.silo_id is not None:
@@ -672,59 +804,79 @@ def get_retriever_tool(silo: Silo, search_params=None):
             search_params = convert_search_params_to_types(search_params, silo.metadata_definition)
 
         retriever = SiloService.get_silo_retriever(silo.silo_id, search_params)
-        name = "silo_retriever"
-        description = "Use this tool to search for documents in the pgvector collection."
-        if silo.silo_type == SiloType.REPO:
-            #todo: add description to repository model to compose description
-            description = "Use this tool to search for relevant documents in the repository."
-        elif silo.silo_type == SiloType.DOMAIN:
-            description = f"Use this tool to search for documents. This tool stores information about a web site and this is its description: {silo.domain.description}"
-        else:
-            description = f"Use this tool to search for documents and information about {silo.description}"
+        description = _silo_tool_description(silo)
 
         # Create a wrapper retriever that includes metadata in page_content
         # This ensures the agent can see metadata like holiday_item_id, type, etc.
         # We'll use a closure to capture the retriever instead of storing it as an attribute
         original_retriever = retriever
-        
-        def format_docs_with_metadata(docs: List[Document]) -> List[Document]:
-            """Format documents to include metadata in page_content"""
-            formatted_docs = []
-            for doc in docs:
-                metadata_str = json.dumps(doc.metadata, ensure_ascii=False) if doc.metadata else "{}"
-                # Include metadata in the page_content so the agent can see it
-                formatted_content = f"Content: {doc.page_content}\nMetadata: {metadata_str}"
-                formatted_doc = Document(
-                    page_content=formatted_content,
-                    metadata=doc.metadata  # Keep original metadata for filtering
-                )
-                formatted_docs.append(formatted_doc)
-            return formatted_docs
+        silo_type = _silo_type_label(silo)
         
         class MetadataRetrieverWrapper(BaseRetriever):
             """Wrapper retriever that includes metadata in document content"""
             
             def _get_relevant_documents(self, query: str) -> List[Document]:
-                docs = original_retriever.invoke(query)
+                with observe_seconds(RETRIEVER_SECONDS, silo_type=silo_type):
+                    docs = original_retriever.invoke(query)
                 return format_docs_with_metadata(docs)
             
             async def _aget_relevant_documents(self, query: str) -> List[Document]:
-                docs = await original_retriever.ainvoke(query)
+                with observe_seconds(RETRIEVER_SECONDS, silo_type=silo_type):
+                    docs = await original_retriever.ainvoke(query)
                 return format_docs_with_metadata(docs)
         
         # Wrap the retriever to include metadata in content
-        wrapped_retriever = MetadataRetrieverWrapper()
-        
-        # Use default document prompt since metadata is now in page_content
-        from langchain_core.prompts import PromptTemplate
-        document_prompt = PromptTemplate.from_template("{page_content}")
-
-        return create_retriever_tool(
-            retriever=wrapped_retriever, 
-            name=name, 
-            description=description, 
-            response_format="content_and_artifact",
-            document_prompt=document_prompt
-        )
+        return _create_silo_retriever_tool(MetadataRetrieverWrapper(), description)
     return None
 
+
+def get_multi_silo_retriever_tool(silos: List[Silo], search_params=None):
+    """One retriever tool that searches several silos concurrently.
+
+    Every silo is queried in parallel and the ranked lists are merged with
+    reciprocal-rank fusion, so the agent gets one answer per tool call instead
+    of one sub-agent round trip per silo. ``search_params`` follow the metadata
+    definition of the first (primary) silo and are only applied to it; the
+    other silos are searched with their defaults. A silo that fails is logged
+    and skipped.
+    """
+    retrievers = []
+    for index, silo in enumerate(silos):
+        params = search_params if index == 0 else None
+        if params:
+            params = convert_search_params_to_types(params, silo.metadata_definition)
+        retrievers.append((silo.silo_id, _silo_type_label(silo), SiloService.get_silo_retriever(silo.silo_id, params)))
+
+    description = "Use this tool to search several document collections at once. It covers:\n" + "\n".join(
+        f"- {_silo_tool_description(silo)}" for silo in silos
+    )
+
+    def search_one(silo_id, silo_type, retriever, query: str) -> List[Document]:
+        try:
+            with observe_seconds(RETRIEVER_SECONDS, silo_type=silo_type):
+                return _tag_silo(retriever.invoke(query), silo_id)
+        except Exception as e:
+            logger.error(f"Retrieval from silo {silo_id} failed: {e}")
+            return []
+
+    async def asearch_one(silo_id, silo_type, retriever, query: str) -> List[Document]:
+        try:
+            with observe_seconds(RETRIEVER_SECONDS, silo_type=silo_type):
+                return _tag_silo(await retriever.ainvoke(query), silo_id)
+        except Exception as e:
+            logger.error(f"Retrieval from silo {silo_id} failed: {e}")
+            return []
+
+    class MultiSiloRetriever(BaseRetriever):
+        """Fans a query out to every silo and fuses the rankings"""
+
+        def _get_relevant_documents(self, query: str) -> List[Document]:
+            results = [search_one(*entry, query) for entry in retrievers]
+            return format_docs_with_metadata(reciprocal_rank_fusion(results, limit=MULTI_SILO_TOP_K))
+
+        async def _aget_relevant_documents(self, query: str) -> List[Document]:
+            results = await asyncio.gather(*(asearch_one(*entry, query) for entry in retrievers))
+            return format_docs_with_metadata(reciprocal_rank_fusion(results, limit=MULTI_SILO_TOP_K))
+
+    return _create_silo_retriever_tool(MultiSiloRetriever(), description)
+
@@ -17,6 +17,8 @@ from tools.outputParserTools import get_parser_model_by_id
 from typing import List
 from langchain_core.documents import Document
 from tools.embeddingTools import get_embeddings_model
+from utils.metrics import LLMCallCounter
+from utils.token_usage import TokenUsageCallback
 load_dotenv()
 
 logging.basicConfig(
@@ -75,7 +77,11 @@ def create_llm_from_service(ai_service, temperature=0, is_vision=False):
     if builder is None:
         raise ValueError(f"Proveedor de modelo no soportado: {provider}")
 
-    return builder()
+    llm = builder()
+    # Count invocations and tokens per provider (the Mistral vision wrapper is not a LangChain model)
+    if hasattr(llm, 'callbacks'):
+        llm.callbacks = list(llm.callbacks or []) + [LLMCallCounter(provider), TokenUsageCallback(provider)]
+    return llm
 
 def get_llm(agent, is_vision=False):
     """
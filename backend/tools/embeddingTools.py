@@ -3,7 +3,10 @@ from langchain_ollama import OllamaEmbeddings
 from langchain_mistralai import MistralAIEmbeddings
 from langchain_azure_ai.embeddings import AzureAIEmbeddingsModel
 from huggingface_hub import InferenceClient
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
 from models.embedding_service import EmbeddingProvider
+from utils.metrics import EMBEDDING_CALLS
 import logging
 
 logging.basicConfig(
@@ -23,10 +26,42 @@ class HuggingFaceEmbeddingsAdapter:
     def embed_documents(self, documents):
         return [self.embed_query(doc) for doc in documents]
 
+class CountingEmbeddings(Embeddings):
+    """Delegates to a provider embeddings model and counts calls per provider."""
+
+    def __init__(self, embeddings, provider):
+        self.embeddings = embeddings
+        self.provider = str(provider)
+
+    def embed_documents(self, texts):
+        EMBEDDING_CALLS.labels(provider=self.provider).inc()
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        EMBEDDING_CALLS.labels(provider=self.provider).inc()
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        if not hasattr(self.embeddings, 'aembed_documents'):
+            return await run_in_executor(None, self.embed_documents, texts)
+        EMBEDDING_CALLS.labels(provider=self.provider).inc()
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text):
+        if not hasattr(self.embeddings, 'aembed_query'):
+            return await run_in_executor(None, self.embed_query, text)
+        EMBEDDING_CALLS.labels(provider=self.provider).inc()
+        return await self.embeddings.aembed_query(text)
+
+
 def get_embeddings_model(embedding_service):
     """Returns the appropriate embeddings model based on the service configuration"""
     if embedding_service is None:
         raise ValueError("No embedding service provided")
+    return CountingEmbeddings(_build_embeddings_model(embedding_service), embedding_service.provider)
+
+
+def _build_embeddings_model(embedding_service):
 
     logger.info(f"Proveedor {embedding_service.provider}")
 
@@ -13,6 +13,7 @@ from mistralai import Mistral
 from langchain_anthropic import ChatAnthropic
 from langchain_ollama import ChatOllama
 from tools.PDFTools import extract_text_from_pdf, convert_pdf_to_images as pdf_to_images, check_pdf_has_text
+from utils.token_usage import record_token_usage
 load_dotenv()
 
 INFORMATION_EXTRACTION_SYSTEM_PROMPT = "Extract all information from this image and return it ONLY as a JSON object."
@@ -97,6 +98,11 @@ def extract_text_from_image(base64_image: str, vision_system_prompt, vision_mode
             messages=messages,
             model=vision_model.model_name
         )
+        usage = getattr(response, "usage", None)
+        record_token_usage(
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
         return response.choices[0].message.content
     
     else:
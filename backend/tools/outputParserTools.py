@@ -1,12 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import Type, Dict, Any, List, get_origin, get_args
+from typing import Type, Dict, Any, List, Tuple, get_origin, get_args
 from sqlalchemy.orm import Session
+from cachetools import TTLCache
 from db.database import SessionLocal
 from db.database import db
 from models.output_parser import OutputParser
 import logging
+import os
+import threading
 from datetime import date
 
+PARSER_MODEL_CACHE_SIZE = int(os.getenv("PARSER_MODEL_CACHE_SIZE", "256"))
+PARSER_MODEL_CACHE_TTL_SECONDS = float(os.getenv("PARSER_MODEL_CACHE_TTL_SECONDS", "300"))
+
+# parser_id -> modelo Pydantic. Las ediciones hechas en este proceso lo
+# invalidan; el TTL acota cuánto tarda en verse una edición hecha en otro worker.
+_model_cache: TTLCache = TTLCache(maxsize=max(PARSER_MODEL_CACHE_SIZE, 1), ttl=PARSER_MODEL_CACHE_TTL_SECONDS)
+_model_cache_lock = threading.Lock()
+
 
 def process_type(field_type):
     """
@@ -150,56 +161,110 @@ def create_model_from_json_schema(schema_data: List[Dict[str, Any]], model_name:
     
     return modelo
 
-def get_parser_model_by_id(parser_id: int, ancestor_parsers: set = None) -> Type[BaseModel]:
+def _referenced_parser_ids(fields: List[Dict[str, Any]]) -> List[int]:
+    """IDs de los parsers a los que hacen referencia los campos (tipo parser o lista de parsers)."""
+    ids = []
+    for field in fields or []:
+        if field.get('type') == 'parser' and field.get('parser_id'):
+            ids.append(int(field['parser_id']))
+        elif field.get('type') == 'list' and field.get('list_item_type') == 'parser' and field.get('list_item_parser_id'):
+            ids.append(int(field['list_item_parser_id']))
+    return ids
+
+
+def _load_parser_tree(parser_id: int) -> Dict[int, Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Carga ``(name, fields)`` del parser y de todos los parsers de los que depende.
+
+    Una consulta por nivel de anidamiento, en una única sesión. Los parsers
+    inexistentes no aparecen en el resultado.
+    """
+    tree: Dict[int, Tuple[str, List[Dict[str, Any]]]] = {}
+    pending = {parser_id}
+    session = SessionLocal()
+    try:
+        while pending:
+            rows = session.query(OutputParser.parser_id, OutputParser.name, OutputParser.fields).filter(
+                OutputParser.parser_id.in_(pending)
+            ).all()
+            for row_id, name, fields in rows:
+                tree[row_id] = (name, fields or [])
+            pending = {
+                ref_id
+                for row_id, _, fields in rows
+                for ref_id in _referenced_parser_ids(fields)
+            } - tree.keys()
+    finally:
+        session.close()
+    return tree
+
+
+def _build_parser_model(parser_id: int, tree: Dict[int, Tuple[str, List[Dict[str, Any]]]],
+                        built: Dict[int, Type[BaseModel]], ancestor_parsers: set) -> Type[BaseModel]:
     """
-    Obtiene y construye el modelo Pydantic correspondiente a un ID de parser.
+    Construye el modelo de ``parser_id`` a partir del árbol ya cargado.
 
     `ancestor_parsers` mantiene la cadena de parsers que están actualmente en
     construcción en la rama de recursión actual. Solo se considera dependencia
     circular si un parser hijo referencia a uno de sus ancestros (no a un
-    hermano ya procesado en otra rama).
+    hermano ya procesado en otra rama, que se reutiliza desde `built`).
     """
-    logging.info(f"Iniciando construcción del modelo Pydantic para parser_id: {parser_id}")
-
-    if ancestor_parsers is None:
-        ancestor_parsers = set()
-
+    if parser_id in built:
+        return built[parser_id]
     if parser_id in ancestor_parsers:
         logging.error(
             f"Dependencia circular detectada para el parser {parser_id}. "
             f"Cadena de ancestros: {ancestor_parsers}"
         )
         raise ValueError(f"Dependencia circular detectada para el parser {parser_id}")
+    if parser_id not in tree:
+        raise ValueError(f"No se encontró el parser con ID {parser_id}")
 
     ancestor_parsers.add(parser_id)
-    logging.info(f"Cadena de ancestros activa: {ancestor_parsers}")
-
     try:
-        session = SessionLocal()
-        try:
-            parser = session.query(OutputParser).filter(OutputParser.parser_id == parser_id).first()
-            if not parser:
-                raise ValueError(f"No se encontró el parser con ID {parser_id}")
-
-            schema_data = parser.fields
-            logging.info(f"Schema obtenido de la base de datos: {schema_data}")
-        finally:
-            session.close()
-
-        for field in schema_data:
+        name, fields = tree[parser_id]
+        # Copias: los campos del árbol (y del ORM) no se modifican
+        schema_data = []
+        for field in fields:
+            field = dict(field)
             if field['type'] == 'parser':
-                logging.info(f"Procesando campo tipo parser: {field['name']}")
-                referenced_model = get_parser_model_by_id(int(field['parser_id']), ancestor_parsers)
-                field['type'] = referenced_model
+                field['type'] = _build_parser_model(int(field['parser_id']), tree, built, ancestor_parsers)
             elif field['type'] == 'list' and field.get('list_item_type') == 'parser':
-                logging.info(f"Procesando campo tipo lista de parser: {field['name']}")
-                referenced_model = get_parser_model_by_id(int(field['list_item_parser_id']), ancestor_parsers)
-                field['type'] = 'list'
-                field['list_item_type'] = referenced_model
-
-        return create_model_from_json_schema(schema_data, parser.name)
+                field['list_item_type'] = _build_parser_model(
+                    int(field['list_item_parser_id']), tree, built, ancestor_parsers
+                )
+            schema_data.append(field)
+        built[parser_id] = create_model_from_json_schema(schema_data, name)
+        return built[parser_id]
     finally:
-        # Al salir de esta rama de recursión, el parser deja de ser un ancestro
-        # activo, por lo que puede ser referenciado de nuevo en ramas paralelas
-        # (p. ej. dos hermanos que apuntan al mismo parser hijo).
-        ancestor_parsers.discard(parser_id)
\ No newline at end of file
+        ancestor_parsers.discard(parser_id)
+
+
+def get_parser_model_by_id(parser_id: int) -> Type[BaseModel]:
+    """
+    Obtiene el modelo Pydantic correspondiente a un ID de parser.
+
+    Los modelos se cachean por ``parser_id``: una llamada con el modelo en
+    caché no consulta la base de datos. Al modificar o borrar un parser se
+    llama a ``invalidate_parser_models``.
+    """
+    with _model_cache_lock:
+        model = _model_cache.get(parser_id)
+    if model is not None:
+        return model
+
+    tree = _load_parser_tree(parser_id)
+    if parser_id not in tree:
+        raise ValueError(f"No se encontró el parser con ID {parser_id}")
+
+    logging.info(f"Construyendo el modelo Pydantic para parser_id: {parser_id}")
+    model = _build_parser_model(parser_id, tree, {}, set())
+    with _model_cache_lock:
+        _model_cache[parser_id] = model
+    return model
+
+
+def invalidate_parser_models() -> None:
+    """Descarta los modelos cacheados; se llama al modificar o borrar un parser."""
+    with _model_cache_lock:
+        _model_cache.clear()
@@ -0,0 +1,230 @@
+"""
+Pool of warm interpreters for the python_repl tool.
+
+Starting ``sys.executable`` and importing pandas/numpy costs 1-2 s, paid on
+every python_repl call when each call gets its own subprocess. The pool keeps
+``PYTHON_REPL_POOL_SIZE`` spare workers (``tools/python_repl_worker.py``)
+started ahead of time, so a call only pays the script's own run time.
+
+Isolation: a worker serves a single working directory. A spare is bound to the
+directory of its first call and goes back to the pool under that directory
+only, so state a script leaves in the interpreter (imported or patched
+modules, environment variables) never reaches another conversation. Every
+script still runs in a fresh ``__main__`` namespace.
+
+Workers are recycled after ``PYTHON_REPL_WORKER_MAX_RUNS`` runs, after
+``PYTHON_REPL_WORKER_IDLE_SECONDS`` unused, and killed on timeout or when
+they die. At most ``PYTHON_REPL_MAX_IDLE_WORKERS`` bound workers are kept;
+the least recently used goes first.
+"""
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PYTHON_REPL_POOL_SIZE = int(os.getenv("PYTHON_REPL_POOL_SIZE", "2"))
+PYTHON_REPL_MAX_IDLE_WORKERS = int(os.getenv("PYTHON_REPL_MAX_IDLE_WORKERS", "8"))
+PYTHON_REPL_WORKER_MAX_RUNS = int(os.getenv("PYTHON_REPL_WORKER_MAX_RUNS", "50"))
+PYTHON_REPL_WORKER_IDLE_SECONDS = float(os.getenv("PYTHON_REPL_WORKER_IDLE_SECONDS", "600"))
+PYTHON_REPL_STARTUP_TIMEOUT = float(os.getenv("PYTHON_REPL_STARTUP_TIMEOUT", "60"))
+# Address-space limit per worker (RLIMIT_AS); 0 disables it
+PYTHON_REPL_MEMORY_LIMIT_MB = int(os.getenv("PYTHON_REPL_MEMORY_LIMIT_MB", "0"))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_repl_worker.py")
+
+
+class WorkerTimeout(Exception):
+    """The worker did not answer in time; it has been killed."""
+
+
+class WorkerDied(Exception):
+    """The worker process exited while starting or running a script."""
+
+
+@dataclass
+class ReplResult:
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+class PythonWorker:
+    """One worker interpreter and its line-based JSON channel."""
+
+    def __init__(self, max_output_chars: int):
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, str(max_output_chars), str(PYTHON_REPL_MEMORY_LIMIT_MB)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=os.environ.copy(),
+        )
+        self.working_dir: Optional[str] = None
+        self.runs = 0
+        self.last_used = time.monotonic()
+        self._ready = False
+        self._buffer = b""
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _read_message(self, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close()
+                raise WorkerTimeout()
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                self.close()
+                raise WorkerDied(self.process.returncode)
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def run(self, code: str, working_dir: str, timeout: float) -> ReplResult:
+        """Run ``code`` with ``working_dir`` as cwd; raises WorkerTimeout or WorkerDied."""
+        if not self._ready:
+            self._read_message(PYTHON_REPL_STARTUP_TIMEOUT)
+            self._ready = True
+        self.working_dir = working_dir
+        self.runs += 1
+        try:
+            self.process.stdin.write((json.dumps({"code": code, "cwd": working_dir}) + "\n").encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.close()
+            raise WorkerDied(self.process.returncode)
+        reply = self._read_message(timeout)
+        self.last_used = time.monotonic()
+        return ReplResult(reply["stdout"], reply["stderr"], reply["exit_code"])
+
+    def close(self) -> None:
+        if self.alive:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class PythonReplPool:
+    """Thread-safe pool of spare and per-working-directory workers."""
+
+    def __init__(self, max_output_chars: int):
+        self.max_output_chars = max_output_chars
+        self._lock = threading.Lock()
+        self._spares: List[PythonWorker] = []
+        # working_dir -> idle workers bound to it, least recently used first
+        self._idle: "OrderedDict[str, List[PythonWorker]]" = OrderedDict()
+        self._closed = False
+
+    def _spawn(self) -> PythonWorker:
+        return PythonWorker(self.max_output_chars)
+
+    def _fill_spares(self) -> None:
+        # Called with the lock held; Popen returns before the worker is warm
+        while not self._closed and len(self._spares) < PYTHON_REPL_POOL_SIZE:
+            self._spares.append(self._spawn())
+
+    def _idle_count(self) -> int:
+        return sum(len(workers) for workers in self._idle.values())
+
+    def _expire(self, now: float) -> List[PythonWorker]:
+        expired = []
+        for working_dir in list(self._idle):
+            keep = []
+            for worker in self._idle[working_dir]:
+                if worker.alive and now - worker.last_used < PYTHON_REPL_WORKER_IDLE_SECONDS:
+                    keep.append(worker)
+                else:
+                    expired.append(worker)
+            if keep:
+                self._idle[working_dir] = keep
+            else:
+                del self._idle[working_dir]
+        return expired
+
+    def warm(self) -> None:
+        """Start the spare workers ahead of the first call."""
+        with self._lock:
+            self._fill_spares()
+
+    def acquire(self, working_dir: str) -> PythonWorker:
+        """Take an idle worker bound to ``working_dir``, else a spare, else a new one."""
+        with self._lock:
+            expired = self._expire(time.monotonic())
+            worker = None
+            bound = self._idle.get(working_dir)
+            if bound:
+                worker = bound.pop()
+                if not bound:
+                    del self._idle[working_dir]
+            else:
+                while self._spares and worker is None:
+                    candidate = self._spares.pop(0)
+                    if candidate.alive:
+                        worker = candidate
+                    else:
+                        expired.append(candidate)
+                self._fill_spares()
+        for stale in expired:
+            stale.close()
+        return worker or self._spawn()
+
+    def release(self, worker: PythonWorker) -> None:
+        """Return ``worker`` to the pool for its working directory, or retire it."""
+        evicted = []
+        with self._lock:
+            if self._closed or not worker.alive or worker.runs >= PYTHON_REPL_WORKER_MAX_RUNS:
+                evicted.append(worker)
+            else:
+                self._idle.setdefault(worker.working_dir, []).append(worker)
+                self._idle.move_to_end(worker.working_dir)
+                while self._idle_count() > PYTHON_REPL_MAX_IDLE_WORKERS:
+                    oldest_dir = next(iter(self._idle))
+                    evicted.append(self._idle[oldest_dir].pop(0))
+                    if not self._idle[oldest_dir]:
+                        del self._idle[oldest_dir]
+        for stale in evicted:
+            stale.close()
+
+    def run(self, code: str, working_dir: str, timeout: float) -> ReplResult:
+        """Run ``code`` in a worker for ``working_dir``; raises WorkerTimeout or WorkerDied."""
+        worker = self.acquire(working_dir)
+        try:
+            return worker.run(code, working_dir, timeout)
+        finally:
+            self.release(worker)
+
+    def shutdown(self) -> None:
+        """Stop all workers; later calls start (and retire) workers on demand."""
+        with self._lock:
+            self._closed = True
+            workers = self._spares + [w for bound in self._idle.values() for w in bound]
+            self._spares = []
+            self._idle.clear()
+        for worker in workers:
+            worker.close()
+        logger.info("python_repl pool stopped (%d workers)", len(workers))
@@ -0,0 +1,142 @@
+"""
+Long-lived interpreter for the python_repl tool.
+
+Started by ``tools.python_repl_pool`` with ``sys.executable``. It imports the
+data libraries once, then runs one script per request, each in a fresh
+``__main__`` namespace with the request's working directory as cwd and
+``sys.path[0]`` (as ``python script.py`` would). File descriptors 1 and 2 are
+redirected to temporary files during a run, so output written by C extensions
+and child processes is captured too. After each run, modules imported from the
+working directory are forgotten and ``os.environ`` is restored, so an edited
+helper module is re-imported and one script's environment changes do not leak
+into the next.
+
+Protocol: one JSON object per line. The worker answers ``{"ready": true}``
+once warm, then reads ``{"code", "cwd"}`` requests from stdin and replies
+``{"stdout", "stderr", "exit_code"}``. The protocol uses duplicates of the
+original stdin/stdout; the user code sees /dev/null as stdin.
+"""
+import builtins
+import json
+import linecache
+import os
+import sys
+import tempfile
+import traceback
+
+SCRIPT_NAME = "<python_repl>"
+PRELOAD_MODULES = ("numpy", "pandas", "openpyxl")
+
+
+def _preload() -> None:
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+
+
+def _apply_memory_limit(limit_mb: int) -> None:
+    if limit_mb <= 0:
+        return
+    import resource
+    limit = limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _read_capped(f, max_chars: int) -> str:
+    f.seek(0)
+    return f.read(max_chars * 4).decode("utf-8", errors="replace")[:max_chars]
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _forget_local_modules(cwd: str, loaded_before: set) -> None:
+    """Drop modules imported since ``loaded_before`` whose files live under ``cwd``."""
+    root = os.path.join(os.path.realpath(cwd), "")
+    for name in set(sys.modules) - loaded_before:
+        module = sys.modules.get(name)
+        paths = [getattr(module, "__file__", None), *(getattr(module, "__path__", None) or ())]
+        if any(path and os.path.realpath(path).startswith(root) for path in paths):
+            del sys.modules[name]
+
+
+def run(code: str, cwd: str, max_chars: int) -> dict:
+    """Run ``code`` as a script in ``cwd`` and return its captured output."""
+    exit_code = 0
+    loaded_before = set(sys.modules)
+    environ_before = dict(os.environ)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = os.dup(1), os.dup(2)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        try:
+            os.chdir(cwd)
+            sys.path[0] = cwd
+            linecache.cache[SCRIPT_NAME] = (len(code), None, code.splitlines(True), SCRIPT_NAME)
+            exec(compile(code, SCRIPT_NAME, "exec"), {"__name__": "__main__", "__builtins__": builtins})
+        except SystemExit as exc:
+            exit_code = _exit_code(exc)
+        except BaseException:
+            # Drop this frame so the traceback starts at the user's script
+            exc_type, exc, tb = sys.exc_info()
+            traceback.print_exception(exc_type, exc, tb.tb_next)
+            exit_code = 1
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+            _forget_local_modules(cwd, loaded_before)
+            if os.environ != environ_before:
+                os.environ.clear()
+                os.environ.update(environ_before)
+        return {
+            "stdout": _read_capped(out, max_chars),
+            "stderr": _read_capped(err, max_chars),
+            "exit_code": exit_code,
+        }
+
+
+def main() -> None:
+    max_chars = int(sys.argv[1])
+    memory_limit_mb = int(sys.argv[2])
+
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    sys.path.insert(0, os.getcwd())
+
+    _preload()
+    _apply_memory_limit(memory_limit_mb)
+
+    def reply(message: dict) -> None:
+        replies.write(json.dumps(message) + "\n")
+        replies.flush()
+
+    reply({"ready": True})
+    for line in requests:
+        request = json.loads(line)
+        reply(run(request["code"], request["cwd"], max_chars))
+
+
+if __name__ == "__main__":
+    # Run from the tools directory: keep it off the user's import path
+    sys.path.pop(0)
+    main()
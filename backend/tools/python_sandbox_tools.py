@@ -1,21 +1,32 @@
-import os
-import subprocess
 import sys
-import tempfile
 import logging
 from langchain_core.tools import tool
 
+from tools.python_repl_pool import PythonReplPool, WorkerDied, WorkerTimeout
+
 logger = logging.getLogger(__name__)
 
 MAX_OUTPUT_CHARS = 20_000
 DEFAULT_TIMEOUT = 30  # seconds
 
+_pool = PythonReplPool(MAX_OUTPUT_CHARS)
+
+
+def start_python_repl_pool() -> None:
+    """Start the spare python_repl interpreters so the first call is warm."""
+    _pool.warm()
+
+
+def stop_python_repl_pool() -> None:
+    _pool.shutdown()
+
 
 def create_python_repl_tool(working_dir: str):
     """
     Create a python_repl LangChain tool bound to a specific working directory.
 
-    The tool executes Python code in a subprocess isolated from the backend process.
+    The tool executes Python code in a pooled worker interpreter isolated from the
+    backend process (see tools.python_repl_pool); each call runs as a fresh script.
     Code runs with the given working_dir as cwd, so agents can reference uploaded
     files by filename only (e.g. open('report.xlsx')) without needing full paths.
 
@@ -40,28 +51,8 @@ def create_python_repl_tool(working_dir: str):
             df = pd.read_excel('data.xlsx')
             print(df.shape)
         """
-        script_path = None
         try:
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".py",
-                dir=working_dir,
-                delete=False,
-                encoding="utf-8",
-            ) as f:
-                f.write(code)
-                script_path = f.name
-
-            logger.info("python_repl using interpreter: %s", sys.executable)
-
-            result = subprocess.run(
-                [sys.executable, script_path],
-                capture_output=True,
-                text=True,
-                timeout=DEFAULT_TIMEOUT,
-                cwd=working_dir,
-                env=os.environ.copy(),
-            )
+            result = _pool.run(code, working_dir, DEFAULT_TIMEOUT)
 
             output = result.stdout or ""
             if result.stderr:
@@ -70,22 +61,19 @@ def create_python_repl_tool(working_dir: str):
             logger.info(
                 "python_repl executed successfully in %s (exit=%d, output_len=%d)",
                 working_dir,
-                result.returncode,
+                result.exit_code,
                 len(output),
             )
 
-        except subprocess.TimeoutExpired:
+        except WorkerTimeout:
             output = f"[Error] Execution timed out after {DEFAULT_TIMEOUT} seconds."
             logger.warning("python_repl timed out in %s", working_dir)
+        except WorkerDied as exc:
+            output = f"[Error] Python process exited unexpectedly (exit={exc.args[0] if exc.args else None})."
+            logger.warning("python_repl worker died in %s: %s", working_dir, exc)
         except Exception as exc:
             output = f"[Error] Failed to execute code: {exc}"
             logger.error("python_repl unexpected error: %s", exc, exc_info=True)
-        finally:
-            if script_path and os.path.exists(script_path):
-                try:
-                    os.unlink(script_path)
-                except OSError:
-                    pass
 
         return output[:MAX_OUTPUT_CHARS]
 
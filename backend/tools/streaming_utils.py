@@ -14,10 +14,21 @@ Usage example:
         if events:
             for event in events:
                 yield format_sse_event(event["type"], event["data"])
+
+Transports that do not speak our SSE format (e.g. the OpenAI-compatible
+adapter) consume ``StreamEvent`` objects instead and render them directly, so
+no payload is serialized twice.
+
+Fast models emit many tiny text chunks; ``TokenCoalescer`` merges them into
+one ``token`` event per ``STREAM_COALESCE_MS`` window or
+``STREAM_COALESCE_BYTES`` of text, whichever comes first.
 """
 
-import json
-from typing import Any
+import os
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+import orjson
 
 from utils.logger import get_logger
 
@@ -48,6 +59,16 @@ SSE_ERROR: str = "error"
 #: The stream has completed.
 SSE_DONE: str = "done"
 
+# ---------------------------------------------------------------------------
+# Token coalescing
+# ---------------------------------------------------------------------------
+
+#: Minimum time between two token events; 0 forwards every chunk as-is.
+STREAM_COALESCE_MS = float(os.getenv('STREAM_COALESCE_MS', '40'))
+
+#: Buffered text size (UTF-8 bytes) that forces a flush before the window ends.
+STREAM_COALESCE_BYTES = int(os.getenv('STREAM_COALESCE_BYTES', '512'))
+
 # ---------------------------------------------------------------------------
 # Thinking-message i18n map
 # ---------------------------------------------------------------------------
@@ -75,12 +96,81 @@ _THINKING_MESSAGES: dict[str, str] = {
 # ---------------------------------------------------------------------------
 
 
+class StreamEvent(NamedTuple):
+    """A normalized stream event, before any transport-specific rendering."""
+
+    type: str
+    data: dict
+
+
+class TokenCoalescer:
+    """Merge consecutive token chunks into fewer, larger token events.
+
+    ``add`` buffers a chunk and returns the buffered text once
+    ``interval_ms`` have passed since the previous flush or ``max_bytes``
+    are buffered; otherwise it returns ``None``. The first chunk is released
+    immediately so time-to-first-token is unaffected. Callers must ``flush``
+    before emitting any other event type, and at the end of the stream.
+
+    The window is checked when chunks arrive; text is never held back by a
+    timer.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = STREAM_COALESCE_MS,
+        max_bytes: int = STREAM_COALESCE_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = max(interval_ms, 0) / 1000
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._parts: list[str] = []
+        self._size = 0
+        self._last_flush: Optional[float] = None
+
+    def add(self, text: str) -> Optional[str]:
+        """Buffer ``text``; return the merged text when it is due for emission."""
+        if not text:
+            return None
+        self._parts.append(text)
+        self._size += len(text.encode())
+        now = self._clock()
+        if (
+            self._last_flush is None
+            or self._size >= self.max_bytes
+            or now - self._last_flush >= self.interval
+        ):
+            return self._drain(now)
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Return and clear whatever text is buffered, or ``None`` if empty."""
+        return self._drain(self._clock()) if self._parts else None
+
+    def _drain(self, now: float) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._last_flush = now
+        return text
+
+
+def encode_json(payload: Any) -> bytes:
+    """Serialize ``payload`` with orjson as UTF-8 JSON.
+
+    Values orjson cannot serialize natively fall back to ``str()`` so that an
+    odd tool argument never kills a stream.
+    """
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
 def format_sse_event(event_type: str, data: dict) -> str:
     """Serialize a single SSE message line.
 
     The output follows the HTML Living Standard SSE format::
 
-        data: {"type": "token", "data": {"content": "hello"}}\\n\\n
+        data: {"type":"token","data":{"content":"hello"}}\\n\\n
 
     Args:
         event_type: One of the ``SSE_*`` constants defined in this module.
@@ -89,7 +179,7 @@ def format_sse_event(event_type: str, data: dict) -> str:
     Returns:
         A fully-formed SSE line ready to be sent to the client.
     """
-    payload = json.dumps({"type": event_type, "data": data}, ensure_ascii=False)
+    payload = encode_json({"type": event_type, "data": data}).decode()
     return f"data: {payload}\n\n"
 
 
@@ -5,12 +5,16 @@ This module provides a PGVector-specific implementation of VectorStoreBase,
 wrapping LangChain's PGVector functionality while conforming to our abstract interface.
 """
 
+import asyncio
 import json
 import logging
+import os
+import re
 import numpy as np
 from typing import List, Optional, Dict, Any
 from sqlalchemy import text
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.vectorstores.base import VectorStoreRetriever
 from langchain_postgres.vectorstores import PGVector
 
@@ -23,6 +27,77 @@ logger = logging.getLogger(__name__)
 # PGVector-style operator -> SQL fragment for numeric comparisons
 _PG_NUMERIC_OPS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
 
+# Reciprocal-rank fusion constant for hybrid search
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Full-text column kept in sync with langchain_pg_embedding.document. The
+# 'simple' configuration does not stem, so identifiers such as part numbers
+# and error codes are matched verbatim.
+_ADD_LEXICAL_COLUMN_SQL = (
+    "ALTER TABLE langchain_pg_embedding ADD COLUMN IF NOT EXISTS document_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(document, ''))) STORED"
+)
+_ADD_LEXICAL_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_document_tsv "
+    "ON langchain_pg_embedding USING gin (document_tsv)"
+)
+
+# Dense and lexical candidates are ranked and fused in a single statement
+_HYBRID_SEARCH_SQL = """
+WITH dense AS (
+    SELECT e.id, ROW_NUMBER() OVER (ORDER BY e.embedding <=> CAST(:embedding AS vector)) AS rank
+    FROM langchain_pg_embedding e
+    WHERE e.collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = :name){where_extra}
+    ORDER BY e.embedding <=> CAST(:embedding AS vector)
+    LIMIT :candidates
+),
+lexical AS (
+    SELECT e.id, ROW_NUMBER() OVER (ORDER BY ts_rank_cd(e.document_tsv, q.query) DESC) AS rank
+    FROM langchain_pg_embedding e, to_tsquery('simple', :tsquery) AS q(query)
+    WHERE e.collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = :name)
+      AND e.document_tsv @@ q.query{where_extra}
+    ORDER BY ts_rank_cd(e.document_tsv, q.query) DESC
+    LIMIT :candidates
+),
+fused AS (
+    SELECT id, SUM(1.0 / (:rrf_k + rank)) AS score
+    FROM (SELECT id, rank FROM dense UNION ALL SELECT id, rank FROM lexical) candidates
+    GROUP BY id
+)
+SELECT e.id, e.document, e.cmetadata, f.score
+FROM fused f JOIN langchain_pg_embedding e ON e.id = f.id
+ORDER BY f.score DESC
+LIMIT :k
+"""
+
+
+def _lexical_query(query: str) -> str:
+    """OR-query over the query's words, so any exact term can produce a hit."""
+    return " | ".join(dict.fromkeys(word.lower() for word in re.findall(r"\w+", query)))
+
+
+class PGVectorHybridRetriever(BaseRetriever):
+    """LangChain retriever over PGVectorStore hybrid search."""
+
+    store: Any
+    collection_name: str
+    embedding_service: Any = None
+    search_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        return self.store.search_similar_documents(
+            self.collection_name,
+            query,
+            embedding_service=self.embedding_service,
+            filter_metadata=self.search_kwargs.get("filter"),
+            k=self.search_kwargs.get("k", 4),
+            search_type="hybrid",
+            fetch_k=self.search_kwargs.get("fetch_k"),
+        )
+
+    async def _aget_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        return await asyncio.to_thread(self._get_relevant_documents, query)
+
 
 class PGVectorStore(VectorStoreInterface):
     """
@@ -46,6 +121,7 @@ class PGVectorStore(VectorStoreInterface):
         self.db = db
         self.engine = db.engine
         self.async_engine = getattr(db, '_async_engine', None)
+        self._lexical_column_ready = False
     
     def _get_vector_store(
         self, 
@@ -91,7 +167,32 @@ class PGVectorStore(VectorStoreInterface):
             return
             
         vector_store = self._get_vector_store(collection_name, embedding_service)
+        self._ensure_lexical_column()
         vector_store.add_documents(documents)
+
+    def _ensure_lexical_column(self) -> None:
+        """
+        Add the full-text column and its GIN index if they are missing.
+
+        Existing installs get them from the Alembic migration; this covers
+        databases where LangChain created ``langchain_pg_embedding`` later.
+        The catalog is checked first, so the ALTER (and its table lock) only
+        runs once per database.
+        """
+        if self._lexical_column_ready:
+            return
+        with self.engine.begin() as connection:
+            exists = connection.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'langchain_pg_embedding' AND column_name = 'document_tsv'"
+                )
+            ).scalar() is not None
+            if not exists:
+                logger.info("Adding full-text column to langchain_pg_embedding")
+                connection.execute(text(_ADD_LEXICAL_COLUMN_SQL))
+                connection.execute(text(_ADD_LEXICAL_INDEX_SQL))
+        self._lexical_column_ready = True
     
     def delete_documents(
         self, 
@@ -157,16 +258,28 @@ class PGVectorStore(VectorStoreInterface):
             filter_metadata: Optional metadata filters
             k: Number of results to return
             search_type: Search strategy — "similarity" (default),
-                "similarity_score_threshold", or "mmr".
+                "similarity_score_threshold", "mmr" or "hybrid".
             score_threshold: Minimum relevance score for
                 "similarity_score_threshold" search.
-            fetch_k: Candidate pool size before MMR re-ranking (default: k*4).
+            fetch_k: Candidate pool size before MMR re-ranking or hybrid
+                fusion (default: k*4).
             lambda_mult: MMR diversity factor 0..1 (default: 0.5).
 
         Returns:
             List of Document objects with similarity scores and IDs in metadata
-            (_score=None for MMR results).
+            (_score=None for MMR results, the fused RRF score for hybrid).
         """
+        # Hybrid search runs its own SQL; empty queries and vectors use the similarity path below
+        if search_type == "hybrid" and isinstance(query, str) and query.strip():
+            return self._hybrid_search(
+                collection_name,
+                query,
+                embedding_service,
+                filter_metadata,
+                k,
+                fetch_k if fetch_k else k * 4,
+            )
+
         vector_store = self._get_vector_store(collection_name, embedding_service)
 
         # Handle empty queries and direct embedding vectors — always use similarity path
@@ -244,6 +357,45 @@ class PGVectorStore(VectorStoreInterface):
             for doc, score in results_with_scores
         ]
     
+    def _hybrid_search(
+        self,
+        collection_name: str,
+        query: str,
+        embedding_service,
+        filter_metadata: Optional[Dict[str, Any]],
+        k: int,
+        candidates: int,
+    ) -> List[Document]:
+        """
+        Fuse dense and full-text candidates by reciprocal rank in one query.
+
+        The ``candidates`` best matches of each kind are merged; documents
+        found by both rank highest.
+        """
+        self._ensure_lexical_column()
+        embedding = get_embeddings_model(embedding_service).embed_query(query)
+        params: Dict[str, Any] = {
+            "name": collection_name,
+            "embedding": "[" + ",".join(str(float(x)) for x in embedding) + "]",
+            "tsquery": _lexical_query(query),
+            "candidates": max(candidates, k),
+            "rrf_k": RRF_K,
+            "k": k,
+        }
+        where_extra = self._build_filter_sql(filter_metadata, params) if filter_metadata else ""
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                text(_HYBRID_SEARCH_SQL.format(where_extra=where_extra)), params
+            ).fetchall()
+        return [
+            Document(
+                page_content=row.document,
+                metadata={**(row.cmetadata or {}), '_score': float(row.score), '_id': row.id},
+            )
+            for row in rows
+        ]
+
     def get_retriever(
         self,
         collection_name: str,
@@ -262,12 +414,22 @@ class PGVectorStore(VectorStoreInterface):
             search_params: Optional search parameters (filters, k, etc.)
             use_async: If True, uses async engine for async operations (e.g., in LangGraph)
             search_type: LangChain retriever search strategy — "similarity"
-                (default), "similarity_score_threshold", or "mmr".
+                (default), "similarity_score_threshold", or "mmr". "hybrid"
+                returns a PGVectorHybridRetriever, which always runs on the
+                sync engine in a worker thread.
             **kwargs: Additional arguments to pass to as_retriever
 
         Returns:
             VectorStoreRetriever instance configured for this collection
         """
+        if search_type == "hybrid":
+            return PGVectorHybridRetriever(
+                store=self,
+                collection_name=collection_name,
+                embedding_service=embedding_service,
+                search_kwargs=search_params or {},
+            )
+
         vector_store = self._get_vector_store(collection_name, embedding_service, use_async)
 
         if search_params is not None:
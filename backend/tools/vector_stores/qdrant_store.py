@@ -9,6 +9,9 @@ Note: Requires qdrant-client package to be installed:
 """
 
 import logging
+import re
+import zlib
+from collections import Counter
 from typing import List, Optional, Dict, Any
 from langchain_core.documents import Document
 from langchain_core.vectorstores.base import VectorStoreRetriever
@@ -18,6 +21,42 @@ from tools.embeddingTools import get_embeddings_model
 
 logger = logging.getLogger(__name__)
 
+# Named sparse vector holding term frequencies for lexical matching
+LEXICAL_VECTOR_NAME = 'lexical'
+
+
+def _term_indices(text: str) -> Counter:
+    # crc32 keeps indices stable across processes, unlike hash()
+    return Counter(zlib.crc32(word.lower().encode()) for word in re.findall(r"\w+", text or ""))
+
+
+class LexicalSparseEmbeddings:
+    """
+    Hashed term-frequency sparse vectors for Qdrant hybrid search.
+
+    Qdrant applies IDF to the ``lexical`` vector itself (``Modifier.IDF``),
+    so plain term counts give BM25-style ranking without an extra model.
+    Implements langchain_qdrant's SparseEmbeddings interface.
+    """
+
+    def embed_documents(self, texts: List[str]) -> list:
+        return [self._to_sparse(_term_indices(text)) for text in texts]
+
+    def embed_query(self, text: str):
+        return self._to_sparse(Counter(dict.fromkeys(_term_indices(text), 1)))
+
+    async def aembed_documents(self, texts: List[str]) -> list:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str):
+        return self.embed_query(text)
+
+    @staticmethod
+    def _to_sparse(counts: Counter):
+        from langchain_qdrant import SparseVector
+        indices = sorted(counts)
+        return SparseVector(indices=indices, values=[float(counts[i]) for i in indices])
+
 
 class QdrantStore(VectorStoreInterface):
     """
@@ -74,11 +113,14 @@ class QdrantStore(VectorStoreInterface):
         )
         
         self._QdrantVectorStore = QdrantVectorStore
+        # Collections known to carry the lexical sparse vector
+        self._lexical_collections: set = set()
     
     def _get_vector_store(
         self, 
         collection_name: str, 
-        embedding_service=None
+        embedding_service=None,
+        hybrid: bool = False,
     ):
         """
         Internal method to create a QdrantVectorStore instance.
@@ -86,17 +128,47 @@ class QdrantStore(VectorStoreInterface):
         Args:
             collection_name: Name of the collection
             embedding_service: Embedding service to use
+            hybrid: Write and query the lexical sparse vector as well; queries
+                are fused by Qdrant with RRF in one request
             
         Returns:
             Configured QdrantVectorStore instance
         """
         embeddings = get_embeddings_model(embedding_service)
         
+        if hybrid:
+            from langchain_qdrant import RetrievalMode
+            return self._QdrantVectorStore(
+                client=self.client,
+                collection_name=collection_name,
+                embedding=embeddings,
+                retrieval_mode=RetrievalMode.HYBRID,
+                sparse_embedding=LexicalSparseEmbeddings(),
+                sparse_vector_name=LEXICAL_VECTOR_NAME,
+            )
         return self._QdrantVectorStore(
             client=self.client,
             collection_name=collection_name,
             embedding=embeddings
         )
+
+    def _has_lexical_vector(self, collection_name: str) -> bool:
+        """
+        Whether the collection was created with the lexical sparse vector.
+
+        Collections created before hybrid search existed lack it; they keep
+        working with dense search until they are re-created.
+        """
+        if collection_name in self._lexical_collections:
+            return True
+        try:
+            info = self.client.get_collection(collection_name)
+        except Exception:
+            return False
+        if LEXICAL_VECTOR_NAME in (info.config.params.sparse_vectors or {}):
+            self._lexical_collections.add(collection_name)
+            return True
+        return False
     
     def index_documents(
         self, 
@@ -135,19 +207,25 @@ class QdrantStore(VectorStoreInterface):
             test_embedding = embeddings.embed_query("test")
             vector_size = len(test_embedding)
             
-            from qdrant_client.models import Distance, VectorParams
+            from qdrant_client.models import Distance, Modifier, SparseVectorParams, VectorParams
             
             self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=vector_size,
                     distance=Distance.COSINE
-                )
+                ),
+                sparse_vectors_config={
+                    LEXICAL_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)
+                },
             )
+            self._lexical_collections.add(collection_name)
             logger.info(f"Created collection {collection_name} with vector size {vector_size}")
         
         # Always use the same method to get vector store
-        vector_store = self._get_vector_store(collection_name, embedding_service)
+        vector_store = self._get_vector_store(
+            collection_name, embedding_service, hybrid=self._has_lexical_vector(collection_name)
+        )
         
         # Add documents - this will generate embeddings automatically
         ids = vector_store.add_documents(documents)
@@ -312,7 +390,7 @@ class QdrantStore(VectorStoreInterface):
             filter_metadata: Optional metadata filters
             k: Number of results to return
             search_type: Search strategy — "similarity" (default),
-                "similarity_score_threshold", or "mmr".
+                "similarity_score_threshold", "mmr" or "hybrid".
             score_threshold: Minimum relevance score for
                 "similarity_score_threshold" search.
             fetch_k: Candidate pool size before MMR re-ranking (default: k*4).
@@ -320,13 +398,32 @@ class QdrantStore(VectorStoreInterface):
 
         Returns:
             List of Document objects with similarity scores in metadata
-            (_score=None for MMR results).
+            (_score=None for MMR results, the fused RRF score for hybrid).
         """
-        vector_store = self._get_vector_store(collection_name, embedding_service)
-
         # Handle empty queries — always use similarity path
         if not query or (isinstance(query, str) and not query.strip()):
             query = " "
+            if search_type == "hybrid":
+                search_type = "similarity"
+
+        if search_type == "hybrid":
+            if self._has_lexical_vector(collection_name):
+                results_with_scores = self._get_vector_store(
+                    collection_name, embedding_service, hybrid=True
+                ).similarity_search_with_score(query, k=k, filter=filter_metadata)
+                return [
+                    Document(
+                        page_content=doc.page_content,
+                        metadata={**doc.metadata, '_score': score},
+                    )
+                    for doc, score in results_with_scores
+                ]
+            logger.warning(
+                f"Collection {collection_name} has no lexical vectors; using dense search instead of hybrid"
+            )
+            search_type = "similarity"
+
+        vector_store = self._get_vector_store(collection_name, embedding_service)
 
         # Dispatch on search_type
         if search_type == "mmr":
@@ -392,13 +489,26 @@ class QdrantStore(VectorStoreInterface):
             search_params: Optional search parameters (filters, k, etc.)
             use_async: Whether to use async operations (note: may not be fully supported)
             search_type: LangChain retriever search strategy — "similarity"
-                (default), "similarity_score_threshold", or "mmr".
+                (default), "similarity_score_threshold", "mmr" or "hybrid".
+                Hybrid falls back to dense similarity on collections without
+                the lexical vector.
             **kwargs: Additional arguments for retriever configuration
 
         Returns:
             VectorStoreRetriever instance configured for this collection
         """
-        vector_store = self._get_vector_store(collection_name, embedding_service)
+        hybrid = False
+        if search_type == "hybrid":
+            search_type = "similarity"
+            hybrid = self._has_lexical_vector(collection_name)
+            if not hybrid:
+                logger.warning(
+                    f"Collection {collection_name} has no lexical vectors; using dense search instead of hybrid"
+                )
+            if search_params:
+                # Qdrant sizes the fused candidate pools itself
+                search_params = {key: value for key, value in search_params.items() if key != 'fetch_k'}
+        vector_store = self._get_vector_store(collection_name, embedding_service, hybrid=hybrid)
 
         if search_params is not None:
             return vector_store.as_retriever(
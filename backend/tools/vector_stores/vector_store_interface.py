@@ -102,11 +102,12 @@ class VectorStoreInterface(ABC):
             filter_metadata: Optional metadata filters
             k: Number of results to return (default: 5)
             search_type: Search strategy — "similarity" (default),
-                "similarity_score_threshold", or "mmr".
+                "similarity_score_threshold", "mmr", or "hybrid" (dense and
+                full-text matches fused by reciprocal rank).
             score_threshold: Minimum relevance score; used when
                 search_type="similarity_score_threshold".
-            fetch_k: Candidate pool size before MMR re-ranking; used when
-                search_type="mmr" (default: k*4).
+            fetch_k: Candidate pool size before MMR re-ranking or hybrid
+                fusion; used when search_type="mmr" or "hybrid" (default: k*4).
             lambda_mult: MMR diversity factor 0..1; used when search_type="mmr"
                 (default: 0.5).
 
@@ -138,7 +139,7 @@ class VectorStoreInterface(ABC):
             search_params: Optional search parameters (filters, k, etc.)
             use_async: Whether to use async operations
             search_type: LangChain retriever search strategy — "similarity"
-                (default), "similarity_score_threshold", or "mmr".
+                (default), "similarity_score_threshold", "mmr", or "hybrid".
             **kwargs: Additional arguments for retriever configuration
 
         Returns:
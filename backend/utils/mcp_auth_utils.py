@@ -10,7 +10,7 @@ The authentication flow:
 2. User makes request → token in Authorization header  
 3. Backend extracts token from request
 4. Token passed to agent execution via user_context
-5. MCPClientManager injects token into MCP server connections
+5. The MCP client pool injects token into MCP server connections
 6. External MCP servers verify token using shared secret
 
 For external MCP servers to work with this system, they need to:
@@ -0,0 +1,167 @@
+"""
+Prometheus metrics for agent turns, connection pools and model calls.
+
+Served at ``/metrics``. When uvicorn runs several workers, point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty, writable directory so histograms and
+counters from every worker are aggregated. Pool gauges are read live at scrape
+time and describe the worker that answered the scrape.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# 5 ms .. 60 s: covers pool waits as well as LLM-bound phases
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+AGENT_PREPARE_PHASE_SECONDS = Histogram(
+    'aict_agent_prepare_phase_seconds',
+    'Duration of each _prepare_turn phase',
+    ['phase'],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_CREATE_SECONDS = Histogram(
+    'aict_agent_create_seconds',
+    'Time to build the agent chain in create_agent',
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_FINALIZE_SECONDS = Histogram(
+    'aict_agent_finalize_seconds',
+    'Duration of _finalize_turn',
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_STREAM_FIRST_TOKEN_SECONDS = Histogram(
+    'aict_agent_stream_first_token_seconds',
+    'Time from the start of a streaming chat to its first token',
+    buckets=LATENCY_BUCKETS,
+)
+MCP_TOOL_DISCOVERY_SECONDS = Histogram(
+    'aict_mcp_tool_discovery_seconds',
+    'Time to list the tools of one MCP config',
+    ['outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+RETRIEVER_SECONDS = Histogram(
+    'aict_retriever_seconds',
+    'Silo retriever latency',
+    ['silo_type'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'aict_db_pool_checkout_seconds',
+    'Time spent waiting to check a connection out of a SQLAlchemy pool',
+    ['pool'],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALLS = Counter('aict_llm_calls_total', 'LLM calls by provider', ['provider'])
+EMBEDDING_CALLS = Counter('aict_embedding_calls_total', 'Embedding calls by provider', ['provider'])
+LLM_TOKENS = Counter('aict_llm_tokens_total', 'LLM tokens by provider and kind (input/output)', ['provider', 'kind'])
+# Subset of the input tokens: cache reads are hits, creations are misses that were cached
+LLM_PROMPT_CACHE_TOKENS = Counter('aict_llm_prompt_cache_tokens_total', 'Prompt-cache input tokens by provider and kind (read/creation)', ['provider', 'kind'])
+CHECKPOINT_ROWS_DELETED = Counter('aict_checkpoint_rows_deleted_total', 'LangGraph checkpoint rows deleted by retention, by table', ['table'])
+CHECKPOINT_BYTES_RECLAIMED = Counter('aict_checkpoint_bytes_reclaimed_total', 'Payload bytes of LangGraph checkpoint rows deleted by retention, by table', ['table'])
+
+_live_collectors = []
+
+
+@contextmanager
+def observe_seconds(histogram: Histogram, **labels):
+    """Observe the duration of the ``with`` block on ``histogram``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Callback handler that counts model invocations for one provider."""
+
+    run_inline = True
+
+    def __init__(self, provider: str):
+        self.provider = provider
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        LLM_CALLS.labels(provider=self.provider).inc()
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        LLM_CALLS.labels(provider=self.provider).inc()
+
+
+class PoolStatsCollector:
+    """Reports SQLAlchemy and checkpointer pool occupancy at scrape time."""
+
+    def __init__(self, engines: Dict[str, Any], checkpointer_pool: Callable[[], Optional[Any]]):
+        self._engines = engines
+        self._checkpointer_pool = checkpointer_pool
+
+    def collect(self) -> Iterable:
+        connections = GaugeMetricFamily(
+            'aict_db_pool_connections',
+            'Connections per SQLAlchemy pool and state',
+            labels=['pool', 'state'],
+        )
+        for name, engine in self._engines.items():
+            # Read through the engine: dispose() replaces its pool
+            pool = engine.pool
+            if hasattr(pool, 'checkedout'):
+                connections.add_metric([name, 'checked_out'], pool.checkedout())
+                connections.add_metric([name, 'idle'], pool.checkedin())
+                connections.add_metric([name, 'overflow'], max(pool.overflow(), 0))
+        yield connections
+
+        pool = self._checkpointer_pool()
+        if pool is None:
+            return
+        stats = pool.get_stats()
+        gauge = GaugeMetricFamily(
+            'aict_checkpointer_pool_connections',
+            'Checkpointer AsyncConnectionPool connections and waiting requests',
+            labels=['state'],
+        )
+        gauge.add_metric(['size'], stats.get('pool_size', 0))
+        gauge.add_metric(['available'], stats.get('pool_available', 0))
+        gauge.add_metric(['waiting'], stats.get('requests_waiting', 0))
+        yield gauge
+        yield CounterMetricFamily(
+            'aict_checkpointer_pool_requests',
+            'Connection requests served by the checkpointer pool',
+            value=stats.get('requests_num', 0),
+        )
+        yield CounterMetricFamily(
+            'aict_checkpointer_pool_wait_seconds',
+            'Cumulative time requests waited for a checkpointer connection',
+            value=stats.get('requests_wait_ms', 0) / 1000,
+        )
+
+
+def register_live_collector(collector) -> None:
+    """Register a collector whose values are read from this process at scrape time."""
+    _live_collectors.append(collector)
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        REGISTRY.register(collector)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _live_collectors:
+            registry.register(collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
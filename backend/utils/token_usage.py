@@ -0,0 +1,154 @@
+"""
+Per-turn LLM token accounting.
+
+``create_llm_from_service`` attaches a ``TokenUsageCallback`` to every model it
+builds. The callback adds the ``usage_metadata`` of each response to the
+``TurnUsage`` bound to the current context by ``track_token_usage``, so calls
+made by sub-agents, the summarization middleware and OCR workers all count
+towards the turn that caused them. Calls made outside a tracked block are only
+reflected in the Prometheus token counter.
+
+Prompt-cache reads and writes reported by the provider (``input_token_details``
+of ``usage_metadata``) are tracked alongside; they are a subset of the input
+tokens, not in addition to them.
+
+Worker threads do not inherit context variables; code that fans out to a
+``ThreadPoolExecutor`` must submit ``contextvars.copy_context().run`` so the
+workers see the caller's ``TurnUsage``.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.metrics import LLM_PROMPT_CACHE_TOKENS, LLM_TOKENS
+
+_current_usage: ContextVar[Optional['TurnUsage']] = ContextVar('token_usage', default=None)
+
+
+@dataclass
+class TurnUsage:
+    """Thread-safe token totals for one chat turn or OCR run."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, input_tokens: int, output_tokens: int, cache_read_tokens: int = 0,
+            cache_creation_tokens: int = 0) -> None:
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.cache_read_tokens += cache_read_tokens
+            self.cache_creation_tokens += cache_creation_tokens
+            self.llm_calls += 1
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Usage in the OpenAI ``usage`` shape, plus the number of model calls."""
+        return {
+            "prompt_tokens": self.input_tokens,
+            "completion_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "prompt_tokens_details": {
+                "cached_tokens": self.cache_read_tokens,
+                "cache_creation_tokens": self.cache_creation_tokens,
+            },
+            "llm_calls": self.llm_calls,
+        }
+
+
+@contextmanager
+def track_token_usage(usage: Optional[TurnUsage] = None) -> Iterator[TurnUsage]:
+    """Bind ``usage`` (or a new ``TurnUsage``) to the current context for the block."""
+    usage = usage if usage is not None else TurnUsage()
+    previous = _current_usage.get()
+    _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        # set() rather than reset(): an async generator may be closed from
+        # another context, where the reset token would be rejected
+        _current_usage.set(previous)
+
+
+def record_token_usage(input_tokens: int, output_tokens: int, cache_read_tokens: int = 0,
+                       cache_creation_tokens: int = 0) -> None:
+    """Add one model call to the usage of the current context, if any.
+
+    For clients that bypass LangChain callbacks (e.g. the raw Mistral vision
+    client).
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(input_tokens or 0, output_tokens or 0, cache_read_tokens or 0, cache_creation_tokens or 0)
+
+
+def extract_token_usage(response: Any) -> Optional[Tuple[int, int]]:
+    """Return ``(input_tokens, output_tokens)`` from an ``LLMResult``, if reported.
+
+    Prefers the standard ``usage_metadata`` of chat messages and falls back to
+    the provider's ``llm_output["token_usage"]``.
+    """
+    input_tokens = output_tokens = 0
+    found = False
+    for generations in getattr(response, 'generations', None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if metadata:
+                input_tokens += metadata.get('input_tokens', 0) or 0
+                output_tokens += metadata.get('output_tokens', 0) or 0
+                found = True
+    if found:
+        return input_tokens, output_tokens
+
+    token_usage = (getattr(response, 'llm_output', None) or {}).get('token_usage')
+    if isinstance(token_usage, dict):
+        return token_usage.get('prompt_tokens', 0) or 0, token_usage.get('completion_tokens', 0) or 0
+    return None
+
+
+def extract_cache_usage(response: Any) -> Tuple[int, int]:
+    """Return ``(cache_read_tokens, cache_creation_tokens)`` from an ``LLMResult``.
+
+    LangChain normalises Anthropic, OpenAI and Gemini cache counters into
+    ``usage_metadata["input_token_details"]``; providers without prompt caching
+    report nothing and yield ``(0, 0)``.
+    """
+    cache_read = cache_creation = 0
+    for generations in getattr(response, 'generations', None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+            details = metadata.get('input_token_details') or {}
+            cache_read += details.get('cache_read', 0) or 0
+            cache_creation += details.get('cache_creation', 0) or 0
+    return cache_read, cache_creation
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Callback handler that records the token usage of each model response."""
+
+    run_inline = True
+
+    def __init__(self, provider: str):
+        self.provider = provider
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        # Calls whose provider reports no usage still count as calls
+        input_tokens, output_tokens = extract_token_usage(response) or (0, 0)
+        LLM_TOKENS.labels(provider=self.provider, kind='input').inc(input_tokens)
+        LLM_TOKENS.labels(provider=self.provider, kind='output').inc(output_tokens)
+        cache_read, cache_creation = extract_cache_usage(response)
+        if cache_read or cache_creation:
+            LLM_PROMPT_CACHE_TOKENS.labels(provider=self.provider, kind='read').inc(cache_read)
+            LLM_PROMPT_CACHE_TOKENS.labels(provider=self.provider, kind='creation').inc(cache_creation)
+        record_token_usage(input_tokens, output_tokens, cache_read, cache_creation)
@@ -158,6 +158,19 @@ def client(db):
     app.dependency_overrides.pop(get_db, None)
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    """
+    Reset the process-wide auth cache so apps, keys and roles resolved in one
+    test (often with the same IDs) never leak into the next.
+    """
+    from services.auth_cache_service import auth_cache
+
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
 # ---------------------------------------------------------------------------
 # Entity fixtures
 # ---------------------------------------------------------------------------
@@ -175,7 +175,7 @@ class TestListConversations:
             conv.title = "Conv 1"
             conv.created_at = None
             conv.updated_at = None
-            mock_list.return_value = ([conv], 1)
+            mock_list.return_value = ([conv], 1, None)
 
             resp = client.get(
                 chat_url(fake_app.app_id, fake_agent.agent_id, "/conversations"),
@@ -182,7 +182,7 @@ class TestCallAgentStream:
         _mock_streaming_service(mocker)
 
         result = await chat_module.call_agent_stream(
-            app_id=1, agent_id=1, message="Hello", files=[],
+            request=MagicMock(), app_id=1, agent_id=1, message="Hello", files=[],
             file_references=None, search_params=None,
             conversation_id=None, api_key="key", db=MagicMock(),
         )
@@ -200,7 +200,7 @@ class TestCallAgentStream:
 
         with pytest.raises(HTTPException) as exc_info:
             await chat_module.call_agent_stream(
-                app_id=1, agent_id=999, message="hi", files=[],
+                request=MagicMock(), app_id=1, agent_id=999, message="hi", files=[],
                 file_references=None, search_params=None,
                 conversation_id=None, api_key="key", db=MagicMock(),
             )
@@ -310,7 +310,7 @@ class TestListConversations:
         mocker.patch.object(
             chat_module.ConversationService,
             "list_conversations",
-            return_value=([conv], 1),
+            return_value=([conv], 1, None),
         )
         mocker.patch(
             "routers.public.v1.chat.PublicConversationSchema.model_validate",
@@ -351,9 +351,9 @@ class TestGetConversationWithHistory:
         )
         mocker.patch.object(
             chat_module.ConversationService,
-            "get_conversation_history",
+            "get_conversation_history_page",
             new_callable=AsyncMock,
-            return_value=[{"role": "user", "content": "hi"}],
+            return_value=([{"message_id": 5, "role": "user", "content": "hi"}], None),
         )
 
         result = await chat_module.get_conversation_with_history(
@@ -362,6 +362,34 @@ class TestGetConversationWithHistory:
         )
         assert result.conversation_id == 1
         assert len(result.messages) == 1
+        assert result.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_paginates_with_cursor(self, mocker):
+        _patch_auth(mocker)
+        conv = MagicMock()
+        conv.conversation_id = 1
+        conv.agent_id = 1
+        conv.title = "Test"
+        conv.created_at = None
+        conv.updated_at = None
+
+        mocker.patch.object(chat_module.ConversationService, "get_conversation", return_value=conv)
+        page = mocker.patch.object(
+            chat_module.ConversationService,
+            "get_conversation_history_page",
+            new_callable=AsyncMock,
+            return_value=([{"message_id": 41, "role": "agent", "content": "hello"}], 41),
+        )
+
+        result = await chat_module.get_conversation_with_history(
+            app_id=1, agent_id=1, conversation_id=1,
+            api_key="key", db=MagicMock(), before=42, limit=1,
+        )
+
+        assert page.call_args.kwargs["before"] == 42
+        assert page.call_args.kwargs["limit"] == 1
+        assert result.next_cursor == 41
 
     @pytest.mark.asyncio
     async def test_not_found(self, mocker):
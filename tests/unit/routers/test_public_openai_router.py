@@ -8,9 +8,11 @@ from unittest.mock import AsyncMock, MagicMock
 import pytest
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 
 from routers.public.v1 import openai as openai_module
 from routers.public.v1.schemas_openai import OpenAIChatCompletionRequest, OpenAIMessage
+from tools.streaming_utils import StreamEvent
 from models.app import App
 
 
@@ -83,6 +85,7 @@ class TestOpenAIRouter:
         result = await openai_module.chat_completions(
             app_id="1",
             request=req,
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock()
         )
@@ -123,6 +126,7 @@ class TestOpenAIRouter:
         result = await openai_module.chat_completions(
             app_id="1",
             request=req,
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock()
         )
@@ -189,6 +193,7 @@ class TestOpenAIRouter:
         result = await openai_module.chat_completions(
             app_id="1",
             request=req,
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock()
         )
@@ -225,6 +230,7 @@ class TestOpenAIRouter:
         result = await openai_module.chat_completions(
             app_id="1",
             request=req,
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock()
         )
@@ -246,7 +252,7 @@ class TestOpenAIRouter:
 
 
 def _mock_streaming_service(mocker, events):
-    """Return a mock AgentStreamingService whose stream_agent_chat yields *events*."""
+    """Return a mock AgentStreamingService whose stream_agent_events yields *events*."""
 
     async def _gen(*args, **kwargs):
         for event in events:
@@ -254,27 +260,31 @@ def _mock_streaming_service(mocker, events):
 
     mock_cls = mocker.patch.object(openai_module, "AgentStreamingService")
     svc = mock_cls.return_value
-    svc.stream_agent_chat.return_value = _gen()
+    svc.stream_agent_events.return_value = _gen()
     return svc
 
 
 async def _collect_sse(streaming_response) -> list[str]:
-    """Drain a StreamingResponse and return each raw SSE line that starts with 'data: '."""
+    """Send a StreamingResponse over a fake ASGI connection and return each raw SSE line that starts with 'data: '."""
+    body = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message["body"])
+
+    await streaming_response({"type": "http", "asgi": {"spec_version": "2.4"}}, None, send)
     chunks = []
-    async for raw in streaming_response.body_iterator:
-        if isinstance(raw, bytes):
-            raw = raw.decode()
-        for line in raw.splitlines():
-            line = line.strip()
-            if line.startswith("data: "):
-                chunks.append(line[6:])  # strip "data: " prefix
+    for line in b"".join(body).decode().splitlines():
+        line = line.strip()
+        if line.startswith("data: "):
+            chunks.append(line[6:])  # strip "data: " prefix
     return chunks
 
 
 class TestListModels:
     @pytest.mark.asyncio
-    async def test_only_memoryless_agents_returned(self, mocker):
-        """Agents with has_memory=True must be excluded from /models."""
+    async def test_agents_with_memory_are_listed(self, mocker):
+        """Agents with memory can resume conversations, so /models lists them too."""
         _patch_auth(mocker)
         _mock_app(mocker)
 
@@ -301,30 +311,7 @@ class TestListModels:
             db=MagicMock(),
         )
 
-        model_ids = [m.id for m in result.data]
-        assert "10" in model_ids
-        assert "20" not in model_ids
-
-    @pytest.mark.asyncio
-    async def test_empty_when_all_agents_have_memory(self, mocker):
-        _patch_auth(mocker)
-        _mock_app(mocker)
-
-        mock_cls = mocker.patch.object(openai_module, "AgentService")
-        svc = mock_cls.return_value
-
-        stateful = MagicMock()
-        stateful.agent_id = 99
-        stateful.has_memory = True
-        svc.get_agents.return_value = [stateful]
-
-        result = await openai_module.list_models(
-            app_id="1",
-            api_key="key",
-            db=MagicMock(),
-        )
-
-        assert result.data == []
+        assert [m.id for m in result.data] == ["10", "20"]
 
 
 class TestStreamingChatCompletions:
@@ -347,6 +334,7 @@ class TestStreamingChatCompletions:
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -365,6 +353,7 @@ class TestStreamingChatCompletions:
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -384,14 +373,15 @@ class TestStreamingChatCompletions:
         _mock_agent_service(mocker)
 
         token_events = [
-            'data: {"type": "token", "data": {"content": "Hello"}}',
-            'data: {"type": "token", "data": {"content": " world"}}',
+            StreamEvent("token", {"content": "Hello"}),
+            StreamEvent("token", {"content": " world"}),
         ]
         _mock_streaming_service(mocker, events=token_events)
 
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -413,12 +403,13 @@ class TestStreamingChatCompletions:
         _mock_app(mocker)
         _mock_agent_service(mocker)
 
-        done_event = 'data: {"type": "done", "data": ""}'
+        done_event = StreamEvent("done", {"response": "Hi", "conversation_id": None, "files": []})
         _mock_streaming_service(mocker, events=[done_event])
 
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -430,6 +421,37 @@ class TestStreamingChatCompletions:
         assert stop_chunk["choices"][0]["finish_reason"] == "stop"
         assert stop_chunk["choices"][0]["delta"] == {}
 
+    @pytest.mark.asyncio
+    async def test_streaming_include_usage_appends_usage_chunk(self, mocker):
+        """stream_options.include_usage adds a choice-less usage chunk before [DONE]."""
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker)
+
+        usage = {
+            "prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15,
+            "prompt_tokens_details": {"cached_tokens": 8, "cache_creation_tokens": 0}, "llm_calls": 1,
+        }
+        _mock_streaming_service(mocker, events=[StreamEvent("done", {"response": "Hi", "usage": usage})])
+        request = self._base_request(stream=True)
+        request.stream_options = {"include_usage": True}
+
+        result = await openai_module.chat_completions(
+            app_id="1",
+            request=request,
+            http_request=MagicMock(),
+            api_key="key",
+            db=MagicMock(),
+        )
+
+        chunks = await _collect_sse(result)
+        usage_chunk = json.loads(chunks[-2])
+        assert usage_chunk["choices"] == []
+        assert usage_chunk["usage"] == {
+            "prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15,
+            "prompt_tokens_details": {"cached_tokens": 8},
+        }
+
     @pytest.mark.asyncio
     async def test_streaming_error_event_sends_error_content_and_stop(self, mocker):
         """An 'error' event must surface the error message with finish_reason=stop."""
@@ -437,12 +459,13 @@ class TestStreamingChatCompletions:
         _mock_app(mocker)
         _mock_agent_service(mocker)
 
-        error_event = 'data: {"type": "error", "data": {"message": "Something went wrong"}}'
+        error_event = StreamEvent("error", {"message": "Something went wrong"})
         _mock_streaming_service(mocker, events=[error_event])
 
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -463,14 +486,15 @@ class TestStreamingChatCompletions:
         _mock_agent_service(mocker)
 
         events = [
-            'data: {"type": "token", "data": {"content": "Hi"}}',
-            'data: {"type": "done", "data": ""}',
+            StreamEvent("token", {"content": "Hi"}),
+            StreamEvent("done", {"response": "Hi", "conversation_id": None, "files": []}),
         ]
         _mock_streaming_service(mocker, events=events)
 
         result = await openai_module.chat_completions(
             app_id="1",
             request=self._base_request(stream=True),
+            http_request=MagicMock(),
             api_key="key",
             db=MagicMock(),
         )
@@ -481,23 +505,179 @@ class TestStreamingChatCompletions:
         assert len(ids) == 1
         assert next(iter(ids)).startswith("chatcmpl-")
 
+
+class FakeConversationStore:
+    """In-memory stand-in for the prefix-hash columns of Conversation."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def claim(self, db, agent_id, user_context, prefix_digest):
+        for conversation_id, digest in list(self.hashes.items()):
+            if digest == prefix_digest:
+                del self.hashes[conversation_id]
+                return conversation_id
+        return None
+
+    def remember(self, db, conversation_id, digest):
+        if conversation_id and digest:
+            self.hashes[conversation_id] = digest
+
+
+class TestConversationResume:
+    @pytest.fixture
+    def store(self, mocker):
+        store = FakeConversationStore()
+        mocker.patch.object(openai_module.OpenAIConversationService, "claim", side_effect=store.claim)
+        mocker.patch.object(openai_module.OpenAIConversationService, "remember", side_effect=store.remember)
+        return store
+
+    def _request(self, *messages, stream=False):
+        return OpenAIChatCompletionRequest(
+            model="1", messages=[OpenAIMessage(role=r, content=c) for r, c in messages], stream=stream,
+        )
+
+    async def _call(self, request):
+        return await openai_module.chat_completions(
+            app_id="1", request=request, http_request=MagicMock(), api_key="key", db=MagicMock(),
+        )
+
+    @pytest.mark.asyncio
+    async def test_repeated_history_resumes_conversation_with_newest_message_only(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=True)
+        exec_mock = _mock_execution_service(mocker, result={
+            "response": "Hi there", "conversation_id": 42, "metadata": {},
+        })
+
+        await self._call(self._request(("system", "Be nice"), ("user", "Hello")))
+        await self._call(self._request(("user", "Hello"), ("assistant", "Hi there"), ("user", "And now?")))
+
+        first, second = exec_mock.execute_agent_chat_with_file_refs.call_args_list
+        assert first.kwargs["conversation_id"] is None
+        assert second.kwargs["conversation_id"] == 42
+        assert second.kwargs["message"] == "[Latest Input]\nuser: And now?"
+
+    @pytest.mark.asyncio
+    async def test_edited_history_starts_new_conversation(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=True)
+        exec_mock = _mock_execution_service(mocker, result={
+            "response": "Hi there", "conversation_id": 42, "metadata": {},
+        })
+
+        await self._call(self._request(("user", "Hello")))
+        await self._call(self._request(("user", "Hello"), ("assistant", "Something else"), ("user", "And now?")))
+
+        second = exec_mock.execute_agent_chat_with_file_refs.call_args_list[1]
+        assert second.kwargs["conversation_id"] is None
+        assert "--- Conversation History ---" in second.kwargs["message"]
+
+    @pytest.mark.asyncio
+    async def test_memoryless_agents_never_resume(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=False)
+        _mock_execution_service(mocker)
+
+        await self._call(self._request(("user", "Hello")))
+
+        assert store.hashes == {}
+
+    @pytest.mark.asyncio
+    async def test_streamed_reply_is_remembered_and_failure_releases_claim(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=True)
+
+        _mock_streaming_service(mocker, events=[
+            StreamEvent("token", {"content": "Hi "}),
+            StreamEvent("token", {"content": "there"}),
+            StreamEvent("done", {"response": "Hi there", "conversation_id": 42}),
+        ])
+        await _collect_sse(await self._call(self._request(("user", "Hello"), stream=True)))
+        remembered = dict(store.hashes)
+
+        svc = _mock_streaming_service(mocker, events=[StreamEvent("error", {"message": "boom"})])
+        await _collect_sse(await self._call(
+            self._request(("user", "Hello"), ("assistant", "Hi there"), ("user", "Next"), stream=True)
+        ))
+
+        assert svc.stream_agent_events.call_args.kwargs["conversation_id"] == 42
+        assert store.hashes == remembered
+
     @pytest.mark.asyncio
-    async def test_streaming_rejects_agent_with_memory(self, mocker):
-        """Streaming must be rejected when the agent has memory enabled."""
+    async def test_failure_after_run_started_keeps_claim(self, mocker, store):
         _patch_auth(mocker)
         _mock_app(mocker)
         _mock_agent_service(mocker, has_memory=True)
+        store.hashes[42] = openai_module.chain_digest([("user", "Hello"), ("assistant", "Hi there")])
+
+        async def _gen(*args, on_run_start, **kwargs):
+            on_run_start()
+            yield StreamEvent("error", {"message": "boom"})
+
+        svc = _mock_streaming_service(mocker, events=[])
+        svc.stream_agent_events.side_effect = _gen
+        await _collect_sse(await self._call(
+            self._request(("user", "Hello"), ("assistant", "Hi there"), ("user", "Next"), stream=True)
+        ))
+
+        exec_mock = _mock_execution_service(mocker)
+        store.hashes[43] = openai_module.chain_digest([("user", "Hola"), ("assistant", "Hey")])
+
+        async def _run(*args, on_run_start, **kwargs):
+            on_run_start()
+            raise HTTPException(status_code=500, detail="boom")
+
+        exec_mock.execute_agent_chat_with_file_refs.side_effect = _run
+        with pytest.raises(HTTPException):
+            await self._call(self._request(("user", "Hola"), ("assistant", "Hey"), ("user", "Next")))
+
+        assert store.hashes == {}
+
+    @pytest.mark.asyncio
+    async def test_client_gone_before_stream_starts_releases_claim(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=True)
+        store.hashes[42] = openai_module.chain_digest([("user", "Hello"), ("assistant", "Hi there")])
+        _mock_streaming_service(mocker, events=[])
+
+        response = await self._call(
+            self._request(("user", "Hello"), ("assistant", "Hi there"), ("user", "Next"), stream=True)
+        )
+        assert store.hashes == {}
+
+        async def send(message):
+            raise OSError("client disconnected")
+
+        with pytest.raises(ClientDisconnect):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, None, send)
+
+        assert 42 in store.hashes
+
+    @pytest.mark.asyncio
+    async def test_rejected_attachment_releases_claim(self, mocker, store):
+        _patch_auth(mocker)
+        _mock_app(mocker)
+        _mock_agent_service(mocker, has_memory=True)
+        exec_mock = _mock_execution_service(mocker)
+        store.hashes[42] = openai_module.chain_digest([("user", "Hello"), ("assistant", "Hi there")])
+        mocker.patch.object(
+            openai_module, "_validate_image_url",
+            side_effect=HTTPException(status_code=400, detail="Image URL is not allowed."),
+        )
+        image = [{"type": "image_url", "image_url": {"url": "http://10.0.0.1/cat.png"}}]
 
         with pytest.raises(HTTPException) as exc_info:
-            await openai_module.chat_completions(
-                app_id="1",
-                request=self._base_request(stream=True),
-                api_key="key",
-                db=MagicMock(),
-            )
+            await self._call(self._request(("user", "Hello"), ("assistant", "Hi there"), ("user", image)))
 
         assert exc_info.value.status_code == 400
-        assert "memory" in exc_info.value.detail.lower()
+        exec_mock.execute_agent_chat_with_file_refs.assert_not_called()
+        assert 42 in store.hashes
 
 
 class TestSSRFValidation:
@@ -582,7 +762,7 @@ class TestResponseFormat:
 
         req = self._base_request(response_format={"type": "json_object"})
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
@@ -600,7 +780,7 @@ class TestResponseFormat:
         schema = {"type": "object", "properties": {"answer": {"type": "string"}}}
         req = self._base_request(response_format={"type": "json_schema", "json_schema": schema})
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
@@ -617,7 +797,7 @@ class TestResponseFormat:
 
         req = self._base_request(response_format={"type": "text"})
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
@@ -633,7 +813,7 @@ class TestResponseFormat:
 
         req = self._base_request(response_format=None)
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
@@ -649,7 +829,7 @@ class TestResponseFormat:
 
         req = self._base_request(response_format={"type": "audio"})
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
@@ -679,7 +859,7 @@ class TestAgentOutputParserIntegration:
             messages=[OpenAIMessage(role="user", content="Give me JSON")],
         )
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         content = result.choices[0].message.content
@@ -708,7 +888,7 @@ class TestAgentOutputParserIntegration:
             messages=[OpenAIMessage(role="user", content="Check")],
         )
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         assert result.response_format == {"type": "json_object"}
@@ -727,7 +907,7 @@ class TestAgentOutputParserIntegration:
             messages=[OpenAIMessage(role="user", content="Hello")],
         )
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         assert result.response_format is None
@@ -765,7 +945,7 @@ class TestNewContentPartTypes:
         )
 
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         assert result.object == "chat.completion"
@@ -806,7 +986,7 @@ class TestNewContentPartTypes:
         )
 
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         file_mock.upload_file.assert_called_once()
@@ -844,7 +1024,7 @@ class TestNewContentPartTypes:
         )
 
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         assert result.object == "chat.completion"
@@ -883,19 +1063,20 @@ class TestNewContentPartTypes:
         )
 
         await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         file_mock.upload_file.assert_not_called()
-        file_mock.get_file_reference.assert_called_once_with("existing-file-123")
+        file_mock.get_file_reference.assert_called_once()
+        assert file_mock.get_file_reference.call_args.args[:2] == ("existing-file-123", 1)
 
         kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
         assert len(kwargs["file_references"]) == 1
         assert kwargs["file_references"][0].file_id == "existing-file-123"
 
     @pytest.mark.asyncio
-    async def test_file_part_with_unknown_file_id_skips_reference(self, mocker):
-        """file part with unknown file_id should log a warning and not add a reference."""
+    async def test_file_part_with_unknown_file_id_returns_404(self, mocker):
+        """file part with a file_id the caller does not own should be refused with 404."""
         _patch_auth(mocker)
         _mock_app(mocker)
         _mock_agent_service(mocker)
@@ -918,13 +1099,14 @@ class TestNewContentPartTypes:
             max_tokens=None,
         )
 
-        await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
-        )
+        with pytest.raises(HTTPException) as exc_info:
+            await openai_module.chat_completions(
+                app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
+            )
 
+        assert exc_info.value.status_code == 404
         file_mock.upload_file.assert_not_called()
-        kwargs = exec_mock.execute_agent_chat_with_file_refs.call_args.kwargs
-        assert len(kwargs["file_references"]) == 0
+        exec_mock.execute_agent_chat_with_file_refs.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_mixed_content_parts_text_audio_file(self, mocker):
@@ -960,7 +1142,7 @@ class TestNewContentPartTypes:
         )
 
         result = await openai_module.chat_completions(
-            app_id="1", request=req, api_key="key", db=MagicMock()
+            app_id="1", request=req, http_request=MagicMock(), api_key="key", db=MagicMock()
         )
 
         assert result.object == "chat.completion"
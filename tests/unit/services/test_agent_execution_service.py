@@ -8,12 +8,15 @@ All external dependencies are mocked so tests run without a database, LLM
 connection, or LangGraph.
 """
 
+import asyncio
 import os
 
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from fastapi import HTTPException
+from sqlalchemy import inspect
 
+from models.mcp_config import MCPConfig
 from services.agent_execution_service import AgentExecutionService
 from services.agent_execution_context import AgentExecutionContext
 
@@ -118,8 +121,8 @@ class TestAgentNotFound:
     @pytest.mark.asyncio
     async def test_raises_404_when_fresh_agent_not_found(self):
         """
-        agent_service.get_agent succeeds but agent_execution_repo returns None
-        (could happen in a race condition — agent deleted between checks).
+        The single eager load in agent_execution_repo returns None
+        (e.g. the agent was deleted after the access check on the router).
         """
         agent = make_agent(agent_id=1)
         svc, _ = make_service(agent=agent, fresh_agent=None)
@@ -400,3 +403,141 @@ class TestFileSnapshotting:
             )
 
             mock_inject.assert_called_once_with("ok", [mock_file_ref])
+
+
+# ---------------------------------------------------------------------------
+# _prepare_turn — single agent load, concurrent setup, timings
+# ---------------------------------------------------------------------------
+
+
+class TestPrepareTurn:
+    @pytest.mark.asyncio
+    async def test_agent_loaded_once_with_relationships(self, tmp_path):
+        agent = make_agent(agent_id=1)
+        svc, _ = make_service(agent=agent)
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools", new=AsyncMock(return_value=[])),
+        ):
+            ctx = await svc._prepare_turn(agent_id=1, message="hello", db=MagicMock())
+
+        svc.agent_execution_repo.get_agent_with_relationships.assert_called_once()
+        svc.agent_service.get_agent.assert_not_called()
+        assert ctx.agent is ctx.fresh_agent is agent
+
+    @pytest.mark.asyncio
+    async def test_mcp_tools_discovered_during_setup(self, tmp_path):
+        agent = make_agent(agent_id=1)
+        svc, _ = make_service(agent=agent)
+        tools = [MagicMock(name="mcp_tool")]
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools",
+                  new=AsyncMock(return_value=tools)) as mock_load,
+        ):
+            ctx = await svc._prepare_turn(agent_id=1, message="hello", db=MagicMock())
+
+        mock_load.assert_awaited_once_with(1, [], None)
+        assert ctx.mcp_tools == tools
+
+    @pytest.mark.asyncio
+    async def test_mcp_discovery_gets_configs_detached_from_session(self, tmp_path):
+        agent = make_agent(agent_id=1)
+        mcp = MCPConfig(config_id=3, name="docs", config={"docs": {"url": "http://mcp"}}, ssl_verify=True)
+        agent.mcp_associations = [MagicMock(mcp=mcp)]
+        svc, _ = make_service(agent=agent)
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools",
+                  new=AsyncMock(return_value=[])) as mock_load,
+        ):
+            await svc._prepare_turn(agent_id=1, message="hello", db=MagicMock())
+
+        (config,) = mock_load.await_args.args[1]
+        assert config is not mcp and inspect(config).transient
+        assert (config.config_id, config.name, config.config) == (3, "docs", mcp.config)
+        assert config.config is not mcp.config
+
+    @pytest.mark.asyncio
+    async def test_phase_timings_recorded(self, tmp_path):
+        agent = make_agent(agent_id=1, has_memory=True)
+        svc, _ = make_service(agent=agent)
+        conversation = MagicMock(conversation_id=7, session_id="conv_1_abc")
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools", new=AsyncMock(return_value=[])),
+            patch("services.conversation_service.ConversationService.create_conversation",
+                  return_value=conversation),
+        ):
+            ctx = await svc._prepare_turn(agent_id=1, message="hello", db=MagicMock())
+
+        assert set(ctx.timings) == {
+            "load_agent", "mcp_discovery", "conversation", "files", "workspace_snapshot", "total",
+        }
+        assert ctx.effective_conv_id == 7
+        svc.session_service.get_user_session.assert_awaited_once_with(
+            agent_id=1, user_context=None, conversation_id="abc",
+        )
+
+    @pytest.mark.asyncio
+    async def test_agent_reloaded_after_auto_created_conversation(self, tmp_path):
+        agent = make_agent(agent_id=1, has_memory=True)
+        reloaded = make_agent(agent_id=1, has_memory=True)
+        svc, _ = make_service(agent=agent)
+        svc.agent_execution_repo.get_agent_with_relationships.side_effect = [agent, reloaded]
+        conversation = MagicMock(conversation_id=7, session_id="conv_1_abc")
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools", new=AsyncMock(return_value=[])),
+            patch("services.conversation_service.ConversationService.create_conversation",
+                  return_value=conversation),
+        ):
+            ctx = await svc._prepare_turn(agent_id=1, message="hello", db=MagicMock())
+
+        assert svc.agent_execution_repo.get_agent_with_relationships.call_count == 2
+        assert ctx.agent is ctx.fresh_agent is reloaded
+
+    @pytest.mark.asyncio
+    async def test_mcp_discovery_cancelled_when_conversation_missing(self, tmp_path):
+        agent = make_agent(agent_id=1, has_memory=True)
+        svc, _ = make_service(agent=agent)
+        cancelled = asyncio.Event()
+
+        async def slow_discovery(*_args):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with (
+            patch.object(svc, "_validate_agent_access", new=AsyncMock()),
+            patch("services.agent_execution_service.get_app_config",
+                  return_value={"TMP_BASE_FOLDER": str(tmp_path)}),
+            patch("tools.agentTools.load_mcp_tools", new=slow_discovery),
+            patch("services.conversation_service.ConversationService.get_conversation",
+                  return_value=None),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await svc._prepare_turn(
+                    agent_id=1, message="hello", conversation_id=5, db=MagicMock()
+                )
+            await asyncio.sleep(0)
+
+        assert exc_info.value.status_code == 404
+        assert cancelled.is_set()
@@ -0,0 +1,163 @@
+"""
+Unit tests for the typed stream events of AgentStreamingService, token
+coalescing, disconnect handling and the orjson-based SSE rendering in
+tools.streaming_utils.
+"""
+
+import json
+from datetime import date
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from services.agent_streaming_service import AgentStreamingService
+from tools.streaming_utils import StreamEvent, TokenCoalescer, encode_json, format_sse_event
+from utils.token_usage import TurnUsage
+
+
+class TestFormatSseEvent:
+    def test_round_trips_non_ascii_payload(self):
+        line = format_sse_event("token", {"content": "¿Qué tal? 👋"})
+
+        assert line.startswith("data: ") and line.endswith("\n\n")
+        assert json.loads(line[6:]) == {"type": "token", "data": {"content": "¿Qué tal? 👋"}}
+
+    def test_unserializable_values_fall_back_to_str(self):
+        payload = json.loads(encode_json({"args": {"when": date(2026, 1, 2), 3: "x"}}))
+
+        assert payload == {"args": {"when": "2026-01-02", "3": "x"}}
+
+
+class TestStreamAgentChat:
+    @pytest.mark.asyncio
+    async def test_renders_each_event_once_as_sse(self):
+        events = [
+            StreamEvent("metadata", {"conversation_id": 7}),
+            StreamEvent("token", {"content": "Hi"}),
+            StreamEvent("done", {"response": "Hi", "conversation_id": 7, "files": []}),
+        ]
+
+        async def fake_events(*args, **kwargs):
+            for event in events:
+                yield event
+
+        service = AgentStreamingService.__new__(AgentStreamingService)
+        with patch.object(AgentStreamingService, "stream_agent_events", side_effect=fake_events):
+            lines = [line async for line in service.stream_agent_chat(1, "hello")]
+
+        assert [json.loads(line[6:])["type"] for line in lines] == ["metadata", "token", "done"]
+        assert json.loads(lines[1][6:])["data"] == {"content": "Hi"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenCoalescer:
+    def test_first_chunk_released_immediately(self):
+        coalescer = TokenCoalescer(interval_ms=50, max_bytes=100, clock=FakeClock())
+
+        assert coalescer.add("Hel") == "Hel"
+
+    def test_chunks_within_window_are_merged(self):
+        clock = FakeClock()
+        coalescer = TokenCoalescer(interval_ms=50, max_bytes=100, clock=clock)
+        coalescer.add("a")
+
+        clock.now = 0.01
+        assert coalescer.add("b") is None
+        clock.now = 0.02
+        assert coalescer.add("c") is None
+        clock.now = 0.06
+        assert coalescer.add("d") == "bcd"
+
+    def test_size_limit_forces_flush(self):
+        coalescer = TokenCoalescer(interval_ms=1000, max_bytes=4, clock=FakeClock())
+        coalescer.add("x")
+
+        assert coalescer.add("ab") is None
+        assert coalescer.add("ñé") == "abñé"
+
+    def test_flush_returns_remaining_text_once(self):
+        coalescer = TokenCoalescer(interval_ms=1000, max_bytes=100, clock=FakeClock())
+        coalescer.add("a")
+        coalescer.add("b")
+
+        assert coalescer.flush() == "b"
+        assert coalescer.flush() is None
+
+
+def ai_chunk(text):
+    return ("messages", (AIMessageChunk(content=text), {}))
+
+
+class TestStreamAgentEvents:
+    def make_service(self, chunks, on_close=None):
+        async def astream(*args, **kwargs):
+            try:
+                for chunk in chunks:
+                    yield chunk
+            finally:
+                if on_close:
+                    on_close()
+
+        agent_chain = MagicMock()
+        agent_chain.astream = astream
+        ctx = MagicMock(effective_conv_id=7, session_id_for_cache=None, usage=TurnUsage())
+        ctx.fresh_agent.has_memory = False
+
+        service = AgentStreamingService.__new__(AgentStreamingService)
+        service.db = None
+        service.execution_service = MagicMock()
+        service.execution_service._prepare_turn = AsyncMock(return_value=ctx)
+        service.execution_service._finalize_turn = AsyncMock(
+            side_effect=lambda ctx, content, db: {
+                "parsed_response": content, "effective_conv_id": 7, "files_data": [],
+                "metadata": {"usage": ctx.usage.as_dict()},
+            }
+        )
+        return service, agent_chain
+
+    async def collect(self, service, agent_chain, **kwargs):
+        with (
+            patch("services.agent_streaming_service.create_agent", AsyncMock(return_value=(agent_chain, None))),
+            patch("services.agent_streaming_service.prepare_agent_config", return_value={"configurable": {}}),
+            patch("services.agent_streaming_service.build_human_message", return_value="hi"),
+            patch("services.agent_streaming_service.TokenCoalescer", lambda: TokenCoalescer(interval_ms=60_000)),
+        ):
+            return [event async for event in service.stream_agent_events(1, "hello", **kwargs)]
+
+    @pytest.mark.asyncio
+    async def test_tokens_coalesced_and_flushed_before_tool_events(self):
+        tool_call = AIMessage(content="", tool_calls=[{"name": "web_search", "args": {}, "id": "t1"}])
+        service, chain = self.make_service([
+            ai_chunk("a"), ai_chunk("b"), ai_chunk("c"),
+            ("updates", {"model": {"messages": [tool_call]}}),
+            ai_chunk("d"), ai_chunk("e"),
+        ])
+
+        events = await self.collect(service, chain)
+
+        assert [(e.type, e.data.get("content")) for e in events if e.type in ("token", "tool_start")] == [
+            ("token", "a"), ("token", "bc"), ("tool_start", None), ("token", "de"),
+        ]
+        assert events[-1].type == "done"
+        assert service.execution_service._finalize_turn.call_args.args[1] == "abcde"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_graph_run_and_skips_done(self):
+        closed = []
+        service, chain = self.make_service(
+            [ai_chunk("a"), ai_chunk("b"), ai_chunk("c")], on_close=lambda: closed.append(True)
+        )
+
+        events = await self.collect(service, chain, is_disconnected=AsyncMock(return_value=True))
+
+        assert [e.type for e in events] == ["metadata", "token"]
+        assert closed == [True]
+        assert service.execution_service._finalize_turn.call_args.args[1] == "a"
@@ -0,0 +1,123 @@
+"""
+Unit tests for the authorization lookup cache.
+
+App rows are served from an in-memory SQLite database holding only the App
+and User tables, so cache hits can be verified by counting queries.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.app import App
+from models.user import User
+from routers.controls.role_authorization import AppRole
+from services.auth_cache_service import AuthCache, CachedAPIKey
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    User.__table__.create(engine)
+    App.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(user_id=1, email="owner@example.com", name="Owner", is_active=True))
+    session.add(App(app_id=5, name="Demo", slug="demo", owner_id=1, agent_rate_limit=10))
+    session.commit()
+
+    session.queries = 0
+
+    def count(*_args):
+        session.queries += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cache():
+    return AuthCache(ttl_seconds=60, max_entries=100)
+
+
+class TestAppLookup:
+    def test_app_by_id_and_slug_share_one_query(self, cache, db):
+        by_slug = cache.get_app(db, "demo")
+        by_id = cache.get_app(db, "5")
+        by_int = cache.get_app(db, 5)
+
+        assert by_slug == by_id == by_int
+        assert by_slug.agent_rate_limit == 10
+        assert by_slug.owner_active is True
+        assert db.queries == 1
+
+    def test_unknown_app_returns_none(self, cache, db):
+        assert cache.get_app(db, "missing") is None
+        assert cache.get_app(db, 99) is None
+
+    def test_invalidate_app_drops_slug_keys_and_roles(self, cache, db):
+        cache.get_app(db, "demo")
+        cache.set_api_key(5, "secret", CachedAPIKey(key_id=3, app_id=5, owner_id=1, owner_active=True))
+        cache.set_role(5, 2, AppRole.EDITOR)
+
+        cache.invalidate_app(5)
+
+        assert cache.get_api_key(5, "secret") is None
+        assert cache.get_role(5, 2) is None
+        cache.get_app(db, "demo")
+        assert db.queries == 2
+
+    def test_disabled_cache_always_queries(self, db):
+        cache = AuthCache(ttl_seconds=0)
+
+        cache.get_app(db, 5)
+        cache.get_app(db, 5)
+
+        assert db.queries == 2
+        assert cache.get_stats()["enabled"] is False
+
+
+class TestInvalidation:
+    def test_invalidate_api_key_by_id(self, cache):
+        cache.set_api_key(5, "a", CachedAPIKey(key_id=3, app_id=5, owner_id=1, owner_active=True))
+        cache.set_api_key(5, "b", CachedAPIKey(key_id=4, app_id=5, owner_id=1, owner_active=True))
+
+        cache.invalidate_api_key(3)
+
+        assert cache.get_api_key(5, "a") is None
+        assert cache.get_api_key(5, "b").key_id == 4
+
+    def test_invalidate_user_drops_owned_apps_keys_and_roles(self, cache, db):
+        cache.get_app(db, 5)
+        cache.set_api_key(5, "a", CachedAPIKey(key_id=3, app_id=5, owner_id=1, owner_active=True))
+        cache.set_role(5, 1, AppRole.OWNER)
+        cache.set_role(6, 2, AppRole.VIEWER)
+
+        cache.invalidate_user(1)
+
+        assert cache.get_api_key(5, "a") is None
+        assert cache.get_role(5, 1) is None
+        assert cache.get_role(6, 2) == AppRole.VIEWER
+        cache.get_app(db, 5)
+        assert db.queries == 2
+
+    def test_raw_key_is_not_stored(self, cache):
+        cache.set_api_key(5, "super-secret", CachedAPIKey(key_id=3, app_id=5, owner_id=1, owner_active=True))
+
+        assert all("super-secret" not in k for k in cache._api_keys.keys())
+
+
+class TestStats:
+    def test_hits_and_misses_are_counted(self, cache, db):
+        cache.get_app(db, 5)
+        cache.get_app(db, 5)
+        cache.get_role(5, 1)
+
+        stats = cache.get_stats()["caches"]
+        assert stats["apps"]["hits"] == 1
+        assert stats["apps"]["misses"] == 1
+        assert stats["apps"]["size"] == 1
+        assert stats["roles"]["misses"] == 1
@@ -0,0 +1,135 @@
+"""
+Unit tests for LangGraph checkpoint retention.
+
+PostgreSQL is replaced by a fake pool that answers the retention queries from
+canned rows and records the deletions, so these tests cover thread selection,
+batching, locking and statistics rather than the SQL itself.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import checkpoint_retention_service as module
+from services.checkpoint_retention_service import CheckpointRetentionService, select_stale_threads
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchone(self):
+        return self.rows[0]
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def execute(self, sql, params=None):
+        return FakeCursor(self.pool.answer(sql, params))
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, threads, live_sessions=(), over_limit=(), locked=True):
+        self.threads = threads
+        self.live_sessions = set(live_sessions)
+        self.over_limit = list(over_limit)
+        self.locked = locked
+        self.deleted_threads = []
+        self.trimmed_threads = []
+
+    @asynccontextmanager
+    async def connection(self):
+        yield FakeConnection(self)
+
+    def answer(self, sql, params):
+        if 'pg_try_advisory_lock' in sql:
+            return [{'locked': self.locked}]
+        if 'pg_advisory_unlock' in sql:
+            return [{}]
+        if 'max((checkpoint' in sql:
+            after, limit = params
+            return [row for row in self.threads if row['thread_id'] > after][:limit]
+        if 'FROM "Conversation"' in sql:
+            return [{'session_id': s} for s in params[0] if s in self.live_sessions]
+        if 'HAVING count(*)' in sql:
+            after, _keep, limit = params
+            return [{'thread_id': t} for t in self.over_limit if t > after][:limit]
+        if 'row_number()' in sql:
+            self.trimmed_threads.extend(params['threads'])
+        elif 'DELETE FROM checkpoints WHERE' in sql:
+            self.deleted_threads.extend(params['threads'])
+        return [{'n': 2, 'size': 100}]
+
+
+def thread(thread_id, idle_hours=0):
+    return {'thread_id': thread_id, 'last_ts': NOW - timedelta(hours=idle_hours)}
+
+
+class TestSelectStaleThreads:
+    def test_deleted_conversations_are_stale(self):
+        threads = [thread('thread_1_conv_1_a'), thread('thread_1_conv_1_b')]
+
+        assert select_stale_threads(threads, {'conv_1_a'}, NOW) == ['thread_1_conv_1_b']
+
+    def test_idle_session_memory_expires(self):
+        threads = [thread('thread_2_oauth_2_7', idle_hours=30), thread('thread_2_api_2_ab12', idle_hours=1)]
+
+        assert select_stale_threads(threads, set(), NOW, timedelta(hours=24)) == ['thread_2_oauth_2_7']
+
+    def test_conversations_never_expire_by_age(self):
+        assert select_stale_threads([thread('thread_1_conv_1_a', idle_hours=1000)], {'conv_1_a'}, NOW) == []
+
+    def test_unknown_thread_shapes_are_kept(self):
+        assert select_stale_threads([thread('thread_3', idle_hours=1000), thread('other')], set(), NOW) == []
+
+
+class TestRunOnce:
+    @pytest.fixture(autouse=True)
+    def no_pause(self, monkeypatch):
+        monkeypatch.setattr(module, 'CHECKPOINT_RETENTION_BATCH_PAUSE_SECONDS', 0)
+
+    @pytest.mark.asyncio
+    async def test_skips_when_another_process_holds_the_lock(self):
+        pool = FakePool([thread('thread_1_conv_1_gone')], locked=False)
+
+        assert await CheckpointRetentionService.run_once(pool) is None
+        assert pool.deleted_threads == []
+
+    @pytest.mark.asyncio
+    async def test_deletes_stale_threads_in_batches(self, monkeypatch):
+        monkeypatch.setattr(module, 'CHECKPOINT_RETENTION_BATCH_SIZE', 2)
+        pool = FakePool(
+            [thread('thread_1_conv_1_a'), thread('thread_1_conv_1_b'), thread('thread_1_conv_1_c')],
+            live_sessions={'conv_1_b'},
+        )
+
+        stats = await CheckpointRetentionService.run_once(pool)
+
+        assert pool.deleted_threads == ['thread_1_conv_1_a', 'thread_1_conv_1_c']
+        assert stats.threads_deleted == 2
+        # Two batches, three tables each, 2 rows / 100 bytes per statement
+        assert stats.rows_deleted['checkpoints'] == 4
+        assert stats.bytes_reclaimed['checkpoint_blobs'] == 200
+
+    @pytest.mark.asyncio
+    async def test_trims_threads_over_the_limit(self, monkeypatch):
+        monkeypatch.setattr(module, 'CHECKPOINT_RETENTION_BATCH_SIZE', 2)
+        pool = FakePool([], over_limit=['thread_1_conv_1_a', 'thread_1_conv_1_b', 'thread_2_oauth_2_7'])
+
+        stats = await CheckpointRetentionService.run_once(pool)
+
+        assert pool.trimmed_threads == ['thread_1_conv_1_a', 'thread_1_conv_1_b', 'thread_2_oauth_2_7']
+        assert stats.threads_trimmed == 3
+        assert stats.threads_deleted == 0
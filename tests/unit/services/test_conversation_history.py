@@ -0,0 +1,162 @@
+"""
+Unit tests for the conversation history projection in ConversationService.
+
+The service tests patch the repository and checkpointer, so they cover what is
+written per turn, cursor pagination and the one-off backfill of conversations
+that predate the projection. The repository tests run on in-memory SQLite.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage
+from repositories.conversation_message_repository import ConversationMessageRepository
+from services import conversation_service as module
+from services.conversation_service import ConversationService
+
+
+def make_conversation(history_projected=True):
+    conversation = MagicMock()
+    conversation.conversation_id = 3
+    conversation.agent_id = 9
+    conversation.session_id = "conv_9_abc"
+    conversation.history_projected = history_projected
+    conversation.agent.app_id = 1
+    return conversation
+
+
+def rows(*ids):
+    return [
+        ConversationMessage(message_id=i, conversation_id=3, role="user" if i % 2 else "agent", content=f"m{i}")
+        for i in ids
+    ]
+
+
+class TestRecordTurn:
+    def test_appends_display_text_of_both_messages(self):
+        conversation = make_conversation()
+        user = "Summarize\n\n[Attached files:]\n--- File: a.pdf ---\nsecret\n--- End of a.pdf ---"
+
+        with patch.object(module.ConversationMessageRepository, "add_messages_if_projected") as add:
+            ConversationService.record_turn(MagicMock(), conversation, user, {"answer": 42})
+
+        assert add.call_args.args[2] == [("user", "Summarize 📎"), ("agent", '{"answer": 42}')]
+
+    def test_image_only_message_gets_placeholder(self):
+        user = [{"type": "text", "text": ""}, {"type": "image_url"}]
+
+        with patch.object(module.ConversationMessageRepository, "add_messages_if_projected") as add:
+            ConversationService.record_turn(MagicMock(), make_conversation(), user, "A cat")
+
+        assert add.call_args.args[2] == [("user", "[Imagen adjunta]"), ("agent", "A cat")]
+
+    def test_reset_history_clears_projection(self):
+        with patch.object(module.ConversationMessageRepository, "clear") as clear:
+            ConversationService.reset_history(MagicMock(), make_conversation())
+
+        assert clear.call_args.args[1] == 3
+
+
+class TestGetConversationHistoryPage:
+    @pytest.mark.asyncio
+    async def test_returns_page_and_cursor_without_reading_checkpoints(self):
+        checkpointer = AsyncMock()
+        with patch.object(ConversationService, "get_conversation", return_value=make_conversation()), \
+             patch.object(module.ConversationMessageRepository, "get_page", return_value=rows(7, 8, 9)) as get_page, \
+             patch.object(module.CheckpointerCacheService, "get_conversation_history_async", checkpointer):
+            history, next_cursor = await ConversationService.get_conversation_history_page(
+                MagicMock(), 3, {"user_id": 1}, before=10, limit=2
+            )
+
+        assert get_page.call_args.kwargs == {"before": 10, "limit": 3}
+        assert [m["message_id"] for m in history] == [8, 9]
+        assert next_cursor == 8
+        checkpointer.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self):
+        with patch.object(ConversationService, "get_conversation", return_value=make_conversation()), \
+             patch.object(module.ConversationMessageRepository, "get_page", return_value=rows(1, 2)):
+            history, next_cursor = await ConversationService.get_conversation_history_page(
+                MagicMock(), 3, {"user_id": 1}, limit=2
+            )
+
+        assert len(history) == 2
+        assert next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_legacy_conversation_is_backfilled_from_checkpoint_once(self):
+        checkpoint_history = [
+            {"role": "user", "content": "[{'type': 'text', 'text': 'hi'}]"},
+            {"role": "agent", "content": "hello"},
+        ]
+        with patch.object(ConversationService, "get_conversation", return_value=make_conversation(False)), \
+             patch.object(module.CheckpointerCacheService, "get_conversation_history_async",
+                          AsyncMock(return_value=checkpoint_history)), \
+             patch.object(module.ConversationMessageRepository, "backfill", return_value=True) as backfill, \
+             patch.object(module.ConversationMessageRepository, "get_page", return_value=[]):
+            await ConversationService.get_conversation_history_page(MagicMock(), 3, {"user_id": 1})
+
+        assert backfill.call_args.args[1:] == (3, [("user", "hi"), ("agent", "hello")])
+
+    @pytest.mark.asyncio
+    async def test_not_found(self):
+        with patch.object(ConversationService, "get_conversation", return_value=None):
+            assert await ConversationService.get_conversation_history_page(MagicMock(), 3, {}) is None
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = ("Conversation", "conversation_message")
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in tables])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_conversation(db, history_projected=True):
+    conversation = Conversation(
+        agent_id=9, session_id="conv_9_abc", history_projected=history_projected, prefix_hash="digest"
+    )
+    db.add(conversation)
+    db.commit()
+    return conversation.conversation_id
+
+
+def stored(db, conversation_id):
+    return [(m.role, m.content) for m in ConversationMessageRepository.get_page(db, conversation_id)]
+
+
+class TestConversationMessageRepository:
+    def test_skips_conversations_awaiting_backfill(self, db):
+        conversation_id = add_conversation(db, history_projected=False)
+
+        assert not ConversationMessageRepository.add_messages_if_projected(db, conversation_id, [("user", "hi")])
+        assert stored(db, conversation_id) == []
+
+    def test_rereads_flag_set_by_concurrent_backfill(self, db):
+        conversation_id = add_conversation(db, history_projected=False)
+        stale = db.get(Conversation, conversation_id)
+        assert stale.history_projected is False
+        # Another reader backfills the history meanwhile
+        assert ConversationMessageRepository.backfill(db, conversation_id, [("user", "old")])
+
+        assert ConversationMessageRepository.add_messages_if_projected(db, conversation_id, [("user", "new")])
+        assert stored(db, conversation_id) == [("user", "old"), ("user", "new")]
+
+    def test_clear_empties_history_and_resume_digest(self, db):
+        conversation_id = add_conversation(db, history_projected=False)
+        ConversationMessageRepository.backfill(db, conversation_id, [("user", "hi"), ("agent", "hello")])
+
+        ConversationMessageRepository.clear(db, conversation_id)
+
+        conversation = db.get(Conversation, conversation_id)
+        assert stored(db, conversation_id) == []
+        assert conversation.prefix_hash is None
+        assert conversation.history_projected is True
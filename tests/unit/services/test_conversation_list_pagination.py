@@ -0,0 +1,99 @@
+"""
+Unit tests for conversation list keyset pagination and the last_message preview.
+
+The query is a MagicMock, so these tests cover the cursor encoding, page
+trimming and the preview marker rewriting, not the generated SQL.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from repositories.conversation_repository import ConversationRepository
+from services.conversation_service import ConversationService
+
+
+def make_conversation(conversation_id, updated_at=datetime(2026, 1, 2, 3, 4, 5)):
+    conversation = MagicMock()
+    conversation.conversation_id = conversation_id
+    conversation.updated_at = updated_at
+    return conversation
+
+
+def make_query(rows):
+    query = MagicMock()
+    query.filter.return_value = query
+    query.order_by.return_value = query
+    query.offset.return_value = query
+    query.limit.return_value.all.return_value = rows
+    return query
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = ConversationRepository.encode_cursor(make_conversation(42))
+        assert ConversationRepository.decode_cursor(cursor) == (datetime(2026, 1, 2, 3, 4, 5), 42)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "Zm9vfGJhcg=="])
+    def test_invalid_cursor_raises_value_error(self, cursor):
+        with pytest.raises(ValueError):
+            ConversationRepository.decode_cursor(cursor)
+
+
+class TestPaginate:
+    def test_next_cursor_when_more_rows(self):
+        rows = [make_conversation(i) for i in (5, 4, 3)]
+        query = make_query(rows)
+
+        page, next_cursor = ConversationRepository.paginate(query, limit=2)
+
+        query.limit.assert_called_once_with(3)
+        assert page == rows[:2]
+        assert ConversationRepository.decode_cursor(next_cursor)[1] == 4
+
+    def test_last_page_has_no_cursor(self):
+        rows = [make_conversation(1)]
+        page, next_cursor = ConversationRepository.paginate(make_query(rows), limit=2)
+        assert page == rows
+        assert next_cursor is None
+
+    def test_cursor_filters_and_ignores_offset(self):
+        query = make_query([])
+        cursor = ConversationRepository.encode_cursor(make_conversation(7))
+
+        ConversationRepository.paginate(query, limit=10, offset=20, cursor=cursor)
+
+        query.filter.assert_called_once()
+        query.offset.assert_not_called()
+
+    def test_offset_without_cursor(self):
+        query = make_query([])
+        ConversationRepository.paginate(query, limit=10, offset=20)
+        query.filter.assert_not_called()
+        query.offset.assert_called_once_with(20)
+
+    def test_conversation_of_extracts_from_joined_rows(self):
+        rows = [(make_conversation(i), "agent") for i in (3, 2)]
+        _, next_cursor = ConversationRepository.paginate(
+            make_query(rows), limit=1, conversation_of=lambda row: row[0]
+        )
+        assert ConversationRepository.decode_cursor(next_cursor)[1] == 3
+
+
+class TestMessagePreview:
+    def test_plain_text_is_truncated(self):
+        assert ConversationService.message_preview("x" * 300) == "x" * 200
+
+    def test_markers_are_shortened(self):
+        response = "See ![chart](file://a.png) and [📎 report.pdf](file://b.pdf) or [link](file://c)"
+        assert ConversationService.message_preview(response) == (
+            "See [imagen] and [archivo] or [link](file://c)"
+        )
+
+    def test_content_blocks_join_text_parts(self):
+        response = [{"type": "text", "text": "Hello"}, {"type": "image"}, {"type": "text", "text": "world"}]
+        assert ConversationService.message_preview(response) == "Hello world"
+
+    def test_empty_response_falls_back(self):
+        assert ConversationService.message_preview("  ") == "[imagen generada]"
@@ -0,0 +1,159 @@
+"""
+Unit tests for the FileManagementService attachment catalog.
+
+The file_attachment table is created in an in-memory SQLite database and
+TMP_BASE_FOLDER points at a temporary directory, so uploads, listing, lookup
+and removal run end to end without PostgreSQL.
+"""
+
+import io
+import json
+import os
+
+import pytest
+from unittest.mock import patch
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.file_attachment import FileAttachment
+from services.file_management_service import FileManagementService
+
+
+USER_CONTEXT = {"user_id": 1, "app_id": 2}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    FileAttachment.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def service(db, tmp_path):
+    with patch("utils.config.get_app_config", return_value={"TMP_BASE_FOLDER": str(tmp_path)}):
+        yield FileManagementService(db=db)
+
+
+def make_upload(name="notes.txt", data=b"hello catalog"):
+    return UploadFile(filename=name, file=io.BytesIO(data))
+
+
+class TestAttachmentCatalog:
+    @pytest.mark.asyncio
+    async def test_upload_is_listed_in_other_service_instances(self, service, db, tmp_path):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        other_worker = FileManagementService(db=db)
+        files = await other_worker.list_attached_files(5, USER_CONTEXT)
+
+        assert [f["file_id"] for f in files] == [file_ref.file_id]
+        assert files[0]["content"] == "hello catalog"
+        assert os.path.exists(os.path.join(str(tmp_path), files[0]["file_path"]))
+
+    @pytest.mark.asyncio
+    async def test_no_json_sidecars_are_written(self, service, tmp_path):
+        await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        persistent = tmp_path / "persistent"
+        assert not [p for p in persistent.rglob("*") if p.suffix in (".json", ".content")]
+
+    @pytest.mark.asyncio
+    async def test_listing_without_content(self, service):
+        await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        files = await service.list_attached_files(5, USER_CONTEXT, include_content=False)
+
+        assert files[0]["content"] is None
+        assert files[0]["content_preview"] == "hello catalog"
+
+    @pytest.mark.asyncio
+    async def test_get_file_reference_by_id(self, service, db):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        found = await FileManagementService(db=db).get_file_reference(file_ref.file_id, 5, USER_CONTEXT)
+
+        assert found.filename == "notes.txt"
+        assert found.content == "hello catalog"
+        assert await service.get_file_reference("missing", 5, USER_CONTEXT) is None
+
+    @pytest.mark.asyncio
+    async def test_get_file_reference_includes_conversation_files(self, service):
+        file_ref = await service.upload_file(
+            make_upload(), agent_id=5, user_context={**USER_CONTEXT, "conversation_id": "7"}
+        )
+
+        assert await service.get_file_reference(file_ref.file_id, 5, USER_CONTEXT) is not None
+
+    @pytest.mark.asyncio
+    async def test_get_file_reference_refuses_other_tenants(self, service):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        other_app = {"user_id": 1, "app_id": 3}
+        other_key = {"user_id": "apikey_other", "app_id": 2}
+        assert await service.get_file_reference(file_ref.file_id, 5, other_app) is None
+        assert await service.get_file_reference(file_ref.file_id, 5, other_key) is None
+        assert await service.get_file_reference(file_ref.file_id, 6, USER_CONTEXT) is None
+
+    @pytest.mark.asyncio
+    async def test_content_is_loaded_lazily(self, service, db):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+        db.expunge_all()
+        attachment = db.query(FileAttachment).filter_by(file_id=file_ref.file_id).one()
+
+        lazy_ref = service._to_file_reference(attachment)
+
+        assert lazy_ref._content_loader is not None
+        assert lazy_ref.content == "hello catalog"
+
+    @pytest.mark.asyncio
+    async def test_remove_file_deletes_row_and_original(self, service, tmp_path):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+        original = os.path.join(str(tmp_path), file_ref.file_path)
+
+        assert await service.remove_file(file_ref.file_id, 5, USER_CONTEXT) is True
+        assert await service.list_attached_files(5, USER_CONTEXT) == []
+        assert not os.path.exists(original)
+
+    @pytest.mark.asyncio
+    async def test_remove_file_is_scoped_to_session(self, service):
+        file_ref = await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+
+        assert await service.remove_file(file_ref.file_id, 6, USER_CONTEXT) is False
+        assert len(await service.list_attached_files(5, USER_CONTEXT)) == 1
+
+    @pytest.mark.asyncio
+    async def test_legacy_sidecars_are_imported_once(self, service, tmp_path):
+        session_key = service._get_session_key(5, USER_CONTEXT)
+        session_dir = tmp_path / "persistent" / session_key
+        session_dir.mkdir(parents=True)
+        (session_dir / "legacy-id.json").write_text(json.dumps({
+            "file_id": "legacy-id", "filename": "old.txt", "file_type": "text",
+            "file_path": None, "file_size_bytes": 3, "uploaded_at": "2025-01-01T00:00:00",
+        }))
+        (session_dir / "legacy-id.content").write_text("old")
+        (session_dir / "old.txt").write_text("old")
+
+        files = await service.list_attached_files(5, USER_CONTEXT)
+
+        assert [f["file_id"] for f in files] == ["legacy-id"]
+        assert files[0]["content"] == "old"
+        assert files[0]["file_path"] == f"persistent/{session_key}/old.txt"
+        assert sorted(os.listdir(session_dir)) == ["old.txt"]
+
+    @pytest.mark.asyncio
+    async def test_file_stats(self, service):
+        await service.upload_file(make_upload(), agent_id=5, user_context=USER_CONTEXT)
+        await service.upload_file(make_upload("b.txt"), agent_id=6, user_context=USER_CONTEXT)
+
+        stats = service.get_file_stats()
+
+        assert stats["total_files"] == 2
+        assert stats["total_sessions"] == 2
+        assert stats["file_types"] == {"text": 2}
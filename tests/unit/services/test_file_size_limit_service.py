@@ -0,0 +1,120 @@
+"""
+Unit tests for the streaming helpers of FileSizeLimitService.
+
+Covers chunked upload writes and incremental base64 decoding, including
+size-limit enforcement part-way through a payload, and the per-app limit
+that the enforce_file_size_limit dependency hands to the endpoints.
+"""
+
+import base64
+import hashlib
+import io
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from routers.controls import file_size_limit as controls
+from services.file_size_limit_service import FileSizeLimitService
+
+
+PAYLOAD = bytes(range(256)) * 40  # 10 KB
+
+
+def make_upload(data=PAYLOAD, name="doc.bin"):
+    return UploadFile(filename=name, file=io.BytesIO(data))
+
+
+class TestStreamUploadToFile:
+    @pytest.mark.asyncio
+    async def test_writes_file_and_returns_size_and_hash(self, tmp_path):
+        dest = tmp_path / "out.bin"
+        size, sha = await FileSizeLimitService.stream_upload_to_file(make_upload(), str(dest), chunk_size=1000)
+
+        assert size == len(PAYLOAD)
+        assert sha == hashlib.sha256(PAYLOAD).hexdigest()
+        assert dest.read_bytes() == PAYLOAD
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload_and_removes_partial_file(self, tmp_path):
+        dest = tmp_path / "out.bin"
+        upload = make_upload(b"x" * (1024 * 1024 + 1))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await FileSizeLimitService.stream_upload_to_file(upload, str(dest), max_size_mb=1, chunk_size=4096)
+
+        assert exc_info.value.status_code == 413
+        assert not dest.exists()
+
+    @pytest.mark.asyncio
+    async def test_zero_limit_means_unlimited(self, tmp_path):
+        size, _ = await FileSizeLimitService.stream_upload_to_file(
+            make_upload(b"x" * (1024 * 1024 + 1)), str(tmp_path / "out.bin"), max_size_mb=0
+        )
+        assert size == 1024 * 1024 + 1
+
+
+class TestDecodeBase64ToFile:
+    @pytest.mark.parametrize("chunk_size", [3, 7, 100, 1024 * 1024])
+    def test_round_trip_for_any_chunk_size(self, chunk_size):
+        out = io.BytesIO()
+        size, sha = FileSizeLimitService.decode_base64_to_file(
+            base64.b64encode(PAYLOAD).decode(), out, chunk_size=chunk_size
+        )
+        assert out.getvalue() == PAYLOAD
+        assert size == len(PAYLOAD)
+        assert sha == hashlib.sha256(PAYLOAD).hexdigest()
+
+    def test_data_url_offset_and_whitespace(self):
+        encoded = base64.b64encode(b"hello world").decode()
+        url = "data:image/png;base64," + encoded[:5] + "\n" + encoded[5:]
+        out = io.BytesIO()
+
+        FileSizeLimitService.decode_base64_to_file(url, out, start=url.index(",") + 1, chunk_size=3)
+
+        assert out.getvalue() == b"hello world"
+
+    def test_unpadded_payload(self):
+        out = io.BytesIO()
+        FileSizeLimitService.decode_base64_to_file(base64.b64encode(b"ab").decode().rstrip("="), out)
+        assert out.getvalue() == b"ab"
+
+    def test_limit_is_enforced_while_decoding(self):
+        encoded = base64.b64encode(b"x" * (1024 * 1024 + 10)).decode()
+        out = io.BytesIO()
+
+        with pytest.raises(HTTPException) as exc_info:
+            FileSizeLimitService.decode_base64_to_file(encoded, out, max_size_mb=1, chunk_size=64 * 1024)
+
+        assert exc_info.value.status_code == 413
+        assert len(out.getvalue()) <= 1024 * 1024
+
+    def test_invalid_payload_raises_value_error(self):
+        with pytest.raises(ValueError):
+            FileSizeLimitService.decode_base64_to_file("a", io.BytesIO())
+
+
+class TestEnforceFileSizeLimit:
+    def make_request(self, headers):
+        return SimpleNamespace(headers=headers, state=SimpleNamespace())
+
+    def enforce(self, request, max_file_size_mb=5):
+        with patch.object(controls.auth_cache, "get_app", return_value=MagicMock(max_file_size_mb=max_file_size_mb)):
+            controls.enforce_file_size_limit("app", request, MagicMock())
+
+    @pytest.mark.parametrize("headers", [{}, {"content-length": "chunked"}, {"content-length": "1024"}])
+    def test_limit_is_stored_with_or_without_content_length(self, headers):
+        request = self.make_request(headers)
+        self.enforce(request)
+        assert controls.get_request_file_size_limit(request) == 5
+
+    def test_oversized_content_length_is_rejected(self):
+        with pytest.raises(HTTPException) as exc_info:
+            self.enforce(self.make_request({"content-length": str(6 * 1024 * 1024)}))
+        assert exc_info.value.status_code == 413
+
+    def test_unlimited_app_stores_nothing(self):
+        request = self.make_request({})
+        self.enforce(request, max_file_size_mb=0)
+        assert controls.get_request_file_size_limit(request) == 0
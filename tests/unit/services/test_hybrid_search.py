@@ -0,0 +1,133 @@
+"""
+Unit tests for hybrid (dense + full-text) search in the vector stores.
+
+The database engine and Qdrant client are mocked; the tests check the single
+fused query on PGVector and the sparse-vector wiring on Qdrant.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tools.vector_stores.pgvector_store import PGVectorHybridRetriever, PGVectorStore, _lexical_query
+from tools.vector_stores.qdrant_store import LEXICAL_VECTOR_NAME, LexicalSparseEmbeddings
+
+
+def make_pg_store(rows=()):
+    db = MagicMock()
+    connection = db.engine.connect.return_value.__enter__.return_value
+    connection.execute.return_value.fetchall.return_value = list(rows)
+    store = PGVectorStore(db)
+    store._lexical_column_ready = True
+    return store, connection
+
+
+@pytest.fixture
+def embeddings():
+    model = MagicMock()
+    model.embed_query.return_value = [0.1, 0.2]
+    with patch("tools.vector_stores.pgvector_store.get_embeddings_model", return_value=model):
+        yield model
+
+
+class TestLexicalQuery:
+    def test_terms_are_or_combined_and_deduplicated(self):
+        assert _lexical_query("Error E1234 error") == "error | e1234"
+
+    def test_punctuation_cannot_inject_operators(self):
+        assert _lexical_query("a & !b | (c)") == "a | b | c"
+
+
+class TestPGVectorHybridSearch:
+    def test_single_fused_statement(self, embeddings):
+        row = MagicMock(id="doc-1", document="Part E1234", cmetadata={"type": "manual"}, score=0.03)
+        store, connection = make_pg_store([row])
+
+        docs = store.search_similar_documents(
+            "silo_1", "E1234 overheating", filter_metadata={"type": "manual"}, k=5, search_type="hybrid"
+        )
+
+        connection.execute.assert_called_once()
+        sql, params = connection.execute.call_args.args
+        assert "document_tsv @@" in str(sql) and "embedding <=>" in str(sql)
+        assert params["tsquery"] == "e1234 | overheating"
+        assert params["embedding"] == "[0.1,0.2]"
+        assert params["candidates"] == 20
+        assert "manual" in params.values()
+        assert docs[0].page_content == "Part E1234"
+        assert docs[0].metadata == {"type": "manual", "_score": 0.03, "_id": "doc-1"}
+
+    def test_fetch_k_sizes_candidate_pools(self, embeddings):
+        store, connection = make_pg_store()
+
+        store.search_similar_documents("silo_1", "query", k=5, search_type="hybrid", fetch_k=50)
+
+        assert connection.execute.call_args.args[1]["candidates"] == 50
+
+    def test_retriever_for_hybrid_search_type(self):
+        store, _ = make_pg_store()
+
+        retriever = store.get_retriever("silo_1", search_params={"k": 3}, search_type="hybrid")
+
+        assert isinstance(retriever, PGVectorHybridRetriever)
+        with patch.object(store, "search_similar_documents", return_value=[]) as search:
+            retriever.invoke("query")
+        assert search.call_args.kwargs["k"] == 3
+        assert search.call_args.kwargs["search_type"] == "hybrid"
+
+    def test_lexical_column_added_once_when_missing(self):
+        db = MagicMock()
+        connection = db.engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.scalar.return_value = None
+        store = PGVectorStore(db)
+
+        store._ensure_lexical_column()
+        store._ensure_lexical_column()
+
+        statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+        assert len(statements) == 3
+        assert "ADD COLUMN IF NOT EXISTS document_tsv" in statements[1]
+        assert "USING gin" in statements[2]
+
+
+class TestLexicalSparseEmbeddings:
+    def test_documents_carry_term_frequencies(self):
+        vector = LexicalSparseEmbeddings().embed_documents(["pump pump valve"])[0]
+
+        assert sorted(vector.values) == [1.0, 2.0]
+        assert vector.indices == sorted(vector.indices)
+
+    def test_query_terms_are_binary_and_stable(self):
+        first = LexicalSparseEmbeddings().embed_query("Pump pump")
+        second = LexicalSparseEmbeddings().embed_query("pump")
+
+        assert first.values == [1.0]
+        assert first.indices == second.indices
+
+
+class TestQdrantHybridSearch:
+    def make_store(self, sparse_vectors):
+        from tools.vector_stores.qdrant_store import QdrantStore
+
+        with patch("qdrant_client.QdrantClient"):
+            store = QdrantStore(MagicMock(), url="http://qdrant:6333")
+        store.client.get_collection.return_value.config.params.sparse_vectors = sparse_vectors
+        return store
+
+    def test_hybrid_uses_sparse_vector_when_collection_has_it(self):
+        store = self.make_store({LEXICAL_VECTOR_NAME: MagicMock()})
+
+        with patch.object(store, "_get_vector_store") as get_store:
+            get_store.return_value.similarity_search_with_score.return_value = []
+            store.search_similar_documents("silo_1", "E1234", k=5, search_type="hybrid")
+
+        assert get_store.call_args.kwargs == {"hybrid": True}
+
+    def test_hybrid_falls_back_to_dense_for_old_collections(self):
+        store = self.make_store(None)
+
+        with patch.object(store, "_get_vector_store") as get_store:
+            get_store.return_value.similarity_search_with_score.return_value = []
+            store.search_similar_documents("silo_1", "E1234", k=5, search_type="hybrid")
+
+        assert get_store.call_args.kwargs == {}
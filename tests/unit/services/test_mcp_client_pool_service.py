@@ -0,0 +1,221 @@
+"""
+Unit tests for MCPClientPool.
+
+MultiServerMCPClient is replaced with a fake so no MCP server is contacted.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+
+from services.mcp_client_pool_service import MCPClientPool, build_mcp_connections
+
+
+def make_config(config_id=1, name="search", url="https://mcp.example.com/mcp", ssl_verify=True):
+    config = MagicMock()
+    config.config_id = config_id
+    config.name = name
+    config.ssl_verify = ssl_verify
+    stored = {name: {"url": url, "transport": "streamable_http"}}
+    config.to_connection_dict.return_value = stored
+    return config
+
+
+class FakeClient:
+    """Stands in for MultiServerMCPClient; records every tool listing."""
+
+    instances = []
+    delay = 0.0
+    error = None
+
+    def __init__(self, connections):
+        self.connections = connections
+        self.calls = 0
+        FakeClient.instances.append(self)
+
+    async def get_tools(self):
+        self.calls += 1
+        if FakeClient.delay:
+            await asyncio.sleep(FakeClient.delay)
+        if FakeClient.error:
+            raise FakeClient.error
+        return [MagicMock(name=f"{name}_tool") for name in self.connections]
+
+
+@pytest.fixture(autouse=True)
+def fake_client():
+    FakeClient.instances = []
+    FakeClient.delay = 0.0
+    FakeClient.error = None
+    with patch("services.mcp_client_pool_service.MultiServerMCPClient", FakeClient):
+        yield FakeClient
+
+
+def user(token):
+    return {"oauth": True, "token": token}
+
+
+class TestBuildConnections:
+    def test_adds_auth_header_without_touching_stored_config(self):
+        config = make_config()
+
+        connections = build_mcp_connections(config, user("tok"))
+
+        assert connections["search"]["headers"]["Authorization"] == "Bearer tok"
+        assert "headers" not in config.to_connection_dict()["search"]
+
+    def test_insecure_client_factory_when_ssl_disabled(self):
+        connections = build_mcp_connections(make_config(ssl_verify=False))
+
+        assert "httpx_client_factory" in connections["search"]
+
+
+class TestToolCache:
+    @pytest.mark.asyncio
+    async def test_tools_cached_within_ttl(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60)
+        config = make_config()
+
+        first = await pool.get_tools([config])
+        second = await pool.get_tools([config])
+
+        assert first == second
+        assert len(fake_client.instances) == 1
+        assert fake_client.instances[0].calls == 1
+
+    @pytest.mark.asyncio
+    async def test_clients_are_per_identity(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60)
+        config = make_config()
+
+        await pool.get_tools([config], user("alice"))
+        await pool.get_tools([config], user("bob"))
+        await pool.get_tools([config], user("alice"))
+
+        assert len(fake_client.instances) == 2
+        tokens = {c.connections["search"]["headers"]["Authorization"] for c in fake_client.instances}
+        assert tokens == {"Bearer alice", "Bearer bob"}
+
+    @pytest.mark.asyncio
+    async def test_edited_config_is_rediscovered(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60)
+        config = make_config()
+        await pool.get_tools([config])
+
+        config.to_connection_dict.return_value = {"search": {"url": "https://other.example.com/mcp"}}
+        await pool.get_tools([config])
+
+        assert len(fake_client.instances) == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_catalog_served_while_refreshing(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=0)
+        config = make_config()
+        first = await pool.get_tools([config])
+
+        second = await pool.get_tools([config])
+        assert second == first
+        await asyncio.sleep(0.01)
+
+        assert fake_client.instances[0].calls == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_cold_lookups_share_one_discovery(self, fake_client):
+        fake_client.delay = 0.01
+        pool = MCPClientPool(ttl_seconds=60)
+        config = make_config()
+
+        await asyncio.gather(*(pool.get_tools([config]) for _ in range(5)))
+
+        assert len(fake_client.instances) == 1
+        assert fake_client.instances[0].calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_config_drops_pooled_clients(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60)
+        config = make_config()
+        await pool.get_tools([config])
+
+        pool.invalidate_config(config.config_id)
+        await pool.get_tools([config])
+
+        assert len(fake_client.instances) == 2
+
+
+class TestCircuitBreaker:
+    @pytest.mark.asyncio
+    async def test_slow_server_times_out_without_blocking_others(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60, connect_timeout=0.05)
+        slow, fast = make_config(1, "slow"), make_config(2, "fast")
+
+        async def get_tools(self):
+            self.calls += 1
+            if "slow" in self.connections:
+                await asyncio.sleep(1)
+            return [MagicMock()]
+
+        with patch.object(FakeClient, "get_tools", get_tools):
+            tools = await asyncio.wait_for(pool.get_tools([slow, fast]), timeout=0.5)
+
+        assert len(tools) == 1
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_consecutive_failures(self, fake_client):
+        fake_client.error = ConnectionError("refused")
+        pool = MCPClientPool(ttl_seconds=60, failure_threshold=2, open_seconds=60)
+        config = make_config()
+
+        assert await pool.get_tools([config]) == []
+        assert await pool.get_tools([config]) == []
+        assert await pool.get_tools([config]) == []
+
+        assert sum(c.calls for c in fake_client.instances) == 2
+
+    @pytest.mark.asyncio
+    async def test_circuit_half_opens_after_cooldown(self, fake_client):
+        fake_client.error = ConnectionError("refused")
+        pool = MCPClientPool(ttl_seconds=60, failure_threshold=1, open_seconds=0)
+        config = make_config()
+        assert await pool.get_tools([config]) == []
+
+        fake_client.error = None
+        tools = await pool.get_tools([config])
+
+        assert len(tools) == 1
+
+    @pytest.mark.asyncio
+    async def test_success_resets_failure_count(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=0, failure_threshold=2, open_seconds=60)
+        config = make_config()
+        fake_client.error = ConnectionError("refused")
+        assert await pool.get_tools([config]) == []
+        fake_client.error = None
+        assert len(await pool.get_tools([config])) == 1
+
+        # Background refreshes now fail; the earlier failure must not count
+        fake_client.error = ConnectionError("refused")
+        assert len(await pool.get_tools([config])) == 1
+        await asyncio.sleep(0.01)
+        assert len(await pool.get_tools([config])) == 1
+        await asyncio.sleep(0.01)
+        calls = sum(c.calls for c in fake_client.instances)
+
+        # Circuit open: the cached catalog is served without contacting the server
+        assert len(await pool.get_tools([config])) == 1
+        await asyncio.sleep(0.01)
+        assert sum(c.calls for c in fake_client.instances) == calls
+
+    @pytest.mark.asyncio
+    async def test_rejected_token_does_not_open_shared_circuit(self, fake_client):
+        pool = MCPClientPool(ttl_seconds=60, failure_threshold=1, open_seconds=60)
+        config = make_config()
+        request = httpx.Request("POST", "https://mcp.example.com/mcp")
+        rejected = httpx.HTTPStatusError("401", request=request, response=httpx.Response(401, request=request))
+        fake_client.error = ExceptionGroup("unhandled errors in a TaskGroup", [rejected])
+
+        assert await pool.get_tools([config], user("expired")) == []
+
+        fake_client.error = None
+        assert len(await pool.get_tools([config], user("valid"))) == 1
@@ -0,0 +1,142 @@
+"""
+Unit tests for multi-silo retrieval in tools.agentTools.
+
+Silo retrievers are replaced with fakes; the tests check reciprocal-rank
+fusion, content deduplication and that silos are searched concurrently.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock, patch
+from langchain_core.documents import Document
+
+from tools.agentTools import (
+    get_agent_retriever_tool,
+    get_agent_silos,
+    reciprocal_rank_fusion,
+)
+
+
+def docs(*contents):
+    return [Document(page_content=content, metadata={}) for content in contents]
+
+
+def make_silo(silo_id, description="docs"):
+    silo = MagicMock()
+    silo.silo_id = silo_id
+    silo.silo_type = "CUSTOM"
+    silo.description = description
+    silo.metadata_definition = None
+    return silo
+
+
+def make_agent(primary=None, extra=()):
+    agent = MagicMock()
+    agent.silo_id = primary.silo_id if primary else None
+    agent.silo = primary
+    agent.silo_associations = [MagicMock(silo_id=silo.silo_id, silo=silo) for silo in extra]
+    return agent
+
+
+class FakeRetriever:
+    def __init__(self, results, delay=0.0, error=None):
+        self.results = results
+        self.delay = delay
+        self.error = error
+
+    def invoke(self, query):
+        if self.error:
+            raise self.error
+        return self.results
+
+    async def ainvoke(self, query):
+        await asyncio.sleep(self.delay)
+        return self.invoke(query)
+
+
+@pytest.fixture
+def silo_retrievers():
+    retrievers = {}
+    with patch(
+        "tools.agentTools.SiloService.get_silo_retriever",
+        side_effect=lambda silo_id, params=None: retrievers[silo_id],
+    ) as mock_get:
+        mock_get.retrievers = retrievers
+        yield mock_get
+
+
+class TestReciprocalRankFusion:
+    def test_documents_found_by_several_lists_rank_first(self):
+        fused = reciprocal_rank_fusion([docs("a", "b", "c"), docs("c", "d")])
+
+        assert [d.page_content for d in fused][:1] == ["c"]
+
+    def test_duplicates_merged_by_content(self):
+        fused = reciprocal_rank_fusion([docs("a", "b"), docs("b", "a")])
+
+        assert sorted(d.page_content for d in fused) == ["a", "b"]
+
+    def test_limit_caps_results(self):
+        assert len(reciprocal_rank_fusion([docs("a", "b", "c")], limit=2)) == 2
+
+
+class TestAgentSilos:
+    def test_primary_first_without_duplicates(self):
+        primary, other = make_silo(1), make_silo(2)
+
+        silos = get_agent_silos(make_agent(primary, [other, primary]))
+
+        assert [s.silo_id for s in silos] == [1, 2]
+
+    def test_no_silos_means_no_tool(self):
+        assert get_agent_retriever_tool(make_agent()) is None
+
+
+class TestMultiSiloRetriever:
+    @pytest.mark.asyncio
+    async def test_single_silo_keeps_plain_retriever(self, silo_retrievers):
+        silo_retrievers.retrievers[1] = FakeRetriever(docs("a"))
+
+        tool = get_agent_retriever_tool(make_agent(make_silo(1)))
+        content, artifact = await tool.coroutine("query")
+
+        assert [d.metadata for d in artifact] == [{}]
+
+    @pytest.mark.asyncio
+    async def test_silos_searched_concurrently_and_fused(self, silo_retrievers):
+        silo_retrievers.retrievers.update({
+            1: FakeRetriever(docs("shared", "only-1"), delay=0.1),
+            2: FakeRetriever(docs("only-2", "shared"), delay=0.1),
+            3: FakeRetriever(docs("only-3"), delay=0.1),
+        })
+        tool = get_agent_retriever_tool(make_agent(make_silo(1), [make_silo(2), make_silo(3)]))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        content, artifact = await tool.coroutine("query")
+
+        assert loop.time() - started < 0.25
+        assert artifact[0].page_content.startswith("Content: shared")
+        assert len(artifact) == 4
+        assert {d.metadata["silo_id"] for d in artifact} == {1, 2, 3}
+
+    @pytest.mark.asyncio
+    async def test_failing_silo_is_skipped(self, silo_retrievers):
+        silo_retrievers.retrievers.update({
+            1: FakeRetriever(docs("a")),
+            2: FakeRetriever([], error=ConnectionError("down")),
+        })
+        tool = get_agent_retriever_tool(make_agent(make_silo(1), [make_silo(2)]))
+
+        content, artifact = await tool.coroutine("query")
+
+        assert len(artifact) == 1
+
+    def test_search_params_only_applied_to_primary_silo(self, silo_retrievers):
+        silo_retrievers.retrievers.update({1: FakeRetriever([]), 2: FakeRetriever([])})
+
+        get_agent_retriever_tool(make_agent(make_silo(1), [make_silo(2)]), {"k": 5})
+
+        params = {call.args[0]: call.args[1] for call in silo_retrievers.call_args_list}
+        assert params == {1: {"k": 5}, 2: None}
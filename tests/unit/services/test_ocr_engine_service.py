@@ -0,0 +1,201 @@
+"""
+Unit tests for ConcurrentOCREngine and how OCR agents route PDF pages to it.
+
+PDF rasterization and the vision model are mocked so tests run without
+poppler or an LLM connection.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from services.agent_execution_service import AgentExecutionService
+from services.ocr_engine_service import ConcurrentOCREngine
+from services.pdf_extraction_service import PDFPage
+
+
+MODULE = "services.ocr_engine_service"
+EXECUTION = "services.agent_execution_service"
+LONG_TEXT = "Invoice number 12345 issued to ACME Corporation for consulting services. "
+
+
+def _fake_rasterizer(created: list):
+    """Return a convert_pdf_page_to_image stand-in that writes a real file."""
+    def _convert(pdf_path, page_number, output_folder, dpi=200):
+        path = os.path.join(output_folder, f"page-{page_number}.jpg")
+        with open(path, "wb") as f:
+            f.write(b"jpeg")
+        created.append(path)
+        return path
+    return _convert
+
+
+class TestConcurrentOCREngine:
+    def test_requires_vision_model(self):
+        with pytest.raises(ValueError):
+            ConcurrentOCREngine(vision_model=None, vision_system_prompt="p")
+
+    def test_results_are_returned_in_page_order(self, tmp_path):
+        created = []
+
+        def _ocr(b64, prompt, model, title):
+            # Later pages finish first to exercise reordering
+            page = int(title.split()[-1])
+            time.sleep(0.01 * (5 - page))
+            return f"text {page}"
+
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=4), \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer(created)), \
+             patch(f"{MODULE}.extract_text_from_image", side_effect=_ocr):
+            engine = ConcurrentOCREngine(MagicMock(), "prompt", max_workers=4)
+            results = engine.process_pdf("doc.pdf", str(tmp_path))
+
+        assert [r["page"] for r in results] == [1, 2, 3, 4]
+        assert results[2]["extracted_text"] == "text 3"
+
+    def test_concurrency_is_bounded_by_max_workers(self, tmp_path):
+        lock = threading.Lock()
+        in_flight = {"now": 0, "peak": 0}
+
+        def _ocr(b64, prompt, model, title):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            time.sleep(0.02)
+            with lock:
+                in_flight["now"] -= 1
+            return "ok"
+
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=10), \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer([])), \
+             patch(f"{MODULE}.extract_text_from_image", side_effect=_ocr):
+            engine = ConcurrentOCREngine(MagicMock(), "prompt", max_workers=3)
+            results = engine.process_pdf("doc.pdf", str(tmp_path))
+
+        assert len(results) == 10
+        assert 1 < in_flight["peak"] <= 3
+
+    def test_shares_one_vision_client(self, tmp_path):
+        vision_model = MagicMock()
+        seen_models = []
+
+        def _ocr(b64, prompt, model, title):
+            seen_models.append(model)
+            return "ok"
+
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=3), \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer([])), \
+             patch(f"{MODULE}.extract_text_from_image", side_effect=_ocr):
+            ConcurrentOCREngine(vision_model, "prompt").process_pdf("doc.pdf", str(tmp_path))
+
+        assert seen_models == [vision_model] * 3
+
+    def test_failed_pages_are_skipped_and_reported(self, tmp_path):
+        progress = []
+
+        def _ocr(b64, prompt, model, title):
+            if title == "Page 2":
+                raise RuntimeError("model error")
+            return "ok"
+
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=3), \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer([])), \
+             patch(f"{MODULE}.extract_text_from_image", side_effect=_ocr):
+            engine = ConcurrentOCREngine(
+                MagicMock(), "prompt", max_workers=1,
+                progress_callback=lambda *args: progress.append(args),
+            )
+            results = engine.process_pdf("doc.pdf", str(tmp_path))
+
+        assert [r["page"] for r in results] == [1, 3]
+        assert [p[0] for p in progress] == [1, 2, 3]
+        assert all(p[1] == 3 for p in progress)
+        assert (2, 3, 2, False) in progress
+        assert engine.failed_pages == [2]
+
+    def test_page_images_are_removed(self, tmp_path):
+        created = []
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=3), \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer(created)), \
+             patch(f"{MODULE}.extract_text_from_image", return_value="ok"):
+            ConcurrentOCREngine(MagicMock(), "prompt").process_pdf("doc.pdf", str(tmp_path))
+
+        assert len(created) == 3
+        assert not any(os.path.exists(p) for p in created)
+        assert os.listdir(tmp_path) == []
+
+    def test_empty_pdf_returns_no_pages(self, tmp_path):
+        with patch(f"{MODULE}.get_pdf_page_count", return_value=0):
+            assert ConcurrentOCREngine(MagicMock(), "prompt").process_pdf("doc.pdf", str(tmp_path)) == []
+
+    def test_only_requested_pages_are_processed(self, tmp_path):
+        titles = []
+
+        def _ocr(b64, prompt, model, title):
+            titles.append(title)
+            return "ok"
+
+        with patch(f"{MODULE}.get_pdf_page_count") as page_count, \
+             patch(f"{MODULE}.convert_pdf_page_to_image", side_effect=_fake_rasterizer([])), \
+             patch(f"{MODULE}.extract_text_from_image", side_effect=_ocr):
+            results = ConcurrentOCREngine(MagicMock(), "prompt").process_pdf("doc.pdf", str(tmp_path), pages=[2, 5])
+
+        page_count.assert_not_called()
+        assert [r["page"] for r in results] == [2, 5]
+        assert sorted(titles) == ["Page 2", "Page 5"]
+
+
+class TestOCRPageRouting:
+    @pytest.fixture
+    def run_ocr(self, tmp_path):
+        def _run(pages, vision_model, text_system_prompt=None):
+            service = AgentExecutionService()
+            agent = MagicMock(agent_id=1, output_parser_id=None, text_system_prompt=text_system_prompt)
+            service.agent_execution_repo = MagicMock()
+            service.agent_execution_repo.get_ocr_agent_with_relationships.return_value = agent
+            with patch(f"{EXECUTION}.PDFExtractionService.get_pages", return_value=pages), \
+                 patch(f"{EXECUTION}.get_llm", side_effect=vision_model) as get_llm, \
+                 patch(f"{EXECUTION}.get_app_config", return_value={"IMAGES_PATH": str(tmp_path)}), \
+                 patch(f"{EXECUTION}.ConcurrentOCREngine") as engine:
+                engine.return_value.process_pdf.return_value = [{"page": 2, "extracted_text": "scan"}]
+                engine.return_value.failed_pages = []
+                result = service._process_pdf_with_ocr_sync(agent, "doc.pdf", MagicMock())
+            return result, get_llm, engine
+        return _run
+
+    def test_text_only_pdf_skips_vision_model(self, run_ocr):
+        result, get_llm, engine = run_ocr([PDFPage(1, LONG_TEXT, False)], lambda *a, **k: MagicMock())
+
+        assert result["method"] == "text_extraction"
+        get_llm.assert_not_called()
+        engine.assert_not_called()
+
+    def test_mixed_pdf_sends_scanned_pages_to_vision(self, run_ocr):
+        pages = [PDFPage(1, LONG_TEXT, False), PDFPage(2, "", True)]
+        result, _, engine = run_ocr(pages, lambda *a, **k: MagicMock())
+
+        assert result["method"] == "vision_only"
+        engine.return_value.process_pdf.assert_called_once()
+        assert engine.return_value.process_pdf.call_args.kwargs["pages"] == [2]
+
+    @pytest.mark.parametrize("vision_model", [
+        lambda *a, **k: None,
+        MagicMock(side_effect=ValueError("no vision service")),
+    ])
+    def test_mixed_pdf_without_vision_model_falls_back_to_text(self, run_ocr, vision_model):
+        pages = [PDFPage(1, LONG_TEXT, False), PDFPage(2, "", True)]
+        result, _, engine = run_ocr(pages, vision_model)
+
+        assert result["method"] == "text_extraction"
+        assert result["content"] == LONG_TEXT
+        engine.assert_not_called()
+
+    def test_failed_text_model_marks_fallback(self, run_ocr):
+        with patch(f"{EXECUTION}.format_data_with_text_llm", side_effect=RuntimeError("model error")):
+            result, _, _ = run_ocr([PDFPage(1, "", True)], lambda *a, **k: MagicMock(), text_system_prompt="extract")
+
+        assert result["method"] == "vision_only"
+        assert result["fallback"] is True
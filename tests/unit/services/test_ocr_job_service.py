@@ -0,0 +1,218 @@
+"""
+Unit tests for OCRJobService.
+
+Covers the agent configuration fingerprint, result shaping, job submission
+(cache hits, in-flight reuse and queuing) and the synchronous cache helpers.
+The repository is mocked so no database is required.
+"""
+
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import HTTPException, UploadFile
+
+from models.enums.ocr_job_status import OCRJobStatus
+from services import ocr_job_service as module
+from services.ocr_job_service import (
+    OCRJobService,
+    build_ocr_response,
+    compute_agent_fingerprint,
+    compute_file_sha256,
+    is_cacheable_result,
+)
+
+
+def make_agent(**overrides):
+    service = SimpleNamespace(
+        service_id=1, provider="OpenAI", description="gpt-4o",
+        endpoint=None, api_version=None, api_key="secret",
+    )
+    defaults = dict(
+        agent_id=7,
+        app_id=3,
+        temperature=0.2,
+        text_system_prompt="extract",
+        vision_system_prompt="read",
+        ai_service=service,
+        vision_service_rel=service,
+        output_parser=SimpleNamespace(parser_id=5, name="Invoice", fields=[{"name": "total"}]),
+    )
+    defaults.update(overrides)
+    return SimpleNamespace(**defaults)
+
+
+def make_upload(name="doc.pdf", data=b"%PDF-1.4 test"):
+    return UploadFile(filename=name, file=io.BytesIO(data))
+
+
+@pytest.fixture
+def jobs_dir(tmp_path):
+    with patch.object(OCRJobService, "_jobs_dir", return_value=str(tmp_path)):
+        yield tmp_path
+
+
+class TestFingerprint:
+    def test_is_stable(self):
+        assert compute_agent_fingerprint(make_agent()) == compute_agent_fingerprint(make_agent())
+
+    def test_changes_with_prompt(self):
+        assert compute_agent_fingerprint(make_agent()) != compute_agent_fingerprint(
+            make_agent(text_system_prompt="something else")
+        )
+
+    def test_changes_with_output_parser_fields(self):
+        other = make_agent(output_parser=SimpleNamespace(parser_id=5, name="Invoice", fields=[{"name": "vat"}]))
+        assert compute_agent_fingerprint(make_agent()) != compute_agent_fingerprint(other)
+
+    def test_ignores_api_key(self):
+        rotated = make_agent()
+        rotated.ai_service = SimpleNamespace(**{**vars(rotated.ai_service), "api_key": "rotated"})
+        assert compute_agent_fingerprint(make_agent()) == compute_agent_fingerprint(rotated)
+
+
+class TestBuildOcrResponse:
+    def test_structured_content_is_serialized(self):
+        response = build_ocr_response({
+            "content": {"total": 10},
+            "extracted_text": [{"page": 1}, {"page": 2}],
+            "confidence": 0.8,
+        })
+        assert json.loads(response["text"]) == {"total": 10}
+        assert response["pages"] == 2
+        assert response["confidence"] == 0.8
+
+    def test_plain_text_counts_as_one_page(self):
+        response = build_ocr_response({"content": "hello", "extracted_text": "hello", "confidence": 0.9})
+        assert response == {"text": "hello", "pages": 1, "confidence": 0.9}
+
+    def test_none(self):
+        assert build_ocr_response(None) is None
+
+
+class TestSubmitJob:
+    @pytest.mark.asyncio
+    async def test_rejects_non_pdf(self, jobs_dir):
+        with pytest.raises(HTTPException) as exc_info:
+            await OCRJobService.submit_job(make_agent(), make_upload("doc.txt"), MagicMock())
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_queues_new_job(self, jobs_dir):
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.find_cached.return_value = None
+            repo.find_active.return_value = None
+            repo.create.side_effect = lambda job, db: job
+
+            job, cached = await OCRJobService.submit_job(make_agent(), make_upload(), MagicMock())
+
+        assert cached is False
+        assert job.status == OCRJobStatus.QUEUED
+        assert job.pdf_sha256 == compute_file_sha256(job.pdf_path)
+        assert job.agent_fingerprint == compute_agent_fingerprint(make_agent())
+
+    @pytest.mark.asyncio
+    async def test_returns_cached_job_and_discards_upload(self, jobs_dir):
+        cached_job = MagicMock(job_id="cached")
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.find_cached.return_value = cached_job
+
+            job, cached = await OCRJobService.submit_job(make_agent(), make_upload(), MagicMock())
+
+        assert job is cached_job
+        assert cached is True
+        repo.create.assert_not_called()
+        assert list(jobs_dir.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_reuses_in_flight_job(self, jobs_dir):
+        running = MagicMock(job_id="running")
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.find_cached.return_value = None
+            repo.find_active.return_value = running
+
+            job, cached = await OCRJobService.submit_job(make_agent(), make_upload(), MagicMock())
+
+        assert job is running
+        assert cached is False
+        repo.create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rejects_pdf_over_app_limit(self, jobs_dir):
+        upload = make_upload(data=b"%PDF" + b"x" * (1024 * 1024))
+        with patch.object(module, "OCRJobRepository") as repo:
+            with pytest.raises(HTTPException) as exc_info:
+                await OCRJobService.submit_job(make_agent(), upload, MagicMock(), max_size_mb=1)
+
+        assert exc_info.value.status_code == 413
+        repo.create.assert_not_called()
+        assert list(jobs_dir.iterdir()) == []
+
+
+class TestProgress:
+    def test_progress_is_reported_against_document_pages(self):
+        with patch.object(module, "OCRJobRepository") as repo, patch("db.database.SessionLocal") as session_local:
+            callback = OCRJobService._progress_callback("job", total_pages=10)
+            callback(1, 3, 7, True)
+
+        repo.update_progress.assert_called_once_with("job", 8, None, session_local.return_value)
+
+
+class TestJobAccess:
+    def test_get_job_checks_agent(self):
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.get_by_id.return_value = MagicMock(agent_id=1)
+            with pytest.raises(HTTPException) as exc_info:
+                OCRJobService.get_job("job", agent_id=2, db=MagicMock())
+        assert exc_info.value.status_code == 404
+
+    def test_to_dict_only_exposes_result_when_completed(self):
+        job = MagicMock(
+            job_id="j", agent_id=1, status=OCRJobStatus.RUNNING, pdf_filename="a.pdf",
+            total_pages=4, processed_pages=2, created_at=None, started_at=None,
+            finished_at=None, result={"content": "x"}, error=None,
+        )
+        assert OCRJobService.to_dict(job)["result"] is None
+
+        job.status = OCRJobStatus.COMPLETED
+        data = OCRJobService.to_dict(job, cached=True)
+        assert data["status"] == "COMPLETED"
+        assert data["cached"] is True
+        assert data["result"]["text"] == "x"
+
+
+class TestSyncCache:
+    def test_cache_miss_returns_none(self):
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.find_cached.return_value = None
+            assert OCRJobService.get_cached_result(make_agent(), "sha", MagicMock()) is None
+
+    def test_cache_hit_returns_stored_result(self):
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.find_cached.return_value = MagicMock(job_id="j", result={"content": "cached"})
+            assert OCRJobService.get_cached_result(make_agent(), "sha", MagicMock()) == {"content": "cached"}
+
+    def test_record_result_stores_completed_job(self):
+        with patch.object(module, "OCRJobRepository") as repo:
+            repo.create.side_effect = lambda job, db: job
+            job = OCRJobService.record_result(make_agent(), "sha", {"content": "x"}, MagicMock(), pdf_filename="a.pdf")
+        assert job.status == OCRJobStatus.COMPLETED
+        assert job.pdf_sha256 == "sha"
+        assert job.result == {"content": "x"}
+
+    @pytest.mark.parametrize("result", [
+        {"content": "x", "failed_pages": [2]},
+        {"content": "  "},
+        {"content": []},
+        {"method": "text_extraction", "content": "x", "fallback": True},
+    ])
+    def test_incomplete_results_are_not_cached(self, result):
+        assert is_cacheable_result(result) is False
+        with patch.object(module, "OCRJobRepository") as repo:
+            assert OCRJobService.record_result(make_agent(), "sha", result, MagicMock()) is None
+        repo.create.assert_not_called()
+
+    def test_complete_result_is_cacheable(self):
+        assert is_cacheable_result({"content": {"total": 3}, "failed_pages": [], "fallback": False}) is True
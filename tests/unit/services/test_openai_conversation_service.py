@@ -0,0 +1,74 @@
+"""
+Unit tests for the message-prefix digests used to resume OpenAI-compatible
+conversations, and for claiming a conversation by its digest. The claim runs
+on in-memory SQLite.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.conversation import Conversation
+from repositories.conversation_repository import ConversationRepository
+from services.openai_conversation_service import chain_digest
+
+
+class TestChainDigest:
+    def test_extending_a_prefix_matches_digest_of_full_list(self):
+        messages = [("user", "Hello"), ("assistant", "Hi"), ("user", "Bye")]
+
+        assert chain_digest(messages[2:], chain_digest(messages[:2])) == chain_digest(messages)
+
+    def test_surrounding_whitespace_is_ignored(self):
+        assert chain_digest([("user", "Hello\n")]) == chain_digest([("user", "  Hello")])
+
+    def test_role_and_order_matter(self):
+        base = chain_digest([("user", "a"), ("assistant", "b")])
+
+        assert base != chain_digest([("assistant", "a"), ("assistant", "b")])
+        assert base != chain_digest([("assistant", "b"), ("user", "a")])
+
+    def test_content_parts_are_hashed_by_value(self):
+        parts = [{"type": "text", "text": "look"}, {"type": "image_url", "image_url": {"url": "data:x"}}]
+
+        assert chain_digest([("user", parts)]) == chain_digest([("user", [dict(p) for p in parts])])
+        assert chain_digest([("user", parts)]) != chain_digest([("user", parts[:1])])
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables["Conversation"]])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class TestClaimByPrefixHash:
+    def add(self, db, updated_at):
+        conversation = Conversation(
+            agent_id=9, session_id=f"conv_{updated_at:%d}", api_key_hash="key",
+            prefix_hash="digest", updated_at=updated_at,
+        )
+        db.add(conversation)
+        db.commit()
+        return conversation.conversation_id
+
+    def prefix_hashes(self, db):
+        return dict(db.query(Conversation.conversation_id, Conversation.prefix_hash).all())
+
+    def test_takes_a_single_row_when_several_match(self, db):
+        older = self.add(db, datetime(2026, 1, 1))
+        newer = self.add(db, datetime(2026, 1, 2))
+
+        assert ConversationRepository.claim_by_prefix_hash(db, 9, "key", "digest") == newer
+        assert self.prefix_hashes(db) == {older: "digest", newer: None}
+        assert ConversationRepository.claim_by_prefix_hash(db, 9, "key", "digest") == older
+        assert ConversationRepository.claim_by_prefix_hash(db, 9, "key", "digest") is None
+
+    def test_other_key_does_not_match(self, db):
+        self.add(db, datetime(2026, 1, 1))
+        assert ConversationRepository.claim_by_prefix_hash(db, 9, "other", "digest") is None
@@ -0,0 +1,94 @@
+"""
+Unit tests for the cached Pydantic models built from output parsers.
+
+The parser tree loader is patched, so these tests cover model synthesis,
+cache keys and invalidation, not the database queries.
+"""
+
+import copy
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from tools import outputParserTools as module
+from tools.outputParserTools import get_parser_model_by_id, invalidate_parser_models
+
+ADDRESS = ("Address", [{"name": "city", "type": "str", "description": "City"}])
+PERSON = ("Person", [
+    {"name": "name", "type": "str", "description": "Full name"},
+    {"name": "home", "type": "parser", "parser_id": 2, "description": "Home"},
+    {"name": "others", "type": "list", "list_item_type": "parser", "list_item_parser_id": 2,
+     "description": "Other addresses"},
+])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    invalidate_parser_models()
+    yield
+    invalidate_parser_models()
+
+
+@pytest.fixture
+def tree():
+    tree = {1: copy.deepcopy(PERSON), 2: copy.deepcopy(ADDRESS)}
+    with patch.object(module, "_load_parser_tree", side_effect=lambda parser_id: tree):
+        yield tree
+
+
+class TestReferencedParserIds:
+    def test_collects_parser_and_list_references(self):
+        assert module._referenced_parser_ids(PERSON[1]) == [2, 2]
+        assert module._referenced_parser_ids(None) == []
+
+
+class TestGetParserModelById:
+    def test_builds_nested_models(self, tree):
+        model = get_parser_model_by_id(1)
+
+        person = model(name="Ann", home={"city": "Bilbao"}, others=[{"city": "Vigo"}])
+        assert model.__name__ == "Person"
+        assert person.home.city == "Bilbao"
+        assert model.model_fields["others"].annotation == List[type(person.home)]
+
+    def test_does_not_mutate_parser_fields(self, tree):
+        get_parser_model_by_id(1)
+        assert tree[1] == PERSON
+
+    def test_warm_call_skips_synthesis(self, tree):
+        model = get_parser_model_by_id(1)
+        with patch.object(module, "create_model_from_json_schema") as mock_create:
+            assert get_parser_model_by_id(1) is model
+        mock_create.assert_not_called()
+
+    def test_warm_call_does_not_load_parsers(self, tree):
+        get_parser_model_by_id(1)
+        with patch.object(module, "_load_parser_tree") as mock_load:
+            get_parser_model_by_id(1)
+        mock_load.assert_not_called()
+
+    def test_nested_parser_edit_rebuilds_after_invalidation(self, tree):
+        model = get_parser_model_by_id(1)
+        tree[2][1].append({"name": "zip", "type": "str", "description": "Zip code"})
+        invalidate_parser_models()
+
+        rebuilt = get_parser_model_by_id(1)
+
+        assert rebuilt is not model
+        assert "zip" in rebuilt.model_fields["home"].annotation.model_fields
+
+    def test_invalidate_clears_cache(self, tree):
+        model = get_parser_model_by_id(1)
+        invalidate_parser_models()
+        assert get_parser_model_by_id(1) is not model
+
+    def test_circular_reference_raises(self, tree):
+        tree[2][1].append({"name": "owner", "type": "parser", "parser_id": 1, "description": "Owner"})
+        with pytest.raises(ValueError, match="circular"):
+            get_parser_model_by_id(1)
+
+    def test_missing_parser_raises(self, tree):
+        del tree[2]
+        with pytest.raises(ValueError, match="No se encontró el parser con ID 2"):
+            get_parser_model_by_id(1)
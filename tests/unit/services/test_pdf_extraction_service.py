@@ -0,0 +1,141 @@
+"""
+Unit tests for PDFExtractionService.
+
+pypdf's PdfReader is replaced with fake pages so tests control the text layer
+and embedded images of each page without real PDF fixtures.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from services import pdf_extraction_service as module
+from services.pdf_extraction_service import (
+    PDFExtractionService,
+    PageKind,
+    classify_page,
+)
+
+
+LONG_TEXT = "Invoice number 12345 issued to ACME Corporation for consulting services. "
+
+
+class FakePage(dict):
+    def __init__(self, text, has_image=False):
+        super().__init__()
+        self._text = text
+        if has_image:
+            self["/Resources"] = FakeObject({"/XObject": FakeObject({"/Im0": FakeObject({"/Subtype": "/Image"})})})
+
+    def extract_text(self):
+        return self._text
+
+
+class FakeObject(dict):
+    def get_object(self):
+        return self
+
+
+class FakeReader:
+    instances = 0
+
+    def __init__(self, pages):
+        FakeReader.instances += 1
+        self.pages = pages
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    PDFExtractionService.clear_cache()
+    FakeReader.instances = 0
+    yield
+    PDFExtractionService.clear_cache()
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 fake")
+    return str(path)
+
+
+def patch_reader(pages):
+    return patch.object(module, "PdfReader", side_effect=lambda path: FakeReader(pages))
+
+
+class TestClassifyPage:
+    def test_text_page(self):
+        assert classify_page(LONG_TEXT, has_images=True) == PageKind.TEXT
+
+    def test_image_without_text_is_scanned(self):
+        assert classify_page("", has_images=True) == PageKind.SCANNED
+
+    def test_empty_page_is_blank(self):
+        assert classify_page("  ", has_images=False) == PageKind.BLANK
+
+
+
+class TestPageHasImages:
+    def form(self, xobjects):
+        return FakeObject({"/Subtype": "/Form", "/Resources": FakeObject({"/XObject": FakeObject(xobjects)})})
+
+    def test_image_inside_form_xobject(self):
+        form = self.form({"/Im0": FakeObject({"/Subtype": "/Image"})})
+        page = FakePage("")
+        page["/Resources"] = FakeObject({"/XObject": FakeObject({"/Fm0": self.form({"/Fm1": form})})})
+        assert module._page_has_images(page) is True
+
+    def test_form_without_images(self):
+        page = FakePage("")
+        page["/Resources"] = FakeObject({"/XObject": FakeObject({"/Fm0": self.form({})})})
+        assert module._page_has_images(page) is False
+
+    def test_self_referencing_form_terminates(self):
+        form = self.form({})
+        form["/Resources"]["/XObject"]["/Fm0"] = form
+        page = FakePage("")
+        page["/Resources"] = FakeObject({"/XObject": FakeObject({"/Fm0": form})})
+        assert module._page_has_images(page) is False
+
+
+class TestExtraction:
+    def test_pages_are_parsed_once_and_cached(self, pdf_file):
+        with patch_reader([FakePage(LONG_TEXT), FakePage("page two")]):
+            first = PDFExtractionService.get_pages(pdf_file)
+            text = PDFExtractionService.extract_text(pdf_file)
+
+        assert [p.page_number for p in first] == [1, 2]
+        assert text == LONG_TEXT + "page two"
+        assert FakeReader.instances == 1
+
+    def test_pages_are_yielded_lazily(self, pdf_file):
+        with patch_reader([FakePage(LONG_TEXT), FakePage(LONG_TEXT)]):
+            iterator = PDFExtractionService.iter_pages(pdf_file)
+            assert next(iterator).page_number == 1
+
+    def test_partial_iteration_is_not_cached(self, pdf_file):
+        with patch_reader([FakePage(LONG_TEXT), FakePage(LONG_TEXT)]):
+            next(PDFExtractionService.iter_pages(pdf_file))
+            PDFExtractionService.get_pages(pdf_file)
+
+        assert FakeReader.instances == 2
+
+    def test_none_text_is_normalized(self, pdf_file):
+        with patch_reader([FakePage(None)]):
+            assert PDFExtractionService.extract_text(pdf_file) == ""
+
+    def test_split_mixed_document(self, pdf_file):
+        with patch_reader([FakePage(LONG_TEXT), FakePage("", has_image=True), FakePage("")]):
+            pages = PDFExtractionService.get_pages(pdf_file)
+
+        groups = PDFExtractionService.split_by_kind(pages)
+        assert [p.page_number for p in groups[PageKind.TEXT]] == [1]
+        assert [p.page_number for p in groups[PageKind.SCANNED]] == [2]
+        assert [p.page_number for p in groups[PageKind.BLANK]] == [3]
+        assert PDFExtractionService.has_text(pages) is True
+
+    def test_load_documents_matches_pypdf_loader_metadata(self, pdf_file):
+        with patch_reader([FakePage("one"), FakePage("two")]):
+            docs = PDFExtractionService.load_documents(pdf_file, {"resource_id": 9})
+
+        assert [d.page_content for d in docs] == ["one", "two"]
+        assert docs[1].metadata == {"resource_id": 9, "source": pdf_file, "page": 1, "total_pages": 2}
@@ -0,0 +1,103 @@
+"""
+Unit tests for provider prompt caching in tools.agentTools.
+
+The LangChain agent factory is replaced with a mock so the tests can inspect
+the system prompt, middleware and model settings create_agent passes to it.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_anthropic import ChatAnthropic
+from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware
+from langchain_core.messages import SystemMessage
+from langchain_openai import ChatOpenAI
+
+from tools import agentTools
+from tools.agentTools import build_system_prompt
+
+
+def make_agent(provider, endpoint=None):
+    agent = MagicMock()
+    agent.agent_id = 7
+    agent.system_prompt = "You are helpful."
+    agent.output_parser_id = None
+    agent.has_memory = False
+    agent.skill_associations = []
+    agent.tool_associations = []
+    agent.server_tools = []
+    agent.enable_code_interpreter = True
+    agent.ai_service.provider = provider
+    agent.ai_service.endpoint = endpoint
+    return agent
+
+
+async def run_create_agent(agent, llm, working_dir):
+    with patch.object(agentTools, "get_llm", return_value=llm), \
+         patch.object(agentTools, "get_langsmith_config", return_value=None), \
+         patch.object(agentTools, "get_agent_retriever_tool", return_value=None), \
+         patch.object(agentTools, "create_python_repl_tool", return_value=MagicMock()), \
+         patch.object(agentTools, "create_langchain_agent") as factory:
+        await agentTools.create_agent(agent, working_dir=working_dir, mcp_tools=[])
+    return factory.call_args.kwargs
+
+
+class TestBuildSystemPrompt:
+    def test_anthropic_gets_cache_breakpoint_on_static_block_only(self):
+        llm = ChatAnthropic(model="claude-test", api_key="k")
+
+        prompt = build_system_prompt(llm, "static", "dynamic")
+
+        assert isinstance(prompt, SystemMessage)
+        static, dynamic = prompt.content
+        assert static["text"] == "static" and static["cache_control"]["type"] == "ephemeral"
+        assert dynamic == {"type": "text", "text": "dynamic"}
+
+    def test_other_providers_get_static_prefix_string(self):
+        llm = ChatOpenAI(model="gpt-test", api_key="k")
+
+        assert build_system_prompt(llm, "static", "dynamic") == "staticdynamic"
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(agentTools, "PROMPT_CACHING_ENABLED", False)
+        llm = ChatAnthropic(model="claude-test", api_key="k")
+
+        assert build_system_prompt(llm, "static", "dynamic") == "staticdynamic"
+
+
+class TestCreateAgentPromptCaching:
+    @pytest.mark.asyncio
+    async def test_session_specific_workspace_block_comes_last(self, tmp_path):
+        llm = ChatOpenAI(model="gpt-test", api_key="k")
+
+        kwargs = await run_create_agent(make_agent("OpenAI"), llm, str(tmp_path))
+
+        prompt = kwargs["system_prompt"]
+        assert prompt.startswith("You are helpful.")
+        assert prompt.index("<code_interpreter>") < prompt.index("<workspace>")
+        assert prompt.rstrip().endswith("</workspace>")
+
+    @pytest.mark.asyncio
+    async def test_anthropic_agents_cache_conversation_prefix(self, tmp_path):
+        llm = ChatAnthropic(model="claude-test", api_key="k")
+
+        kwargs = await run_create_agent(make_agent("Anthropic"), llm, str(tmp_path))
+
+        assert any(isinstance(m, AnthropicPromptCachingMiddleware) for m in kwargs["middleware"])
+        assert str(tmp_path) not in kwargs["system_prompt"].content[0]["text"]
+
+    @pytest.mark.asyncio
+    async def test_openai_requests_share_agent_cache_key(self, tmp_path):
+        llm = ChatOpenAI(model="gpt-test", api_key="k")
+
+        await run_create_agent(make_agent("OpenAI"), llm, str(tmp_path))
+
+        assert llm.model_kwargs["prompt_cache_key"] == "aict-agent-7"
+
+    @pytest.mark.asyncio
+    async def test_openai_compatible_endpoints_get_no_cache_key(self, tmp_path):
+        llm = ChatOpenAI(model="gpt-test", api_key="k")
+
+        await run_create_agent(make_agent("OpenAI", endpoint="http://vllm:8000/v1"), llm, str(tmp_path))
+
+        assert "prompt_cache_key" not in llm.model_kwargs
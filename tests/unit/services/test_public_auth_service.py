@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 import pytest
 from fastapi import HTTPException, status
 
+from services.auth_cache_service import auth_cache
 from services.public_auth_service import PublicAuthService
 
 
@@ -49,8 +50,51 @@ class TestValidateApiKeyForApp:
         repo = mocker.MagicMock()
         repo.get_active_by_app_and_key.return_value = api_key_obj
         service = PublicAuthService(api_key_repository=repo)
+        write_behind = mocker.patch("services.public_auth_service.write_behind")
 
         result = service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="valid")
 
-        assert result is api_key_obj
-        repo.update_last_used_at.assert_called_once()
+        assert result.key_id == 99
+        assert result.app_id == 10
+        write_behind.touch_api_key.assert_called_once()
+        assert write_behind.touch_api_key.call_args.args[0] == 99
+        repo.update_last_used_at.assert_not_called()
+
+
+class TestApiKeyCaching:
+    def test_valid_key_is_served_from_cache(self, mocker):
+        mocker.patch("services.public_auth_service.write_behind")
+        repo = mocker.MagicMock()
+        repo.get_active_by_app_and_key.return_value = make_api_key_record(key_id=7)
+        service = PublicAuthService(api_key_repository=repo)
+
+        first = service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="valid")
+        second = service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="valid")
+
+        assert first == second
+        repo.get_active_by_app_and_key.assert_called_once()
+
+    def test_invalid_key_is_not_cached(self, mocker):
+        repo = mocker.MagicMock()
+        repo.get_active_by_app_and_key.return_value = None
+        service = PublicAuthService(api_key_repository=repo)
+
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="nope")
+
+        assert repo.get_active_by_app_and_key.call_count == 2
+
+    def test_invalidated_key_is_looked_up_again(self, mocker):
+        mocker.patch("services.public_auth_service.write_behind")
+        repo = mocker.MagicMock()
+        repo.get_active_by_app_and_key.return_value = make_api_key_record(key_id=7)
+        service = PublicAuthService(api_key_repository=repo)
+        service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="valid")
+
+        auth_cache.invalidate_api_key(7)
+        repo.get_active_by_app_and_key.return_value = None
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.validate_api_key_for_app(db=MagicMock(), app_id=10, api_key="valid")
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
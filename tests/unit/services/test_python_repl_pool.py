@@ -0,0 +1,141 @@
+"""
+Unit tests for the python_repl interpreter pool.
+
+Pool bookkeeping is tested with fake workers; a few tests start real worker
+interpreters to cover output capture, namespaces and timeouts.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from tools import python_repl_pool as module
+from tools.python_repl_pool import PythonReplPool, WorkerTimeout
+
+
+class FakeWorker:
+    def __init__(self, max_output_chars):
+        self.working_dir = None
+        self.runs = 0
+        self.last_used = 0.0
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.alive = False
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pool():
+    with patch.object(module, "PythonWorker", FakeWorker), \
+            patch.object(module, "PYTHON_REPL_POOL_SIZE", 1), \
+            patch.object(module, "time") as mock_time:
+        mock_time.monotonic.return_value = 100.0
+        yield PythonReplPool(max_output_chars=100)
+
+
+def use(pool, working_dir):
+    worker = pool.acquire(working_dir)
+    worker.working_dir = working_dir
+    worker.runs += 1
+    worker.last_used = 100.0
+    pool.release(worker)
+    return worker
+
+
+class TestPoolBookkeeping:
+    def test_spare_is_taken_and_replaced(self, fake_pool):
+        fake_pool.warm()
+        spare = fake_pool._spares[0]
+
+        assert fake_pool.acquire("/a") is spare
+        assert len(fake_pool._spares) == 1
+        assert fake_pool._spares[0] is not spare
+
+    def test_worker_is_reused_for_same_directory_only(self, fake_pool):
+        first = use(fake_pool, "/a")
+
+        assert use(fake_pool, "/a") is first
+        assert use(fake_pool, "/b") is not first
+
+    def test_worker_retired_after_max_runs(self, fake_pool):
+        with patch.object(module, "PYTHON_REPL_WORKER_MAX_RUNS", 2):
+            first = use(fake_pool, "/a")
+            use(fake_pool, "/a")
+
+        assert first.closed
+        assert "/a" not in fake_pool._idle
+
+    def test_dead_worker_is_not_pooled(self, fake_pool):
+        worker = fake_pool.acquire("/a")
+        worker.working_dir = "/a"
+        worker.alive = False
+        fake_pool.release(worker)
+        assert "/a" not in fake_pool._idle
+
+    def test_least_recently_used_directory_evicted(self, fake_pool):
+        with patch.object(module, "PYTHON_REPL_MAX_IDLE_WORKERS", 2):
+            oldest = use(fake_pool, "/a")
+            use(fake_pool, "/b")
+            use(fake_pool, "/c")
+
+        assert oldest.closed
+        assert list(fake_pool._idle) == ["/b", "/c"]
+
+    def test_idle_workers_expire(self, fake_pool):
+        worker = use(fake_pool, "/a")
+        module.time.monotonic.return_value = 100.0 + module.PYTHON_REPL_WORKER_IDLE_SECONDS
+
+        assert fake_pool.acquire("/a") is not worker
+        assert worker.closed
+
+    def test_shutdown_closes_all_workers(self, fake_pool):
+        fake_pool.warm()
+        bound = use(fake_pool, "/a")
+        spares = list(fake_pool._spares)
+
+        fake_pool.shutdown()
+
+        assert bound.closed and all(w.closed for w in spares)
+        assert fake_pool._spares == [] and not fake_pool._idle
+
+
+@pytest.fixture
+def pool():
+    with patch.object(module, "PYTHON_REPL_POOL_SIZE", 0):
+        pool = PythonReplPool(max_output_chars=500)
+        yield pool
+        pool.shutdown()
+
+
+class TestWorkerInterpreter:
+    def test_runs_scripts_in_working_dir_with_fresh_namespace(self, pool, tmp_path):
+        result = pool.run("import os\nx = 1\nprint(os.getcwd())", str(tmp_path), timeout=30)
+        assert result.stdout.strip() == str(tmp_path)
+        assert result.exit_code == 0
+
+        result = pool.run("print('x' in globals())", str(tmp_path), timeout=30)
+        assert result.stdout.strip() == "False"
+
+    def test_captures_stderr_exit_code_and_caps_output(self, pool, tmp_path):
+        result = pool.run("import sys\nprint('y' * 1000)\nsys.exit('boom')", str(tmp_path), timeout=30)
+        assert result.stdout == "y" * 500
+        assert result.stderr.strip() == "boom"
+        assert result.exit_code == 1
+
+    def test_timeout_kills_worker(self, pool, tmp_path):
+        pool.run("pass", str(tmp_path), timeout=30)
+        with pytest.raises(WorkerTimeout):
+            pool.run("import time\ntime.sleep(5)", str(tmp_path), timeout=0.2)
+        assert str(tmp_path) not in pool._idle
+
+    def test_local_modules_and_environment_reset_between_runs(self, pool, tmp_path):
+        (tmp_path / "helper.py").write_text("VALUE = 1\n")
+        script = "import os, helper\nprint(helper.VALUE, os.environ.get('REPL_TEST_VAR'))"
+        result = pool.run(script + "\nos.environ['REPL_TEST_VAR'] = 'set'", str(tmp_path), timeout=30)
+        assert result.stdout.strip() == "1 None"
+
+        (tmp_path / "helper.py").write_text("VALUE = 2  # edited\n")
+        result = pool.run(script, str(tmp_path), timeout=30)
+        assert result.stdout.strip() == "2 None"
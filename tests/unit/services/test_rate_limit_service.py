@@ -9,7 +9,12 @@ import time
 import pytest
 import threading
 
-from services.rate_limit_service import RateLimitService, RateLimitState
+from services.rate_limit_service import (
+    RateLimitService,
+    RateLimitState,
+    SharedRateLimitService,
+    create_rate_limit_service,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -124,13 +129,74 @@ class TestWindowReset:
         blocked = svc.check_and_consume(app_id=1, max_per_minute=3)
         assert blocked.remaining == 0
 
-        # Advance to minute 1
-        fake_time[0] = 61.0
+        # Advance past minute 1, so the exhausted window no longer overlaps
+        fake_time[0] = 121.0
 
         fresh_state = svc.check_and_consume(app_id=1, max_per_minute=3)
         assert fresh_state.remaining == 2  # 3 - 1
 
 
+# ---------------------------------------------------------------------------
+# Sliding window behaviour
+# ---------------------------------------------------------------------------
+
+
+class TestSlidingWindow:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        fake_time = [0.0]
+        monkeypatch.setattr("services.rate_limit_service.time.time", lambda: fake_time[0])
+        return fake_time
+
+    def test_previous_window_is_weighted_at_boundary(self, clock):
+        svc = fresh()
+        clock[0] = 59.0
+        for _ in range(4):
+            svc.check_and_consume(app_id=1, max_per_minute=4)
+
+        # One second into the next minute the previous burst still counts almost fully
+        clock[0] = 61.0
+        state = svc.check_and_consume(app_id=1, max_per_minute=4)
+        assert state.exceeded is True
+
+        # Halfway through, half of the previous window remains: 4 * 0.5 + 1 <= 4
+        clock[0] = 90.0
+        state = svc.check_and_consume(app_id=1, max_per_minute=4)
+        assert state.exceeded is False
+        assert state.remaining == 1
+
+    def test_no_double_burst_across_boundary(self, clock):
+        svc = fresh()
+        clock[0] = 59.5
+        admitted = sum(not svc.check_and_consume(1, 10).exceeded for _ in range(10))
+        clock[0] = 60.5
+        admitted += sum(not svc.check_and_consume(1, 10).exceeded for _ in range(10))
+
+        assert admitted == 10
+
+    def test_reset_epoch_points_at_next_admission_when_exceeded(self, clock):
+        svc = fresh()
+        clock[0] = 59.0
+        for _ in range(4):
+            svc.check_and_consume(app_id=1, max_per_minute=4)
+
+        clock[0] = 61.0
+        state = svc.check_and_consume(app_id=1, max_per_minute=4)
+
+        # 4 * (1 - f) + 1 <= 4  ->  f >= 0.25  ->  15s into minute 1
+        assert state.reset_epoch == 75
+
+    def test_usage_stats_include_previous_window(self, clock):
+        svc = fresh()
+        clock[0] = 30.0
+        for _ in range(8):
+            svc.check_and_consume(app_id=1, max_per_minute=10)
+
+        clock[0] = 90.0
+        stats = svc.get_app_usage_stats(app_id=1, max_per_minute=10)
+        assert stats["current_usage"] == 4
+
+
 # ---------------------------------------------------------------------------
 # get_app_state
 # ---------------------------------------------------------------------------
@@ -254,3 +320,86 @@ class TestCleanup:
 
         # Should not raise
         svc.check_and_consume(app_id=999, max_per_minute=100)
+
+
+# ---------------------------------------------------------------------------
+# Shared (multi-worker) backend
+# ---------------------------------------------------------------------------
+
+
+class FakeSharedStore:
+    """Stands in for the rate_limit_window table shared by several workers."""
+
+    def __init__(self):
+        self.counts = {}
+        self.reservations = 0
+
+    def attach(self, svc):
+        svc._fetch_previous = lambda app_id, window: self.counts.get((app_id, window - 1), 0)
+        svc._reserve = self.reserve
+        return svc
+
+    def reserve(self, app_id, window, requested, cap):
+        self.reservations += 1
+        shared = self.counts.get((app_id, window), 0)
+        granted = max(0, min(requested, cap - shared))
+        self.counts[(app_id, window)] = shared + granted
+        return granted, shared + granted
+
+
+class TestSharedBackend:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        fake_time = [10.0]
+        monkeypatch.setattr("services.rate_limit_service.time.time", lambda: fake_time[0])
+        return fake_time
+
+    def test_limit_holds_across_workers(self, clock):
+        store = FakeSharedStore()
+        workers = [store.attach(SharedRateLimitService(lease_size=5)) for _ in range(4)]
+
+        admitted = sum(
+            not workers[i % 4].check_and_consume(app_id=1, max_per_minute=60).exceeded
+            for i in range(240)
+        )
+
+        assert admitted == 60
+
+    def test_requests_are_admitted_from_local_lease(self, clock):
+        store = FakeSharedStore()
+        svc = store.attach(SharedRateLimitService(lease_size=10))
+
+        for _ in range(20):
+            svc.check_and_consume(app_id=1, max_per_minute=1000)
+
+        assert store.reservations == 2
+
+    def test_full_window_is_rejected_without_round_trip(self, clock):
+        store = FakeSharedStore()
+        svc = store.attach(SharedRateLimitService(lease_size=1))
+        for _ in range(3):
+            svc.check_and_consume(app_id=1, max_per_minute=3)
+        reservations = store.reservations
+
+        state = svc.check_and_consume(app_id=1, max_per_minute=3)
+
+        assert state.exceeded is True
+        assert state.remaining == 0
+        assert store.reservations == reservations
+
+    def test_falls_back_to_local_counters_on_database_error(self, clock):
+        svc = SharedRateLimitService()
+
+        def broken(*args):
+            raise RuntimeError("db down")
+
+        svc._fetch_previous = broken
+
+        state = svc.check_and_consume(app_id=1, max_per_minute=5)
+        assert state.exceeded is False
+        assert state.remaining == 4
+
+    def test_factory_selects_backend(self):
+        assert type(create_rate_limit_service("memory")) is RateLimitService
+        assert isinstance(create_rate_limit_service("postgres"), SharedRateLimitService)
+        assert type(create_rate_limit_service("bogus")) is RateLimitService
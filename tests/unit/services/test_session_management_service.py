@@ -0,0 +1,123 @@
+"""
+Unit tests for SessionManagementService.
+
+Each test swaps in a fresh InMemorySessionStore and LRU cache. Two service
+"workers" are simulated by clearing the local cache while keeping the store,
+which is what a shared PostgreSQL store looks like from a second process.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from cachetools import LRUCache
+
+from services.session_management_service import (
+    InMemorySessionStore,
+    SessionManagementService,
+    create_session_store,
+    DatabaseSessionStore,
+    SessionStore,
+)
+
+
+USER_CONTEXT = {"user_id": 7, "app_id": 1}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(SessionManagementService, "_store", InMemorySessionStore())
+    monkeypatch.setattr(SessionManagementService, "_cache", LRUCache(maxsize=2))
+    return SessionManagementService()
+
+
+def age(service, session_id, hours):
+    """Move a session's last access back in time, in the store and the cache."""
+    past = datetime.utcnow() - timedelta(hours=hours)
+    service._store._sessions[session_id][1] = past
+    cached = service._cache.get(session_id)
+    if cached:
+        cached.last_accessed = past
+
+
+class TestGetUserSession:
+    @pytest.mark.asyncio
+    async def test_creates_then_reuses_session(self, service):
+        first = await service.get_user_session(3, USER_CONTEXT)
+        second = await service.get_user_session(3, USER_CONTEXT)
+
+        assert first.id == "oauth_3_7"
+        assert second is first
+
+    @pytest.mark.asyncio
+    async def test_other_worker_sees_same_session(self, service):
+        first = await service.get_user_session(3, USER_CONTEXT, conversation_id="abc")
+        service._cache.clear()
+
+        second = await service.get_user_session(3, USER_CONTEXT, conversation_id="abc")
+
+        assert second.id == first.id
+        assert second.created_at == first.created_at
+
+    @pytest.mark.asyncio
+    async def test_expired_session_is_removed(self, service):
+        session = await service.get_user_session(3, USER_CONTEXT)
+        age(service, session.id, hours=25)
+
+        assert await service.get_user_session(3, USER_CONTEXT) is None
+        assert service._store.get(session.id) is None
+
+    @pytest.mark.asyncio
+    async def test_activity_on_another_worker_keeps_session_alive(self, service):
+        session = await service.get_user_session(3, USER_CONTEXT)
+        session.last_accessed = datetime.utcnow() - timedelta(hours=25)  # stale local view
+
+        again = await service.get_user_session(3, USER_CONTEXT)
+
+        assert again is not None
+        assert again.id == session.id
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, service):
+        for agent_id in range(5):
+            await service.get_user_session(agent_id, USER_CONTEXT)
+
+        assert len(service._cache) == 2
+        assert service.get_session_stats()["total_sessions"] == 5
+
+
+class TestResetAndCleanup:
+    @pytest.mark.asyncio
+    async def test_reset_removes_from_store_and_cache(self, service):
+        session = await service.get_user_session(3, USER_CONTEXT)
+
+        assert await service.reset_user_session(3, USER_CONTEXT) is True
+        assert session.id not in service._cache
+        assert await service.reset_user_session(3, USER_CONTEXT) is False
+
+    @pytest.mark.asyncio
+    async def test_cleanup_expired_sessions(self, service):
+        old = await service.get_user_session(1, USER_CONTEXT)
+        await service.get_user_session(2, USER_CONTEXT)
+        age(service, old.id, hours=30)
+
+        assert service.cleanup_expired_sessions() == 1
+
+        stats = service.get_session_stats()
+        assert stats["total_sessions"] == 1
+        assert stats["expired_sessions"] == 0
+        assert old.id not in service._cache
+
+
+class TestStoreFactory:
+    def test_backend_selection(self):
+        assert isinstance(create_session_store("memory"), InMemorySessionStore)
+        assert isinstance(create_session_store("postgres"), DatabaseSessionStore)
+        assert isinstance(create_session_store("unknown"), InMemorySessionStore)
+
+    def test_incomplete_store_cannot_be_instantiated(self):
+        class PartialStore(SessionStore):
+            def get(self, session_id):
+                return None
+
+        with pytest.raises(TypeError):
+            PartialStore()
@@ -235,3 +235,20 @@ def test_silo_search_schema_rejects_score_threshold_with_wrong_type():
 
     assert "score_threshold" in str(exc_info.value)
 
+
+
+def test_silo_search_schema_accepts_hybrid_with_fetch_k():
+    """SiloSearchSchema allows fetch_k to size the hybrid candidate pools."""
+    schema = SiloSearchSchema(query="E-1234", search_type="hybrid", fetch_k=40)
+
+    assert schema.search_type == "hybrid"
+
+
+def test_silo_search_schema_rejects_lambda_mult_with_hybrid():
+    """lambda_mult stays MMR-only."""
+    import pytest
+
+    with pytest.raises(ValidationError) as exc_info:
+        SiloSearchSchema(query="test", search_type="hybrid", lambda_mult=0.5)
+
+    assert "lambda_mult" in str(exc_info.value)
@@ -0,0 +1,196 @@
+"""
+Unit tests for IACTTool, the agent-as-a-tool wrapper in tools.agentTools.
+
+LLM creation and LangChain agent compilation are mocked; the tests check that
+sub-agents are built lazily, cached across tool instances and run async, and
+that cached tools keep working once their ORM agents are detached.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+from langchain.messages import AIMessage
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base
+from models.agent import Agent
+from models.ai_service import AIService
+from tools import agentTools
+from tools.agentTools import IACTTool
+
+
+def make_tool_agent(agent_id=10, name="Helper Agent", system_prompt="Be helpful", children=()):
+    agent = MagicMock(spec=Agent)
+    agent.agent_id = agent_id
+    agent.name = name
+    agent.description = "Helps"
+    agent.system_prompt = system_prompt
+    agent.prompt_template = None
+    agent.temperature = 0.2
+    agent.silo_id = None
+    agent.skill_associations = []
+    agent.ai_service = MagicMock(
+        service_id=1, provider="OpenAI", description="gpt", endpoint=None, api_key="k", api_version=None
+    )
+    agent.tool_associations = [MagicMock(tool=child) for child in children]
+    return agent
+
+
+def make_compiled(reply="done", delay=0.0):
+    compiled = MagicMock()
+
+    async def ainvoke(payload):
+        await asyncio.sleep(delay)
+        return {"messages": [AIMessage(content=reply)]}
+
+    compiled.ainvoke = AsyncMock(side_effect=ainvoke)
+    compiled.invoke.return_value = {"messages": [AIMessage(content=reply)]}
+    return compiled
+
+
+@pytest.fixture(autouse=True)
+def clear_sub_agent_cache():
+    agentTools._sub_agent_cache.clear()
+    yield
+    agentTools._sub_agent_cache.clear()
+
+
+@pytest.fixture
+def compile_agent():
+    with (
+        patch("tools.agentTools.get_llm", return_value=MagicMock()),
+        patch("tools.agentTools.create_langchain_agent", side_effect=lambda **_: make_compiled()) as mock_create,
+    ):
+        yield mock_create
+
+
+class TestLazyConstruction:
+    def test_constructing_tool_does_not_build_agent(self, compile_agent):
+        IACTTool(make_tool_agent(children=[make_tool_agent(agent_id=11, name="Nested")]))
+
+        compile_agent.assert_not_called()
+
+    def test_missing_ai_service_still_rejected_upfront(self, compile_agent):
+        agent = make_tool_agent()
+        agent.ai_service = None
+
+        with pytest.raises(ValueError):
+            IACTTool(agent)
+
+    @pytest.mark.asyncio
+    async def test_first_call_builds_agent_and_nested_tools(self, compile_agent):
+        tool = IACTTool(make_tool_agent(children=[make_tool_agent(agent_id=11, name="Nested")]))
+
+        result = await tool.ainvoke({"query": "hi"})
+
+        assert result == "done"
+        assert compile_agent.call_count == 2
+
+
+class TestSharedCache:
+    @pytest.mark.asyncio
+    async def test_compiled_agent_reused_across_tool_instances(self, compile_agent):
+        await IACTTool(make_tool_agent()).ainvoke({"query": "one"})
+        await IACTTool(make_tool_agent()).ainvoke({"query": "two"})
+
+        assert compile_agent.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_configuration_rebuilds(self, compile_agent):
+        await IACTTool(make_tool_agent()).ainvoke({"query": "one"})
+        await IACTTool(make_tool_agent(system_prompt="Be terse")).ainvoke({"query": "two"})
+
+        assert compile_agent.call_count == 2
+
+    def test_nested_change_alters_parent_fingerprint(self):
+        before = agentTools.sub_agent_fingerprint(make_tool_agent(children=[make_tool_agent(agent_id=11)]))
+        after = agentTools.sub_agent_fingerprint(
+            make_tool_agent(children=[make_tool_agent(agent_id=11, system_prompt="changed")])
+        )
+
+        assert before != after
+
+    def test_silo_and_embedding_changes_alter_fingerprint(self):
+        def with_silo(vector_db_type="PGVECTOR", endpoint=None):
+            agent = make_tool_agent()
+            agent.silo_id = 5
+            agent.silo = MagicMock(
+                silo_id=5, silo_type="CUSTOM", description="Docs", vector_db_type=vector_db_type,
+                embedding_service=MagicMock(
+                    service_id=2, provider="OpenAI", description="text-embedding-3-small",
+                    endpoint=endpoint, api_key="k", api_version=None,
+                ),
+            )
+            agent.silo.embedding_service.name = "Embeddings"
+            return agentTools.sub_agent_fingerprint(agent)
+
+        assert with_silo() == with_silo()
+        assert with_silo() != with_silo(vector_db_type="QDRANT")
+        assert with_silo() != with_silo(endpoint="https://embeddings.example.com")
+
+
+class TestAsyncExecution:
+    @pytest.mark.asyncio
+    async def test_arun_uses_async_invoke(self):
+        compiled = make_compiled()
+        tool = IACTTool(make_tool_agent())
+        tool.react_agent = compiled
+
+        await tool.ainvoke({"query": "hi"})
+
+        compiled.ainvoke.assert_awaited_once()
+        compiled.invoke.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_independent_calls_run_concurrently(self):
+        tools = [IACTTool(make_tool_agent(agent_id=20 + i, name=f"Agent {i}")) for i in range(3)]
+        for tool in tools:
+            tool.react_agent = make_compiled(delay=0.1)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(tool.ainvoke({"query": "hi"}) for tool in tools))
+
+        assert results == ["done"] * 3
+        assert loop.time() - started < 0.25
+
+    @pytest.mark.asyncio
+    async def test_errors_returned_as_tool_output(self, compile_agent):
+        compile_agent.side_effect = RuntimeError("boom")
+
+        result = await IACTTool(make_tool_agent()).ainvoke({"query": "hi"})
+
+        assert "boom" in result
+
+
+class TestDetachedAgents:
+    @pytest.fixture
+    def session(self):
+        engine = create_engine("sqlite://")
+        tables = ("AIService", "Agent", "agent_tools", "agent_silos", "agent_skills")
+        Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in tables])
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.mark.asyncio
+    async def test_cached_tool_survives_closed_session(self, session, compile_agent):
+        service = AIService(name="gpt", provider="OpenAI")
+        session.add(service)
+        session.flush()
+        agent = Agent(name="Helper Agent", description="Helps", prompt_template="Q: {question}",
+                      service_id=service.service_id)
+        session.add(agent)
+        session.commit()
+
+        tool = IACTTool(agent)
+        tool.get_react_agent()
+        # The request that built the tool commits and closes its session
+        session.commit()
+        session.close()
+
+        assert tool._format_prompt("hi") == "Q: hi"
+        assert await tool.ainvoke({"query": "hi"}) == "done"
+        assert tool.agent is None
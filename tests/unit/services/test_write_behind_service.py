@@ -0,0 +1,158 @@
+"""
+Unit tests for the write-behind aggregator.
+
+The database session is a MagicMock, so these tests cover coalescing,
+read-through of pending counters, retry behaviour and per-row isolation
+rather than the PostgreSQL statements themselves.
+"""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from models.token_usage import TokenUsage
+from services import write_behind_service as module
+from services.write_behind_service import WriteBehindAggregator
+
+
+PERIOD = date(2026, 10, 1)
+
+
+@pytest.fixture
+def aggregator():
+    return WriteBehindAggregator()
+
+
+class TestRecording:
+    def test_agent_requests_are_coalesced(self, aggregator):
+        for _ in range(3):
+            aggregator.increment_agent_requests(7)
+
+        assert aggregator.pending_agent_requests(7) == 3
+        assert aggregator.pending_agent_requests(8) == 0
+
+    def test_llm_calls_are_tracked_per_period(self, aggregator):
+        aggregator.increment_llm_calls(1, PERIOD)
+        aggregator.increment_llm_calls(1, PERIOD, n=2)
+
+        assert aggregator.pending_llm_calls(1, PERIOD) == 3
+        assert aggregator.pending_llm_calls(1, date(2026, 9, 1)) == 0
+
+    def test_api_key_keeps_latest_timestamp(self, aggregator):
+        later = datetime(2026, 10, 18, 12, 0)
+        aggregator.touch_api_key(5, later)
+        aggregator.touch_api_key(5, datetime(2026, 10, 18, 11, 0))
+
+        assert aggregator._pending.api_key_last_used[5] == later
+
+    def test_conversation_keeps_last_message(self, aggregator):
+        aggregator.increment_conversation(3, 2, last_message="first")
+        aggregator.increment_conversation(3, 2, last_message="second")
+        aggregator.increment_conversation(3, 1)
+
+        delta = aggregator._pending.conversations[3]
+        assert delta.message_count == 5
+        assert delta.last_message == "second"
+
+
+    def test_token_usage_is_summed_per_app_agent_and_day(self, aggregator):
+        aggregator.add_token_usage(1, 7, PERIOD, 100, 20)
+        aggregator.add_token_usage(1, 7, PERIOD, 50, 5, llm_calls=2)
+        aggregator.add_token_usage(1, 8, PERIOD, 1, 1)
+
+        delta = aggregator._pending.token_usage[(1, 7, PERIOD)]
+        assert (delta.input_tokens, delta.output_tokens, delta.llm_calls) == (150, 25, 3)
+        assert len(aggregator._pending.token_usage) == 2
+
+
+class TestFlush:
+    def test_empty_flush_does_not_touch_database(self, aggregator):
+        db = MagicMock()
+
+        assert aggregator.flush(db) == 0
+        db.execute.assert_not_called()
+        db.commit.assert_not_called()
+
+    def test_flush_writes_one_statement_per_row_and_commits(self, aggregator):
+        db = MagicMock()
+        aggregator.increment_agent_requests(7)
+        aggregator.increment_agent_requests(7)
+        aggregator.increment_llm_calls(1, PERIOD)
+        aggregator.touch_api_key(5)
+        aggregator.increment_conversation(3, 2, last_message="hi")
+        aggregator.add_token_usage(1, 7, PERIOD, 100, 20)
+
+        assert aggregator.flush(db) == 5
+        assert db.execute.call_count == 5
+        db.commit.assert_called_once()
+        db.close.assert_not_called()
+        assert aggregator.pending_agent_requests(7) == 0
+
+    def test_failed_flush_restores_pending_counts(self, aggregator):
+        db = MagicMock()
+        db.commit.side_effect = RuntimeError("db down")
+        aggregator.increment_agent_requests(7, n=2)
+        aggregator.increment_llm_calls(1, PERIOD)
+        aggregator.add_token_usage(1, 7, PERIOD, 100, 20)
+
+        assert aggregator.flush(db) == 0
+        db.rollback.assert_called_once()
+        assert aggregator._pending.token_usage[(1, 7, PERIOD)].input_tokens == 100
+
+        aggregator.increment_agent_requests(7)
+        assert aggregator.pending_agent_requests(7) == 3
+        assert aggregator.pending_llm_calls(1, PERIOD) == 1
+
+    def test_rejected_row_is_dropped_and_others_committed(self, aggregator):
+        db = MagicMock()
+        deleted_user = IntegrityError("INSERT INTO usage_records", {}, Exception("violates foreign key"))
+        db.execute.side_effect = [None, deleted_user]
+        aggregator.increment_agent_requests(7)
+        aggregator.increment_llm_calls(99, PERIOD)
+
+        assert aggregator.flush(db) == 1
+        assert db.begin_nested.call_count == 2
+        db.commit.assert_called_once()
+        db.rollback.assert_not_called()
+        assert aggregator.pending_llm_calls(99, PERIOD) == 0
+
+        # The next flush is not blocked by the dropped row
+        db.execute.side_effect = None
+        aggregator.increment_agent_requests(7)
+        assert aggregator.flush(db) == 1
+
+    def test_batch_discarded_after_max_attempts(self, aggregator):
+        db = MagicMock()
+        db.commit.side_effect = RuntimeError("db down")
+        aggregator.increment_agent_requests(7)
+
+        with patch.object(module, "WRITE_BEHIND_MAX_ATTEMPTS", 3):
+            for _ in range(2):
+                aggregator.flush(db)
+            assert aggregator.pending_agent_requests(7) == 1
+
+            aggregator.flush(db)
+
+        assert aggregator.pending_agent_requests(7) == 0
+        assert aggregator._failed_attempts == 0
+
+
+class TestDeletedOwners:
+    def test_token_usage_has_no_foreign_keys(self):
+        assert not TokenUsage.__table__.foreign_keys
+
+    def test_token_usage_of_deleted_agent_does_not_block_flush(self, aggregator):
+        # Agent 7 was deleted after its usage was buffered
+        db = MagicMock()
+        aggregator.increment_agent_requests(7)
+        aggregator.add_token_usage(1, 7, PERIOD, 100, 20)
+        aggregator.touch_api_key(5)
+
+        assert aggregator.flush(db) == 3
+        db.commit.assert_called_once()
+        assert aggregator._pending.is_empty()
+
+        aggregator.touch_api_key(5)
+        assert aggregator.flush(db) == 1
@@ -0,0 +1,74 @@
+"""Tests for the Prometheus helpers in utils.metrics."""
+import pytest
+from unittest.mock import MagicMock
+
+from prometheus_client import CollectorRegistry, Histogram
+
+from utils.metrics import LLM_CALLS, LLMCallCounter, PoolStatsCollector, observe_seconds
+
+
+def sample(registry, name, labels=None):
+    return registry.get_sample_value(name, labels or {})
+
+
+class TestObserveSeconds:
+    def test_observes_once_per_block(self):
+        registry = CollectorRegistry()
+        histogram = Histogram('t_phase_seconds', 'test', ['phase'], registry=registry)
+
+        with observe_seconds(histogram, phase='files'):
+            pass
+
+        assert sample(registry, 't_phase_seconds_count', {'phase': 'files'}) == 1
+
+    def test_observes_when_block_raises(self):
+        registry = CollectorRegistry()
+        histogram = Histogram('t_plain_seconds', 'test', registry=registry)
+
+        with pytest.raises(RuntimeError):
+            with observe_seconds(histogram):
+                raise RuntimeError("boom")
+
+        assert sample(registry, 't_plain_seconds_count') == 1
+
+
+class TestLLMCallCounter:
+    def test_counts_chat_and_completion_starts(self):
+        counter = LLMCallCounter('TestProvider')
+        before = LLM_CALLS.labels(provider='TestProvider')._value.get()
+
+        counter.on_chat_model_start({}, [[]])
+        counter.on_llm_start({}, ["prompt"])
+
+        assert LLM_CALLS.labels(provider='TestProvider')._value.get() == before + 2
+
+
+class TestPoolStatsCollector:
+    def make_engine(self, checked_out=2, idle=3, overflow=-1):
+        engine = MagicMock()
+        engine.pool.checkedout.return_value = checked_out
+        engine.pool.checkedin.return_value = idle
+        engine.pool.overflow.return_value = overflow
+        return engine
+
+    def test_reports_sqlalchemy_pools(self):
+        registry = CollectorRegistry()
+        registry.register(PoolStatsCollector({'sync': self.make_engine()}, lambda: None))
+
+        labels = {'pool': 'sync', 'state': 'checked_out'}
+        assert sample(registry, 'aict_db_pool_connections', labels) == 2
+        assert sample(registry, 'aict_db_pool_connections', {'pool': 'sync', 'state': 'idle'}) == 3
+        assert sample(registry, 'aict_db_pool_connections', {'pool': 'sync', 'state': 'overflow'}) == 0
+
+    def test_reports_checkpointer_pool_stats(self):
+        pool = MagicMock()
+        pool.get_stats.return_value = {
+            'pool_size': 5, 'pool_available': 1, 'requests_waiting': 2,
+            'requests_num': 40, 'requests_wait_ms': 1500,
+        }
+        registry = CollectorRegistry()
+        registry.register(PoolStatsCollector({}, lambda: pool))
+
+        assert sample(registry, 'aict_checkpointer_pool_connections', {'state': 'waiting'}) == 2
+        assert sample(registry, 'aict_checkpointer_pool_requests_total') == 40
+        assert sample(registry, 'aict_checkpointer_pool_wait_seconds_total') == 1.5
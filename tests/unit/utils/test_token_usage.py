@@ -0,0 +1,125 @@
+"""Tests for per-turn token accounting in utils.token_usage."""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from utils.token_usage import (
+    TokenUsageCallback,
+    TurnUsage,
+    extract_cache_usage,
+    extract_token_usage,
+    record_token_usage,
+    track_token_usage,
+)
+
+
+def fake_model(input_tokens=10, output_tokens=4, replies=1):
+    messages = iter([
+        AIMessage(
+            content="ok",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        for _ in range(replies)
+    ])
+    return GenericFakeChatModel(messages=messages, callbacks=[TokenUsageCallback('Test')])
+
+
+class TestExtractTokenUsage:
+    def test_reads_usage_metadata(self):
+        message = AIMessage(content="hi", usage_metadata={"input_tokens": 7, "output_tokens": 2, "total_tokens": 9})
+        result = LLMResult(generations=[[ChatGeneration(message=message)]])
+
+        assert extract_token_usage(result) == (7, 2)
+
+    def test_falls_back_to_llm_output(self):
+        result = LLMResult(
+            generations=[[ChatGeneration(message=AIMessage(content="hi"))]],
+            llm_output={"token_usage": {"prompt_tokens": 5, "completion_tokens": 1}},
+        )
+
+        assert extract_token_usage(result) == (5, 1)
+
+    def test_none_when_not_reported(self):
+        assert extract_token_usage(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="hi"))]])) is None
+
+
+class TestExtractCacheUsage:
+    def test_reads_input_token_details(self):
+        message = AIMessage(content="hi", usage_metadata={
+            "input_tokens": 1200, "output_tokens": 5, "total_tokens": 1205,
+            "input_token_details": {"cache_read": 1024, "cache_creation": 100},
+        })
+        result = LLMResult(generations=[[ChatGeneration(message=message)]])
+
+        assert extract_cache_usage(result) == (1024, 100)
+
+    def test_zero_without_cache_details(self):
+        message = AIMessage(content="hi", usage_metadata={"input_tokens": 7, "output_tokens": 2, "total_tokens": 9})
+
+        assert extract_cache_usage(LLMResult(generations=[[ChatGeneration(message=message)]])) == (0, 0)
+
+    def test_cache_reads_are_added_to_turn_usage(self):
+        message = AIMessage(content="ok", usage_metadata={
+            "input_tokens": 2000, "output_tokens": 10, "total_tokens": 2010,
+            "input_token_details": {"cache_read": 1500},
+        })
+        model = GenericFakeChatModel(messages=iter([message]), callbacks=[TokenUsageCallback('Test')])
+
+        with track_token_usage() as usage:
+            model.invoke("a")
+
+        assert usage.as_dict()["prompt_tokens_details"] == {"cached_tokens": 1500, "cache_creation_tokens": 0}
+
+
+class TestTrackTokenUsage:
+    def test_model_calls_inside_block_are_summed(self):
+        model = fake_model(replies=2)
+
+        with track_token_usage() as usage:
+            model.invoke("a")
+            model.invoke("b")
+
+        assert usage.as_dict() == {
+            "prompt_tokens": 20,
+            "completion_tokens": 8,
+            "total_tokens": 28,
+            "prompt_tokens_details": {"cached_tokens": 0, "cache_creation_tokens": 0},
+            "llm_calls": 2,
+        }
+
+    def test_calls_outside_block_are_not_attributed(self):
+        usage = TurnUsage()
+        with track_token_usage(usage):
+            pass
+
+        fake_model().invoke("a")
+        record_token_usage(5, 5)
+
+        assert usage.llm_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_async_calls_are_tracked(self):
+        with track_token_usage() as usage:
+            await fake_model().ainvoke("a")
+
+        assert (usage.input_tokens, usage.output_tokens) == (10, 4)
+
+    def test_worker_threads_see_usage_through_copied_context(self):
+        model = fake_model(replies=3)
+
+        with track_token_usage() as usage:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, model.invoke, "x") for _ in range(3)]
+                for future in futures:
+                    future.result()
+
+        assert usage.llm_calls == 3
+        assert usage.input_tokens == 30